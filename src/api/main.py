@@ -3,8 +3,12 @@ FastAPI Main Application
 
 REST API for horse racing prediction system.
 Goal: Achieve 200% return rate.
+
+Startup imports no ML libraries; the prediction models load in the
+background after the DB pool is up (API_MODEL_WARMUP).
 """
 
+import asyncio
 import logging
 import os
 from contextlib import asynccontextmanager
@@ -13,9 +17,11 @@ from dotenv import load_dotenv
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
+from src.config import API_MODEL_WARMUP, ODDS_WATCHER_ENABLED
 from src.db.async_connection import close_db_pool, get_connection, init_db_pool
 from src.db.code_master import initialize_code_cache
 from src.logging_config import setup_logging
+from src.services.odds_watcher import start_odds_watcher, stop_odds_watcher
 
 # Load .env file
 load_dotenv()
@@ -75,14 +81,28 @@ async def lifespan(app: FastAPI):
             await initialize_code_cache(conn)
         logger.info("Code master cache initialized")
 
+        if ODDS_WATCHER_ENABLED:
+            start_odds_watcher()
+
     except Exception as e:
         logger.error(f"Failed to initialize application: {e}")
         raise
 
+    # Model loading runs in the background so /health answers immediately
+    warmup_task = None
+    if API_MODEL_WARMUP:
+        from src.services.prediction_service import warm_startup_models
+
+        warmup_task = asyncio.create_task(warm_startup_models())
+
     yield
 
     # Shutdown
     logger.info("Shutting down FastAPI application...")
+    if warmup_task is not None and not warmup_task.done():
+        warmup_task.cancel()
+    if ODDS_WATCHER_ENABLED:
+        stop_odds_watcher()
     try:
         await close_db_pool()
         logger.info("Database pool closed")
@@ -109,9 +129,10 @@ app.add_middleware(
 
 
 # Register routers
-from src.api.routes import debug, health, horses, jockeys, odds, predictions, races
+from src.api.routes import debug, health, horses, jockeys, metrics, odds, predictions, races
 
 app.include_router(health.router, tags=["health"])
+app.include_router(metrics.router, tags=["metrics"])
 app.include_router(debug.router, prefix="/api", tags=["debug"])
 
 # /api/v1 prefix (for versioning)
@@ -0,0 +1,29 @@
+"""
+Metrics endpoint.
+"""
+
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+
+from src.metrics import render_prometheus
+
+router = APIRouter()
+
+# Prometheus text exposition format
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+@router.get(
+    "/metrics",
+    response_class=PlainTextResponse,
+    summary="パイプライン計測メトリクス",
+    description="予想パイプライン各ステージの処理時間ヒストグラム（Prometheus形式）",
+)
+async def metrics() -> PlainTextResponse:
+    """
+    Pipeline timing metrics.
+
+    Returns:
+        PlainTextResponse: Histograms in Prometheus text format.
+    """
+    return PlainTextResponse(render_prometheus(), media_type=PROMETHEUS_CONTENT_TYPE)
@@ -5,18 +5,27 @@ Odds information endpoints.
 import logging
 from datetime import datetime
 
-from fastapi import APIRouter, Path, Query, status
+from fastapi import APIRouter, Header, Path, Query, Response, status
+from fastapi.responses import StreamingResponse
 
-from src.api.exceptions import DatabaseErrorException, RaceNotFoundException
+from src.api.exceptions import (
+    DatabaseErrorException,
+    InvalidRequestException,
+    RaceNotFoundException,
+)
 from src.api.schemas.odds import CombinationOdds, OddsResponse, SingleOdds
 from src.db.async_connection import get_connection
 from src.db.queries.odds_queries import (
+    EXOTIC_ODDS_COLUMNS,
+    PACKED_ODDS_BASE,
     get_odds_exacta,
     get_odds_quinella,
     get_odds_trifecta,
     get_odds_trio,
+    get_odds_version,
     get_odds_wide,
     get_odds_win_place,
+    iter_exotic_odds_packed,
 )
 from src.db.queries.race_queries import check_race_exists
 
@@ -24,6 +33,28 @@ logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
+VALID_TICKET_TYPES = ("win", "place", "quinella", "exacta", "wide", "trio", "trifecta")
+
+
+def _make_etag(ticket_type: str, version: str, since: str | None = None) -> str:
+    """
+    Build a strong ETag from ticket type and odds version.
+
+    A delta response is a different representation from the full snapshot of
+    the same version, so its base version is part of the tag.
+    """
+    if since:
+        return f'"{ticket_type}-{version}-since-{since}"'
+    return f'"{ticket_type}-{version}"'
+
+
+def _etag_matches(if_none_match: str | None, etag: str) -> bool:
+    """Check an If-None-Match header value against the current ETag."""
+    if not if_none_match:
+        return False
+    candidates = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+    return "*" in candidates or etag in candidates
+
 
 @router.get(
     "/odds/{race_id}",
@@ -33,26 +64,49 @@ router = APIRouter()
     description="レースのオッズ情報を取得します。券種を指定可能。",
 )
 async def get_odds(
+    response: Response,
     race_id: str = Path(..., min_length=16, max_length=16, description="レースID（16桁）"),
     ticket_type: str = Query(
         "win", description="券種（win/place/quinella/exacta/wide/trio/trifecta）"
     ),
-) -> OddsResponse:
+    since: str | None = Query(
+        None,
+        pattern=r"^[0-9]+$",
+        description="差分取得の基準バージョン（前回レスポンスの version）",
+    ),
+    if_none_match: str | None = Header(None),
+) -> OddsResponse | Response:
     """
     Get odds information.
 
+    Odds only change when JRA-VAN publishes a new announcement, so the response
+    carries an ETag derived from the latest update timestamp of the ticket type.
+    A matching If-None-Match returns 304 without fetching any odds rows, and
+    ``since`` returns only the combinations updated after that version.
+
     Args:
+        response: Response used to set the ETag header.
         race_id: Race ID (16 digits).
         ticket_type: Ticket type.
+        since: Version from a previous response for delta retrieval (optional).
+        if_none_match: If-None-Match request header.
 
     Returns:
-        OddsResponse: Odds information.
+        OddsResponse: Odds information, or 304 Not Modified.
 
     Raises:
         RaceNotFoundException: Race not found.
+        InvalidRequestException: Invalid ticket type.
         DatabaseErrorException: Database connection error.
     """
-    logger.info(f"GET /odds/{race_id}?ticket_type={ticket_type}")
+    logger.info(f"GET /odds/{race_id}?ticket_type={ticket_type}&since={since}")
+
+    if ticket_type not in VALID_TICKET_TYPES:
+        logger.warning(f"Invalid ticket type: {ticket_type}")
+        raise InvalidRequestException(
+            f"不正な券種です: {ticket_type}。"
+            f"有効な券種: win/place/quinella/exacta/wide/trio/trifecta"
+        )
 
     try:
         async with get_connection() as conn:
@@ -62,19 +116,28 @@ async def get_odds(
                 logger.warning(f"Race not found: {race_id}")
                 raise RaceNotFoundException(race_id)
 
+            # Conditional GET: skip fetching odds if the client is up to date
+            version = await get_odds_version(conn, race_id, ticket_type)
+            etag = _make_etag(ticket_type, version, since) if version else None
+            if etag and _etag_matches(if_none_match, etag):
+                logger.info(f"Odds not modified: {race_id} {ticket_type} version={version}")
+                return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+
             odds_data: list[SingleOdds | CombinationOdds] = []
+            # Deltas must be complete, so the popularity cap applies to full snapshots only
+            combination_limit = None if since else 100
 
             # Get odds based on ticket type
             if ticket_type == "win":
                 # Win odds
-                win_place = await get_odds_win_place(conn, race_id)
+                win_place = await get_odds_win_place(conn, race_id, updated_since=since)
                 odds_data = [
                     SingleOdds(horse_number=o["umaban"], odds=o["odds"]) for o in win_place["win"]
                 ]
 
             elif ticket_type == "place":
                 # Place odds
-                win_place = await get_odds_win_place(conn, race_id)
+                win_place = await get_odds_win_place(conn, race_id, updated_since=since)
                 # Return median as place odds have a range
                 odds_data = [
                     SingleOdds(horse_number=o["umaban"], odds=(o["odds_min"] + o["odds_max"]) / 2)
@@ -83,7 +146,9 @@ async def get_odds(
 
             elif ticket_type == "quinella":
                 # Quinella odds
-                quinella = await get_odds_quinella(conn, race_id, limit=100)
+                quinella = await get_odds_quinella(
+                    conn, race_id, limit=combination_limit, updated_since=since
+                )
                 odds_data = [
                     CombinationOdds(numbers=[o["umaban1"], o["umaban2"]], odds=o["odds"])
                     for o in quinella
@@ -91,7 +156,9 @@ async def get_odds(
 
             elif ticket_type == "exacta":
                 # Exacta odds
-                exacta = await get_odds_exacta(conn, race_id, limit=100)
+                exacta = await get_odds_exacta(
+                    conn, race_id, limit=combination_limit, updated_since=since
+                )
                 odds_data = [
                     CombinationOdds(numbers=[o["umaban1"], o["umaban2"]], odds=o["odds"])
                     for o in exacta
@@ -99,7 +166,9 @@ async def get_odds(
 
             elif ticket_type == "wide":
                 # Wide odds
-                wide = await get_odds_wide(conn, race_id, limit=100)
+                wide = await get_odds_wide(
+                    conn, race_id, limit=combination_limit, updated_since=since
+                )
                 # Return median as wide odds have a range
                 odds_data = [
                     CombinationOdds(
@@ -111,7 +180,9 @@ async def get_odds(
 
             elif ticket_type == "trio":
                 # Trio odds
-                trio = await get_odds_trio(conn, race_id, limit=100)
+                trio = await get_odds_trio(
+                    conn, race_id, limit=combination_limit, updated_since=since
+                )
                 odds_data = [
                     CombinationOdds(
                         numbers=[o["umaban1"], o["umaban2"], o["umaban3"]], odds=o["odds"]
@@ -121,7 +192,9 @@ async def get_odds(
 
             elif ticket_type == "trifecta":
                 # Trifecta odds
-                trifecta = await get_odds_trifecta(conn, race_id, limit=100)
+                trifecta = await get_odds_trifecta(
+                    conn, race_id, limit=combination_limit, updated_since=since
+                )
                 odds_data = [
                     CombinationOdds(
                         numbers=[o["umaban1"], o["umaban2"], o["umaban3"]], odds=o["odds"]
@@ -129,24 +202,104 @@ async def get_odds(
                     for o in trifecta
                 ]
 
-            else:
-                logger.warning(f"Invalid ticket type: {ticket_type}")
-                from src.api.exceptions import InvalidRequestException
+            if etag:
+                response.headers["ETag"] = etag
 
-                raise InvalidRequestException(
-                    f"不正な券種です: {ticket_type}。"
-                    f"有効な券種: win/place/quinella/exacta/wide/trio/trifecta"
-                )
-
-            response = OddsResponse(
-                race_id=race_id, ticket_type=ticket_type, updated_at=datetime.now(), odds=odds_data
+            logger.info(
+                f"Odds retrieved: {len(odds_data)} items for {ticket_type} "
+                f"(version={version}, delta={since is not None})"
+            )
+            return OddsResponse(
+                race_id=race_id,
+                ticket_type=ticket_type,
+                updated_at=datetime.now(),
+                odds=odds_data,
+                version=version,
+                is_delta=since is not None,
             )
-
-            logger.info(f"Odds retrieved: {len(odds_data)} items for {ticket_type}")
-            return response
 
     except RaceNotFoundException:
         raise
     except Exception as e:
         logger.error(f"Failed to get odds: {e}")
         raise DatabaseErrorException(str(e)) from e
+
+
+@router.get(
+    "/odds/{race_id}/table",
+    status_code=status.HTTP_200_OK,
+    response_class=StreamingResponse,
+    summary="全組み合わせオッズ取得（パック形式）",
+    description=(
+        "連系券種の全組み合わせオッズを、組み合わせ番号をインデックスとする"
+        "リトルエンディアン uint32 配列（オッズ×10、0=発売なし）としてストリーム返却します。"
+    ),
+)
+async def get_odds_table(
+    race_id: str = Path(..., min_length=16, max_length=16, description="レースID（16桁）"),
+    ticket_type: str = Query(..., description="券種（quinella/exacta/wide/trio/trifecta）"),
+    if_none_match: str | None = Header(None),
+) -> Response:
+    """
+    Stream the complete combination odds table in packed form.
+
+    Unlike get_odds, there is no popularity limit: an 18-horse trifecta
+    market returns all 4896 combinations in an 18**3 uint32 array (23 KB).
+    Index = sum((number_i - 1) * 18**(k - 1 - i)); quinella/wide/trio use
+    ascending horse numbers. Decode with
+    ``numpy.frombuffer(body, "<u4").reshape((18,) * k) / 10``.
+
+    Args:
+        race_id: Race ID (16 digits).
+        ticket_type: Exotic ticket type.
+        if_none_match: If-None-Match request header.
+
+    Returns:
+        StreamingResponse with the packed array, or 304 Not Modified.
+
+    Raises:
+        RaceNotFoundException: Race not found.
+        InvalidRequestException: Invalid ticket type.
+        DatabaseErrorException: Database connection error.
+    """
+    logger.info(f"GET /odds/{race_id}/table?ticket_type={ticket_type}")
+
+    if ticket_type not in EXOTIC_ODDS_COLUMNS:
+        logger.warning(f"Invalid ticket type for odds table: {ticket_type}")
+        raise InvalidRequestException(
+            f"不正な券種です: {ticket_type}。有効な券種: {'/'.join(EXOTIC_ODDS_COLUMNS)}"
+        )
+
+    try:
+        async with get_connection() as conn:
+            exists = await check_race_exists(conn, race_id)
+            if not exists:
+                logger.warning(f"Race not found: {race_id}")
+                raise RaceNotFoundException(race_id)
+
+            version = await get_odds_version(conn, race_id, ticket_type)
+    except RaceNotFoundException:
+        raise
+    except Exception as e:
+        logger.error(f"Failed to get odds table version: {e}")
+        raise DatabaseErrorException(str(e)) from e
+
+    _, _, combination_size = EXOTIC_ODDS_COLUMNS[ticket_type]
+    headers = {
+        "X-Odds-Base": str(PACKED_ODDS_BASE),
+        "X-Odds-Combination-Size": str(combination_size),
+        "X-Odds-Scale": "10",
+    }
+    if version:
+        etag = _make_etag(f"{ticket_type}-table", version)
+        headers["ETag"] = etag
+        if _etag_matches(if_none_match, etag):
+            return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+
+    async def stream():
+        # The connection is held for the duration of the stream only
+        async with get_connection() as conn:
+            async for chunk in iter_exotic_odds_packed(conn, race_id, ticket_type):
+                yield chunk
+
+    return StreamingResponse(stream(), media_type="application/octet-stream", headers=headers)
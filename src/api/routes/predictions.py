@@ -12,10 +12,15 @@ from src.api.exceptions import (
     RaceNotFoundException,
 )
 from src.api.schemas.prediction import (
+    FeatureSnapshotRequest,
+    FeatureSnapshotResponse,
     PredictionHistoryResponse,
     PredictionRequest,
     PredictionResponse,
+    PredictionWarmupRequest,
+    PredictionWarmupResponse,
 )
+from src.exceptions import MissingDataError
 from src.services import prediction_service
 
 logger = logging.getLogger(__name__)
@@ -67,6 +72,72 @@ async def generate_prediction(request: PredictionRequest) -> PredictionResponse:
         raise DatabaseErrorException(str(e)) from e
 
 
+@router.post(
+    "/predictions/warm",
+    response_model=PredictionWarmupResponse,
+    status_code=status.HTTP_200_OK,
+    summary="予想ウォームアップ",
+    description="確定予想の直前にモデルの読み込みと特徴量スナップショットの作成を行います。",
+)
+async def warm_prediction(request: PredictionWarmupRequest) -> PredictionWarmupResponse:
+    """
+    Load the model and build the feature snapshot ahead of a final prediction.
+
+    Args:
+        request: Warm-up request.
+
+    Returns:
+        PredictionWarmupResponse: Loaded model.
+
+    Raises:
+        RaceNotFoundException: Race not found.
+        DatabaseErrorException: Database connection error.
+    """
+    logger.info(f"POST /predictions/warm: race_id={request.race_id}")
+
+    try:
+        result = await prediction_service.warm_prediction(request.race_id)
+        return PredictionWarmupResponse(**result)
+
+    except MissingDataError as e:
+        logger.warning(f"Race not found: {e}")
+        raise RaceNotFoundException(request.race_id) from e
+    except Exception as e:
+        logger.error(f"Failed to warm prediction: {e}")
+        raise DatabaseErrorException(str(e)) from e
+
+
+@router.post(
+    "/predictions/snapshots",
+    response_model=FeatureSnapshotResponse,
+    status_code=status.HTTP_200_OK,
+    summary="特徴量スナップショット作成",
+    description="前夜に指定日の全レースの特徴量を計算・保存します（確定予想の高速化）。",
+)
+async def create_feature_snapshots(request: FeatureSnapshotRequest) -> FeatureSnapshotResponse:
+    """
+    Store pre-race feature snapshots for a race day.
+
+    Args:
+        request: Snapshot request.
+
+    Returns:
+        FeatureSnapshotResponse: Races with a stored snapshot.
+
+    Raises:
+        DatabaseErrorException: Database connection error.
+    """
+    logger.info(f"POST /predictions/snapshots: race_date={request.race_date}")
+
+    try:
+        race_ids = await prediction_service.snapshot_race_features(request.race_date)
+        return FeatureSnapshotResponse(race_date=request.race_date, race_ids=race_ids)
+
+    except Exception as e:
+        logger.error(f"Failed to create feature snapshots: {e}")
+        raise DatabaseErrorException(str(e)) from e
+
+
 @router.get(
     "/predictions/{prediction_id}",
     response_model=PredictionResponse,
@@ -100,7 +171,8 @@ async def get_prediction(
             raise PredictionNotFoundException(prediction_id)
 
         logger.info(f"Prediction retrieved: {prediction_id}")
-        return response
+        # Win/place EV follows the latest odds while the odds watcher runs
+        return prediction_service.apply_latest_ev(response)
 
     except PredictionNotFoundException:
         raise
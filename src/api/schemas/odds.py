@@ -28,3 +28,7 @@ class OddsResponse(BaseModel):
     ticket_type: str = Field(..., description="券種（win/place/quinella/exacta/trio/trifecta）")
     updated_at: datetime = Field(..., description="オッズ更新日時")
     odds: list[SingleOdds | CombinationOdds] = Field(..., description="オッズリスト")
+    version: str | None = Field(
+        None, description="オッズバージョン（ETagと同値。差分取得時の since に指定）"
+    )
+    is_delta: bool = Field(False, description="since 以降に更新された組み合わせのみの場合 True")
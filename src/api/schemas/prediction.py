@@ -72,6 +72,18 @@ class EVRecommendationEntry(BaseModel):
     expected_value: float = Field(..., description="期待値")
 
 
+class ExoticEVRecommendationEntry(BaseModel):
+    """Exotic ticket EV recommendation entry."""
+
+    bet_type: str = Field(..., description="券種（quinella/exacta/wide/trio/trifecta）")
+    numbers: list[int] = Field(
+        ..., min_length=2, max_length=3, description="馬番（馬単・三連単は着順通り）"
+    )
+    probability: float = Field(..., ge=0.0, le=1.0, description="予測確率")
+    odds: float = Field(..., description="オッズ")
+    expected_value: float = Field(..., description="期待値")
+
+
 class EVRecommendations(BaseModel):
     """EV recommendations container."""
 
@@ -81,10 +93,46 @@ class EVRecommendations(BaseModel):
     place_recommendations: list[EVRecommendationEntry] = Field(
         default_factory=list, description="複勝EV推奨馬（EV >= 1.5）"
     )
+    exotic_recommendations: list[ExoticEVRecommendationEntry] = Field(
+        default_factory=list, description="連系券種EV推奨（EV >= 1.5）"
+    )
     odds_source: str = Field(default="realtime", description="オッズソース")
     odds_time: str | None = Field(None, description="オッズ取得時刻")
 
 
+class SimulatedHorseEntry(BaseModel):
+    """Monte Carlo race simulation result for one horse."""
+
+    horse_number: int = Field(..., ge=1, le=18, description="馬番（1-18）")
+    position_distribution: PositionDistribution = Field(..., description="シミュレーション順位分布")
+    win_probability: float = Field(..., ge=0.0, le=1.0, description="シミュレーション勝率")
+    win_ci_lower: float = Field(..., ge=0.0, le=1.0, description="勝率95%信頼区間下限")
+    win_ci_upper: float = Field(..., ge=0.0, le=1.0, description="勝率95%信頼区間上限")
+    place_probability: float = Field(..., ge=0.0, le=1.0, description="シミュレーション複勝率")
+    place_ci_lower: float = Field(..., ge=0.0, le=1.0, description="複勝率95%信頼区間下限")
+    place_ci_upper: float = Field(..., ge=0.0, le=1.0, description="複勝率95%信頼区間上限")
+
+
+class SimulatedExoticEntry(BaseModel):
+    """Simulated exotic ticket probability entry."""
+
+    bet_type: str = Field(..., description="券種（quinella/exacta/wide/trio/trifecta）")
+    numbers: list[int] = Field(
+        ..., min_length=2, max_length=3, description="馬番（馬単・三連単は着順通り）"
+    )
+    probability: float = Field(..., ge=0.0, le=1.0, description="シミュレーション的中確率")
+
+
+class RaceSimulation(BaseModel):
+    """Monte Carlo race simulation (Plackett-Luce) summary."""
+
+    n_draws: int = Field(..., ge=1, description="シミュレーション回数")
+    horses: list[SimulatedHorseEntry] = Field(default_factory=list, description="馬別結果")
+    exotic_probabilities: list[SimulatedExoticEntry] = Field(
+        default_factory=list, description="券種別の上位組み合わせ確率"
+    )
+
+
 class PredictionResult(BaseModel):
     """Prediction result body (probability-based ranking format)."""
 
@@ -101,6 +149,7 @@ class PredictionResult(BaseModel):
         None, description="穴馬候補（複勝率高い＆勝率低い）"
     )
     ev_recommendations: EVRecommendations | None = Field(None, description="EV推奨馬（EV >= 1.5）")
+    simulation: RaceSimulation | None = Field(None, description="レースシミュレーション結果")
     prediction_confidence: float = Field(..., ge=0.0, le=1.0, description="予測全体の信頼度スコア")
     model_info: str = Field(..., description="使用モデル情報")
 
@@ -113,6 +162,33 @@ class PredictionRequest(BaseModel):
     bias_date: str | None = Field(None, description="バイアス適用日（YYYY-MM-DD形式）")
 
 
+class PredictionWarmupRequest(BaseModel):
+    """Prediction warm-up request (sent shortly before the final prediction)."""
+
+    race_id: str = Field(..., min_length=16, max_length=16, description="レースID（16桁）")
+
+
+class PredictionWarmupResponse(BaseModel):
+    """Prediction warm-up response."""
+
+    race_id: str = Field(..., description="レースID")
+    model: str | None = Field(None, description="読み込み済みモデルファイル名")
+    snapshot: bool = Field(False, description="特徴量スナップショットの有無")
+
+
+class FeatureSnapshotRequest(BaseModel):
+    """Feature snapshot request (evening run for the next race day)."""
+
+    race_date: str = Field(..., description="レース日（YYYY-MM-DD形式）")
+
+
+class FeatureSnapshotResponse(BaseModel):
+    """Feature snapshot response."""
+
+    race_date: str = Field(..., description="レース日（YYYY-MM-DD）")
+    race_ids: list[str] = Field(..., description="スナップショット保存済みレースID一覧")
+
+
 class PredictionResponse(BaseModel):
     """Prediction generation response."""
 
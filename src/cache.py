@@ -21,6 +21,7 @@ Cache Key Conventions:
     - bias:{date} - Daily track bias (TTL: 3600s)
     - code:{table} - Code master data (TTL: 86400s)
     - race:{race_id} - Race metadata (TTL: 300s)
+    - simulation:{race_id}:{hash}:{draws}:{seed} - Race simulation summary (TTL: 3600s)
 """
 
 import json
@@ -261,6 +262,7 @@ TTL_RACE = 300  # Race metadata: 5 minutes
 TTL_BIAS = 3600  # Daily bias: 1 hour
 TTL_CODE_MASTER = 86400  # Code master: 24 hours
 TTL_PREDICTION = 1800  # Predictions: 30 minutes
+TTL_SIMULATION = 3600  # Race simulation summaries: 1 hour (deterministic per prediction)
 
 
 if __name__ == "__main__":
@@ -14,8 +14,6 @@ import logging
 import os
 from datetime import date, datetime, timedelta
 
-from src.export.video_json_exporter import VideoJsonExporter
-
 logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
 logger = logging.getLogger(__name__)
 
@@ -61,6 +59,9 @@ def main():
     logger.info(f"Target date: {target_date}")
     logger.info(f"Filter: {args.filter}, Venue: {args.venue or 'all'}, Race: {args.race or 'all'}")
 
+    # Imported after argument parsing: the exporter loads the ML stack (pandas, joblib)
+    from src.export.video_json_exporter import VideoJsonExporter
+
     exporter = VideoJsonExporter(model_path=args.model)
     output_files = exporter.export_day(
         target_date,
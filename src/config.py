@@ -34,6 +34,13 @@ DB_DEFAULT_STATS_DAYS_BACK: Final[int] = 30
 DB_CONNECTION_POOL_MIN: Final[int] = 1
 DB_CONNECTION_POOL_MAX: Final[int] = 10
 
+# SQL profiler (opt-in, src.db.profiler; report: python -m src.db.profiler)
+SQL_PROFILE: Final[bool] = os.getenv("SQL_PROFILE", "false").lower() == "true"
+SQL_PROFILE_SLOW_MS: Final[float] = float(
+    os.getenv("SQL_PROFILE_SLOW_MS", "500")
+)  # EXPLAIN (ANALYZE, BUFFERS) above this
+SQL_PROFILE_DIR: Final[str] = os.getenv("SQL_PROFILE_DIR", "logs/sql_profile")
+
 # =====================================
 # Machine Learning Settings
 # =====================================
@@ -72,6 +79,9 @@ API_MAX_LIMIT: Final[int] = 100
 API_REQUEST_TIMEOUT: Final[int] = 300  # 5 minutes
 API_STATS_TIMEOUT: Final[int] = 10  # 10 seconds
 
+# Load the prediction models in the background after startup (first prediction skips the load)
+API_MODEL_WARMUP: Final[bool] = os.getenv("API_MODEL_WARMUP", "true").lower() == "true"
+
 # =====================================
 # Discord Bot Settings
 # =====================================
@@ -79,17 +89,46 @@ DISCORD_REQUEST_TIMEOUT: Final[int] = 300  # 5 minutes
 DISCORD_STATS_TIMEOUT: Final[int] = 10  # 10 seconds
 DISCORD_MAX_PREDICTIONS_DISPLAY: Final[int] = 5  # Max predictions to display
 DISCORD_MAX_STATS_DISPLAY: Final[int] = 10  # Max stats to display
+DISCORD_HTTP_MAX_CONNECTIONS: Final[int] = 10  # Pooled API connections (keep-alive)
 
 # Auto prediction scheduler settings
-SCHEDULER_EVENING_PREDICTION_HOUR: Final[int] = 21  # Pre-race prediction execution hour
-SCHEDULER_EVENING_PREDICTION_MINUTE: Final[int] = 0  # Pre-race prediction execution minute
-SCHEDULER_CHECK_INTERVAL_MINUTES: Final[int] = 10  # Race time check interval (minutes)
+SCHEDULER_EVENING_PREDICTION_HOUR: Final[int] = 21  # Pre-race feature snapshot hour
+SCHEDULER_EVENING_PREDICTION_MINUTE: Final[int] = 0  # Pre-race feature snapshot minute
+SCHEDULER_SNAPSHOT_TIMEOUT: Final[int] = 1800  # Next-day feature snapshot request timeout
+SCHEDULER_CARD_REFRESH_MINUTES: Final[int] = 30  # Race card refresh interval (post time changes)
 SCHEDULER_FINAL_PREDICTION_MINUTES_BEFORE: Final[int] = (
     30  # Final prediction timing (minutes before race)
 )
-SCHEDULER_FINAL_PREDICTION_TOLERANCE_MINUTES: Final[int] = (
-    5  # Final prediction time tolerance (minutes)
-)
+SCHEDULER_PREWARM_MINUTES_BEFORE: Final[int] = 10  # Pre-warm lead before the final prediction
+SCHEDULER_STATE_PATH: Final[str] = os.getenv(
+    "SCHEDULER_STATE_PATH", "data/scheduler_state.json"
+)  # Persisted card and completed final predictions
+SCHEDULER_MAX_CONCURRENT_PREDICTIONS: Final[int] = 4  # Final predictions run in parallel
+SCHEDULER_FINAL_RETRY_SECONDS: Final[int] = 30  # First retry delay of a failed final prediction
+SCHEDULER_FINAL_RETRY_MAX_SECONDS: Final[int] = 300  # Upper bound of the doubling retry delay
+
+# Race simulation (Monte Carlo, Plackett-Luce)
+SIMULATION_N_DRAWS: Final[int] = int(os.getenv("SIMULATION_N_DRAWS", "10000"))
+SIMULATION_SEED: Final[int] = int(os.getenv("SIMULATION_SEED", "42"))
+
+# Intra-day bias (same-day results applied to later races on the card)
+INTRADAY_BIAS_MIN_RACES: Final[int] = 3  # Finalized races at a venue before applying
+INTRADAY_BIAS_REFRESH_SECONDS: Final[int] = 60  # Minimum interval between DB refreshes
+
+# Real-time odds watcher (in-memory odds snapshots for EV)
+ODDS_WATCHER_ENABLED: Final[bool] = os.getenv("ODDS_WATCHER_ENABLED", "false").lower() == "true"
+ODDS_WATCHER_POLL_SECONDS: Final[float] = float(os.getenv("ODDS_WATCHER_POLL_SECONDS", "15"))
+ODDS_WATCHER_NOTIFY_CHANNEL: Final[str | None] = (
+    os.getenv("ODDS_WATCHER_NOTIFY_CHANNEL") or None
+)  # LISTEN channel for immediate polls (e.g. "odds_updated")
+
+# Historical backtest (parallel date shards, Parquet output)
+BACKTEST_WORKERS: Final[int] = int(os.getenv("BACKTEST_WORKERS", "4"))
+BACKTEST_SHARD_DAYS: Final[int] = int(os.getenv("BACKTEST_SHARD_DAYS", "31"))
+BACKTEST_OUTPUT_DIR: Final[str] = os.getenv("BACKTEST_OUTPUT_DIR", "backtest_results")
+
+# Video JSON export (races exported concurrently over one DB pool, keep <= DB_POOL_MAX_SIZE)
+VIDEO_EXPORT_CONCURRENCY: Final[int] = int(os.getenv("VIDEO_EXPORT_CONCURRENCY", "4"))
 
 # =====================================
 # CORS Settings (Security)
@@ -104,6 +143,8 @@ CORS_ALLOW_ORIGINS_PROD: Final[list] = [
 # =====================================
 LOG_LEVEL: Final[str] = "INFO"
 LOG_FORMAT: Final[str] = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+# Emit a log record per pipeline span (src.metrics; JSON log format adds span/duration_ms fields)
+METRICS_LOG_SPANS: Final[bool] = os.getenv("METRICS_LOG_SPANS", "false").lower() == "true"
 
 # =====================================
 # File Paths
@@ -130,6 +171,16 @@ FEATURE_SPEED_INDEX_MIN: Final[float] = 0.0
 FEATURE_SPEED_INDEX_MAX: Final[float] = 100.0
 FEATURE_JOCKEY_WIN_RATE_MIN: Final[float] = 0.0
 FEATURE_JOCKEY_WIN_RATE_MAX: Final[float] = 1.0
+# Read past-performance stats from finalized_runs (pre-cast copy, migration 004)
+FEATURE_USE_FINALIZED_RUNS: Final[bool] = (
+    os.getenv("FEATURE_USE_FINALIZED_RUNS", "false").lower() == "true"
+)
+# Days re-copied into finalized_runs after each result collection (catches late corrections)
+FINALIZED_RUNS_REFRESH_DAYS: Final[int] = 7
+# Scale prediction features by the SHAP adjustment coefficients (shap_feature_aggregates)
+FEATURE_USE_SHAP_ADJUSTMENTS: Final[bool] = (
+    os.getenv("FEATURE_USE_SHAP_ADJUSTMENTS", "false").lower() == "true"
+)
 
 # Mock settings (for development)
 FEATURE_MOCK_RANDOM_SEED: Final[int] = 42
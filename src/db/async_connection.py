@@ -5,6 +5,7 @@ Async connection pool management for FastAPI.
 """
 
 import logging
+import time
 from contextlib import asynccontextmanager
 
 import asyncpg
@@ -17,7 +18,9 @@ from src.config import (
     DB_POOL_MIN_SIZE,
     DB_PORT,
     DB_USER,
+    SQL_PROFILE,
 )
+from src.db import profiler
 
 logger = logging.getLogger(__name__)
 
@@ -176,7 +179,12 @@ async def execute_query(sql: str, *args) -> list[dict]:
     """
     try:
         async with get_connection() as conn:
+            start = time.perf_counter()
             rows = await conn.fetch(sql, *args)
+            if SQL_PROFILE:
+                await profiler.observe_async(
+                    conn, sql, args, time.perf_counter() - start, len(rows)
+                )
             return [dict(row) for row in rows]
     except Exception as e:
         logger.error(f"Query execution failed: {e}\nSQL: {sql}")
@@ -196,7 +204,12 @@ async def execute_one(sql: str, *args) -> dict | None:
     """
     try:
         async with get_connection() as conn:
+            start = time.perf_counter()
             row = await conn.fetchrow(sql, *args)
+            if SQL_PROFILE:
+                await profiler.observe_async(
+                    conn, sql, args, time.perf_counter() - start, 1 if row else 0
+                )
             return dict(row) if row else None
     except Exception as e:
         logger.error(f"Query execution failed: {e}\nSQL: {sql}")
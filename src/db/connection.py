@@ -16,6 +16,7 @@ from src.config import (
     DB_CONNECTION_POOL_MAX,
     DB_CONNECTION_POOL_MIN,
 )
+from src.db.profiler import connection_kwargs
 from src.exceptions import (
     DatabaseConnectionError,
     MissingEnvironmentVariableError,
@@ -148,13 +149,14 @@ class DatabaseConnection:
                     database=self.database,
                     user=self.user,
                     password=self.password,
+                    **connection_kwargs(),
                 )
                 logger.debug("DB connection successful (local)")
                 return conn
 
             elif self.db_mode == "neon":
                 logger.debug("Starting DB connection (Neon)")
-                conn = psycopg2.connect(self.connection_url)
+                conn = psycopg2.connect(self.connection_url, **connection_kwargs())
                 logger.debug("DB connection successful (Neon)")
                 return conn
 
@@ -200,11 +202,12 @@ class DatabaseConnection:
                         database=self.database,
                         user=self.user,
                         password=self.password,
+                        **connection_kwargs(),
                     )
                 elif self.db_mode == "neon":
                     logger.info(f"Creating connection pool (Neon): min={minconn}, max={maxconn}")
                     self._connection_pool = pool.SimpleConnectionPool(
-                        minconn, maxconn, self.connection_url
+                        minconn, maxconn, self.connection_url, **connection_kwargs()
                     )
 
                 logger.info("Connection pool created successfully")
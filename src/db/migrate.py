@@ -130,6 +130,11 @@ def check_tables():
         "daily_bias",
         "model_calibration",
         "shap_analysis",
+        "finalized_runs",
+        "dashboard_daily_summary",
+        "dashboard_cumulative_summary",
+        "shap_race_contributions",
+        "shap_feature_aggregates",
     ]
 
     cursor = conn.cursor()
@@ -0,0 +1,20 @@
+-- ===========================================
+-- マイグレーション: 特徴量スナップショットテーブル作成
+-- ===========================================
+-- 更新日: 2026-10-18
+-- 説明: 前夜に計算したレース毎の特徴量（履歴ベース）を保存するテーブル
+--       確定予想では馬体重・取消・馬場状態のみ差し替えて再スコアリングする
+
+-- race_feature_snapshots テーブル（レース毎の出走馬特徴量）
+CREATE TABLE IF NOT EXISTS race_feature_snapshots (
+    race_code TEXT PRIMARY KEY,
+    race_date DATE NOT NULL,
+    features JSONB NOT NULL,                    -- 出走馬毎の特徴量（レコード配列）
+    entries JSONB NOT NULL,                     -- 計算時の出走馬（馬番 → 血統登録番号・騎手コード）
+    created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE INDEX IF NOT EXISTS idx_race_feature_snapshots_date ON race_feature_snapshots (race_date DESC);
+
+COMMENT ON TABLE race_feature_snapshots IS '前夜計算の特徴量スナップショット（確定予想で当日変動列のみ更新）';
+COMMENT ON COLUMN race_feature_snapshots.entries IS '計算時の出走馬。馬・騎手が変わった場合は再計算';
@@ -0,0 +1,130 @@
+-- ===========================================
+-- マイグレーション: 確定成績インデックス・型付き確定成績テーブル作成
+-- ===========================================
+-- 更新日: 2026-10-18
+-- 説明: 特徴量抽出のバッチクエリ（data_kubun='7' かつ着順が数値の出走成績を
+--       血統登録番号で絞り race_code 順に読む）向けの部分インデックスと、
+--       確定成績を数値型に変換済みで保持する finalized_runs テーブル
+--       finalized_runs は結果収集後に refresh_finalized_runs(開始日) で直近分のみ再作成する
+--       （マテリアライズドビューは差分リフレッシュできないためテーブル + 関数で実装）
+--       初回実行時はインデックス作成と全件投入に時間がかかる
+
+-- ===========================================
+-- 元テーブルの部分インデックス
+-- ===========================================
+
+-- 馬毎の確定成績（過去成績・詳細成績・ラップ: ketto_toroku_bango IN (...) ORDER BY race_code DESC）
+CREATE INDEX IF NOT EXISTS idx_umagoto_finalized_horse
+    ON umagoto_race_joho (ketto_toroku_bango, race_code DESC)
+    WHERE data_kubun = '7' AND kakutei_chakujun ~ '^[0-9]+$';
+
+-- 騎手×馬コンビ成績（kishu_code = ? AND ketto_toroku_bango = ?）
+CREATE INDEX IF NOT EXISTS idx_umagoto_finalized_jockey_horse
+    ON umagoto_race_joho (kishu_code, ketto_toroku_bango)
+    INCLUDE (kakutei_chakujun)
+    WHERE data_kubun = '7' AND kakutei_chakujun ~ '^[0-9]+$';
+
+-- 騎手・調教師の年別成績（kaisai_nen の範囲集計、インデックスオンリースキャン）
+CREATE INDEX IF NOT EXISTS idx_umagoto_finalized_year
+    ON umagoto_race_joho (kaisai_nen)
+    INCLUDE (kishu_code, chokyoshi_code, kakutei_chakujun)
+    WHERE data_kubun = '7' AND kakutei_chakujun ~ '^[0-9]+$';
+
+-- 年別の確定レース一覧（get_races: kaisai_nen = ? ORDER BY race_code）
+CREATE INDEX IF NOT EXISTS idx_race_shosai_finalized_year
+    ON race_shosai (kaisai_nen, race_code)
+    WHERE data_kubun = '7';
+
+-- 調教データ（馬毎）
+CREATE INDEX IF NOT EXISTS idx_hanro_chokyo_horse
+    ON hanro_chokyo (ketto_toroku_bango, chokyo_nengappi DESC);
+
+-- ===========================================
+-- finalized_runs（確定成績・数値型変換済み）
+-- ===========================================
+
+-- 数値文字列を整数に変換（空白・非数値は NULL）
+CREATE OR REPLACE FUNCTION keiba_int(value TEXT) RETURNS INTEGER
+LANGUAGE sql IMMUTABLE PARALLEL SAFE AS $$
+    SELECT CASE WHEN btrim(value) ~ '^-?[0-9]+$' THEN btrim(value)::INTEGER END
+$$;
+
+CREATE TABLE IF NOT EXISTS finalized_runs (
+    race_code TEXT NOT NULL,
+    umaban SMALLINT NOT NULL,
+    ketto_toroku_bango TEXT NOT NULL,
+    kaisai_nen TEXT NOT NULL,
+    kaisai_gappi TEXT NOT NULL,
+    keibajo_code TEXT NOT NULL,
+    kishu_code TEXT,
+    chokyoshi_code TEXT,
+    chakujun SMALLINT NOT NULL,                 -- 確定着順
+    soha_time INTEGER,                          -- 走破タイム（元の mss.s 表記のまま数値化: 1345 = 1:34.5）
+    kohan_3f SMALLINT,                          -- 後半3F（0.1秒単位）
+    kohan_4f SMALLINT,                          -- 後半4F（0.1秒単位）
+    corner1_juni SMALLINT,
+    corner2_juni SMALLINT,
+    corner3_juni SMALLINT,
+    corner4_juni SMALLINT,
+    tansho_odds INTEGER,                        -- 単勝オッズ（10倍値）
+    tansho_ninkijun SMALLINT,
+    futan_juryo SMALLINT,                       -- 負担重量（0.1kg単位）
+    bataiju SMALLINT,
+    kyori SMALLINT,                             -- race_shosai.kyori
+    track_code TEXT,                            -- race_shosai.track_code
+    PRIMARY KEY (race_code, umaban)
+);
+
+-- 馬毎の直近成績（インデックスオンリースキャンで過去成績集計）
+CREATE INDEX IF NOT EXISTS idx_finalized_runs_horse
+    ON finalized_runs (ketto_toroku_bango, race_code DESC)
+    INCLUDE (chakujun, soha_time, kohan_3f, corner3_juni, corner4_juni,
+             kishu_code, kaisai_nen, kaisai_gappi);
+
+CREATE INDEX IF NOT EXISTS idx_finalized_runs_year ON finalized_runs (kaisai_nen);
+
+-- 開始日以降（race_code の先頭8桁 = 開催日）を元テーブルから再作成し、投入件数を返す
+-- 引数 NULL で全件再作成
+CREATE OR REPLACE FUNCTION refresh_finalized_runs(p_since TEXT DEFAULT NULL) RETURNS INTEGER
+LANGUAGE plpgsql AS $$
+DECLARE
+    v_since TEXT := COALESCE(p_since, '0');
+    v_rows INTEGER;
+BEGIN
+    DELETE FROM finalized_runs WHERE race_code >= v_since;
+
+    INSERT INTO finalized_runs (
+        race_code, umaban, ketto_toroku_bango, kaisai_nen, kaisai_gappi, keibajo_code,
+        kishu_code, chokyoshi_code, chakujun, soha_time, kohan_3f, kohan_4f,
+        corner1_juni, corner2_juni, corner3_juni, corner4_juni,
+        tansho_odds, tansho_ninkijun, futan_juryo, bataiju, kyori, track_code
+    )
+    SELECT
+        u.race_code, keiba_int(u.umaban), u.ketto_toroku_bango,
+        u.kaisai_nen, u.kaisai_gappi, u.keibajo_code,
+        u.kishu_code, u.chokyoshi_code,
+        keiba_int(u.kakutei_chakujun), keiba_int(u.soha_time),
+        keiba_int(u.kohan_3f), keiba_int(u.kohan_4f),
+        keiba_int(u.corner1_juni), keiba_int(u.corner2_juni),
+        keiba_int(u.corner3_juni), keiba_int(u.corner4_juni),
+        keiba_int(u.tansho_odds), keiba_int(u.tansho_ninkijun),
+        keiba_int(u.futan_juryo), keiba_int(u.bataiju),
+        keiba_int(r.kyori), r.track_code
+    FROM umagoto_race_joho u
+    LEFT JOIN race_shosai r ON r.race_code = u.race_code
+    WHERE u.race_code >= v_since
+      AND u.data_kubun = '7'
+      AND u.kakutei_chakujun ~ '^[0-9]+$'
+      AND keiba_int(u.umaban) IS NOT NULL
+    ON CONFLICT (race_code, umaban) DO NOTHING;
+
+    GET DIAGNOSTICS v_rows = ROW_COUNT;
+    RETURN v_rows;
+END;
+$$;
+
+-- 初回のみ全件投入（マイグレーションは毎回全ファイル再実行されるため）
+SELECT refresh_finalized_runs() WHERE NOT EXISTS (SELECT 1 FROM finalized_runs);
+
+COMMENT ON TABLE finalized_runs IS '確定成績（data_kubun=7）の数値型変換済みコピー。結果収集後に refresh_finalized_runs で直近分を更新';
+COMMENT ON FUNCTION refresh_finalized_runs(TEXT) IS '開始日（YYYYMMDD）以降の確定成績を再作成し件数を返す（NULLで全件）';
@@ -0,0 +1,60 @@
+-- ===========================================
+-- マイグレーション: ダッシュボード集計テーブル作成
+-- ===========================================
+-- 更新日: 2026-10-18
+-- 説明: Streamlit ダッシュボード向けの日別・累積集計（的中数・投資/回収額・キャリブレーション）
+--       結果収集で analysis_results を保存するたびに src.scheduler.result.summary が更新する
+--       率・回収率は読み出し時に件数から算出する（期間集計 = 累積の差分）
+--       既存の analysis_results からの初回投入: python -m src.scheduler.result.summary --rebuild
+
+-- dashboard_daily_summary テーブル（分析日毎の件数）
+CREATE TABLE IF NOT EXISTS dashboard_daily_summary (
+    summary_date DATE PRIMARY KEY,
+    total_races INTEGER NOT NULL DEFAULT 0,
+    analyzed_races INTEGER NOT NULL DEFAULT 0,
+    tansho_hit INTEGER NOT NULL DEFAULT 0,
+    fukusho_hit INTEGER NOT NULL DEFAULT 0,
+    umaren_hit INTEGER NOT NULL DEFAULT 0,
+    sanrenpuku_hit INTEGER NOT NULL DEFAULT 0,
+    top3_cover INTEGER NOT NULL DEFAULT 0,
+    mrr_sum FLOAT NOT NULL DEFAULT 0,           -- MRR × 分析レース数
+    tansho_investment INTEGER NOT NULL DEFAULT 0,
+    tansho_return INTEGER NOT NULL DEFAULT 0,
+    fukusho_investment INTEGER NOT NULL DEFAULT 0,
+    fukusho_return INTEGER NOT NULL DEFAULT 0,
+    axis_races INTEGER NOT NULL DEFAULT 0,
+    axis_fukusho_hit INTEGER NOT NULL DEFAULT 0,
+    axis_fukusho_investment INTEGER NOT NULL DEFAULT 0,
+    axis_fukusho_return INTEGER NOT NULL DEFAULT 0,
+    calib_races INTEGER[] NOT NULL,             -- TOP1単勝確率 10%刻み10区間のレース数
+    calib_hits INTEGER[] NOT NULL,              -- 同区間の単勝的中数
+    updated_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
+-- dashboard_cumulative_summary テーブル（各日までの累積件数）
+CREATE TABLE IF NOT EXISTS dashboard_cumulative_summary (
+    summary_date DATE PRIMARY KEY,
+    days INTEGER NOT NULL DEFAULT 0,            -- 累積した分析日数
+    total_races INTEGER NOT NULL DEFAULT 0,
+    analyzed_races INTEGER NOT NULL DEFAULT 0,
+    tansho_hit INTEGER NOT NULL DEFAULT 0,
+    fukusho_hit INTEGER NOT NULL DEFAULT 0,
+    umaren_hit INTEGER NOT NULL DEFAULT 0,
+    sanrenpuku_hit INTEGER NOT NULL DEFAULT 0,
+    top3_cover INTEGER NOT NULL DEFAULT 0,
+    mrr_sum FLOAT NOT NULL DEFAULT 0,
+    tansho_investment BIGINT NOT NULL DEFAULT 0,
+    tansho_return BIGINT NOT NULL DEFAULT 0,
+    fukusho_investment BIGINT NOT NULL DEFAULT 0,
+    fukusho_return BIGINT NOT NULL DEFAULT 0,
+    axis_races INTEGER NOT NULL DEFAULT 0,
+    axis_fukusho_hit INTEGER NOT NULL DEFAULT 0,
+    axis_fukusho_investment BIGINT NOT NULL DEFAULT 0,
+    axis_fukusho_return BIGINT NOT NULL DEFAULT 0,
+    calib_races INTEGER[] NOT NULL,
+    calib_hits INTEGER[] NOT NULL,
+    updated_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
+COMMENT ON TABLE dashboard_daily_summary IS 'ダッシュボード用の日別集計（analysis_results 保存時に更新）';
+COMMENT ON TABLE dashboard_cumulative_summary IS 'ダッシュボード用の累積集計（各日までの合計。期間集計は2行の差分）';
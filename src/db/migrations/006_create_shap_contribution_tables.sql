@@ -0,0 +1,47 @@
+-- ===========================================
+-- マイグレーション: SHAP寄与度・特徴量調整集計テーブル作成
+-- ===========================================
+-- 更新日: 2026-10-18
+-- 説明: レース毎のSHAP寄与度（軸馬・EV推奨馬、特徴量順の配列）をモデルバージョン毎に保存し、
+--       分析済みレースは再計算しない
+--       特徴量調整係数は軸馬の複勝的中/外れ別の指数減衰和から算出し、未加算（folded = FALSE）の行のみ加算する
+--       RacePredictor は FEATURE_USE_SHAP_ADJUSTMENTS=true のとき adjustments 配列を読み込む（src.scheduler.shap_aggregates）
+
+-- shap_race_contributions テーブル（レース・馬毎のSHAP寄与度）
+CREATE TABLE IF NOT EXISTS shap_race_contributions (
+    model_version TEXT NOT NULL,                -- version@trained_at
+    race_code TEXT NOT NULL,
+    umaban TEXT NOT NULL,
+    race_date DATE NOT NULL,
+    bamei TEXT,
+    chakujun SMALLINT NOT NULL,
+    is_axis BOOLEAN NOT NULL DEFAULT FALSE,     -- 軸馬（複勝確率1位）
+    is_ev BOOLEAN NOT NULL DEFAULT FALSE,       -- EV推奨馬（単勝EV >= 1.5）
+    win_prob FLOAT,
+    place_prob FLOAT,
+    win_ev FLOAT,
+    contributions REAL[] NOT NULL,              -- feature_names 順のSHAP値
+    folded BOOLEAN NOT NULL DEFAULT FALSE,      -- 特徴量調整集計に加算済み
+    created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (model_version, race_code, umaban)
+);
+
+CREATE INDEX IF NOT EXISTS idx_shap_race_contributions_unfolded
+    ON shap_race_contributions (model_version) WHERE is_axis AND NOT folded;
+
+-- shap_feature_aggregates テーブル（モデルバージョン毎の減衰集計と調整係数）
+CREATE TABLE IF NOT EXISTS shap_feature_aggregates (
+    model_version TEXT PRIMARY KEY,
+    feature_names TEXT[] NOT NULL,
+    place_sum FLOAT[] NOT NULL,                 -- 軸馬複勝的中時の寄与度の減衰和
+    place_weight FLOAT NOT NULL DEFAULT 0,      -- 同レース数の減衰和
+    miss_sum FLOAT[] NOT NULL,                  -- 軸馬外れ時の寄与度の減衰和
+    miss_weight FLOAT NOT NULL DEFAULT 0,
+    races INTEGER NOT NULL DEFAULT 0,           -- 加算したレース数
+    last_race_date DATE,                        -- 加算済みの最新レース日（減衰の基準日）
+    adjustments REAL[] NOT NULL,                -- feature_names 順の調整係数
+    updated_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
+COMMENT ON TABLE shap_race_contributions IS 'レース毎のSHAP寄与度（モデルバージョン毎に1回だけ計算）';
+COMMENT ON TABLE shap_feature_aggregates IS '特徴量調整係数の指数減衰集計（未加算の行のみ加算）';
@@ -0,0 +1,471 @@
+"""
+SQL Query Profiler
+
+Opt-in statement profiling for the psycopg2 connections (DatabaseConnection)
+and the asyncpg helpers (execute_query / execute_one). With SQL_PROFILE=true
+every statement is timed and tagged with the src function that issued it
+(e.g. "db_queries.get_zenso_batch"). SELECT statements slower than
+SQL_PROFILE_SLOW_MS are re-run once per query shape under
+EXPLAIN (ANALYZE, BUFFERS) and the plan is stored with the record.
+
+Records are appended as JSON lines to SQL_PROFILE_DIR (one file per process).
+
+Usage:
+    SQL_PROFILE=true python -m src.scheduler.race_predictor
+    python -m src.db.profiler --top 20
+    python -m src.db.profiler --check-db  # Drop recommendations already covered by an index
+"""
+
+import hashlib
+import json
+import logging
+import os
+import re
+import sys
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from types import FrameType
+from typing import Any
+
+import psycopg2.extensions
+
+from src.config import SQL_PROFILE, SQL_PROFILE_DIR, SQL_PROFILE_SLOW_MS
+
+logger = logging.getLogger(__name__)
+
+# Frames in these modules are plumbing, not query origins
+_PLUMBING_MODULES = frozenset(
+    {"src.db.profiler", "src.db.connection", "src.db.async_connection", "src.metrics"}
+)
+
+EXPLAIN_PREFIX = "EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) "
+
+# Stored SQL text is truncated to keep the report readable
+MAX_SQL_CHARS = 4000
+
+# Seq scan discarding at least this many rows (and 10x what it keeps) gets an index suggestion
+SEQ_SCAN_MIN_REMOVED = 10000
+
+_write_lock = threading.Lock()
+_explained: set[str] = set()
+
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r"\b\d+(?:\.\d+)?\b")
+_WRITE_STATEMENT = re.compile(r"\b(INSERT|UPDATE|DELETE|MERGE|TRUNCATE|CREATE|DROP|ALTER)\b", re.I)
+
+
+def query_origin() -> str:
+    """
+    Name of the src function that issued the current statement.
+
+    Returns:
+        "module.function" (e.g. "db_queries.get_zenso_batch"), or "unknown"
+    """
+    frame: FrameType | None = sys._getframe(1)
+    while frame is not None:
+        module = frame.f_globals.get("__name__", "")
+        if module.startswith("src.") and module not in _PLUMBING_MODULES:
+            return f"{module.rsplit('.', 1)[-1]}.{frame.f_code.co_name}"
+        frame = frame.f_back
+    return "unknown"
+
+
+def normalize_sql(sql: str) -> str:
+    """Collapse whitespace and replace literals with ? (groups statements by shape)."""
+    sql = _STRING_LITERAL.sub("?", sql)
+    sql = _NUMBER_LITERAL.sub("?", sql)
+    return " ".join(sql.split())
+
+
+def fingerprint(sql: str) -> str:
+    """Short stable id of a statement shape."""
+    return hashlib.md5(normalize_sql(sql).encode()).hexdigest()[:12]
+
+
+def is_explainable(sql: str) -> bool:
+    """Whether EXPLAIN ANALYZE can safely re-run the statement (read-only queries only)."""
+    head = sql.lstrip().split(None, 1)[0].upper() if sql.strip() else ""
+    return head in ("SELECT", "WITH") and not _WRITE_STATEMENT.search(sql)
+
+
+def _profile_path() -> Path:
+    return Path(SQL_PROFILE_DIR) / f"profile-{os.getpid()}.jsonl"
+
+
+def record(
+    driver: str,
+    sql: str,
+    duration: float,
+    rows: int,
+    origin: str,
+    plan: Any = None,
+) -> None:
+    """
+    Append one statement record to this process's profile file.
+
+    Args:
+        driver: "psycopg2" or "asyncpg"
+        sql: Statement text
+        duration: Execution time in seconds
+        rows: Rows returned/affected (-1 if unknown)
+        origin: Issuing function (query_origin())
+        plan: EXPLAIN (FORMAT JSON) output for slow statements
+    """
+    entry = {
+        "ts": datetime.now().isoformat(timespec="milliseconds"),
+        "driver": driver,
+        "origin": origin,
+        "fingerprint": fingerprint(sql),
+        "duration_ms": round(duration * 1000, 3),
+        "rows": rows,
+        "sql": normalize_sql(sql)[:MAX_SQL_CHARS],
+    }
+    if plan is not None:
+        entry["plan"] = plan
+    line = json.dumps(entry, ensure_ascii=False, default=str)
+    try:
+        with _write_lock:
+            path = _profile_path()
+            path.parent.mkdir(parents=True, exist_ok=True)
+            with open(path, "a", encoding="utf-8") as f:
+                f.write(line + "\n")
+    except OSError as e:
+        logger.warning(f"SQL profile write failed: {e}")
+
+
+def _needs_plan(sql: str, duration: float) -> bool:
+    """Slow, read-only and not explained yet in this process (claims the fingerprint)."""
+    if duration * 1000 < SQL_PROFILE_SLOW_MS or not is_explainable(sql):
+        return False
+    key = fingerprint(sql)
+    with _write_lock:
+        if key in _explained:
+            return False
+        _explained.add(key)
+    return True
+
+
+def _parse_plan(raw: Any) -> Any:
+    """EXPLAIN (FORMAT JSON) output as Python objects (drivers return str or parsed JSON)."""
+    return json.loads(raw) if isinstance(raw, str) else raw
+
+
+# =====================================
+# psycopg2
+# =====================================
+
+
+def _explain_psycopg2(conn, sql: str, params) -> Any:
+    """Run EXPLAIN ANALYZE on a plain cursor, inside a savepoint when in a transaction."""
+    in_transaction = not conn.autocommit
+    cur = psycopg2.extensions.cursor(conn)
+    try:
+        if in_transaction:
+            cur.execute("SAVEPOINT sql_profile_explain")
+        try:
+            cur.execute(EXPLAIN_PREFIX + sql, params)
+            plan = _parse_plan(cur.fetchone()[0])
+        except psycopg2.Error as e:
+            if in_transaction:
+                cur.execute("ROLLBACK TO SAVEPOINT sql_profile_explain")
+            logger.debug(f"EXPLAIN failed: {e}")
+            return None
+        if in_transaction:
+            cur.execute("RELEASE SAVEPOINT sql_profile_explain")
+        return plan
+    finally:
+        cur.close()
+
+
+class ProfilingCursorMixin(psycopg2.extensions.cursor):
+    """Times execute()/executemany() and records them (mixed into any cursor class)."""
+
+    def execute(self, query, vars=None):
+        origin = query_origin()
+        start = time.perf_counter()
+        result = super().execute(query, vars)
+        duration = time.perf_counter() - start
+
+        sql = query.decode() if isinstance(query, bytes) else str(query)
+        plan = _explain_psycopg2(self.connection, sql, vars) if _needs_plan(sql, duration) else None
+        record("psycopg2", sql, duration, self.rowcount, origin, plan)
+        return result
+
+    def executemany(self, query, vars_list):
+        origin = query_origin()
+        start = time.perf_counter()
+        result = super().executemany(query, vars_list)
+        sql = query.decode() if isinstance(query, bytes) else str(query)
+        record("psycopg2", sql, time.perf_counter() - start, self.rowcount, origin)
+        return result
+
+
+_cursor_classes: dict[type, type] = {}
+
+
+def _profiling_cursor(factory: type) -> type:
+    """Profiling subclass of a cursor class (cached)."""
+    cls = _cursor_classes.get(factory)
+    if cls is None:
+        cls = type(f"Profiling{factory.__name__}", (ProfilingCursorMixin, factory), {})
+        _cursor_classes[factory] = cls
+    return cls
+
+
+class ProfilingConnection(psycopg2.extensions.connection):
+    """psycopg2 connection whose cursors (any cursor_factory) are profiled."""
+
+    def cursor(self, *args, **kwargs):
+        factory = kwargs.pop("cursor_factory", None) or self.cursor_factory
+        kwargs["cursor_factory"] = _profiling_cursor(factory or psycopg2.extensions.cursor)
+        return super().cursor(*args, **kwargs)
+
+
+def connection_kwargs() -> dict[str, Any]:
+    """Extra psycopg2.connect() kwargs: the profiling connection class when enabled."""
+    return {"connection_factory": ProfilingConnection} if SQL_PROFILE else {}
+
+
+# =====================================
+# asyncpg
+# =====================================
+
+
+async def observe_async(conn, sql: str, args: tuple, duration: float, rows: int) -> None:
+    """
+    Record an asyncpg statement (EXPLAIN ANALYZE on the same connection when slow).
+
+    Args:
+        conn: asyncpg connection the statement ran on
+        sql: Statement text
+        args: Statement arguments
+        duration: Execution time in seconds
+        rows: Rows returned
+    """
+    origin = query_origin()
+    plan = None
+    if _needs_plan(sql, duration):
+        try:
+            plan = _parse_plan(await conn.fetchval(EXPLAIN_PREFIX + sql, *args))
+        except Exception as e:
+            logger.debug(f"EXPLAIN failed: {e}")
+    record("asyncpg", sql, duration, rows, origin, plan)
+
+
+# =====================================
+# Report
+# =====================================
+
+
+def load_records(directory: str | Path = SQL_PROFILE_DIR) -> list[dict]:
+    """Read all profile records in a directory."""
+    records = []
+    for path in sorted(Path(directory).glob("*.jsonl")):
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if line:
+                    try:
+                        records.append(json.loads(line))
+                    except json.JSONDecodeError:
+                        logger.warning(f"Skipping malformed profile line in {path.name}")
+    return records
+
+
+def summarize(records: list[dict]) -> list[dict]:
+    """
+    Aggregate records by (origin, statement shape), most total time first.
+
+    Returns:
+        [{origin, fingerprint, calls, total_ms, mean_ms, p95_ms, max_ms, rows, sql, plan}]
+    """
+    # Report-only dependency; src.db.connection imports this module
+    import numpy as np
+
+    groups: dict[tuple[str, str], list[dict]] = {}
+    for r in records:
+        groups.setdefault((r["origin"], r["fingerprint"]), []).append(r)
+
+    summary = []
+    for (origin, fp), items in groups.items():
+        durations = np.array([r["duration_ms"] for r in items])
+        planned = [r for r in items if r.get("plan") is not None]
+        summary.append(
+            {
+                "origin": origin,
+                "fingerprint": fp,
+                "calls": len(items),
+                "total_ms": round(float(durations.sum()), 1),
+                "mean_ms": round(float(durations.mean()), 1),
+                "p95_ms": round(float(np.percentile(durations, 95)), 1),
+                "max_ms": round(float(durations.max()), 1),
+                "rows": int(sum(max(r["rows"], 0) for r in items)),
+                "sql": items[0]["sql"],
+                "plan": max(planned, key=lambda r: r["duration_ms"])["plan"] if planned else None,
+            }
+        )
+    return sorted(summary, key=lambda s: s["total_ms"], reverse=True)
+
+
+def _plan_nodes(node: dict):
+    """All nodes of a plan tree."""
+    yield node
+    for child in node.get("Plans", []):
+        yield from _plan_nodes(child)
+
+
+_FILTER_PREDICATE = re.compile(
+    r"\(*(?:[a-z_]\w*\.)?([a-z_]\w*)\)?(?:::(integer|numeric|bigint|smallint|date))?(?:::\w+)*"
+    r"\s*(=|<=|>=|<|>|~~)"
+)
+
+
+def filter_columns(filter_text: str) -> list[str]:
+    """
+    Indexable columns referenced by a plan Filter (equality first, then ranges).
+
+    Casted columns are returned as expressions, e.g. "(kaisai_nen::integer)".
+    """
+    text = _STRING_LITERAL.sub("''", filter_text)
+    equality: list[str] = []
+    ranges: list[str] = []
+    for column, cast, op in _FILTER_PREDICATE.findall(text):
+        expr = f"({column}::{cast})" if cast else column
+        target = equality if op in ("=", "~~") else ranges
+        if expr not in equality and expr not in ranges:
+            target.append(expr)
+    return (equality + ranges)[:3]
+
+
+def recommend(plan: Any) -> list[str]:
+    """
+    Suggestions from an EXPLAIN (ANALYZE, FORMAT JSON) plan.
+
+    - Seq scans that discard most rows through a Filter -> CREATE INDEX on the filter columns
+    - Sorts spilled to disk -> raise work_mem
+
+    Returns:
+        Suggestion lines (CREATE INDEX statements or notes)
+    """
+    if not plan:
+        return []
+    root = plan[0]["Plan"] if isinstance(plan, list) else plan.get("Plan", plan)
+    suggestions: list[str] = []
+    for node in _plan_nodes(root):
+        node_type = node.get("Node Type", "")
+        loops = node.get("Actual Loops", 1) or 1
+        if node_type in ("Seq Scan", "Parallel Seq Scan") and node.get("Filter"):
+            removed = node.get("Rows Removed by Filter", 0) * loops
+            kept = node.get("Actual Rows", 0) * loops
+            columns = filter_columns(node["Filter"])
+            if removed >= SEQ_SCAN_MIN_REMOVED and removed >= 10 * kept and columns:
+                table = node.get("Relation Name", "?")
+                name = "_".join(re.sub(r"\W+", "_", c).strip("_") for c in columns)
+                statement = (
+                    f"CREATE INDEX IF NOT EXISTS idx_{table}_{name} "
+                    f"ON {table} ({', '.join(columns)});"
+                )
+                if statement not in suggestions:
+                    suggestions.append(statement)
+        elif node_type == "Sort" and node.get("Sort Space Type") == "Disk":
+            note = f"-- Sort spilled {node.get('Sort Space Used', '?')}kB to disk: raise work_mem"
+            if note not in suggestions:
+                suggestions.append(note)
+    return suggestions
+
+
+def existing_indexes(conn) -> dict[str, list[str]]:
+    """Leading column (or expression) of each btree index, per table."""
+    cur = conn.cursor()
+    try:
+        cur.execute("SELECT tablename, indexdef FROM pg_indexes WHERE schemaname = 'public'")
+        indexes: dict[str, list[str]] = {}
+        for table, indexdef in cur.fetchall():
+            match = re.search(r"USING \w+ \((.+)\)", indexdef)
+            if match:
+                leading = match.group(1).split(",")[0].strip()
+                indexes.setdefault(table, []).append(leading.replace(" ", "").lower())
+        return indexes
+    finally:
+        cur.close()
+
+
+def _already_indexed(statement: str, indexes: dict[str, list[str]]) -> bool:
+    """Whether an existing index leads with the suggested index's first column."""
+    match = re.match(r"CREATE INDEX IF NOT EXISTS \w+ ON (\w+) \((.+)\);", statement)
+    if not match:
+        return False
+    table, columns = match.groups()
+    leading = columns.split(",")[0].strip().replace(" ", "").lower()
+    return any(leading in (idx, f"({idx})") for idx in indexes.get(table, []))
+
+
+def _plan_totals(plan: Any) -> str:
+    """Execution time and shared buffer hits/reads of a plan."""
+    top = plan[0] if isinstance(plan, list) else plan
+    node = top.get("Plan", {})
+    return (
+        f"exec {top.get('Execution Time', 0):.1f}ms, "
+        f"shared hit {node.get('Shared Hit Blocks', 0)}, read {node.get('Shared Read Blocks', 0)}"
+    )
+
+
+def format_report(summary: list[dict], top: int = 20, indexes: dict | None = None) -> str:
+    """Human-readable top-offender report with plan-based suggestions."""
+    lines = [
+        f"{'origin':<44} {'calls':>6} {'total ms':>10} {'mean ms':>9} {'p95 ms':>9} {'max ms':>9}"
+    ]
+    for s in summary[:top]:
+        lines.append(
+            f"{s['origin'][:44]:<44} {s['calls']:>6} {s['total_ms']:>10.1f} "
+            f"{s['mean_ms']:>9.1f} {s['p95_ms']:>9.1f} {s['max_ms']:>9.1f}"
+        )
+
+    details = [s for s in summary[:top] if s["plan"] is not None]
+    for s in details:
+        lines.append("")
+        lines.append(f"== {s['origin']} [{s['fingerprint']}] ({_plan_totals(s['plan'])})")
+        lines.append(f"   {s['sql'][:200]}")
+        suggestions = recommend(s["plan"])
+        if indexes is not None:
+            suggestions = [x for x in suggestions if not _already_indexed(x, indexes)]
+        for suggestion in suggestions or ["-- No index suggestion from the plan"]:
+            lines.append(f"   {suggestion}")
+    return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="SQL profile report")
+    parser.add_argument("--dir", default=SQL_PROFILE_DIR, help="Profile directory")
+    parser.add_argument("--top", type=int, default=20, help="Number of statements to show")
+    parser.add_argument(
+        "--check-db", action="store_true", help="Skip suggestions already covered by an index"
+    )
+    parser.add_argument("--json", action="store_true", help="Print the summary as JSON")
+    args = parser.parse_args()
+
+    summary = summarize(load_records(args.dir))
+    if not summary:
+        print(f"No profile records in {args.dir} (run with SQL_PROFILE=true)")
+        sys.exit(0)
+
+    if args.json:
+        for s in summary[: args.top]:
+            s["suggestions"] = recommend(s["plan"])
+        print(json.dumps(summary[: args.top], ensure_ascii=False, indent=2, default=str))
+        sys.exit(0)
+
+    indexes = None
+    if args.check_db:
+        from src.db.connection import get_db
+
+        conn = get_db().get_connection()
+        try:
+            indexes = existing_indexes(conn)
+        finally:
+            conn.close()
+    print(format_report(summary, top=args.top, indexes=indexes))
@@ -19,14 +19,17 @@ from src.db.queries.horse_queries import (
 
 # Odds information queries
 from src.db.queries.odds_queries import (
+    combination_index,
     get_odds_bracket_quinella,
     get_odds_exacta,
     get_odds_quinella,
     get_odds_trifecta,
     get_odds_trio,
+    get_odds_version,
     get_odds_wide,
     get_odds_win_place,
     get_race_odds,
+    iter_exotic_odds_packed,
 )
 
 # Prediction data aggregation queries
@@ -75,7 +78,10 @@ __all__ = [
     "get_odds_trio",
     "get_odds_trifecta",
     "get_odds_bracket_quinella",
+    "get_odds_version",
     "get_race_odds",
+    "iter_exotic_odds_packed",
+    "combination_index",
     # Prediction data queries
     "get_race_prediction_data",
     "get_multiple_races_prediction_data",
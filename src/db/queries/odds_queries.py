@@ -6,6 +6,8 @@ quinella, trifecta, and other betting types.
 """
 
 import logging
+import struct
+from collections.abc import AsyncIterator, Sequence
 from typing import Any
 
 from asyncpg import Connection
@@ -29,14 +31,101 @@ logger = logging.getLogger(__name__)
 # Data category constants
 DATA_KUBUN_SAISYU_ODDS = "3"  # Final odds
 
+# Ticket type -> odds table
+ODDS_TABLES: dict[str, str] = {
+    "win": TABLE_ODDS_TANSHO,
+    "place": TABLE_ODDS_FUKUSHO,
+    "quinella": TABLE_ODDS_UMAREN,
+    "exacta": TABLE_ODDS_UMATAN,
+    "wide": TABLE_ODDS_WIDE,
+    "trio": TABLE_ODDS_SANRENPUKU,
+    "trifecta": TABLE_ODDS_SANRENTAN,
+    "bracket": TABLE_ODDS_WAKUREN,
+}
+
+# Exotic ticket type -> (odds table, odds column, combination size)
+# Wide uses the lower bound, consistent with the place odds used for EV.
+EXOTIC_ODDS_COLUMNS: dict[str, tuple[str, str, int]] = {
+    "quinella": (TABLE_ODDS_UMAREN, "umaren_odds", 2),
+    "exacta": (TABLE_ODDS_UMATAN, "umatan_odds", 2),
+    "wide": (TABLE_ODDS_WIDE, "wide_odds_min", 2),
+    "trio": (TABLE_ODDS_SANRENPUKU, "sanrenpuku_odds", 3),
+    "trifecta": (TABLE_ODDS_SANRENTAN, "sanrentan_odds", 3),
+}
+
+# Packed odds tables are indexed as base-18 numbers of (horse number - 1)
+PACKED_ODDS_BASE = 18
+PACKED_ODDS_ITEM_SIZE = 4  # little-endian uint32, raw JRA-VAN value (odds x 10)
+
+# update_timestamp normalized to digits only (YYYYMMDDHHMMSS) so versions compare as strings
+_VERSION_EXPR = "regexp_replace(update_timestamp, '[^0-9]', '', 'g')"
+
+
+def _updated_since_clause(updated_since: str | None, param_index: int) -> str:
+    """Build the optional delta filter for rows updated after a version."""
+    if not updated_since:
+        return ""
+    return f"AND {_VERSION_EXPR} > ${param_index}"
+
+
+def _query_args(race_id: str, updated_since: str | None) -> list[Any]:
+    """Build positional query arguments matching _updated_since_clause."""
+    args: list[Any] = [race_id, DATA_KUBUN_SAISYU_ODDS]
+    if updated_since:
+        args.append(updated_since)
+    return args
+
+
+async def get_odds_version(conn: Connection, race_id: str, ticket_type: str) -> str | None:
+    """
+    Get the current odds version for a ticket type.
+
+    The version is the latest row update timestamp (digits only) in the
+    ticket type's odds table. It changes only when JRA-VAN publishes new odds,
+    so it can be used as an ETag and as the base for delta requests.
+
+    Args:
+        conn: Database connection.
+        race_id: Race ID (16 digits).
+        ticket_type: Ticket type (win/place/quinella/exacta/wide/trio/trifecta/bracket).
+
+    Returns:
+        Version string (e.g. "20250125153012"), or None if no odds exist.
 
-async def get_odds_win_place(conn: Connection, race_id: str) -> dict[str, Any]:
+    Raises:
+        ValueError: Unknown ticket type.
+    """
+    table = ODDS_TABLES.get(ticket_type)
+    if table is None:
+        raise ValueError(f"Unknown ticket type: {ticket_type}")
+
+    sql = f"""
+        SELECT MAX({_VERSION_EXPR}) AS version
+        FROM {table}
+        WHERE {COL_RACE_ID} = $1
+          AND {COL_DATA_KUBUN} = $2
+    """
+
+    try:
+        version = await conn.fetchval(sql, race_id, DATA_KUBUN_SAISYU_ODDS)
+        return version or None
+    except Exception as e:
+        logger.error(
+            f"Failed to get odds version: race_id={race_id}, ticket_type={ticket_type}, error={e}"
+        )
+        raise
+
+
+async def get_odds_win_place(
+    conn: Connection, race_id: str, updated_since: str | None = None
+) -> dict[str, Any]:
     """
     Get win and place odds.
 
     Args:
         conn: Database connection.
         race_id: Race ID (16 digits).
+        updated_since: Return only rows updated after this version (optional).
 
     Returns:
         {
@@ -53,6 +142,7 @@ async def get_odds_win_place(conn: Connection, race_id: str) -> dict[str, Any]:
         FROM {TABLE_ODDS_TANSHO}
         WHERE {COL_RACE_ID} = $1
           AND {COL_DATA_KUBUN} = $2
+          {_updated_since_clause(updated_since, 3)}
         ORDER BY {COL_UMABAN}
     """
 
@@ -66,12 +156,13 @@ async def get_odds_win_place(conn: Connection, race_id: str) -> dict[str, Any]:
         FROM {TABLE_ODDS_FUKUSHO}
         WHERE {COL_RACE_ID} = $1
           AND {COL_DATA_KUBUN} = $2
+          {_updated_since_clause(updated_since, 3)}
         ORDER BY {COL_UMABAN}
     """
 
     try:
         # Win odds
-        win_rows = await conn.fetch(sql_win, race_id, DATA_KUBUN_SAISYU_ODDS)
+        win_rows = await conn.fetch(sql_win, *_query_args(race_id, updated_since))
         win_odds = []
         for row in win_rows:
             if row["odds"]:
@@ -84,7 +175,7 @@ async def get_odds_win_place(conn: Connection, race_id: str) -> dict[str, Any]:
                 )
 
         # Place odds
-        place_rows = await conn.fetch(sql_place, race_id, DATA_KUBUN_SAISYU_ODDS)
+        place_rows = await conn.fetch(sql_place, *_query_args(race_id, updated_since))
         place_odds = []
         for row in place_rows:
             if row["odds_saitei"] and row["odds_saikou"]:
@@ -104,7 +195,10 @@ async def get_odds_win_place(conn: Connection, race_id: str) -> dict[str, Any]:
 
 
 async def get_odds_quinella(
-    conn: Connection, race_id: str, limit: int | None = None
+    conn: Connection,
+    race_id: str,
+    limit: int | None = None,
+    updated_since: str | None = None,
 ) -> list[dict[str, Any]]:
     """
     Get quinella odds.
@@ -113,6 +207,7 @@ async def get_odds_quinella(
         conn: Database connection.
         race_id: Race ID (16 digits).
         limit: Maximum number of results (optional, sorted by popularity).
+        updated_since: Return only rows updated after this version (optional).
 
     Returns:
         [{"kumi": "3-7", "umaban1": 3, "umaban2": 7, "odds": 18.5, "ninki": 1}, ...]
@@ -126,6 +221,7 @@ async def get_odds_quinella(
         FROM {TABLE_ODDS_UMAREN}
         WHERE {COL_RACE_ID} = $1
           AND {COL_DATA_KUBUN} = $2
+          {_updated_since_clause(updated_since, 3)}
         ORDER BY umaren_ninki
     """
 
@@ -133,7 +229,7 @@ async def get_odds_quinella(
         sql += f" LIMIT {limit}"
 
     try:
-        rows = await conn.fetch(sql, race_id, DATA_KUBUN_SAISYU_ODDS)
+        rows = await conn.fetch(sql, *_query_args(race_id, updated_since))
 
         result = []
         for row in rows:
@@ -155,7 +251,10 @@ async def get_odds_quinella(
 
 
 async def get_odds_exacta(
-    conn: Connection, race_id: str, limit: int | None = None
+    conn: Connection,
+    race_id: str,
+    limit: int | None = None,
+    updated_since: str | None = None,
 ) -> list[dict[str, Any]]:
     """
     Get exacta odds.
@@ -164,6 +263,7 @@ async def get_odds_exacta(
         conn: Database connection.
         race_id: Race ID (16 digits).
         limit: Maximum number of results (optional, sorted by popularity).
+        updated_since: Return only rows updated after this version (optional).
 
     Returns:
         [{"kumi": "3->7", "umaban1": 3, "umaban2": 7, "odds": 45.2, "ninki": 1}, ...]
@@ -177,6 +277,7 @@ async def get_odds_exacta(
         FROM {TABLE_ODDS_UMATAN}
         WHERE {COL_RACE_ID} = $1
           AND {COL_DATA_KUBUN} = $2
+          {_updated_since_clause(updated_since, 3)}
         ORDER BY umatan_ninki
     """
 
@@ -184,7 +285,7 @@ async def get_odds_exacta(
         sql += f" LIMIT {limit}"
 
     try:
-        rows = await conn.fetch(sql, race_id, DATA_KUBUN_SAISYU_ODDS)
+        rows = await conn.fetch(sql, *_query_args(race_id, updated_since))
 
         result = []
         for row in rows:
@@ -206,7 +307,10 @@ async def get_odds_exacta(
 
 
 async def get_odds_wide(
-    conn: Connection, race_id: str, limit: int | None = None
+    conn: Connection,
+    race_id: str,
+    limit: int | None = None,
+    updated_since: str | None = None,
 ) -> list[dict[str, Any]]:
     """
     Get wide odds.
@@ -215,6 +319,7 @@ async def get_odds_wide(
         conn: Database connection.
         race_id: Race ID (16 digits).
         limit: Maximum number of results (optional, sorted by popularity).
+        updated_since: Return only rows updated after this version (optional).
 
     Returns:
         [{"kumi": "3-7", "umaban1": 3, "umaban2": 7, "odds_min": 5.0, "odds_max": 7.5, "ninki": 1}, ...]
@@ -229,6 +334,7 @@ async def get_odds_wide(
         FROM {TABLE_ODDS_WIDE}
         WHERE {COL_RACE_ID} = $1
           AND {COL_DATA_KUBUN} = $2
+          {_updated_since_clause(updated_since, 3)}
         ORDER BY wide_ninki
     """
 
@@ -236,7 +342,7 @@ async def get_odds_wide(
         sql += f" LIMIT {limit}"
 
     try:
-        rows = await conn.fetch(sql, race_id, DATA_KUBUN_SAISYU_ODDS)
+        rows = await conn.fetch(sql, *_query_args(race_id, updated_since))
 
         result = []
         for row in rows:
@@ -259,7 +365,10 @@ async def get_odds_wide(
 
 
 async def get_odds_trio(
-    conn: Connection, race_id: str, limit: int | None = None
+    conn: Connection,
+    race_id: str,
+    limit: int | None = None,
+    updated_since: str | None = None,
 ) -> list[dict[str, Any]]:
     """
     Get trio odds.
@@ -268,6 +377,7 @@ async def get_odds_trio(
         conn: Database connection.
         race_id: Race ID (16 digits).
         limit: Maximum number of results (optional, sorted by popularity).
+        updated_since: Return only rows updated after this version (optional).
 
     Returns:
         [{"kumi": "3-7-12", "umaban1": 3, "umaban2": 7, "umaban3": 12, "odds": 85.0, "ninki": 1}, ...]
@@ -283,6 +393,7 @@ async def get_odds_trio(
         WHERE {COL_RACE_ID} = $1
           AND {COL_DATA_KUBUN} = $2
           AND sanrenpuku_odds IS NOT NULL
+          {_updated_since_clause(updated_since, 3)}
         ORDER BY sanrenpuku_ninki
     """
 
@@ -290,7 +401,7 @@ async def get_odds_trio(
         sql += f" LIMIT {limit}"
 
     try:
-        rows = await conn.fetch(sql, race_id, DATA_KUBUN_SAISYU_ODDS)
+        rows = await conn.fetch(sql, *_query_args(race_id, updated_since))
 
         result = []
         for row in rows:
@@ -313,7 +424,10 @@ async def get_odds_trio(
 
 
 async def get_odds_trifecta(
-    conn: Connection, race_id: str, limit: int | None = None
+    conn: Connection,
+    race_id: str,
+    limit: int | None = None,
+    updated_since: str | None = None,
 ) -> list[dict[str, Any]]:
     """
     Get trifecta odds.
@@ -322,6 +436,7 @@ async def get_odds_trifecta(
         conn: Database connection.
         race_id: Race ID (16 digits).
         limit: Maximum number of results (optional, sorted by popularity).
+        updated_since: Return only rows updated after this version (optional).
 
     Returns:
         [{"kumi": "3->7->12", "umaban1": 3, "umaban2": 7, "umaban3": 12, "odds": 450.0, "ninki": 1}, ...]
@@ -337,6 +452,7 @@ async def get_odds_trifecta(
         WHERE {COL_RACE_ID} = $1
           AND {COL_DATA_KUBUN} = $2
           AND sanrentan_odds IS NOT NULL
+          {_updated_since_clause(updated_since, 3)}
         ORDER BY sanrentan_ninki
     """
 
@@ -344,7 +460,7 @@ async def get_odds_trifecta(
         sql += f" LIMIT {limit}"
 
     try:
-        rows = await conn.fetch(sql, race_id, DATA_KUBUN_SAISYU_ODDS)
+        rows = await conn.fetch(sql, *_query_args(race_id, updated_since))
 
         result = []
         for row in rows:
@@ -367,7 +483,10 @@ async def get_odds_trifecta(
 
 
 async def get_odds_bracket_quinella(
-    conn: Connection, race_id: str, limit: int | None = None
+    conn: Connection,
+    race_id: str,
+    limit: int | None = None,
+    updated_since: str | None = None,
 ) -> list[dict[str, Any]]:
     """
     Get bracket quinella odds.
@@ -376,6 +495,7 @@ async def get_odds_bracket_quinella(
         conn: Database connection.
         race_id: Race ID (16 digits).
         limit: Maximum number of results (optional, sorted by popularity).
+        updated_since: Return only rows updated after this version (optional).
 
     Returns:
         [{"kumi": "1-3", "wakuban1": 1, "wakuban2": 3, "odds": 12.5, "ninki": 1}, ...]
@@ -389,6 +509,7 @@ async def get_odds_bracket_quinella(
         FROM {TABLE_ODDS_WAKUREN}
         WHERE {COL_RACE_ID} = $1
           AND {COL_DATA_KUBUN} = $2
+          {_updated_since_clause(updated_since, 3)}
         ORDER BY wakuren_ninki
     """
 
@@ -396,7 +517,7 @@ async def get_odds_bracket_quinella(
         sql += f" LIMIT {limit}"
 
     try:
-        rows = await conn.fetch(sql, race_id, DATA_KUBUN_SAISYU_ODDS)
+        rows = await conn.fetch(sql, *_query_args(race_id, updated_since))
 
         result = []
         for row in rows:
@@ -485,3 +606,100 @@ async def get_race_odds(
         # Return empty dict if odds table doesn't exist
         logger.warning(f"Odds not available: race_id={race_id}, error={e}")
         return {}
+
+
+def combination_index(numbers: Sequence[int]) -> int:
+    """
+    Get the packed-table index of a horse number combination.
+
+    Args:
+        numbers: Horse numbers in bet order (sorted ascending for quinella/wide/trio).
+
+    Returns:
+        Index into the packed odds table (e.g. 3->7->12 = 2*18*18 + 6*18 + 11).
+    """
+    index = 0
+    for number in numbers:
+        index = index * PACKED_ODDS_BASE + (number - 1)
+    return index
+
+
+def _parse_raw_odds(value: Any) -> int:
+    """Parse a raw odds column (10x integer text) into an int, 0 if not sold."""
+    try:
+        return int(value)
+    except (ValueError, TypeError):
+        return 0
+
+
+async def iter_exotic_odds_packed(
+    conn: Connection, race_id: str, ticket_type: str, chunk_rows: int = 1024
+) -> AsyncIterator[bytes]:
+    """
+    Stream the complete exotic odds table as a packed array.
+
+    The output is a dense little-endian uint32 array of length 18**k
+    (k = combination size) indexed by combination_index(). Each value is the
+    raw JRA-VAN odds (odds x 10) and 0 means the combination is not sold.
+    Rows are read with a server-side cursor in combination order, so the
+    table is never materialized as per-row objects.
+
+    Args:
+        conn: Database connection.
+        race_id: Race ID (16 digits).
+        ticket_type: Exotic ticket type (quinella/exacta/wide/trio/trifecta).
+        chunk_rows: Rows fetched per cursor round trip.
+
+    Yields:
+        Chunks of the packed array.
+
+    Raises:
+        ValueError: Unknown ticket type.
+    """
+    if ticket_type not in EXOTIC_ODDS_COLUMNS:
+        raise ValueError(f"Unknown exotic ticket type: {ticket_type}")
+
+    table, odds_column, size = EXOTIC_ODDS_COLUMNS[ticket_type]
+    umaban_columns = [f"umaban_{i}" for i in range(1, size + 1)]
+    sql = f"""
+        SELECT {", ".join(umaban_columns)}, {odds_column}
+        FROM {table}
+        WHERE {COL_RACE_ID} = $1
+          AND {COL_DATA_KUBUN} = $2
+        ORDER BY {", ".join(umaban_columns)}
+    """
+
+    total = PACKED_ODDS_BASE**size
+    chunk_bytes = chunk_rows * PACKED_ODDS_ITEM_SIZE
+    position = 0
+    buffer = bytearray()
+
+    try:
+        async with conn.transaction():
+            async for row in conn.cursor(sql, race_id, DATA_KUBUN_SAISYU_ODDS, prefetch=chunk_rows):
+                try:
+                    numbers = [int(row[col]) for col in umaban_columns]
+                except (ValueError, TypeError):
+                    continue
+                if not all(1 <= n <= PACKED_ODDS_BASE for n in numbers):
+                    continue
+                index = combination_index(numbers)
+                if index < position:
+                    continue
+
+                # Zero-fill unsold combinations between rows
+                buffer += bytes((index - position) * PACKED_ODDS_ITEM_SIZE)
+                buffer += struct.pack("<I", _parse_raw_odds(row[odds_column]))
+                position = index + 1
+
+                if len(buffer) >= chunk_bytes:
+                    yield bytes(buffer)
+                    buffer.clear()
+
+        buffer += bytes((total - position) * PACKED_ODDS_ITEM_SIZE)
+        yield bytes(buffer)
+    except Exception as e:
+        logger.error(
+            f"Failed to stream exotic odds: race_id={race_id}, ticket_type={ticket_type}, error={e}"
+        )
+        raise
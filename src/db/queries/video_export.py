@@ -33,55 +33,81 @@ from src.db.table_names import (
 logger = logging.getLogger(__name__)
 
 
-async def get_horse_past_races(
-    conn: Connection, ketto_toroku_bango: str, limit: int = 5
-) -> list[dict[str, Any]]:
-    """Get recent race results for a horse.
+def _record_stats(runs: int, win_count: int, place_count: int) -> dict[str, Any]:
+    """Build a runs/wins/places stats dict with rates."""
+    return {
+        "runs": runs,
+        "win_count": win_count,
+        "place_count": place_count,
+        "win_rate": round(win_count / runs, 3) if runs > 0 else 0.0,
+        "place_rate": round(place_count / runs, 3) if runs > 0 else 0.0,
+    }
+
+
+EMPTY_COURSE_STATS: dict[str, Any] = _record_stats(0, 0, 0)
+
+
+async def get_horses_past_races(
+    conn: Connection, ketto_toroku_bangos: list[str], limit: int = 5
+) -> dict[str, list[dict[str, Any]]]:
+    """Get recent race results for several horses in one query.
 
     Args:
         conn: Database connection.
-        ketto_toroku_bango: Pedigree registration number.
-        limit: Max number of past races to retrieve.
+        ketto_toroku_bangos: Pedigree registration numbers.
+        limit: Max number of past races to retrieve per horse.
 
     Returns:
-        List of past race dicts sorted by most recent first.
+        Dict mapping pedigree registration number to past race dicts sorted by
+        most recent first. Horses without results are absent.
     """
+    if not ketto_toroku_bangos:
+        return {}
+
     sql = f"""
-        SELECT
-            se.{COL_RACE_ID},
-            r.{COL_RACE_NAME},
-            r.{COL_KAISAI_YEAR},
-            r.{COL_KAISAI_MONTHDAY},
-            r.{COL_JYOCD},
-            r.{COL_KYORI},
-            r.{COL_TRACK_CD},
-            r.grade_code,
-            se.kakutei_chakujun,
-            se.tansho_odds,
-            se.ninki_jun,
-            se.soha_time,
-            se.kohan_3f,
-            se.{COL_UMABAN},
-            se.futan_juryo,
-            ks.kishumei
-        FROM {TABLE_UMA_RACE} se
-        INNER JOIN {TABLE_RACE} r ON se.{COL_RACE_ID} = r.{COL_RACE_ID}
-            AND r.{COL_DATA_KUBUN} = $2
-        LEFT JOIN {TABLE_KISYU} ks ON se.{COL_KISYUCODE} = ks.{COL_KISYUCODE}
-        WHERE se.{COL_KETTONUM} = $1
-          AND se.{COL_DATA_KUBUN} = $2
-          AND se.kakutei_chakujun IS NOT NULL
-        ORDER BY r.{COL_KAISAI_YEAR} DESC, r.{COL_KAISAI_MONTHDAY} DESC
-        LIMIT $3
+        SELECT *
+        FROM (
+            SELECT
+                se.{COL_KETTONUM},
+                se.{COL_RACE_ID},
+                r.{COL_RACE_NAME},
+                r.{COL_KAISAI_YEAR},
+                r.{COL_KAISAI_MONTHDAY},
+                r.{COL_JYOCD},
+                r.{COL_KYORI},
+                r.{COL_TRACK_CD},
+                r.grade_code,
+                se.kakutei_chakujun,
+                se.tansho_odds,
+                se.ninki_jun,
+                se.soha_time,
+                se.kohan_3f,
+                se.{COL_UMABAN},
+                se.futan_juryo,
+                ks.kishumei,
+                ROW_NUMBER() OVER (
+                    PARTITION BY se.{COL_KETTONUM}
+                    ORDER BY r.{COL_KAISAI_YEAR} DESC, r.{COL_KAISAI_MONTHDAY} DESC
+                ) AS rn
+            FROM {TABLE_UMA_RACE} se
+            INNER JOIN {TABLE_RACE} r ON se.{COL_RACE_ID} = r.{COL_RACE_ID}
+                AND r.{COL_DATA_KUBUN} = $2
+            LEFT JOIN {TABLE_KISYU} ks ON se.{COL_KISYUCODE} = ks.{COL_KISYUCODE}
+            WHERE se.{COL_KETTONUM} = ANY($1)
+              AND se.{COL_DATA_KUBUN} = $2
+              AND se.kakutei_chakujun IS NOT NULL
+        ) recent
+        WHERE rn <= $3
+        ORDER BY {COL_KETTONUM}, rn
     """
 
     try:
-        rows = await conn.fetch(sql, ketto_toroku_bango, DATA_KUBUN_KAKUTEI, limit)
-        results = []
+        rows = await conn.fetch(sql, list(ketto_toroku_bangos), DATA_KUBUN_KAKUTEI, limit)
+        results: dict[str, list[dict[str, Any]]] = {}
         for row in rows:
             year = row[COL_KAISAI_YEAR]
             monthday = row[COL_KAISAI_MONTHDAY]
-            results.append(
+            results.setdefault(row[COL_KETTONUM], []).append(
                 {
                     "race_code": row[COL_RACE_ID],
                     "race_name": (row[COL_RACE_NAME] or "").strip(),
@@ -102,128 +128,118 @@ async def get_horse_past_races(
             )
         return results
     except Exception as e:
-        logger.error(f"Failed to get horse past races: {ketto_toroku_bango}, error={e}")
+        logger.error(
+            f"Failed to get horse past races: {len(ketto_toroku_bangos)} horses, error={e}"
+        )
         raise
 
 
-async def get_jockey_course_stats(
+async def _get_course_stats_by(
     conn: Connection,
-    kishu_code: str,
+    key_column: str,
+    keys: list[str],
     keibajo_code: str,
     track_code: str,
     kyori: int,
-) -> dict[str, Any]:
-    """Get jockey stats for a specific course.
-
-    Args:
-        conn: Database connection.
-        kishu_code: Jockey code.
-        keibajo_code: Racecourse code.
-        track_code: Track code (turf/dirt).
-        kyori: Distance.
+) -> dict[str, dict[str, Any]]:
+    """Aggregate course stats (+/- 200m) grouped by a runner column."""
+    if not keys:
+        return {}
 
-    Returns:
-        Dict with win_count, place_count, runs, win_rate, place_rate.
-    """
-    # Distance range: +/- 200m
     dist_min = kyori - 200
     dist_max = kyori + 200
 
     sql = f"""
         SELECT
+            se.{key_column} AS group_key,
             COUNT(*) AS runs,
             COUNT(*) FILTER (WHERE se.kakutei_chakujun = '01') AS win_count,
             COUNT(*) FILTER (WHERE se.kakutei_chakujun IN ('01','02','03')) AS place_count
         FROM {TABLE_UMA_RACE} se
         INNER JOIN {TABLE_RACE} r ON se.{COL_RACE_ID} = r.{COL_RACE_ID}
             AND r.{COL_DATA_KUBUN} = $5
-        WHERE se.{COL_KISYUCODE} = $1
+        WHERE se.{key_column} = ANY($1)
           AND r.{COL_JYOCD} = $2
           AND r.{COL_TRACK_CD} LIKE $3
           AND r.{COL_KYORI}::int BETWEEN $4 AND $6
           AND se.{COL_DATA_KUBUN} = $5
           AND se.kakutei_chakujun IS NOT NULL
+        GROUP BY se.{key_column}
     """
 
+    rows = await conn.fetch(
+        sql,
+        list(keys),
+        keibajo_code,
+        f"{track_code}%",
+        dist_min,
+        DATA_KUBUN_KAKUTEI,
+        dist_max,
+    )
+    stats = {key: dict(EMPTY_COURSE_STATS) for key in keys}
+    for row in rows:
+        stats[row["group_key"]] = _record_stats(row["runs"], row["win_count"], row["place_count"])
+    return stats
+
+
+async def get_jockeys_course_stats(
+    conn: Connection,
+    kishu_codes: list[str],
+    keibajo_code: str,
+    track_code: str,
+    kyori: int,
+) -> dict[str, dict[str, Any]]:
+    """Get course stats for several jockeys in one query.
+
+    Args:
+        conn: Database connection.
+        kishu_codes: Jockey codes.
+        keibajo_code: Racecourse code.
+        track_code: Track code (turf/dirt).
+        kyori: Distance.
+
+    Returns:
+        Dict mapping jockey code to {win_count, place_count, runs, win_rate, place_rate}.
+        Every requested jockey is present (zero stats if no runs).
+    """
     try:
-        row = await conn.fetchrow(
-            sql, kishu_code, keibajo_code, f"{track_code}%", dist_min, DATA_KUBUN_KAKUTEI, dist_max
+        return await _get_course_stats_by(
+            conn, COL_KISYUCODE, kishu_codes, keibajo_code, track_code, kyori
         )
-        runs = row["runs"] if row else 0
-        win_count = row["win_count"] if row else 0
-        place_count = row["place_count"] if row else 0
-        return {
-            "runs": runs,
-            "win_count": win_count,
-            "place_count": place_count,
-            "win_rate": round(win_count / runs, 3) if runs > 0 else 0.0,
-            "place_rate": round(place_count / runs, 3) if runs > 0 else 0.0,
-        }
     except Exception as e:
-        logger.error(f"Failed to get jockey course stats: {kishu_code}, error={e}")
+        logger.error(f"Failed to get jockey course stats: {len(kishu_codes)} jockeys, error={e}")
         raise
 
 
-async def get_horse_course_stats(
+async def get_horses_course_stats(
     conn: Connection,
-    ketto_toroku_bango: str,
+    ketto_toroku_bangos: list[str],
     keibajo_code: str,
     track_code: str,
     kyori: int,
-) -> dict[str, Any]:
-    """Get horse stats for a specific course.
+) -> dict[str, dict[str, Any]]:
+    """Get course stats for several horses in one query.
 
     Args:
         conn: Database connection.
-        ketto_toroku_bango: Pedigree registration number.
+        ketto_toroku_bangos: Pedigree registration numbers.
         keibajo_code: Racecourse code.
         track_code: Track code (turf/dirt).
         kyori: Distance.
 
     Returns:
-        Dict with win_count, place_count, runs, win_rate, place_rate.
+        Dict mapping pedigree registration number to
+        {win_count, place_count, runs, win_rate, place_rate}.
+        Every requested horse is present (zero stats if no runs).
     """
-    dist_min = kyori - 200
-    dist_max = kyori + 200
-
-    sql = f"""
-        SELECT
-            COUNT(*) AS runs,
-            COUNT(*) FILTER (WHERE se.kakutei_chakujun = '01') AS win_count,
-            COUNT(*) FILTER (WHERE se.kakutei_chakujun IN ('01','02','03')) AS place_count
-        FROM {TABLE_UMA_RACE} se
-        INNER JOIN {TABLE_RACE} r ON se.{COL_RACE_ID} = r.{COL_RACE_ID}
-            AND r.{COL_DATA_KUBUN} = $5
-        WHERE se.{COL_KETTONUM} = $1
-          AND r.{COL_JYOCD} = $2
-          AND r.{COL_TRACK_CD} LIKE $3
-          AND r.{COL_KYORI}::int BETWEEN $4 AND $6
-          AND se.{COL_DATA_KUBUN} = $5
-          AND se.kakutei_chakujun IS NOT NULL
-    """
-
     try:
-        row = await conn.fetchrow(
-            sql,
-            ketto_toroku_bango,
-            keibajo_code,
-            f"{track_code}%",
-            dist_min,
-            DATA_KUBUN_KAKUTEI,
-            dist_max,
+        return await _get_course_stats_by(
+            conn, COL_KETTONUM, ketto_toroku_bangos, keibajo_code, track_code, kyori
         )
-        runs = row["runs"] if row else 0
-        win_count = row["win_count"] if row else 0
-        place_count = row["place_count"] if row else 0
-        return {
-            "runs": runs,
-            "win_count": win_count,
-            "place_count": place_count,
-            "win_rate": round(win_count / runs, 3) if runs > 0 else 0.0,
-            "place_rate": round(place_count / runs, 3) if runs > 0 else 0.0,
-        }
     except Exception as e:
-        logger.error(f"Failed to get horse course stats: {ketto_toroku_bango}, error={e}")
+        logger.error(
+            f"Failed to get horse course stats: {len(ketto_toroku_bangos)} horses, error={e}"
+        )
         raise
 
 
@@ -273,17 +289,9 @@ async def get_waku_bias(
         )
         result = {}
         for row in rows:
-            waku = row["wakuban"]
-            runs = row["runs"]
-            win_count = row["win_count"]
-            place_count = row["place_count"]
-            result[waku] = {
-                "runs": runs,
-                "win_count": win_count,
-                "place_count": place_count,
-                "win_rate": round(win_count / runs, 3) if runs > 0 else 0.0,
-                "place_rate": round(place_count / runs, 3) if runs > 0 else 0.0,
-            }
+            result[row["wakuban"]] = _record_stats(
+                row["runs"], row["win_count"], row["place_count"]
+            )
         return result
     except Exception as e:
         logger.error(f"Failed to get waku bias: {keibajo_code}, error={e}")
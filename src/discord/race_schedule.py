@@ -0,0 +1,296 @@
+"""
+Race-Time Schedule
+
+Heap of exact-timestamp jobs for one day's race card: a feature pre-warm
+shortly before each final prediction, and the final prediction itself at
+T-SCHEDULER_FINAL_PREDICTION_MINUTES_BEFORE. Post-time changes push new
+entries; superseded ones are dropped lazily when they reach the top.
+
+A failed final prediction is retried with exponential backoff until the
+race starts.
+
+The card and completed final predictions are persisted to a JSON state file,
+so a bot restart neither repeats finished races nor loses pending ones.
+Races whose final time passed while the bot was down still fire immediately
+as long as they have not started.
+"""
+
+import heapq
+import json
+import logging
+import os
+from datetime import date, datetime, time, timedelta, tzinfo
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+# Job kinds
+PREWARM = "prewarm"
+FINAL = "final"
+RETRY = "retry"  # Final prediction retried after a failure
+
+
+def parse_post_time(race_date: date, race_time: str, tz: tzinfo) -> datetime | None:
+    """
+    Parse a race's post time.
+
+    Args:
+        race_date: Race date
+        race_time: Post time ("HH:MM" or "HHMM")
+        tz: Timezone of the post time
+
+    Returns:
+        Post time, or None if the format is unknown
+    """
+    try:
+        if ":" in race_time:
+            hour, minute = map(int, race_time.split(":"))
+        elif len(race_time) == 4:
+            hour, minute = int(race_time[:2]), int(race_time[2:])
+        else:
+            raise ValueError(f"Unknown time format: {race_time}")
+        return datetime.combine(race_date, time(hour=hour, minute=minute), tzinfo=tz)
+    except (ValueError, IndexError) as e:
+        logger.warning(f"Race time parse failed: {race_time} ({e})")
+        return None
+
+
+class RaceSchedule:
+    """
+    Exact-time job schedule for the current race card.
+
+    Heap entries are (fire_at timestamp, race_id, kind). An entry is live only
+    while its timestamp still matches the race's current post time (or its
+    latest retry) and the race has no completed final prediction.
+    """
+
+    def __init__(
+        self,
+        final_minutes_before: int,
+        prewarm_minutes_before: int,
+        state_path: str | Path | None = None,
+        retry_base_seconds: float = 30,
+        retry_max_seconds: float = 300,
+    ):
+        """
+        Args:
+            final_minutes_before: Final prediction lead time before post (minutes)
+            prewarm_minutes_before: Pre-warm lead time before the final prediction (minutes)
+            state_path: JSON state file (None to disable persistence)
+            retry_base_seconds: Delay before the first retry of a failed final prediction
+            retry_max_seconds: Upper bound of the doubling retry delay
+        """
+        self.final_lead = timedelta(minutes=final_minutes_before)
+        self.prewarm_lead = timedelta(minutes=prewarm_minutes_before)
+        self.retry_base = timedelta(seconds=retry_base_seconds)
+        self.retry_max = timedelta(seconds=retry_max_seconds)
+        self.state_path = Path(state_path) if state_path else None
+
+        self.card_date: date | None = None
+        self.post_times: dict[str, datetime] = {}  # race_id -> post time
+        self.predicted: set[str] = set()  # Races with a completed final prediction
+        self._retries: dict[str, tuple[float, int]] = {}  # race_id -> (retry at, attempts)
+        self._heap: list[tuple[float, str, str]] = []
+
+    def fire_time(self, race_id: str, kind: str) -> datetime | None:
+        """Current fire time of a race's job (None if the race is not on the card)."""
+        post_time = self.post_times.get(race_id)
+        if post_time is None:
+            return None
+        final_at = post_time - self.final_lead
+        return final_at - self.prewarm_lead if kind == PREWARM else final_at
+
+    def _push(self, race_id: str, now: datetime) -> None:
+        """Schedule a race's jobs (overdue pre-warms are skipped)."""
+        self._retries.pop(race_id, None)
+        if race_id in self.predicted or self.post_times[race_id] <= now:
+            return
+        for kind in (PREWARM, FINAL):
+            fire_at = self.fire_time(race_id, kind)
+            if fire_at is None or (kind == PREWARM and fire_at <= now):
+                continue
+            heapq.heappush(self._heap, (fire_at.timestamp(), race_id, kind))
+
+    def _is_live(self, entry: tuple[float, str, str]) -> bool:
+        """Check a heap entry has not been superseded."""
+        fire_at, race_id, kind = entry
+        if kind == RETRY:
+            retry = self._retries.get(race_id)
+            return retry is not None and retry[0] == fire_at and race_id not in self.predicted
+        current = self.fire_time(race_id, kind)
+        return (
+            current is not None and current.timestamp() == fire_at and race_id not in self.predicted
+        )
+
+    def _rebuild(self, now: datetime) -> None:
+        """Rebuild the heap from the card."""
+        self._heap = []
+        self._retries = {}
+        for race_id in self.post_times:
+            self._push(race_id, now)
+
+    def update_card(
+        self, card_date: date, post_times: dict[str, datetime], now: datetime
+    ) -> list[str]:
+        """
+        Load or refresh the race card.
+
+        A new date replaces the card and forgets the previous day's predictions;
+        on the same date only new races and changed post times are rescheduled,
+        and races dropped from the card are unscheduled.
+
+        Args:
+            card_date: Card date
+            post_times: Post time per race_id
+            now: Current time
+
+        Returns:
+            Race IDs that were added, changed or removed
+        """
+        if card_date != self.card_date:
+            self.card_date = card_date
+            self.post_times = dict(post_times)
+            self.predicted = set()
+            self._rebuild(now)
+            return sorted(post_times)
+
+        changed = sorted(
+            race_id
+            for race_id in set(post_times) | set(self.post_times)
+            if post_times.get(race_id) != self.post_times.get(race_id)
+        )
+        self.post_times = dict(post_times)
+        for race_id in changed:
+            if race_id in self.post_times:
+                self._push(race_id, now)
+            else:
+                self._retries.pop(race_id, None)
+        return changed
+
+    def pop_due(self, now: datetime) -> list[tuple[str, str]]:
+        """
+        Pop all jobs due at now.
+
+        Returns:
+            (race_id, kind) pairs in fire order
+        """
+        due = []
+        cutoff = now.timestamp()
+        while self._heap and self._heap[0][0] <= cutoff:
+            entry = heapq.heappop(self._heap)
+            if self._is_live(entry):
+                due.append((entry[1], entry[2]))
+        return due
+
+    def next_fire_at(self) -> float | None:
+        """Timestamp of the next live job (None if nothing is scheduled)."""
+        while self._heap and not self._is_live(self._heap[0]):
+            heapq.heappop(self._heap)
+        return self._heap[0][0] if self._heap else None
+
+    def mark_predicted(self, race_id: str) -> None:
+        """Record a completed final prediction."""
+        self.predicted.add(race_id)
+        self._retries.pop(race_id, None)
+
+    def retry_final(self, race_id: str, now: datetime) -> datetime | None:
+        """
+        Reschedule a failed final prediction.
+
+        The delay doubles with each attempt (up to retry_max); a post-time
+        change resets it.
+
+        Args:
+            race_id: Race whose final prediction failed
+            now: Current time
+
+        Returns:
+            Retry time, or None if the race is off the card, done or would start first
+        """
+        post_time = self.post_times.get(race_id)
+        if post_time is None or race_id in self.predicted:
+            return None
+        _, attempts = self._retries.get(race_id, (0.0, 0))
+        retry_at = now + min(self.retry_base * 2**attempts, self.retry_max)
+        if retry_at >= post_time:
+            return None
+        self._retries[race_id] = (retry_at.timestamp(), attempts + 1)
+        heapq.heappush(self._heap, (retry_at.timestamp(), race_id, RETRY))
+        return retry_at
+
+    def reset(self, now: datetime) -> None:
+        """Forget completed predictions and reschedule the remaining races."""
+        self.predicted = set()
+        self._rebuild(now)
+
+    def pending(self, now: datetime) -> list[str]:
+        """Races still waiting for a final prediction, by post time."""
+        return sorted(
+            (
+                race_id
+                for race_id, post_time in self.post_times.items()
+                if post_time > now and race_id not in self.predicted
+            ),
+            key=self.post_times.__getitem__,
+        )
+
+    def is_finished(self, now: datetime) -> bool:
+        """Check every race on the card has started."""
+        return all(post_time <= now for post_time in self.post_times.values())
+
+    def save(self) -> None:
+        """Persist the card and completed predictions (atomic replace)."""
+        if self.state_path is None or self.card_date is None:
+            return
+        state = {
+            "card_date": self.card_date.isoformat(),
+            "post_times": {
+                race_id: post_time.isoformat() for race_id, post_time in self.post_times.items()
+            },
+            "predicted": sorted(self.predicted),
+        }
+        try:
+            self.state_path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.state_path.with_suffix(".tmp")
+            tmp_path.write_text(json.dumps(state, indent=2), encoding="utf-8")
+            os.replace(tmp_path, self.state_path)
+        except OSError as e:
+            logger.warning(f"Scheduler state save failed: {e}")
+
+    def load(self, today: date, now: datetime) -> bool:
+        """
+        Restore today's state after a restart.
+
+        Args:
+            today: Current date (state of another day is ignored)
+            now: Current time
+
+        Returns:
+            True if state was restored
+        """
+        if self.state_path is None or not self.state_path.exists():
+            return False
+        try:
+            state = json.loads(self.state_path.read_text(encoding="utf-8"))
+            card_date = date.fromisoformat(state["card_date"])
+            post_times = {
+                race_id: datetime.fromisoformat(value)
+                for race_id, value in state["post_times"].items()
+            }
+            predicted = set(state.get("predicted", []))
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            logger.warning(f"Scheduler state load failed: {e}")
+            return False
+
+        if card_date != today:
+            logger.info(f"Scheduler state is from {card_date}, ignored")
+            return False
+
+        self.card_date = card_date
+        self.post_times = post_times
+        self.predicted = predicted
+        self._rebuild(now)
+        logger.info(
+            f"Scheduler state restored: {len(post_times)} races, {len(predicted)} predicted"
+        )
+        return True
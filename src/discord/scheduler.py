@@ -3,8 +3,21 @@ Discord Bot Automatic Prediction Scheduler
 
 Automatically executes final predictions 30 minutes before race (after horse weight announcement)
 and notifies via Discord.
+
+Every evening (SCHEDULER_EVENING_PREDICTION_HOUR) the API stores feature snapshots
+for the next day's races, so final predictions only patch race-day columns.
+The day's race card is loaded once and refreshed every SCHEDULER_CARD_REFRESH_MINUTES
+while races remain, so post-time changes are picked up. Each race's pre-warm and
+final prediction are scheduled at exact timestamps (see RaceSchedule) and fired by a
+single dispatcher that sleeps until the next job. The schedule is persisted so a
+restart neither repeats nor drops final predictions.
+
+API calls go through one pooled async HTTP client (keep-alive), so a slow
+prediction never blocks the gateway heartbeat. Races with overlapping post
+times are predicted concurrently, bounded by a semaphore.
 """
 
+import asyncio
 import logging
 import os
 from datetime import date, datetime, time, timedelta, timezone
@@ -13,18 +26,35 @@ from datetime import date, datetime, time, timedelta, timezone
 JST = timezone(timedelta(hours=9))
 from typing import Any
 
-import requests
+import httpx
 
 import discord
 from discord.ext import commands, tasks
 from src.config import (
     API_BASE_URL_DEFAULT,
+    DISCORD_HTTP_MAX_CONNECTIONS,
     DISCORD_REQUEST_TIMEOUT,
-    SCHEDULER_CHECK_INTERVAL_MINUTES,
+    DISCORD_STATS_TIMEOUT,
+    ODDS_WATCHER_ENABLED,
+    SCHEDULER_CARD_REFRESH_MINUTES,
+    SCHEDULER_EVENING_PREDICTION_HOUR,
+    SCHEDULER_EVENING_PREDICTION_MINUTE,
     SCHEDULER_FINAL_PREDICTION_MINUTES_BEFORE,
-    SCHEDULER_FINAL_PREDICTION_TOLERANCE_MINUTES,
+    SCHEDULER_FINAL_RETRY_MAX_SECONDS,
+    SCHEDULER_FINAL_RETRY_SECONDS,
+    SCHEDULER_MAX_CONCURRENT_PREDICTIONS,
+    SCHEDULER_PREWARM_MINUTES_BEFORE,
+    SCHEDULER_SNAPSHOT_TIMEOUT,
+    SCHEDULER_STATE_PATH,
 )
+from src.discord.race_schedule import PREWARM, RaceSchedule, parse_post_time
 from src.models.ev_recommender import EVRecommender
+from src.services.odds_watcher import (
+    get_latest_ev,
+    get_odds_watcher,
+    start_odds_watcher,
+    stop_odds_watcher,
+)
 
 # Logger setup
 logger = logging.getLogger(__name__)
@@ -50,8 +80,24 @@ class PredictionScheduler(commands.Cog):
             os.getenv("DISCORD_NOTIFICATION_CHANNEL_ID", "0")
         )
 
-        # Executed race IDs (to prevent duplicate predictions)
-        self.predicted_race_ids_final: set = set()  # Post-weight predictions completed
+        # Exact-time schedule of today's card (completed races persist across restarts)
+        self.schedule = RaceSchedule(
+            SCHEDULER_FINAL_PREDICTION_MINUTES_BEFORE,
+            SCHEDULER_PREWARM_MINUTES_BEFORE,
+            SCHEDULER_STATE_PATH,
+            SCHEDULER_FINAL_RETRY_SECONDS,
+            SCHEDULER_FINAL_RETRY_MAX_SECONDS,
+        )
+        self._wakeup = asyncio.Event()  # Set when the schedule changes
+        self._dispatcher_task: asyncio.Task | None = None
+        self._prewarm_tasks: set[asyncio.Task] = set()
+
+        # Pooled async HTTP client (created in cog_load)
+        self._http: httpx.AsyncClient | None = None
+
+        # Concurrent final predictions
+        self._prediction_semaphore = asyncio.Semaphore(SCHEDULER_MAX_CONCURRENT_PREDICTIONS)
+        self._prediction_tasks: dict[str, asyncio.Task] = {}  # race_id -> running task
 
         logger.info(f"PredictionScheduler initialized: channel_id={self.notification_channel_id}")
 
@@ -79,7 +125,7 @@ class PredictionScheduler(commands.Cog):
 
             target_date = datetime.strptime(selected_date, "%Y-%m-%d").date()
             collector = ResultCollector()
-            analysis = collector.collect_and_analyze(target_date)
+            analysis = await asyncio.to_thread(collector.collect_and_analyze, target_date)
 
             if analysis["status"] != "success":
                 await interaction.followup.send(
@@ -183,12 +229,42 @@ class PredictionScheduler(commands.Cog):
     async def cog_load(self):
         """Start task when Cog loads."""
         logger.info("Automatic prediction scheduler started")
-        self.hourly_check_task.start()
+        now = datetime.now(JST)
+        self.schedule.load(now.date(), now)
+        self._get_http_client()
+        self.card_refresh_task.start()
+        self.evening_snapshot_task.start()
+        self._dispatcher_task = asyncio.create_task(self._dispatch_loop())
+        if ODDS_WATCHER_ENABLED:
+            start_odds_watcher()
 
     async def cog_unload(self):
         """Stop task when Cog unloads."""
         logger.info("Automatic prediction scheduler stopped")
-        self.hourly_check_task.cancel()
+        self.card_refresh_task.cancel()
+        self.evening_snapshot_task.cancel()
+        if self._dispatcher_task is not None:
+            self._dispatcher_task.cancel()
+        for task in [*self._prediction_tasks.values(), *self._prewarm_tasks]:
+            task.cancel()
+        if self._http is not None:
+            await self._http.aclose()
+            self._http = None
+        if ODDS_WATCHER_ENABLED:
+            stop_odds_watcher()
+
+    def _get_http_client(self) -> httpx.AsyncClient:
+        """Get the pooled HTTP client, creating it on first use."""
+        if self._http is None:
+            self._http = httpx.AsyncClient(
+                base_url=self.api_base_url,
+                timeout=httpx.Timeout(DISCORD_REQUEST_TIMEOUT, connect=DISCORD_STATS_TIMEOUT),
+                limits=httpx.Limits(
+                    max_connections=DISCORD_HTTP_MAX_CONNECTIONS,
+                    max_keepalive_connections=DISCORD_HTTP_MAX_CONNECTIONS,
+                ),
+            )
+        return self._http
 
     def get_notification_channel(self) -> discord.TextChannel | None:
         """Get notification channel."""
@@ -207,73 +283,155 @@ class PredictionScheduler(commands.Cog):
 
         return channel
 
-    @tasks.loop(minutes=SCHEDULER_CHECK_INTERVAL_MINUTES)
-    async def hourly_check_task(self):
+    @tasks.loop(minutes=SCHEDULER_CARD_REFRESH_MINUTES)
+    async def card_refresh_task(self):
         """
-        Periodically check race start times.
+        Load today's race card and keep it current.
 
-        Executes re-prediction 30 minutes before race (after horse weight announcement).
-        Horse weights are typically announced about 75 minutes before start,
-        so re-prediction is done at 30 minutes before.
+        The card is fetched once per day and then refreshed only while races
+        remain, so delayed post times move their scheduled jobs. Final predictions
+        run 30 minutes before the race (after horse weight announcement; weights
+        are typically announced about 75 minutes before start).
         Races with non-matching dates are excluded.
         """
-        now = datetime.now(JST)
-        logger.debug(f"Race time check: {now}")
+        try:
+            await self._refresh_card()
+        except Exception as e:
+            logger.exception(f"Race card refresh error: {e}")
+
+    @tasks.loop(
+        time=time(
+            hour=SCHEDULER_EVENING_PREDICTION_HOUR,
+            minute=SCHEDULER_EVENING_PREDICTION_MINUTE,
+            tzinfo=JST,
+        )
+    )
+    async def evening_snapshot_task(self):
+        """
+        Store feature snapshots for tomorrow's races.
 
+        History-based features are computed the night before, so race-day final
+        predictions only patch body weight, scratches and track condition.
+        """
+        tomorrow = datetime.now(JST).date() + timedelta(days=1)
         try:
-            # Get today's race list (with strict date matching)
-            today = datetime.now(JST).date()
-            races = await self._fetch_races_for_date(today, strict_date_match=True)
+            response = await self._get_http_client().post(
+                "/api/v1/predictions/snapshots",
+                json={"race_date": tomorrow.isoformat()},
+                timeout=SCHEDULER_SNAPSHOT_TIMEOUT,
+            )
+            if response.status_code == 200:
+                race_ids = response.json().get("race_ids", [])
+                logger.info(f"Feature snapshots stored: {tomorrow} -> {len(race_ids)} races")
+            else:
+                logger.warning(f"Feature snapshot request failed: status={response.status_code}")
+        except httpx.HTTPError as e:
+            logger.error(f"Feature snapshot request error: {e}")
 
-            if not races:
-                return
+    async def _refresh_card(self) -> None:
+        """Fetch today's card and reschedule new or changed races."""
+        now = datetime.now(JST)
+        today = now.date()
+        if self.schedule.card_date == today and self.schedule.is_finished(now):
+            return
 
-            for race in races:
-                race_id = race.get("race_id")
-                race_time_str = race.get("race_time")  # "15:25" format
+        # Get today's race list (with strict date matching)
+        races = await self._fetch_races_for_date(today, strict_date_match=True)
+        if not races:
+            return
 
-                if not race_id or not race_time_str:
-                    continue
+        post_times = {}
+        for race in races:
+            race_id = race.get("race_id")
+            race_time_str = race.get("race_time")  # "15:25" format
+            if not race_id or not race_time_str:
+                continue
+            post_time = parse_post_time(today, race_time_str, JST)
+            if post_time is not None:
+                post_times[race_id] = post_time
+
+        changed = self.schedule.update_card(today, post_times, now)
+        if changed:
+            logger.info(
+                f"Race card updated: {today}, {len(changed)} races rescheduled, "
+                f"{len(self.schedule.pending(now))} pending"
+            )
+            self.schedule.save()
+            self._wakeup.set()
 
-                # Parse race time (supports "HH:MM" or "HHMM" format)
-                try:
-                    if ":" in race_time_str:
-                        race_hour, race_minute = map(int, race_time_str.split(":"))
-                    elif len(race_time_str) == 4:
-                        race_hour = int(race_time_str[:2])
-                        race_minute = int(race_time_str[2:])
+    async def _dispatch_loop(self) -> None:
+        """Fire scheduled jobs at their exact times."""
+        await self.bot.wait_until_ready()
+        logger.info("Race schedule dispatcher ready")
+        while True:
+            self._wakeup.clear()
+            try:
+                for race_id, kind in self.schedule.pop_due(datetime.now(JST)):
+                    if kind == PREWARM:
+                        task = asyncio.create_task(self._prewarm_race(race_id))
+                        self._prewarm_tasks.add(task)
+                        task.add_done_callback(self._prewarm_tasks.discard)
                     else:
-                        raise ValueError(f"Unknown time format: {race_time_str}")
-                    race_datetime = datetime.combine(
-                        today, time(hour=race_hour, minute=race_minute), tzinfo=JST
-                    )
-                except (ValueError, IndexError) as e:
-                    logger.warning(f"Race time parse failed: {race_time_str} ({e})")
-                    continue
-
-                # N minutes before race (with M minutes tolerance)
-                minutes_before = SCHEDULER_FINAL_PREDICTION_MINUTES_BEFORE
-                tolerance_seconds = SCHEDULER_FINAL_PREDICTION_TOLERANCE_MINUTES * 60
-
-                target_time = race_datetime - timedelta(minutes=minutes_before)
-                time_diff = abs((now - target_time).total_seconds())
-
-                # Within tolerance and not yet executed
-                if time_diff <= tolerance_seconds and race_id not in self.predicted_race_ids_final:
-                    venue = race.get("venue", "?")
-                    race_num = race.get("race_number", "?")
-                    logger.info(
-                        f"Executing post-weight prediction: race_id={race_id}, venue={venue}, race_num={race_num}"
-                    )
+                        self._start_final_prediction(race_id)
+            except Exception as e:
+                logger.exception(f"Race schedule dispatch error: {e}")
+
+            # Sleep until the next job, or until the card changes
+            next_fire_at = self.schedule.next_fire_at()
+            timeout = (
+                None
+                if next_fire_at is None
+                else max(0.0, next_fire_at - datetime.now(JST).timestamp())
+            )
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout)
+            except TimeoutError:
+                pass
+
+    def _start_final_prediction(self, race_id: str) -> None:
+        """Start a race's final prediction in the background unless already running."""
+        if race_id in self._prediction_tasks:
+            return
+        logger.info(f"Executing post-weight prediction: race_id={race_id}")
 
-                    # Execute prediction (notification handled in _execute_prediction)
-                    success = await self._execute_prediction(race_id, is_final=True)
+        # Races with the same post time run concurrently
+        self._prediction_tasks[race_id] = asyncio.create_task(self._run_final_prediction(race_id))
 
-                    if success:
-                        self.predicted_race_ids_final.add(race_id)
+    async def _run_final_prediction(self, race_id: str) -> None:
+        """Execute a final prediction under the concurrency limit."""
+        try:
+            async with self._prediction_semaphore:
+                # Execute prediction (notification handled in _execute_prediction)
+                success = await self._execute_prediction(race_id, is_final=True)
 
-        except Exception as e:
-            logger.exception(f"Race time check task error: {e}")
+            if success:
+                self.schedule.mark_predicted(race_id)
+                self.schedule.save()
+            else:
+                retry_at = self.schedule.retry_final(race_id, datetime.now(JST))
+                if retry_at is None:
+                    logger.warning(f"Final prediction failed, not retried: race_id={race_id}")
+                else:
+                    logger.warning(
+                        f"Final prediction failed, retrying at {retry_at:%H:%M:%S}: "
+                        f"race_id={race_id}"
+                    )
+                    self._wakeup.set()
+        finally:
+            self._prediction_tasks.pop(race_id, None)
+
+    async def _prewarm_race(self, race_id: str) -> None:
+        """Load the API's model and build the feature snapshot ahead of the final prediction."""
+        try:
+            response = await self._get_http_client().post(
+                "/api/v1/predictions/warm", json={"race_id": race_id}
+            )
+            if response.status_code == 200:
+                logger.info(f"Prediction pre-warmed: race_id={race_id}")
+            else:
+                logger.warning(f"Pre-warm failed: status={response.status_code}, race_id={race_id}")
+        except httpx.HTTPError as e:
+            logger.warning(f"Pre-warm error: race_id={race_id}, error={e}")
 
     async def _fetch_races_for_date(
         self, target_date: date, strict_date_match: bool = True
@@ -289,8 +447,8 @@ class PredictionScheduler(commands.Cog):
             List of races
         """
         try:
-            response = requests.get(
-                f"{self.api_base_url}/api/races/date/{target_date.isoformat()}", timeout=10
+            response = await self._get_http_client().get(
+                f"/api/races/date/{target_date.isoformat()}", timeout=DISCORD_STATS_TIMEOUT
             )
 
             if response.status_code == 200:
@@ -324,7 +482,7 @@ class PredictionScheduler(commands.Cog):
                 logger.warning(f"Race list fetch failed: status={response.status_code}")
                 return []
 
-        except requests.exceptions.RequestException as e:
+        except httpx.HTTPError as e:
             logger.error(f"Race list fetch error: {e}")
             return []
 
@@ -347,10 +505,9 @@ class PredictionScheduler(commands.Cog):
             logger.info(f"Executing prediction: race_id={race_id}, is_final={is_final}")
 
             # Execute prediction via FastAPI
-            response = requests.post(
-                f"{self.api_base_url}/api/v1/predictions/generate",
+            response = await self._get_http_client().post(
+                "/api/v1/predictions/generate",
                 json={"race_id": race_id, "is_final": is_final},  # Final prediction flag
-                timeout=DISCORD_REQUEST_TIMEOUT,
             )
 
             if response.status_code == 200:
@@ -395,12 +552,21 @@ class PredictionScheduler(commands.Cog):
 
                             # === Get expected value based betting recommendations ===
                             race_code = prediction.get("race_code") or race_id
-                            ev_recommender = EVRecommender()
-                            ev_recs = ev_recommender.get_recommendations(
-                                race_code=race_code,
-                                ranked_horses=ranked,
-                                use_realtime_odds=True,
-                            )
+                            # EV the odds watcher keeps current for this prediction, if any
+                            latest_ev = get_latest_ev(race_code, pred_id)
+                            watcher = get_odds_watcher()
+                            if watcher is not None:
+                                watcher.register_prediction(race_code, ranked, pred_id)
+                            if latest_ev is not None:
+                                ev_recs = latest_ev
+                            else:
+                                ev_recommender = EVRecommender()
+                                ev_recs = await asyncio.to_thread(
+                                    ev_recommender.get_recommendations,
+                                    race_code=race_code,
+                                    ranked_horses=ranked,
+                                    use_realtime_odds=True,
+                                )
 
                             # Collect recommended horses with EV >= 1.5 (max 3 combined win/place)
                             win_recs = ev_recs.get("win_recommendations", [])
@@ -498,21 +664,26 @@ class PredictionScheduler(commands.Cog):
                 )
                 return False
 
-        except requests.exceptions.Timeout:
+        except httpx.TimeoutException:
             logger.error(f"Prediction API timeout: race_id={race_id}")
             return False
-        except requests.exceptions.RequestException as e:
+        except httpx.HTTPError as e:
             logger.error(f"Prediction API error: race_id={race_id}, error={e}")
             return False
         except Exception as e:
             logger.exception(f"Prediction execution error: race_id={race_id}, error={e}")
             return False
 
-    @hourly_check_task.before_loop
-    async def before_hourly_task(self):
-        """Wait for bot to be ready before starting race check task."""
+    @card_refresh_task.before_loop
+    async def before_card_refresh_task(self):
+        """Wait for bot to be ready before starting race card task."""
+        await self.bot.wait_until_ready()
+        logger.info("Race card task ready")
+
+    @evening_snapshot_task.before_loop
+    async def before_evening_snapshot_task(self):
+        """Wait for bot to be ready before starting evening snapshot task."""
         await self.bot.wait_until_ready()
-        logger.info("Race time check task ready")
 
     @commands.command(name="scheduler-status")
     @commands.has_permissions(administrator=True)
@@ -523,13 +694,25 @@ class PredictionScheduler(commands.Cog):
         Args:
             ctx: Command context
         """
-        hourly_running = self.hourly_check_task.is_running()
+        card_running = self.card_refresh_task.is_running()
+        dispatcher_running = self._dispatcher_task is not None and not self._dispatcher_task.done()
+        now = datetime.now(JST)
+        pending = self.schedule.pending(now)
+        next_fire_at = self.schedule.next_fire_at()
+        next_fire = (
+            datetime.fromtimestamp(next_fire_at, JST).strftime("%H:%M:%S") if next_fire_at else "-"
+        )
 
         lines = [
             "⚙️ 自動予想スケジューラー状態",
             "",
-            f"レースチェックタスク: {'🟢 実行中' if hourly_running else '🔴 停止'}",
-            f"確定予想完了: {len(self.predicted_race_ids_final)}レース",
+            f"出馬表タスク: {'🟢 実行中' if card_running else '🔴 停止'}",
+            f"ディスパッチャー: {'🟢 実行中' if dispatcher_running else '🔴 停止'}",
+            f"前夜特徴量タスク: {'🟢 実行中' if self.evening_snapshot_task.is_running() else '🔴 停止'}",
+            f"出馬表: {self.schedule.card_date or '未取得'} ({len(self.schedule.post_times)}レース)",
+            f"確定予想待ち: {len(pending)}レース (次回実行: {next_fire})",
+            f"確定予想完了: {len(self.schedule.predicted)}レース",
+            f"確定予想実行中: {len(self._prediction_tasks)}レース",
             "",
             f"通知チャンネルID: {self.notification_channel_id}",
         ]
@@ -545,7 +728,9 @@ class PredictionScheduler(commands.Cog):
         Args:
             ctx: Command context
         """
-        self.predicted_race_ids_final.clear()
+        self.schedule.reset(datetime.now(JST))
+        self.schedule.save()
+        self._wakeup.set()
 
         logger.info("Scheduler reset complete")
         await ctx.send("✅ スケジューラーをリセットしました。")
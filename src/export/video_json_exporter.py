@@ -3,6 +3,11 @@ Video JSON Exporter
 
 Collects prediction data + DB master data and exports structured JSON
 for the video generation pipeline.
+
+A run holds one asyncpg pool: races are exported concurrently (bounded by
+VIDEO_EXPORT_CONCURRENCY), each race fetches its horses' past races and
+course stats with one batch query per kind, and meeting bias / last week
+accuracy are queried once and shared by every race that needs them.
 """
 
 import asyncio
@@ -13,10 +18,11 @@ from datetime import date, datetime, timedelta
 from pathlib import Path
 from typing import Any
 
+from src.config import VIDEO_EXPORT_CONCURRENCY
 from src.db.queries.video_export import (
-    get_horse_course_stats,
-    get_horse_past_races,
-    get_jockey_course_stats,
+    get_horses_course_stats,
+    get_horses_past_races,
+    get_jockeys_course_stats,
     get_last_week_accuracy,
     get_pace_bias,
     get_waku_bias,
@@ -133,14 +139,7 @@ class VideoJsonExporter:
 
         logger.info(f"Exporting {len(filtered)} races for {target_date}")
 
-        output_files = []
-        for race in filtered:
-            try:
-                output_path = self._export_single_race(race, target_date, output_dir)
-                if output_path:
-                    output_files.append(output_path)
-            except Exception as e:
-                logger.error(f"Export failed for {race['race_code']}: {e}")
+        output_files = asyncio.run(self._export_races(filtered, target_date, output_dir))
 
         logger.info(f"Exported {len(output_files)} JSON files to {output_dir}")
         return output_files
@@ -169,33 +168,67 @@ class VideoJsonExporter:
 
         return filtered
 
-    def _export_single_race(
-        self, race: dict, target_date: date, output_dir: str
+    async def _export_races(
+        self, races: list[dict], target_date: date, output_dir: str
+    ) -> list[str]:
+        """Export races concurrently over one DB pool.
+
+        Returns:
+            Output file paths in race order (failed races are skipped).
+        """
+        from src.db.async_connection import close_db_pool, get_connection, init_db_pool
+
+        await init_db_pool()
+        try:
+            async with get_connection() as conn:
+                last_week_results = await get_last_week_accuracy(conn, str(target_date))
+
+            semaphore = asyncio.Semaphore(VIDEO_EXPORT_CONCURRENCY)
+            bias_tasks: dict[tuple[str, ...], asyncio.Task] = {}
+
+            async def export(race: dict) -> str | None:
+                async with semaphore:
+                    try:
+                        return await self._export_single_race(
+                            race, target_date, output_dir, last_week_results, bias_tasks
+                        )
+                    except Exception as e:
+                        logger.error(f"Export failed for {race['race_code']}: {e}")
+                        return None
+
+            results = await asyncio.gather(*(export(race) for race in races))
+        finally:
+            await close_db_pool()
+
+        return [path for path in results if path]
+
+    async def _export_single_race(
+        self,
+        race: dict,
+        target_date: date,
+        output_dir: str,
+        last_week_results: dict[str, Any] | None,
+        bias_tasks: dict[tuple[str, ...], asyncio.Task],
     ) -> str | None:
         """Export a single race to JSON."""
         race_code = race["race_code"]
-        logger.info(
-            f"Predicting: {race.get('keibajo_name', '')} {race.get('race_bango', '')}R"
-        )
+        logger.info(f"Predicting: {race.get('keibajo_name', '')} {race.get('race_bango', '')}R")
 
-        # Run prediction with SHAP
-        predictions = self.predictor.predict_race(race_code, compute_shap=True)
+        # Run prediction with SHAP and get race detail (sync psycopg2) off the event loop
+        predictions, race_detail = await asyncio.gather(
+            asyncio.to_thread(self.predictor.predict_race, race_code, compute_shap=True),
+            asyncio.to_thread(self._get_race_detail, race_code),
+        )
         if not predictions:
             logger.warning(f"No prediction results for {race_code}")
             return None
 
-        # Get race detail for race_name etc.
-        race_detail = self._get_race_detail(race_code)
-
         # Build enriched data via async queries
-        enriched = asyncio.run(
-            self._enrich_predictions(predictions, race, race_detail, target_date)
-        )
+        enriched = await self._enrich_predictions(predictions, race, race_detail, bias_tasks)
+        enriched["last_week_results"] = last_week_results
 
         # Build output JSON
-        output = self._build_output(
-            race, race_detail, predictions, enriched, target_date
-        )
+        output = self._build_output(race, race_detail, predictions, enriched, target_date)
 
         # Write to file
         Path(output_dir).mkdir(parents=True, exist_ok=True)
@@ -255,70 +288,86 @@ class VideoJsonExporter:
         predictions: list[dict],
         race: dict,
         race_detail: dict,
-        target_date: date,
+        bias_tasks: dict[tuple[str, ...], asyncio.Task],
     ) -> dict[str, Any]:
         """Enrich predictions with past races, course stats, and bias data."""
-        from src.db.async_connection import close_db_pool, init_db_pool, get_connection
+        from src.db.async_connection import get_connection
 
-        await init_db_pool()
-        try:
-            async with get_connection() as conn:
-                enriched: dict[str, Any] = {
-                    "horses": {},
-                    "bias_data": {},
-                    "last_week_results": None,
-                }
-
-                # Enrich each horse (top 8 only for performance)
-                sorted_preds = sorted(predictions, key=lambda p: p["pred_rank"])
-                top_horses = sorted_preds[:8]
-
-                keibajo_code = race_detail.get("keibajo_code", race.get("keibajo_code", ""))
-                track_code = race_detail.get("track_code", race.get("track_code", ""))
-                kyori = int(race_detail.get("kyori", race.get("kyori", 0)) or 0)
-
-                for pred in top_horses:
-                    umaban = str(pred["umaban"])
-                    kettonum = pred.get("ketto_toroku_bango", "")
-                    kishu_code = pred.get("kishu_code", "")
-
-                    horse_data: dict[str, Any] = {}
-
-                    if kettonum:
-                        horse_data["past_races"] = await get_horse_past_races(
-                            conn, kettonum, limit=5
-                        )
-                        horse_data["course_stats"] = await get_horse_course_stats(
-                            conn, kettonum, keibajo_code, track_code, kyori
-                        )
+        enriched: dict[str, Any] = {
+            "horses": {},
+            "bias_data": {},
+            "last_week_results": None,
+        }
 
-                    if kishu_code:
-                        horse_data["jockey_course_stats"] = await get_jockey_course_stats(
-                            conn, kishu_code, keibajo_code, track_code, kyori
-                        )
+        # Enrich each horse (top 8 only for performance)
+        sorted_preds = sorted(predictions, key=lambda p: p["pred_rank"])
+        top_horses = sorted_preds[:8]
+
+        keibajo_code = race_detail.get("keibajo_code", race.get("keibajo_code", ""))
+        track_code = race_detail.get("track_code", race.get("track_code", ""))
+        kyori = int(race_detail.get("kyori", race.get("kyori", 0)) or 0)
+
+        kettonums = list(
+            dict.fromkeys(
+                p["ketto_toroku_bango"] for p in top_horses if p.get("ketto_toroku_bango")
+            )
+        )
+        kishu_codes = list(
+            dict.fromkeys(p["kishu_code"] for p in top_horses if p.get("kishu_code"))
+        )
 
-                    enriched["horses"][umaban] = horse_data
+        async with get_connection() as conn:
+            past_races = await get_horses_past_races(conn, kettonums, limit=5)
+            course_stats = await get_horses_course_stats(
+                conn, kettonums, keibajo_code, track_code, kyori
+            )
+            jockey_stats = await get_jockeys_course_stats(
+                conn, kishu_codes, keibajo_code, track_code, kyori
+            )
 
-                # Waku bias and pace bias
-                kaisai_nen = race_detail.get("kaisai_nen", "")
-                kaisai_kai = race_detail.get("kaisai_kai", "")
+        for pred in top_horses:
+            umaban = str(pred["umaban"])
+            kettonum = pred.get("ketto_toroku_bango", "")
+            kishu_code = pred.get("kishu_code", "")
 
-                if keibajo_code and track_code and kaisai_nen and kaisai_kai:
-                    enriched["bias_data"]["waku_bias"] = await get_waku_bias(
-                        conn, keibajo_code, track_code, kaisai_nen, kaisai_kai
-                    )
-                    enriched["bias_data"]["pace_bias"] = await get_pace_bias(
-                        conn, keibajo_code, track_code, kaisai_nen, kaisai_kai
-                    )
+            horse_data: dict[str, Any] = {}
 
-                # Last week accuracy
-                enriched["last_week_results"] = await get_last_week_accuracy(
-                    conn, str(target_date)
-                )
+            if kettonum:
+                horse_data["past_races"] = past_races.get(kettonum, [])
+                horse_data["course_stats"] = course_stats[kettonum]
 
-                return enriched
-        finally:
-            await close_db_pool()
+            if kishu_code:
+                horse_data["jockey_course_stats"] = jockey_stats[kishu_code]
+
+            enriched["horses"][umaban] = horse_data
+
+        # Waku bias and pace bias (shared by every race of the meeting and track)
+        kaisai_nen = race_detail.get("kaisai_nen", "")
+        kaisai_kai = race_detail.get("kaisai_kai", "")
+
+        if keibajo_code and track_code and kaisai_nen and kaisai_kai:
+            key = (keibajo_code, track_code, kaisai_nen, kaisai_kai)
+            if key not in bias_tasks:
+                bias_tasks[key] = asyncio.create_task(self._get_bias_data(*key))
+            enriched["bias_data"] = await bias_tasks[key]
+
+        return enriched
+
+    async def _get_bias_data(
+        self, keibajo_code: str, track_code: str, kaisai_nen: str, kaisai_kai: str
+    ) -> dict[str, Any]:
+        """Get waku and pace bias for a meeting."""
+        from src.db.async_connection import get_connection
+
+        async with get_connection() as conn:
+            return {
+                "waku_bias": await get_waku_bias(
+                    conn, keibajo_code, track_code, kaisai_nen, kaisai_kai
+                ),
+                "pace_bias": await get_pace_bias(
+                    conn, keibajo_code, track_code, kaisai_nen, kaisai_kai
+                ),
+            }
 
     def _build_output(
         self,
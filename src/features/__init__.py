@@ -5,10 +5,12 @@ Extract features from JRA-VAN data for machine learning.
 
 Main components:
 - daily_bias: Daily bias calculation
+- intraday_bias: Incremental same-day bias
 - extractors.calculators: Feature calculation helpers
 - extractors.db_queries: Database query helpers
 """
 
 from src.features.daily_bias import DailyBiasAnalyzer, DailyBiasResult
+from src.features.intraday_bias import IntradayBiasTracker, get_intraday_tracker
 
-__all__ = ["DailyBiasAnalyzer", "DailyBiasResult"]
+__all__ = ["DailyBiasAnalyzer", "DailyBiasResult", "IntradayBiasTracker", "get_intraday_tracker"]
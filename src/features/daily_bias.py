@@ -10,6 +10,8 @@ import logging
 from dataclasses import asdict, dataclass
 from datetime import date, datetime
 
+import pandas as pd
+
 from src.db.connection import get_db
 
 logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
@@ -98,218 +100,237 @@ class DailyBiasAnalyzer:
 
     def analyze(self, target_date: date) -> DailyBiasResult | None:
         """Analyze bias for the specified date."""
-        logger.info(f"Starting bias analysis: {target_date}")
+        return self.analyze_range(target_date, target_date).get(target_date)
+
+    def analyze_range(self, start_date: date, end_date: date) -> dict[date, DailyBiasResult]:
+        """
+        Analyze bias for every race day in a date range in a single pass.
+
+        Races and runners of the whole range are fetched with one query each
+        (instead of one runner query per race) and aggregated per
+        (date, venue) and (date, jockey) with pandas.
+
+        Args:
+            start_date: First date (inclusive)
+            end_date: Last date (inclusive)
+
+        Returns:
+            Bias results keyed by date (days without races are omitted)
+        """
+        logger.info(f"Starting bias analysis: {start_date} - {end_date}")
 
         conn = self.db.get_connection()
         try:
             cur = conn.cursor()
-            kaisai_gappi = target_date.strftime("%m%d")
-            kaisai_nen = str(target_date.year)
+            params = (
+                str(start_date.year),
+                str(end_date.year),
+                start_date.strftime("%Y%m%d"),
+                end_date.strftime("%Y%m%d"),
+            )
 
             # Get race list
             cur.execute(
                 """
-                SELECT DISTINCT r.race_code, r.keibajo_code, r.race_bango,
-                       r.track_code, r.shiba_babajotai_code, r.dirt_babajotai_code
+                SELECT DISTINCT r.race_code, r.kaisai_nen || r.kaisai_gappi AS race_date,
+                       r.keibajo_code, r.track_code,
+                       r.shiba_babajotai_code, r.dirt_babajotai_code
                 FROM race_shosai r
-                WHERE r.kaisai_nen = %s
-                  AND r.kaisai_gappi = %s
+                WHERE r.kaisai_nen BETWEEN %s AND %s
+                  AND r.kaisai_nen || r.kaisai_gappi BETWEEN %s AND %s
                   AND r.data_kubun IN ('6', '7')
                 ORDER BY r.race_code
             """,
-                (kaisai_nen, kaisai_gappi),
+                params,
+            )
+            races = pd.DataFrame(
+                cur.fetchall(),
+                columns=["race_code", "race_date", "venue_code", "track_code", "shiba", "dirt"],
             )
+            if races.empty:
+                logger.warning(f"No race data found: {start_date} - {end_date}")
+                return {}
 
-            races = cur.fetchall()
-            if not races:
-                logger.warning(f"No race data found: {target_date}")
-                return None
+            # Get data for every horse of those races
+            cur.execute(
+                """
+                SELECT u.race_code, u.wakuban, u.kakutei_chakujun,
+                       u.kyakushitsu_hantei, u.kishu_code, u.kishumei_ryakusho
+                FROM umagoto_race_joho u
+                WHERE u.race_code = ANY(%s)
+                  AND u.data_kubun IN ('6', '7')
+                  AND u.kakutei_chakujun IS NOT NULL
+                  AND u.kakutei_chakujun != ''
+                  AND u.kakutei_chakujun ~ '^[0-9]+$'
+                ORDER BY u.race_code
+            """,
+                (races["race_code"].unique().tolist(),),
+            )
+            horses = pd.DataFrame(
+                cur.fetchall(),
+                columns=["race_code", "wakuban", "chakujun", "kyakushitsu", "kishu_code", "name"],
+            )
+            cur.close()
 
-            logger.info(f"Analyzing {len(races)} races")
-
-            # Aggregate data by venue
-            venue_data: dict[str, dict] = {}
-            jockey_data: dict[str, dict] = {}
-
-            for race in races:
-                race_code = race[0]
-                venue_code = race[1]
-                track_code = race[3]
-                baba_code = race[4] if track_code and track_code.startswith("1") else race[5]
-
-                if venue_code not in venue_data:
-                    venue_data[venue_code] = {
-                        "race_count": 0,
-                        "inner_wins": 0,
-                        "inner_total": 0,
-                        "outer_wins": 0,
-                        "outer_total": 0,
-                        "zenso_wins": 0,
-                        "zenso_total": 0,
-                        "koshi_wins": 0,
-                        "koshi_total": 0,
-                        "turf_results": 0,
-                        "dirt_results": 0,
-                        "track_condition": self.TRACK_CONDITION.get(str(baba_code), "不明"),
-                    }
-
-                venue_data[venue_code]["race_count"] += 1
-
-                if track_code and track_code.startswith("1"):
-                    venue_data[venue_code]["turf_results"] += 1
-                else:
-                    venue_data[venue_code]["dirt_results"] += 1
-
-                # Get data for each horse
-                cur.execute(
-                    """
-                    SELECT umaban, wakuban, kakutei_chakujun,
-                           kyakushitsu_hantei, kishu_code, kishumei_ryakusho
-                    FROM umagoto_race_joho
-                    WHERE race_code = %s
-                      AND data_kubun IN ('6', '7')
-                      AND kakutei_chakujun IS NOT NULL
-                      AND kakutei_chakujun != ''
-                      AND kakutei_chakujun ~ '^[0-9]+$'
-                """,
-                    (race_code,),
-                )
+            logger.info(f"Analyzing {len(races)} races, {len(horses)} runners")
 
-                horses = cur.fetchall()
-
-                for horse in horses:
-                    horse[0]
-                    wakuban = horse[1]
-                    chakujun = int(horse[2]) if horse[2] else 99
-                    kyakushitsu = horse[3]
-                    kishu_code = horse[4]
-                    kishu_name = horse[5]
-
-                    is_win = chakujun == 1
-                    is_top3 = chakujun <= 3
-
-                    # Post position bias
-                    try:
-                        waku = int(wakuban) if wakuban else 0
-                        if 1 <= waku <= 4:
-                            venue_data[venue_code]["inner_total"] += 1
-                            if is_win:
-                                venue_data[venue_code]["inner_wins"] += 1
-                        elif 5 <= waku <= 8:
-                            venue_data[venue_code]["outer_total"] += 1
-                            if is_win:
-                                venue_data[venue_code]["outer_wins"] += 1
-                    except (ValueError, TypeError):
-                        pass
-
-                    # Running style bias
-                    try:
-                        kyaku = int(kyakushitsu) if kyakushitsu else 0
-                        if kyaku in (1, 2):  # Front-runner / Stalker
-                            venue_data[venue_code]["zenso_total"] += 1
-                            if is_win:
-                                venue_data[venue_code]["zenso_wins"] += 1
-                        elif kyaku in (3, 4):  # Closer / Deep closer
-                            venue_data[venue_code]["koshi_total"] += 1
-                            if is_win:
-                                venue_data[venue_code]["koshi_wins"] += 1
-                    except (ValueError, TypeError):
-                        pass
-
-                    # Jockey performance
-                    if kishu_code:
-                        if kishu_code not in jockey_data:
-                            jockey_data[kishu_code] = {
-                                "name": kishu_name or kishu_code,
-                                "rides": 0,
-                                "wins": 0,
-                                "top3": 0,
-                            }
-                        jockey_data[kishu_code]["rides"] += 1
-                        if is_win:
-                            jockey_data[kishu_code]["wins"] += 1
-                        if is_top3:
-                            jockey_data[kishu_code]["top3"] += 1
+            results = self._aggregate(races, horses)
+            logger.info(f"Bias analysis complete: {len(results)} days")
+            return results
 
-            cur.close()
+        except Exception as e:
+            logger.error(f"Bias analysis error: {e}")
+            raise
+        finally:
+            conn.close()
 
-            # Calculate biases
-            venue_biases = {}
-            for venue_code, data in venue_data.items():
-                inner_rate = (
-                    data["inner_wins"] / data["inner_total"] if data["inner_total"] > 0 else 0
-                )
-                outer_rate = (
-                    data["outer_wins"] / data["outer_total"] if data["outer_total"] > 0 else 0
-                )
-                zenso_rate = (
-                    data["zenso_wins"] / data["zenso_total"] if data["zenso_total"] > 0 else 0
-                )
-                koshi_rate = (
-                    data["koshi_wins"] / data["koshi_total"] if data["koshi_total"] > 0 else 0
-                )
+    def _aggregate(self, races: pd.DataFrame, horses: pd.DataFrame) -> dict[date, DailyBiasResult]:
+        """Aggregate fetched races and runners into per-day bias results."""
+        analyzed_at = datetime.now().isoformat()
 
-                venue_biases[venue_code] = VenueBias(
-                    venue_code=venue_code,
-                    venue_name=self.VENUE_NAMES.get(venue_code, venue_code),
-                    race_count=data["race_count"],
-                    inner_waku_win_rate=inner_rate,
-                    outer_waku_win_rate=outer_rate,
-                    waku_bias=inner_rate - outer_rate,
-                    zenso_win_rate=zenso_rate,
-                    koshi_win_rate=koshi_rate,
-                    pace_bias=zenso_rate - koshi_rate,
-                    track_condition=data["track_condition"],
-                    turf_results=data["turf_results"],
-                    dirt_results=data["dirt_results"],
-                )
+        # Race-level: race count, turf/dirt split and first race's track condition
+        is_turf = races["track_code"].fillna("").astype(str).str.startswith("1")
+        races = races.assign(
+            is_turf=is_turf.astype(int),
+            is_dirt=(~is_turf).astype(int),
+            baba=races["shiba"].where(is_turf, races["dirt"]),
+        )
+        venue_races = races.groupby(["race_date", "venue_code"], sort=False).agg(
+            race_count=("race_code", "size"),
+            turf_results=("is_turf", "sum"),
+            dirt_results=("is_dirt", "sum"),
+        )
+        venue_races["baba"] = races.drop_duplicates(["race_date", "venue_code"]).set_index(
+            ["race_date", "venue_code"]
+        )["baba"]
+
+        # Runner-level: post position and running style win rates
+        horses = horses.merge(races[["race_code", "race_date", "venue_code"]], on="race_code")
+        chakujun = pd.to_numeric(horses["chakujun"], errors="coerce").fillna(99)
+        waku = pd.to_numeric(horses["wakuban"], errors="coerce").fillna(0)
+        kyaku = pd.to_numeric(horses["kyakushitsu"], errors="coerce").fillna(0)
+        is_win = chakujun == 1
+        is_inner = waku.between(1, 4)
+        is_outer = waku.between(5, 8)
+        is_zenso = kyaku.isin([1, 2])  # Front-runner / Stalker
+        is_koshi = kyaku.isin([3, 4])  # Closer / Deep closer
+        flags = pd.DataFrame(
+            {
+                "race_date": horses["race_date"],
+                "venue_code": horses["venue_code"],
+                "inner_total": is_inner,
+                "inner_wins": is_inner & is_win,
+                "outer_total": is_outer,
+                "outer_wins": is_outer & is_win,
+                "zenso_total": is_zenso,
+                "zenso_wins": is_zenso & is_win,
+                "koshi_total": is_koshi,
+                "koshi_wins": is_koshi & is_win,
+            }
+        )
+        venue_horses = flags.groupby(["race_date", "venue_code"], sort=False).sum()
+        venues = venue_races.join(venue_horses).fillna(0)
 
-            # Calculate jockey performance
-            jockey_performances = {}
-            for code, data in jockey_data.items():
-                if data["rides"] >= 1:  # At least 1 ride
-                    jockey_performances[code] = JockeyDayPerformance(
-                        jockey_code=code,
-                        jockey_name=data["name"],
-                        rides=data["rides"],
-                        wins=data["wins"],
-                        top3=data["top3"],
-                        win_rate=data["wins"] / data["rides"] if data["rides"] > 0 else 0,
-                        top3_rate=data["top3"] / data["rides"] if data["rides"] > 0 else 0,
-                    )
+        def _rate(wins: str, total: str) -> pd.Series:
+            return (venues[wins] / venues[total].where(venues[total] > 0)).fillna(0.0)
 
-            result = DailyBiasResult(
-                target_date=str(target_date),
-                analyzed_at=datetime.now().isoformat(),
-                total_races=len(races),
-                venue_biases=venue_biases,
-                jockey_performances=jockey_performances,
+        venues["inner_rate"] = _rate("inner_wins", "inner_total")
+        venues["outer_rate"] = _rate("outer_wins", "outer_total")
+        venues["zenso_rate"] = _rate("zenso_wins", "zenso_total")
+        venues["koshi_rate"] = _rate("koshi_wins", "koshi_total")
+
+        # Jockey same-day performance
+        jockey_rows = horses[horses["kishu_code"].fillna("") != ""].assign(
+            is_win=is_win, is_top3=chakujun <= 3
+        )
+        jockeys = jockey_rows.groupby(["race_date", "kishu_code"], sort=False).agg(
+            rides=("race_code", "size"),
+            wins=("is_win", "sum"),
+            top3=("is_top3", "sum"),
+        )
+        jockeys["name"] = jockey_rows.drop_duplicates(["race_date", "kishu_code"]).set_index(
+            ["race_date", "kishu_code"]
+        )["name"]
+
+        venue_biases: dict[str, dict[str, VenueBias]] = {}
+        for (race_date, venue_code), row in venues.iterrows():
+            venue_biases.setdefault(race_date, {})[venue_code] = VenueBias(
+                venue_code=venue_code,
+                venue_name=self.VENUE_NAMES.get(venue_code, venue_code),
+                race_count=int(row["race_count"]),
+                inner_waku_win_rate=float(row["inner_rate"]),
+                outer_waku_win_rate=float(row["outer_rate"]),
+                waku_bias=float(row["inner_rate"] - row["outer_rate"]),
+                zenso_win_rate=float(row["zenso_rate"]),
+                koshi_win_rate=float(row["koshi_rate"]),
+                pace_bias=float(row["zenso_rate"] - row["koshi_rate"]),
+                track_condition=self.TRACK_CONDITION.get(str(row["baba"]), "不明"),
+                turf_results=int(row["turf_results"]),
+                dirt_results=int(row["dirt_results"]),
             )
 
-            logger.info(
-                f"Bias analysis complete: {len(venue_biases)} venues, {len(jockey_performances)} jockeys"
+        jockey_performances: dict[str, dict[str, JockeyDayPerformance]] = {}
+        for (race_date, code), row in jockeys.iterrows():
+            rides = int(row["rides"])
+            jockey_performances.setdefault(race_date, {})[code] = JockeyDayPerformance(
+                jockey_code=code,
+                jockey_name=row["name"] if pd.notna(row["name"]) and row["name"] else code,
+                rides=rides,
+                wins=int(row["wins"]),
+                top3=int(row["top3"]),
+                win_rate=int(row["wins"]) / rides,
+                top3_rate=int(row["top3"]) / rides,
             )
-            return result
 
-        except Exception as e:
-            logger.error(f"Bias analysis error: {e}")
-            raise
-        finally:
-            conn.close()
+        race_counts = races.groupby("race_date", sort=False).size()
+        results = {}
+        for race_date, total_races in race_counts.items():
+            day = datetime.strptime(race_date, "%Y%m%d").date()
+            results[day] = DailyBiasResult(
+                target_date=str(day),
+                analyzed_at=analyzed_at,
+                total_races=int(total_races),
+                venue_biases=venue_biases.get(race_date, {}),
+                jockey_performances=jockey_performances.get(race_date, {}),
+            )
+        return results
 
     def save_bias(self, bias_result: DailyBiasResult, output_path: str | None = None) -> bool:
         """Save bias result to database."""
+        return self.save_biases([bias_result]) == 1
+
+    def save_biases(self, bias_results: list[DailyBiasResult]) -> int:
+        """
+        Save multiple bias results to database in one transaction.
+
+        Returns:
+            Number of saved results (0 on failure)
+        """
+        if not bias_results:
+            return 0
+
         conn = self.db.get_connection()
         if not conn:
             logger.error("DB connection failed")
-            return False
+            return 0
 
         try:
             cur = conn.cursor()
-            data = bias_result.to_dict()
+            rows = []
+            for bias_result in bias_results:
+                data = bias_result.to_dict()
+                rows.append(
+                    (
+                        bias_result.target_date,
+                        bias_result.analyzed_at,
+                        bias_result.total_races,
+                        json.dumps(data["venue_biases"], ensure_ascii=False),
+                        json.dumps(data["jockey_performances"], ensure_ascii=False),
+                    )
+                )
 
             # UPSERT
-            cur.execute(
+            cur.executemany(
                 """
                 INSERT INTO daily_bias (
                     target_date, analyzed_at, total_races,
@@ -321,24 +342,21 @@ class DailyBiasAnalyzer:
                     venue_biases = EXCLUDED.venue_biases,
                     jockey_performances = EXCLUDED.jockey_performances
             """,
-                (
-                    bias_result.target_date,
-                    bias_result.analyzed_at,
-                    bias_result.total_races,
-                    json.dumps(data["venue_biases"], ensure_ascii=False),
-                    json.dumps(data["jockey_performances"], ensure_ascii=False),
-                ),
+                rows,
             )
 
             conn.commit()
-            logger.info(f"Bias result saved to DB: {bias_result.target_date}")
-            return True
+            logger.info(
+                f"Bias results saved to DB: {len(rows)} days "
+                f"({bias_results[0].target_date} - {bias_results[-1].target_date})"
+            )
+            return len(rows)
 
         except Exception as e:
             logger.error(f"Bias save error: {e}")
             if conn:
                 conn.rollback()
-            return False
+            return 0
         finally:
             conn.close()
 
@@ -471,14 +489,25 @@ def main():
 
     parser = argparse.ArgumentParser(description="Daily bias analysis")
     parser.add_argument("--date", "-d", help="Target date (YYYY-MM-DD)")
+    parser.add_argument("--start", help="Range start date for backfill (YYYY-MM-DD)")
+    parser.add_argument("--end", help="Range end date for backfill (YYYY-MM-DD)")
     args = parser.parse_args()
 
+    analyzer = DailyBiasAnalyzer()
+
+    if args.start:
+        start_date = datetime.strptime(args.start, "%Y-%m-%d").date()
+        end_date = datetime.strptime(args.end, "%Y-%m-%d").date() if args.end else date.today()
+        results = analyzer.analyze_range(start_date, end_date)
+        saved = analyzer.save_biases([results[d] for d in sorted(results)])
+        print(f"Backfilled {saved} days: {start_date} - {end_date}")
+        return
+
     if args.date:
         target_date = datetime.strptime(args.date, "%Y-%m-%d").date()
     else:
         target_date = date.today()
 
-    analyzer = DailyBiasAnalyzer()
     result = analyzer.analyze(target_date)
 
     if result:
@@ -0,0 +1,301 @@
+"""
+Intra-day Bias Module
+
+Keeps running venue/post-position/pace/jockey counters for the current
+race day and updates them as race results finalize (data_kubun 6/7), so
+later races on the same card can use same-day track bias.
+
+Each finalized race is folded in once with O(field size) work; the bias
+snapshot is rebuilt only from the counters (O(venues + jockeys)), never
+from the full day's results.
+"""
+
+import logging
+import threading
+import time
+from collections.abc import Iterable
+from dataclasses import dataclass
+from datetime import date, datetime
+
+from src.features.daily_bias import (
+    DailyBiasAnalyzer,
+    DailyBiasResult,
+    JockeyDayPerformance,
+    VenueBias,
+)
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class _VenueCounters:
+    """Running counters of one venue."""
+
+    track_condition: str
+    race_count: int = 0
+    inner_wins: int = 0
+    inner_total: int = 0
+    outer_wins: int = 0
+    outer_total: int = 0
+    zenso_wins: int = 0
+    zenso_total: int = 0
+    koshi_wins: int = 0
+    koshi_total: int = 0
+    turf_results: int = 0
+    dirt_results: int = 0
+
+
+@dataclass
+class _JockeyCounters:
+    """Running counters of one jockey."""
+
+    name: str
+    rides: int = 0
+    wins: int = 0
+    top3: int = 0
+
+
+def _to_int(value, default: int) -> int:
+    """Parse a JRA-VAN code into int."""
+    try:
+        return int(value) if value else default
+    except (ValueError, TypeError):
+        return default
+
+
+def _rate(wins: int, total: int) -> float:
+    return wins / total if total > 0 else 0
+
+
+class IntradayBiasTracker:
+    """Incremental same-day bias for one race day."""
+
+    def __init__(self, target_date: date):
+        self.target_date = target_date
+        self._venues: dict[str, _VenueCounters] = {}
+        self._jockeys: dict[str, _JockeyCounters] = {}
+        self._processed: set[str] = set()
+        self._snapshot: DailyBiasResult | None = None
+        self._lock = threading.Lock()
+        self.last_refresh = 0.0  # time.monotonic() of the last refresh()
+
+    @property
+    def total_races(self) -> int:
+        """Number of finalized races folded in."""
+        return len(self._processed)
+
+    def race_count(self, venue_code: str) -> int:
+        """Number of finalized races at a venue."""
+        venue = self._venues.get(venue_code)
+        return venue.race_count if venue else 0
+
+    def add_race(
+        self,
+        race_code: str,
+        venue_code: str,
+        track_code: str | None,
+        shiba_baba_code: str | None,
+        dirt_baba_code: str | None,
+        runners: Iterable[tuple],
+    ) -> bool:
+        """
+        Fold one finalized race into the counters.
+
+        Args:
+            race_code: Race code
+            venue_code: Venue code (keibajo_code)
+            track_code: Track code ("1x" = turf)
+            shiba_baba_code: Turf track condition code
+            dirt_baba_code: Dirt track condition code
+            runners: (wakuban, kakutei_chakujun, kyakushitsu_hantei, kishu_code,
+                kishumei_ryakusho) of each finisher
+
+        Returns:
+            False if the race was already folded in
+        """
+        with self._lock:
+            if race_code in self._processed:
+                return False
+            self._processed.add(race_code)
+            self._snapshot = None
+
+            is_turf = bool(track_code and track_code.startswith("1"))
+            venue = self._venues.get(venue_code)
+            if venue is None:
+                baba_code = shiba_baba_code if is_turf else dirt_baba_code
+                venue = _VenueCounters(
+                    track_condition=DailyBiasAnalyzer.TRACK_CONDITION.get(str(baba_code), "不明")
+                )
+                self._venues[venue_code] = venue
+
+            venue.race_count += 1
+            if is_turf:
+                venue.turf_results += 1
+            else:
+                venue.dirt_results += 1
+
+            for wakuban, chakujun_code, kyakushitsu, kishu_code, kishu_name in runners:
+                chakujun = _to_int(chakujun_code, 99)
+                is_win = chakujun == 1
+
+                # Post position bias
+                waku = _to_int(wakuban, 0)
+                if 1 <= waku <= 4:
+                    venue.inner_total += 1
+                    venue.inner_wins += is_win
+                elif 5 <= waku <= 8:
+                    venue.outer_total += 1
+                    venue.outer_wins += is_win
+
+                # Running style bias
+                kyaku = _to_int(kyakushitsu, 0)
+                if kyaku in (1, 2):  # Front-runner / Stalker
+                    venue.zenso_total += 1
+                    venue.zenso_wins += is_win
+                elif kyaku in (3, 4):  # Closer / Deep closer
+                    venue.koshi_total += 1
+                    venue.koshi_wins += is_win
+
+                # Jockey performance
+                if kishu_code:
+                    jockey = self._jockeys.get(kishu_code)
+                    if jockey is None:
+                        jockey = _JockeyCounters(name=kishu_name or kishu_code)
+                        self._jockeys[kishu_code] = jockey
+                    jockey.rides += 1
+                    jockey.wins += is_win
+                    jockey.top3 += chakujun <= 3
+
+            return True
+
+    def refresh(self, conn) -> int:
+        """
+        Fold in races finalized since the last refresh.
+
+        Issues one query when nothing changed, two otherwise (races and
+        their runners, fetched in bulk).
+
+        Args:
+            conn: psycopg2 connection
+
+        Returns:
+            Number of newly folded races
+        """
+        cur = conn.cursor()
+        try:
+            cur.execute(
+                """
+                SELECT DISTINCT race_code, keibajo_code, track_code,
+                       shiba_babajotai_code, dirt_babajotai_code
+                FROM race_shosai
+                WHERE kaisai_nen = %s
+                  AND kaisai_gappi = %s
+                  AND data_kubun IN ('6', '7')
+                  AND NOT (race_code = ANY(%s))
+                ORDER BY race_code
+            """,
+                (
+                    str(self.target_date.year),
+                    self.target_date.strftime("%m%d"),
+                    list(self._processed),
+                ),
+            )
+            races = cur.fetchall()
+            self.last_refresh = time.monotonic()
+            if not races:
+                return 0
+
+            cur.execute(
+                """
+                SELECT race_code, wakuban, kakutei_chakujun,
+                       kyakushitsu_hantei, kishu_code, kishumei_ryakusho
+                FROM umagoto_race_joho
+                WHERE race_code = ANY(%s)
+                  AND data_kubun IN ('6', '7')
+                  AND kakutei_chakujun IS NOT NULL
+                  AND kakutei_chakujun != ''
+                  AND kakutei_chakujun ~ '^[0-9]+$'
+            """,
+                ([race[0] for race in races],),
+            )
+            runners: dict[str, list[tuple]] = {}
+            for row in cur.fetchall():
+                runners.setdefault(row[0], []).append(row[1:])
+        finally:
+            cur.close()
+
+        added = 0
+        for race_code, venue_code, track_code, shiba, dirt in races:
+            # Results can be visible before the runners' finishing positions;
+            # leave such races for the next refresh instead of folding them in empty
+            if race_code not in runners:
+                continue
+            added += self.add_race(
+                race_code, venue_code, track_code, shiba, dirt, runners[race_code]
+            )
+
+        logger.info(f"Intra-day bias updated: {self.target_date}, +{added} races")
+        return added
+
+    def result(self) -> DailyBiasResult:
+        """Build the current bias snapshot from the counters."""
+        with self._lock:
+            if self._snapshot is not None:
+                return self._snapshot
+
+            venue_biases = {}
+            for venue_code, v in self._venues.items():
+                inner_rate = _rate(v.inner_wins, v.inner_total)
+                outer_rate = _rate(v.outer_wins, v.outer_total)
+                zenso_rate = _rate(v.zenso_wins, v.zenso_total)
+                koshi_rate = _rate(v.koshi_wins, v.koshi_total)
+                venue_biases[venue_code] = VenueBias(
+                    venue_code=venue_code,
+                    venue_name=DailyBiasAnalyzer.VENUE_NAMES.get(venue_code, venue_code),
+                    race_count=v.race_count,
+                    inner_waku_win_rate=inner_rate,
+                    outer_waku_win_rate=outer_rate,
+                    waku_bias=inner_rate - outer_rate,
+                    zenso_win_rate=zenso_rate,
+                    koshi_win_rate=koshi_rate,
+                    pace_bias=zenso_rate - koshi_rate,
+                    track_condition=v.track_condition,
+                    turf_results=v.turf_results,
+                    dirt_results=v.dirt_results,
+                )
+
+            jockey_performances = {
+                code: JockeyDayPerformance(
+                    jockey_code=code,
+                    jockey_name=j.name,
+                    rides=j.rides,
+                    wins=j.wins,
+                    top3=j.top3,
+                    win_rate=j.wins / j.rides,
+                    top3_rate=j.top3 / j.rides,
+                )
+                for code, j in self._jockeys.items()
+            }
+
+            self._snapshot = DailyBiasResult(
+                target_date=str(self.target_date),
+                analyzed_at=datetime.now().isoformat(),
+                total_races=len(self._processed),
+                venue_biases=venue_biases,
+                jockey_performances=jockey_performances,
+            )
+            return self._snapshot
+
+
+# Tracker of the current race day (replaced when the date changes)
+_tracker: IntradayBiasTracker | None = None
+_tracker_lock = threading.Lock()
+
+
+def get_intraday_tracker(target_date: date) -> IntradayBiasTracker:
+    """Get the tracker for a race day, starting a new one on date change."""
+    global _tracker
+    with _tracker_lock:
+        if _tracker is None or _tracker.target_date != target_date:
+            _tracker = IntradayBiasTracker(target_date)
+        return _tracker
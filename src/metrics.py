@@ -0,0 +1,229 @@
+"""
+Pipeline Timing Metrics
+
+Lightweight spans and histograms for the prediction pipeline, with no
+third-party dependency. Span durations are aggregated in-process into
+Prometheus-style histograms (served at /metrics by the API) and can
+optionally be emitted as structured log records, which the JSON log
+format (logging_config.CustomJsonFormatter) renders as fields.
+
+Usage:
+    from src.metrics import span, timed
+
+    with span("feature_build", race_id=race_id):
+        ...
+
+    @timed("query.past_stats")
+    def get_past_stats_batch(conn, kettonums):
+        ...
+
+Stage names:
+    - query.*: Feature extraction batch queries
+    - feature_build, feature_extraction: Feature vector construction
+    - model_load: Model file load (cache misses only)
+    - ensemble.*: Ensemble heads (rank, win, quinella, place)
+    - bias_adjustment, track_adjustment: Post-model score adjustments
+    - db_save: Prediction persistence
+"""
+
+import logging
+import threading
+import time
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from functools import wraps
+from typing import Any, TypeVar
+
+from src.config import METRICS_LOG_SPANS
+
+logger = logging.getLogger(__name__)
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+# Histogram bucket upper bounds (seconds): DB queries through full-day feature builds
+DEFAULT_BUCKETS: tuple[float, ...] = (
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+    30.0,
+    60.0,
+    120.0,
+)
+
+
+def _format_labels(labels: tuple[tuple[str, str], ...]) -> str:
+    """Render label pairs as {k="v",...} (escaped per the text exposition format)."""
+    if not labels:
+        return ""
+    parts = []
+    for key, value in labels:
+        escaped = value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+        parts.append(f'{key}="{escaped}"')
+    return "{" + ",".join(parts) + "}"
+
+
+class Histogram:
+    """
+    Thread-safe cumulative histogram with label sets.
+
+    Each label set keeps per-bucket counts, a running sum and a count, which
+    is exactly what the Prometheus text format needs.
+    """
+
+    def __init__(self, name: str, description: str, buckets: tuple[float, ...] = DEFAULT_BUCKETS):
+        """
+        Args:
+            name: Metric name
+            description: HELP text
+            buckets: Bucket upper bounds in ascending order (+Inf is implicit)
+        """
+        self.name = name
+        self.description = description
+        self.buckets = tuple(sorted(buckets))
+        self._lock = threading.Lock()
+        # labels -> [bucket counts..., sum, count]
+        self._series: dict[tuple[tuple[str, str], ...], list[float]] = {}
+
+    def observe(self, value: float, **labels: str) -> None:
+        """Record one observation."""
+        key = tuple(sorted((k, str(v)) for k, v in labels.items()))
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [0.0] * (len(self.buckets) + 2)
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[i] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    def snapshot(self) -> dict[tuple[tuple[str, str], ...], dict[str, Any]]:
+        """
+        Copy the current values.
+
+        Returns:
+            {labels: {"buckets": [cumulative counts], "sum": float, "count": int}}
+        """
+        with self._lock:
+            return {
+                key: {
+                    "buckets": list(series[: len(self.buckets)]),
+                    "sum": series[-2],
+                    "count": int(series[-1]),
+                }
+                for key, series in self._series.items()
+            }
+
+    def render(self) -> list[str]:
+        """Render as Prometheus text exposition lines."""
+        lines = [f"# HELP {self.name} {self.description}", f"# TYPE {self.name} histogram"]
+        for key, values in sorted(self.snapshot().items()):
+            for bound, count in zip(self.buckets, values["buckets"]):
+                labels = _format_labels(key + (("le", f"{bound:g}"),))
+                lines.append(f"{self.name}_bucket{labels} {int(count)}")
+            labels = _format_labels(key + (("le", "+Inf"),))
+            lines.append(f"{self.name}_bucket{labels} {values['count']}")
+            lines.append(f"{self.name}_sum{_format_labels(key)} {values['sum']:.6f}")
+            lines.append(f"{self.name}_count{_format_labels(key)} {values['count']}")
+        return lines
+
+    def reset(self) -> None:
+        """Clear all observations."""
+        with self._lock:
+            self._series.clear()
+
+
+# Registry of all histograms (name -> Histogram)
+_registry: dict[str, Histogram] = {}
+_registry_lock = threading.Lock()
+
+
+def histogram(
+    name: str, description: str, buckets: tuple[float, ...] = DEFAULT_BUCKETS
+) -> Histogram:
+    """Get or create a registered histogram."""
+    with _registry_lock:
+        hist = _registry.get(name)
+        if hist is None:
+            hist = _registry[name] = Histogram(name, description, buckets)
+        return hist
+
+
+STAGE_SECONDS = histogram(
+    "keiba_stage_duration_seconds", "Duration of prediction pipeline stages in seconds"
+)
+
+
+@contextmanager
+def span(stage: str, **fields: Any) -> Iterator[None]:
+    """
+    Time a pipeline stage.
+
+    The duration is recorded in STAGE_SECONDS labelled by stage and status
+    ("ok" or "error"). Extra fields (e.g. race_id) are not used as labels to
+    keep cardinality bounded; they are only attached to the span log record.
+
+    Args:
+        stage: Stage name (see module docstring)
+        **fields: Context for the structured log record
+    """
+    start = time.perf_counter()
+    status = "ok"
+    try:
+        yield
+    except BaseException:
+        status = "error"
+        raise
+    finally:
+        duration = time.perf_counter() - start
+        STAGE_SECONDS.observe(duration, stage=stage, status=status)
+        if METRICS_LOG_SPANS:
+            logger.info(
+                f"span {stage}: {duration * 1000:.1f}ms ({status})",
+                extra={
+                    "span": stage,
+                    "duration_ms": round(duration * 1000, 3),
+                    "status": status,
+                    **fields,
+                },
+            )
+
+
+def timed(stage: str) -> Callable[[F], F]:
+    """Decorator form of span() for synchronous functions."""
+
+    def decorator(func: F) -> F:
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(stage):
+                return func(*args, **kwargs)
+
+        return wrapper  # type: ignore[return-value]
+
+    return decorator
+
+
+def render_prometheus() -> str:
+    """Render all registered histograms in Prometheus text format."""
+    with _registry_lock:
+        histograms = list(_registry.values())
+    lines: list[str] = []
+    for hist in histograms:
+        lines.extend(hist.render())
+    return "\n".join(lines) + "\n"
+
+
+def reset_metrics() -> None:
+    """Clear all observations (for tests)."""
+    with _registry_lock:
+        histograms = list(_registry.values())
+    for hist in histograms:
+        hist.reset()
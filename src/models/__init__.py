@@ -2,8 +2,23 @@
 Machine Learning Models Module
 
 Feature extraction and model training for horse racing predictions.
+
+Exports are imported on first access, so importing a light submodule
+(surface_utils, ev_recommender, ...) does not load pandas.
 """
 
-from src.models.feature_extractor import FastFeatureExtractor
+import importlib
 
 __all__ = ["FastFeatureExtractor"]
+
+_LAZY_EXPORTS = {"FastFeatureExtractor": "src.models.feature_extractor"}
+
+
+def __getattr__(name: str):
+    """Import a lazy export on first access."""
+    module = _LAZY_EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module), name)
+    globals()[name] = value
+    return value
@@ -0,0 +1,402 @@
+"""
+Model Artifact Index
+
+Compact Parquet index of retrain results and deployed models, so the
+dashboard reads the few columns it plots instead of loading every
+retrain_result_*.json and model pickle on each render.
+
+Tables (models/index/):
+    runs.parquet               One row per training run (date, model, metrics, comparison)
+    artifacts.parquet          One row per deployed model (version, trained_at, metrics)
+    feature_importance.parquet Long format (model, trained_at, feature, importance, rank)
+
+The weekly retrain job appends runs and manager.deploy_new_model records
+deployments; --rebuild backfills the index from the JSON results on disk.
+
+Usage:
+    python -m src.models.artifact_index --rebuild
+    python -m src.models.artifact_index --rebuild --model-dir /app/models
+"""
+
+import json
+import logging
+import os
+from pathlib import Path
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+INDEX_DIR_NAME = "index"
+
+RUNS_TABLE = "runs"
+ARTIFACTS_TABLE = "artifacts"
+IMPORTANCE_TABLE = "feature_importance"
+
+# Columns that identify a row; an upsert replaces every row with the same key
+TABLE_KEYS: dict[str, tuple[str, ...]] = {
+    RUNS_TABLE: ("date", "model"),
+    ARTIFACTS_TABLE: ("model", "trained_at"),
+    IMPORTANCE_TABLE: ("model", "trained_at"),
+}
+
+# Training metrics shared by retrain results and model pickles
+METRIC_COLUMNS = (
+    "ranking_ndcg",
+    "win_auc",
+    "quinella_auc",
+    "place_auc",
+    "win_brier",
+    "quinella_brier",
+    "top3_coverage",
+    "win_accuracy",
+    "quinella_accuracy",
+    "place_accuracy",
+)
+
+# Backtest returns from compare_models(), stored as old_* / new_*
+EVAL_COLUMNS = ("win_auc", "tansho_return", "fukusho_return", "ev_tansho_return")
+
+# Win classifiers whose importances are averaged (new format, then old format)
+_IMPORTANCE_MODELS = (("xgb_win", "lgb_win"), ("xgb_model", "lgb_model"))
+
+
+def index_dir(model_dir: str | Path) -> Path:
+    """Index directory under a model directory."""
+    return Path(model_dir) / INDEX_DIR_NAME
+
+
+def model_key(model_path: str | Path) -> str:
+    """
+    Model name from a model file name.
+
+    ensemble_model_turf_latest.pkl -> "turf", ensemble_model_latest.pkl -> "mixed"
+    """
+    name = Path(model_path).name
+    for surface in ("turf", "dirt"):
+        if f"_{surface}_" in name:
+            return surface
+    return "mixed"
+
+
+# =====================================================================
+# Row builders
+# =====================================================================
+
+
+def _run_row(
+    run_date: str,
+    model: str,
+    training: dict,
+    comparison: dict | None,
+    deployed: bool,
+    source: str,
+) -> dict:
+    """One runs row from a training result and its comparison."""
+    comparison = comparison or {}
+    row: dict[str, Any] = {
+        "date": run_date,
+        "model": model,
+        "source": source,
+        "status": training.get("status"),
+        "deployed": bool(deployed),
+        "samples": training.get("samples"),
+    }
+    for column in METRIC_COLUMNS:
+        row[column] = training.get(column)
+    for prefix in ("old", "new"):
+        evaluation = comparison.get(f"{prefix}_eval") or {}
+        for column in EVAL_COLUMNS:
+            row[f"{prefix}_{column}"] = evaluation.get(column)
+    row["old_score"] = comparison.get("old_score")
+    row["new_score"] = comparison.get("new_score")
+    row["improvement"] = comparison.get("improvement")
+    row["test_samples"] = comparison.get("test_samples")
+    return row
+
+
+def run_rows(result: dict, source: str = "") -> list[dict]:
+    """
+    Runs rows from a retrain_result_*.json or surface_train_result_*.json dict.
+
+    Args:
+        result: Result written by WeeklyRetrain.run_weekly_job or train_surface
+        source: File the result came from
+
+    Returns:
+        One row per trained model (mixed, turf, dirt)
+    """
+    # surface_train_result_{surface}_*.json
+    if "train_result" in result:
+        return [
+            _run_row(
+                str(result.get("trained_at", ""))[:10],
+                result.get("surface") or "mixed",
+                result["train_result"],
+                result.get("comparison"),
+                deployed=False,
+                source=source,
+            )
+        ]
+
+    rows = []
+    if result.get("training"):
+        rows.append(
+            _run_row(
+                result["date"],
+                "mixed",
+                result["training"],
+                result.get("comparison"),
+                result.get("deployed", False),
+                source,
+            )
+        )
+    for surface, surface_result in (result.get("surface_models") or {}).items():
+        if surface_result.get("training"):
+            rows.append(
+                _run_row(
+                    result["date"],
+                    surface,
+                    surface_result["training"],
+                    surface_result.get("comparison"),
+                    surface_result.get("deployed", False),
+                    source,
+                )
+            )
+    return rows
+
+
+def artifact_row(model_data: dict, model: str, model_path: str | Path) -> dict:
+    """Artifacts row from a loaded model pickle."""
+    row: dict[str, Any] = {
+        "model": model,
+        "trained_at": str(model_data.get("trained_at", "")),
+        "version": model_data.get("version"),
+        "path": str(model_path),
+        "samples": model_data.get("training_samples"),
+        "n_features": len(model_data.get("feature_names") or []),
+    }
+    for column in METRIC_COLUMNS:
+        row[column] = model_data.get(column)
+    weights = model_data.get("ensemble_weights") or {}
+    for name in ("xgb", "lgb", "cb"):
+        row[f"{name}_weight"] = weights.get(name)
+    return row
+
+
+def importance_rows(model_data: dict, model: str) -> list[dict]:
+    """
+    Feature importance rows from a loaded model pickle.
+
+    Importance is the mean of the normalized feature_importances_ of the
+    XGBoost and LightGBM win classifiers.
+    """
+    feature_names = list(model_data.get("feature_names") or [])
+    if not feature_names:
+        return []
+
+    models = model_data.get("models") or {}
+    estimators = []
+    for keys in _IMPORTANCE_MODELS:
+        estimators = [models.get(k, model_data.get(k)) for k in keys]
+        estimators = [e for e in estimators if e is not None]
+        if estimators:
+            break
+
+    totals = [0.0] * len(feature_names)
+    used = 0
+    for estimator in estimators:
+        values = getattr(estimator, "feature_importances_", None)
+        if values is None or len(values) != len(feature_names):
+            continue
+        values = [float(v) for v in values]
+        total = sum(values)
+        if total <= 0:
+            continue
+        totals = [t + v / total for t, v in zip(totals, values)]
+        used += 1
+    if not used:
+        return []
+
+    trained_at = str(model_data.get("trained_at", ""))
+    ranked = sorted(zip(feature_names, totals), key=lambda x: x[1], reverse=True)
+    return [
+        {
+            "model": model,
+            "trained_at": trained_at,
+            "feature": feature,
+            "importance": importance / used,
+            "rank": rank,
+        }
+        for rank, (feature, importance) in enumerate(ranked, 1)
+    ]
+
+
+# =====================================================================
+# Writing
+# =====================================================================
+
+
+def _table_path(model_dir: str | Path, table: str) -> Path:
+    return index_dir(model_dir) / f"{table}.parquet"
+
+
+def _upsert(model_dir: str | Path, table: str, rows: list[dict]) -> int:
+    """
+    Replace rows with the same key in a table and rewrite it atomically.
+
+    Returns:
+        Number of rows written for the given keys
+    """
+    if not rows:
+        return 0
+
+    import pandas as pd
+
+    key = list(TABLE_KEYS[table])
+    path = _table_path(model_dir, table)
+    new = pd.DataFrame(rows)
+    if path.exists():
+        existing = pd.read_parquet(path)
+        new_keys = pd.MultiIndex.from_frame(new[key].drop_duplicates())
+        stale = pd.MultiIndex.from_frame(existing[key]).isin(new_keys)
+        new = pd.concat([existing[~stale], new], ignore_index=True)
+
+    new = new.sort_values(key, kind="stable").reset_index(drop=True)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix(".parquet.tmp")
+    new.to_parquet(tmp_path, index=False)
+    os.replace(tmp_path, path)
+    return len(rows)
+
+
+def index_retrain_result(result: dict, model_dir: str | Path, source: str = "") -> int:
+    """
+    Add a retrain result to the runs table.
+
+    Args:
+        result: Result dict written to retrain_result_*.json
+        model_dir: Model directory holding the index
+        source: Result file name
+
+    Returns:
+        Number of runs rows written
+    """
+    count = _upsert(model_dir, RUNS_TABLE, run_rows(result, source))
+    logger.info(f"Artifact index: {count} runs from {source or result.get('date')}")
+    return count
+
+
+def index_deployed_model(model_path: str | Path, model_dir: str | Path | None = None) -> dict:
+    """
+    Add a deployed model to the artifacts and feature importance tables.
+
+    Args:
+        model_path: Deployed model pickle (e.g. ensemble_model_turf_latest.pkl)
+        model_dir: Model directory holding the index (default: the pickle's directory)
+
+    Returns:
+        The artifacts row
+    """
+    import joblib
+
+    model_path = Path(model_path)
+    model_dir = model_dir or model_path.parent
+    model_data = joblib.load(model_path)
+    model = model_key(model_path)
+
+    row = artifact_row(model_data, model, model_path)
+    _upsert(model_dir, ARTIFACTS_TABLE, [row])
+    _upsert(model_dir, IMPORTANCE_TABLE, importance_rows(model_data, model))
+    logger.info(f"Artifact index: {model} model {row['version']} ({row['trained_at']})")
+    return row
+
+
+def rebuild_index(model_dir: str | Path) -> dict[str, int]:
+    """
+    Backfill the index from the result JSON files and deployed models on disk.
+
+    Returns:
+        Rows written per table
+    """
+    model_dir = Path(model_dir)
+    rows = []
+    for pattern in ("retrain_result_*.json", "surface_train_result_*.json"):
+        for path in sorted(model_dir.glob(pattern)):
+            try:
+                with open(path, encoding="utf-8") as f:
+                    rows.extend(run_rows(json.load(f), path.name))
+            except (OSError, ValueError, KeyError) as e:
+                logger.warning(f"Skipping {path.name}: {e}")
+    counts = {RUNS_TABLE: _upsert(model_dir, RUNS_TABLE, rows)}
+
+    artifacts = 0
+    for path in sorted(model_dir.glob("ensemble_model*_latest.pkl")):
+        try:
+            index_deployed_model(path, model_dir)
+            artifacts += 1
+        except Exception as e:
+            logger.warning(f"Skipping {path.name}: {e}")
+    counts[ARTIFACTS_TABLE] = artifacts
+    return counts
+
+
+# =====================================================================
+# Reading
+# =====================================================================
+
+
+def read_index(
+    model_dir: str | Path,
+    table: str,
+    columns: list[str] | None = None,
+    model: str | None = None,
+) -> "pd.DataFrame":
+    """
+    Read a column slice of an index table.
+
+    Args:
+        model_dir: Model directory holding the index
+        table: runs, artifacts or feature_importance
+        columns: Columns to read (default: all)
+        model: Only rows for this model (mixed, turf, dirt)
+
+    Returns:
+        DataFrame (empty if the table does not exist yet)
+    """
+    import pandas as pd
+
+    path = _table_path(model_dir, table)
+    if not path.exists():
+        return pd.DataFrame(columns=columns or list(TABLE_KEYS[table]))
+    filters = [("model", "==", model)] if model else None
+    return pd.read_parquet(path, columns=columns, filters=filters)
+
+
+def index_mtime(model_dir: str | Path) -> float:
+    """Latest modification time of the index tables (0.0 if missing), for cache keys."""
+    mtimes = [
+        _table_path(model_dir, table).stat().st_mtime
+        for table in TABLE_KEYS
+        if _table_path(model_dir, table).exists()
+    ]
+    return max(mtimes, default=0.0)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+
+    parser = argparse.ArgumentParser(description="Model artifact index")
+    parser.add_argument("--rebuild", action="store_true", help="Backfill from files on disk")
+    parser.add_argument("--model-dir", default="models", help="Model directory")
+    args = parser.parse_args()
+
+    if args.rebuild:
+        for table, count in rebuild_index(args.model_dir).items():
+            print(f"{table}: {count}")
+    else:
+        parser.print_help()
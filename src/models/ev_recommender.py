@@ -7,11 +7,17 @@ Recommends horses with EV > threshold as betting candidates.
 
 import logging
 from datetime import datetime, timedelta, timezone
+from typing import TYPE_CHECKING
 
-import numpy as np
 import psycopg2.extras
 
 from src.db.connection import get_db
+from src.db.queries.odds_queries import EXOTIC_ODDS_COLUMNS
+
+# numpy and exotic_probabilities are imported where used, so the odds watcher
+# and the API can import this module without loading numpy
+if TYPE_CHECKING:
+    import numpy as np
 
 # Japan Standard Time
 JST = timezone(timedelta(hours=9))
@@ -26,6 +32,9 @@ DEFAULT_PLACE_EV_THRESHOLD = 1.5  # Place bet EV threshold
 LOOSE_WIN_EV_THRESHOLD = 1.2
 LOOSE_PLACE_EV_THRESHOLD = 1.2
 
+# Exotic bet EV threshold (exacta/quinella/wide/trio/trifecta)
+DEFAULT_EXOTIC_EV_THRESHOLD = 1.5
+
 # Dynamic threshold adjustment
 CONFIDENCE_ALPHA = 0.5  # Max threshold adjustment range
 
@@ -45,6 +54,8 @@ def _calculate_race_confidence(win_probs: list[float]) -> float:
     if not win_probs or len(win_probs) < 2:
         return 0.5
 
+    import numpy as np
+
     probs = np.array(win_probs, dtype=np.float64)
     probs = probs[probs > 0]
     if len(probs) < 2:
@@ -70,6 +81,25 @@ def _calculate_race_confidence(win_probs: list[float]) -> float:
     return float(1.0 - norm_entropy)
 
 
+def format_odds_time(latest_time: str | None) -> str | None:
+    """Format an announcement time (MMDDHHMM[SS]) as "YYYY-MM-DD HH:MM"."""
+    if not latest_time or len(latest_time) < 8:
+        return None
+    try:
+        month = latest_time[0:2]
+        day = latest_time[2:4]
+        hour = latest_time[4:6]
+        minute = latest_time[6:8]
+        now = datetime.now(JST)
+        year = now.year
+        # If December but announcement is January, use next year
+        if now.month == 12 and month == "01":
+            year += 1
+        return f"{year}-{month}-{day} {hour}:{minute}"
+    except Exception:
+        return None
+
+
 class EVRecommender:
     """Expected value based betting recommendation class."""
 
@@ -110,132 +140,36 @@ class EVRecommender:
             }
         """
         try:
-            conn = self.db.get_connection()
+            # Latest odds from the running odds watcher (no DB queries on the hot path)
+            from src.services.odds_watcher import get_latest_odds
 
-            # Get odds
-            if use_realtime_odds:
-                tansho_odds, odds_time = self._get_realtime_tansho_odds(conn, race_code)
-                fukusho_odds, _ = self._get_realtime_fukusho_odds(conn, race_code)
+            snapshot = get_latest_odds(race_code) if use_realtime_odds else None
+
+            if snapshot is not None:
+                tansho_odds = snapshot.tansho
+                fukusho_odds = snapshot.fukusho
+                odds_time = snapshot.odds_time
                 odds_source = "realtime"
             else:
-                tansho_odds = self._get_final_tansho_odds(conn, race_code)
-                fukusho_odds = self._get_final_fukusho_odds(conn, race_code)
-                odds_source = "final"
-                odds_time = None
-
-            conn.close()
-
-            # No odds available
-            if not tansho_odds and not fukusho_odds:
-                logger.warning(f"No odds data: race_code={race_code}")
-                return {
-                    "win_recommendations": [],
-                    "place_recommendations": [],
-                    "odds_source": odds_source,
-                    "odds_time": odds_time,
-                    "error": "No odds data available",
-                }
+                conn = self.db.get_connection()
 
-            # Dynamic threshold adjustment based on model confidence
-            win_probs = [h.get("win_probability", 0) for h in ranked_horses]
-            confidence = _calculate_race_confidence(win_probs)
-            # High confidence -> lower threshold, low confidence -> higher threshold
-            threshold_adj = CONFIDENCE_ALPHA * (1.0 - confidence)
-            effective_win_threshold = self.win_ev_threshold + threshold_adj
-            effective_place_threshold = self.place_ev_threshold + threshold_adj
-            effective_loose_win = LOOSE_WIN_EV_THRESHOLD + threshold_adj * 0.5
-            effective_loose_place = LOOSE_PLACE_EV_THRESHOLD + threshold_adj * 0.5
+                # Get odds
+                if use_realtime_odds:
+                    tansho_odds, odds_time = self._get_realtime_tansho_odds(conn, race_code)
+                    fukusho_odds, _ = self._get_realtime_fukusho_odds(conn, race_code)
+                    odds_source = "realtime"
+                else:
+                    tansho_odds = self._get_final_tansho_odds(conn, race_code)
+                    fukusho_odds = self._get_final_fukusho_odds(conn, race_code)
+                    odds_source = "final"
+                    odds_time = None
 
-            logger.debug(
-                f"Dynamic threshold: confidence={confidence:.3f}, "
-                f"win_ev_th={effective_win_threshold:.2f}, place_ev_th={effective_place_threshold:.2f}"
-            )
+                conn.close()
 
-            # Calculate EV and generate recommendations
-            win_recommendations = []
-            place_recommendations = []
-            win_candidates = []
-            place_candidates = []
-            top1_win_rec = None  # Rank 1 + EV condition
-            top1_place_rec = None  # Rank 1 + EV condition
-
-            for horse in ranked_horses:
-                umaban = str(int(horse.get("horse_number", 0)))
-                horse_name = horse.get("horse_name", "Unknown")
-                win_prob = horse.get("win_probability", 0)
-                place_prob = horse.get("place_probability", 0)
-                rank = horse.get("rank", 99)
-
-                # Win bet expected value
-                tansho_odd = tansho_odds.get(umaban, 0)
-                if tansho_odd > 0 and win_prob > 0:
-                    win_ev = win_prob * tansho_odd
-                    rec = {
-                        "horse_number": int(umaban),
-                        "horse_name": horse_name,
-                        "win_probability": win_prob,
-                        "odds": tansho_odd,
-                        "expected_value": win_ev,
-                        "rank": rank,
-                        "confidence": confidence,
-                    }
-                    if win_ev >= effective_win_threshold:
-                        win_recommendations.append(rec)
-                    elif win_ev >= effective_loose_win:
-                        win_candidates.append(rec)
-                    # Rank 1 + EV >= 1.0
-                    if rank == 1 and win_ev >= 1.0 and top1_win_rec is None:
-                        top1_win_rec = rec
-
-                # Place bet expected value
-                fukusho_odd = fukusho_odds.get(umaban, 0)
-                if fukusho_odd > 0 and place_prob > 0:
-                    place_ev = place_prob * fukusho_odd
-                    rec = {
-                        "horse_number": int(umaban),
-                        "horse_name": horse_name,
-                        "place_probability": place_prob,
-                        "odds": fukusho_odd,
-                        "expected_value": place_ev,
-                        "rank": rank,
-                        "confidence": confidence,
-                    }
-                    if place_ev >= effective_place_threshold:
-                        place_recommendations.append(rec)
-                    elif place_ev >= effective_loose_place:
-                        place_candidates.append(rec)
-                    # Rank 1 + EV >= 1.0
-                    if rank == 1 and place_ev >= 1.0 and top1_place_rec is None:
-                        top1_place_rec = rec
-
-            # Sort by expected value
-            win_recommendations.sort(key=lambda x: x["expected_value"], reverse=True)
-            place_recommendations.sort(key=lambda x: x["expected_value"], reverse=True)
-            win_candidates.sort(key=lambda x: x["expected_value"], reverse=True)
-            place_candidates.sort(key=lambda x: x["expected_value"], reverse=True)
-
-            logger.info(
-                f"EV recommendations: race_code={race_code}, "
-                f"confidence={confidence:.3f}, "
-                f"thresholds=win:{effective_win_threshold:.2f}/place:{effective_place_threshold:.2f}, "
-                f"win={len(win_recommendations)}(candidates={len(win_candidates)}), "
-                f"place={len(place_recommendations)}(candidates={len(place_candidates)})"
+            return self.recommend_from_odds(
+                race_code, ranked_horses, tansho_odds, fukusho_odds, odds_source, odds_time
             )
 
-            return {
-                "win_recommendations": win_recommendations,
-                "place_recommendations": place_recommendations,
-                "win_candidates": win_candidates,
-                "place_candidates": place_candidates,
-                "top1_win": top1_win_rec,
-                "top1_place": top1_place_rec,
-                "odds_source": odds_source,
-                "odds_time": odds_time,
-                "confidence": confidence,
-                "effective_win_threshold": effective_win_threshold,
-                "effective_place_threshold": effective_place_threshold,
-            }
-
         except Exception as e:
             logger.exception(f"EV recommendation error: race_code={race_code}, error={e}")
             return {
@@ -246,6 +180,140 @@ class EVRecommender:
                 "error": str(e),
             }
 
+    def recommend_from_odds(
+        self,
+        race_code: str,
+        ranked_horses: list[dict],
+        tansho_odds: dict[str, float],
+        fukusho_odds: dict[str, float],
+        odds_source: str,
+        odds_time: str | None,
+    ) -> dict:
+        """
+        Compute EV recommendations from already-loaded odds.
+
+        Args:
+            race_code: Race code
+            ranked_horses: Prediction results (containing win_probability, place_probability)
+            tansho_odds: Win odds by horse number ("1" -> 3.5)
+            fukusho_odds: Place odds (minimum) by horse number
+            odds_source: "realtime" or "final"
+            odds_time: Odds announcement time ("YYYY-MM-DD HH:MM") or None
+
+        Returns:
+            Same format as get_recommendations.
+        """
+        # No odds available
+        if not tansho_odds and not fukusho_odds:
+            logger.warning(f"No odds data: race_code={race_code}")
+            return {
+                "win_recommendations": [],
+                "place_recommendations": [],
+                "odds_source": odds_source,
+                "odds_time": odds_time,
+                "error": "No odds data available",
+            }
+
+        # Dynamic threshold adjustment based on model confidence
+        win_probs = [h.get("win_probability", 0) for h in ranked_horses]
+        confidence = _calculate_race_confidence(win_probs)
+        # High confidence -> lower threshold, low confidence -> higher threshold
+        threshold_adj = CONFIDENCE_ALPHA * (1.0 - confidence)
+        effective_win_threshold = self.win_ev_threshold + threshold_adj
+        effective_place_threshold = self.place_ev_threshold + threshold_adj
+        effective_loose_win = LOOSE_WIN_EV_THRESHOLD + threshold_adj * 0.5
+        effective_loose_place = LOOSE_PLACE_EV_THRESHOLD + threshold_adj * 0.5
+
+        logger.debug(
+            f"Dynamic threshold: confidence={confidence:.3f}, "
+            f"win_ev_th={effective_win_threshold:.2f}, place_ev_th={effective_place_threshold:.2f}"
+        )
+
+        # Calculate EV and generate recommendations
+        win_recommendations = []
+        place_recommendations = []
+        win_candidates = []
+        place_candidates = []
+        top1_win_rec = None  # Rank 1 + EV condition
+        top1_place_rec = None  # Rank 1 + EV condition
+
+        for horse in ranked_horses:
+            umaban = str(int(horse.get("horse_number", 0)))
+            horse_name = horse.get("horse_name", "Unknown")
+            win_prob = horse.get("win_probability", 0)
+            place_prob = horse.get("place_probability", 0)
+            rank = horse.get("rank", 99)
+
+            # Win bet expected value
+            tansho_odd = tansho_odds.get(umaban, 0)
+            if tansho_odd > 0 and win_prob > 0:
+                win_ev = win_prob * tansho_odd
+                rec = {
+                    "horse_number": int(umaban),
+                    "horse_name": horse_name,
+                    "win_probability": win_prob,
+                    "odds": tansho_odd,
+                    "expected_value": win_ev,
+                    "rank": rank,
+                    "confidence": confidence,
+                }
+                if win_ev >= effective_win_threshold:
+                    win_recommendations.append(rec)
+                elif win_ev >= effective_loose_win:
+                    win_candidates.append(rec)
+                # Rank 1 + EV >= 1.0
+                if rank == 1 and win_ev >= 1.0 and top1_win_rec is None:
+                    top1_win_rec = rec
+
+            # Place bet expected value
+            fukusho_odd = fukusho_odds.get(umaban, 0)
+            if fukusho_odd > 0 and place_prob > 0:
+                place_ev = place_prob * fukusho_odd
+                rec = {
+                    "horse_number": int(umaban),
+                    "horse_name": horse_name,
+                    "place_probability": place_prob,
+                    "odds": fukusho_odd,
+                    "expected_value": place_ev,
+                    "rank": rank,
+                    "confidence": confidence,
+                }
+                if place_ev >= effective_place_threshold:
+                    place_recommendations.append(rec)
+                elif place_ev >= effective_loose_place:
+                    place_candidates.append(rec)
+                # Rank 1 + EV >= 1.0
+                if rank == 1 and place_ev >= 1.0 and top1_place_rec is None:
+                    top1_place_rec = rec
+
+        # Sort by expected value
+        win_recommendations.sort(key=lambda x: x["expected_value"], reverse=True)
+        place_recommendations.sort(key=lambda x: x["expected_value"], reverse=True)
+        win_candidates.sort(key=lambda x: x["expected_value"], reverse=True)
+        place_candidates.sort(key=lambda x: x["expected_value"], reverse=True)
+
+        logger.info(
+            f"EV recommendations: race_code={race_code}, "
+            f"confidence={confidence:.3f}, "
+            f"thresholds=win:{effective_win_threshold:.2f}/place:{effective_place_threshold:.2f}, "
+            f"win={len(win_recommendations)}(candidates={len(win_candidates)}), "
+            f"place={len(place_recommendations)}(candidates={len(place_candidates)})"
+        )
+
+        return {
+            "win_recommendations": win_recommendations,
+            "place_recommendations": place_recommendations,
+            "win_candidates": win_candidates,
+            "place_candidates": place_candidates,
+            "top1_win": top1_win_rec,
+            "top1_place": top1_place_rec,
+            "odds_source": odds_source,
+            "odds_time": odds_time,
+            "confidence": confidence,
+            "effective_win_threshold": effective_win_threshold,
+            "effective_place_threshold": effective_place_threshold,
+        }
+
     def _get_realtime_tansho_odds(
         self, conn, race_code: str
     ) -> tuple[dict[str, float], str | None]:
@@ -292,22 +360,7 @@ class EVRecommender:
             cur.close()
 
             # Format announcement time
-            odds_time_str = None
-            if latest_time and len(latest_time) >= 8:
-                # MMDDHHMMSS or MMDDHHMM format
-                try:
-                    month = latest_time[0:2]
-                    day = latest_time[2:4]
-                    hour = latest_time[4:6]
-                    minute = latest_time[6:8]
-                    now = datetime.now(JST)
-                    year = now.year
-                    # If December but announcement is January, use next year
-                    if now.month == 12 and month == "01":
-                        year += 1
-                    odds_time_str = f"{year}-{month}-{day} {hour}:{minute}"
-                except Exception:
-                    pass
+            odds_time_str = format_odds_time(latest_time)
 
             logger.debug(
                 f"Time-series win odds retrieved: race_code={race_code}, count={len(odds_dict)}, time={latest_time}"
@@ -461,3 +514,106 @@ class EVRecommender:
         except Exception as e:
             logger.error(f"Final place odds retrieval error: {e}")
             return {}
+
+    def get_exotic_recommendations(
+        self,
+        race_code: str,
+        ranked_horses: list[dict],
+        ticket_types: list[str] | None = None,
+        ev_threshold: float = DEFAULT_EXOTIC_EV_THRESHOLD,
+        limit: int = 10,
+        model: str = "discounted",
+    ) -> dict[str, list[dict]]:
+        """
+        Get EV recommendations for exotic tickets.
+
+        Joint finishing-order probabilities for every combination are derived
+        from the win probabilities and joined with the complete odds table,
+        so EV is evaluated for all combinations (e.g. 4896 trifectas).
+
+        Args:
+            race_code: Race code
+            ranked_horses: Prediction results (containing horse_number, win_probability)
+            ticket_types: Exotic ticket types (default: all)
+            ev_threshold: Minimum EV to recommend
+            limit: Maximum recommendations per ticket type
+            model: Exotic probability model ("harville" or "discounted")
+
+        Returns:
+            {"trifecta": [{"numbers": [3, 7, 12], "probability": ..., "odds": ...,
+                           "expected_value": ...}, ...], ...}
+        """
+        from src.models.exotic_probabilities import (
+            EXOTIC_TICKET_SIZES,
+            compute_exotic_probabilities,
+            top_expected_value_bets,
+        )
+
+        ticket_types = ticket_types or list(EXOTIC_TICKET_SIZES)
+        horse_numbers = [int(h.get("horse_number", 0)) for h in ranked_horses]
+        win_probs = [h.get("win_probability", 0) for h in ranked_horses]
+
+        try:
+            probabilities = compute_exotic_probabilities(horse_numbers, win_probs, model=model)
+        except ValueError as e:
+            logger.warning(f"Exotic probabilities unavailable: race_code={race_code}, {e}")
+            return {ticket_type: [] for ticket_type in ticket_types}
+
+        recommendations: dict[str, list[dict]] = {}
+        conn = self.db.get_connection()
+        try:
+            for ticket_type in ticket_types:
+                odds = self._get_final_exotic_odds(conn, race_code, ticket_type)
+                recommendations[ticket_type] = top_expected_value_bets(
+                    probabilities.ticket(ticket_type), odds, ev_threshold, limit=limit
+                )
+        finally:
+            conn.close()
+
+        logger.info(
+            f"Exotic EV recommendations: race_code={race_code}, "
+            + ", ".join(f"{k}={len(v)}" for k, v in recommendations.items())
+        )
+        return recommendations
+
+    def _get_final_exotic_odds(self, conn, race_code: str, ticket_type: str) -> "np.ndarray":
+        """Get the complete exotic odds table as an 18-horse cube (0 = not sold)."""
+        import numpy as np
+
+        from src.models.exotic_probabilities import EXOTIC_TICKET_SIZES, MAX_HORSES
+
+        size = EXOTIC_TICKET_SIZES[ticket_type]
+        odds = np.zeros((MAX_HORSES,) * size, dtype=np.float64)
+        table, odds_column, _ = EXOTIC_ODDS_COLUMNS[ticket_type]
+        umaban_columns = [f"umaban_{i}" for i in range(1, size + 1)]
+
+        try:
+            cur = conn.cursor()
+            cur.execute(
+                f"""
+                SELECT {", ".join(umaban_columns)}, {odds_column}
+                FROM {table}
+                WHERE race_code = %s
+            """,
+                (race_code,),
+            )
+            rows = cur.fetchall()
+            cur.close()
+        except Exception as e:
+            logger.error(f"Final {ticket_type} odds retrieval error: {e}")
+            return odds
+
+        for row in rows:
+            try:
+                index = tuple(int(n) - 1 for n in row[:size])
+                value = float(row[size]) / 10
+            except (ValueError, TypeError):
+                continue
+            if value > 0 and all(0 <= i < MAX_HORSES for i in index):
+                odds[index] = value
+
+        logger.debug(
+            f"Final {ticket_type} odds retrieved: race_code={race_code}, "
+            f"count={int((odds > 0).sum())}"
+        )
+        return odds
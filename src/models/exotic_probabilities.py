@@ -0,0 +1,252 @@
+"""
+Exotic Bet Probability Module
+
+Derives joint finishing-order probabilities for every exotic ticket
+(exacta/quinella/wide/trio/trifecta) from per-horse win probabilities.
+
+All probabilities are dense NumPy arrays indexed by (horse number - 1) on an
+18-horse cube, the same layout as the packed odds tables streamed by
+GET /odds/{race_id}/table, so EV is a single element-wise multiply.
+
+Models:
+    harville: P(i, j, k) = p_i * p_j / (1 - p_i) * p_k / (1 - p_i - p_j)
+    discounted: Harville with p**lambda strengths for 2nd/3rd place
+        (Lo & Bacon-Shone), a closed-form approximation of the Henery/Stern
+        models that corrects Harville's overconfidence in favorites.
+"""
+
+import logging
+from collections.abc import Sequence
+from dataclasses import dataclass
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Maximum field size (JRA)
+MAX_HORSES = 18
+
+# Discount exponents for 2nd/3rd place (Lo & Bacon-Shone estimates)
+DISCOUNTED_LAMBDA_2 = 0.81
+DISCOUNTED_LAMBDA_3 = 0.65
+
+# Exotic ticket type -> combination size
+EXOTIC_TICKET_SIZES: dict[str, int] = {
+    "quinella": 2,
+    "exacta": 2,
+    "wide": 2,
+    "trio": 3,
+    "trifecta": 3,
+}
+
+
+@dataclass
+class ExoticProbabilities:
+    """Joint finishing-order probabilities on an 18-horse cube.
+
+    Ordered tickets (exacta/trifecta) are indexed in finishing order.
+    Unordered tickets (quinella/wide/trio) are stored only at ascending
+    indices (i < j < k) and are zero elsewhere, so each combination is
+    counted once.
+    """
+
+    win: np.ndarray  # (18,)
+    place: np.ndarray  # (18,) P(top 3)
+    exacta: np.ndarray  # (18, 18)
+    quinella: np.ndarray  # (18, 18)
+    wide: np.ndarray  # (18, 18)
+    trio: np.ndarray  # (18, 18, 18)
+    trifecta: np.ndarray  # (18, 18, 18)
+
+    def ticket(self, ticket_type: str) -> np.ndarray:
+        """Get the probability array for a ticket type."""
+        if ticket_type not in EXOTIC_TICKET_SIZES:
+            raise ValueError(f"Unknown exotic ticket type: {ticket_type}")
+        return getattr(self, ticket_type)
+
+
+def _to_strength_vector(horse_numbers: Sequence[int], win_probs: Sequence[float]) -> np.ndarray:
+    """Scatter win probabilities onto the 18-horse axis and normalize to sum 1."""
+    p = np.zeros(MAX_HORSES, dtype=np.float64)
+    numbers = np.asarray(horse_numbers, dtype=np.int64)
+    probs = np.clip(np.asarray(win_probs, dtype=np.float64), 0.0, None)
+
+    valid = (numbers >= 1) & (numbers <= MAX_HORSES)
+    if not valid.all():
+        logger.warning(f"Ignoring out-of-range horse numbers: {numbers[~valid].tolist()}")
+    p[numbers[valid] - 1] = probs[valid]
+
+    total = p.sum()
+    if total <= 0:
+        raise ValueError("Win probabilities must have a positive sum")
+    return p / total
+
+
+def _conditional(strength: np.ndarray, taken: np.ndarray) -> np.ndarray:
+    """Compute strength / (1 - taken) with zero where nothing remains."""
+    remaining = 1.0 - taken
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(remaining > 1e-12, strength / remaining, 0.0)
+
+
+def trifecta_probabilities(
+    win_probs: np.ndarray, lambda2: float = 1.0, lambda3: float = 1.0
+) -> np.ndarray:
+    """
+    Compute P(i 1st, j 2nd, k 3rd) for all ordered triples.
+
+    Args:
+        win_probs: Normalized win probabilities on the 18-horse axis.
+        lambda2: Strength exponent for 2nd place (1.0 = Harville).
+        lambda3: Strength exponent for 3rd place (1.0 = Harville).
+
+    Returns:
+        (18, 18, 18) array; zero wherever indices repeat.
+    """
+    p = win_probs
+    s2 = p**lambda2
+    s2 = s2 / s2.sum()
+    s3 = p**lambda3
+    s3 = s3 / s3.sum()
+
+    idx = np.arange(MAX_HORSES)
+    i, j, k = idx[:, None, None], idx[None, :, None], idx[None, None, :]
+    distinct = (i != j) & (i != k) & (j != k)
+
+    # P(j 2nd | i 1st) = s2_j / (1 - s2_i)
+    second = _conditional(s2[None, :], s2[:, None])
+    # P(k 3rd | i 1st, j 2nd) = s3_k / (1 - s3_i - s3_j)
+    third = _conditional(s3[None, None, :], s3[:, None, None] + s3[None, :, None])
+
+    return np.where(distinct, p[:, None, None] * second[:, :, None] * third, 0.0)
+
+
+def compute_exotic_probabilities(
+    horse_numbers: Sequence[int],
+    win_probs: Sequence[float],
+    model: str = "discounted",
+) -> ExoticProbabilities:
+    """
+    Derive probabilities for every exotic ticket from win probabilities.
+
+    Args:
+        horse_numbers: Horse numbers (1-18).
+        win_probs: Win probabilities (normalized internally).
+        model: "harville" or "discounted".
+
+    Returns:
+        ExoticProbabilities on the 18-horse cube.
+
+    Raises:
+        ValueError: Unknown model or no positive probabilities.
+    """
+    if model == "harville":
+        lambda2, lambda3 = 1.0, 1.0
+    elif model == "discounted":
+        lambda2, lambda3 = DISCOUNTED_LAMBDA_2, DISCOUNTED_LAMBDA_3
+    else:
+        raise ValueError(f"Unknown exotic probability model: {model}")
+
+    p = _to_strength_vector(horse_numbers, win_probs)
+    trifecta = trifecta_probabilities(p, lambda2, lambda3)
+    return probabilities_from_trifecta(trifecta)
+
+
+def probabilities_from_trifecta(trifecta: np.ndarray) -> ExoticProbabilities:
+    """
+    Aggregate a trifecta tensor into all other ticket types.
+
+    Args:
+        trifecta: (18, 18, 18) ordered top-3 probabilities.
+
+    Returns:
+        ExoticProbabilities derived by summing over finishing orders.
+    """
+    exacta = trifecta.sum(axis=2)
+
+    # Sum over all 6 orderings gives a fully symmetric unordered-triple tensor
+    symmetric = (
+        trifecta
+        + trifecta.transpose(0, 2, 1)
+        + trifecta.transpose(1, 0, 2)
+        + trifecta.transpose(1, 2, 0)
+        + trifecta.transpose(2, 0, 1)
+        + trifecta.transpose(2, 1, 0)
+    )
+
+    idx = np.arange(MAX_HORSES)
+    upper2 = idx[:, None] < idx[None, :]
+    upper3 = upper2[:, :, None] & upper2[None, :, :]
+
+    quinella = np.where(upper2, exacta + exacta.T, 0.0)
+    # Both in top 3: every third horse k completes exactly one unordered triple
+    wide = np.where(upper2, symmetric.sum(axis=2), 0.0)
+    trio = np.where(upper3, symmetric, 0.0)
+
+    win = exacta.sum(axis=1)
+    place = trifecta.sum(axis=(1, 2)) + trifecta.sum(axis=(0, 2)) + trifecta.sum(axis=(0, 1))
+
+    return ExoticProbabilities(
+        win=win,
+        place=place,
+        exacta=exacta,
+        quinella=quinella,
+        wide=wide,
+        trio=trio,
+        trifecta=trifecta,
+    )
+
+
+def expected_values(probabilities: np.ndarray, odds: np.ndarray) -> np.ndarray:
+    """
+    Compute EV = probability x odds for every combination.
+
+    Args:
+        probabilities: Probability array for one ticket type.
+        odds: Odds array of the same shape (0 = not sold).
+
+    Returns:
+        EV array; 0 where the combination is not sold.
+    """
+    return np.where(odds > 0, probabilities * odds, 0.0)
+
+
+def top_expected_value_bets(
+    probabilities: np.ndarray,
+    odds: np.ndarray,
+    ev_threshold: float,
+    limit: int = 10,
+) -> list[dict]:
+    """
+    List combinations with EV at or above a threshold, best first.
+
+    Args:
+        probabilities: Probability array for one ticket type.
+        odds: Odds array of the same shape (0 = not sold).
+        ev_threshold: Minimum EV.
+        limit: Maximum number of combinations.
+
+    Returns:
+        [{"numbers": [3, 7, 12], "probability": 0.012, "odds": 120.5,
+          "expected_value": 1.45}, ...]
+    """
+    ev = expected_values(probabilities, odds)
+    flat = ev.ravel()
+    candidates = np.flatnonzero(flat >= ev_threshold)
+    if candidates.size == 0:
+        return []
+
+    order = candidates[np.argsort(-flat[candidates], kind="stable")][:limit]
+    coords = np.unravel_index(order, ev.shape)
+    prob_flat = probabilities.ravel()
+    odds_flat = odds.ravel()
+
+    return [
+        {
+            "numbers": [int(c[n]) + 1 for c in coords],
+            "probability": float(prob_flat[i]),
+            "odds": float(odds_flat[i]),
+            "expected_value": float(flat[i]),
+        }
+        for n, i in enumerate(order)
+    ]
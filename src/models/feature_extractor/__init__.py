@@ -11,9 +11,13 @@ Modules:
     venue: Venue and previous race (zenso) statistics
     feature_builder: Feature construction logic
     utils: Utility functions
+
+FastFeatureExtractor (and with it pandas) is imported on first access, so
+importing utils or db_queries alone stays light.
 """
 
-from .base import FastFeatureExtractor
+import importlib
+
 from .utils import (
     calc_days_since_last,
     calc_speed_index,
@@ -42,3 +46,12 @@ __all__ = [
     "calc_style_pace_compatibility",
     "stable_hash",
 ]
+
+
+def __getattr__(name: str):
+    """Import FastFeatureExtractor on first access."""
+    if name != "FastFeatureExtractor":
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = importlib.import_module(".base", __name__).FastFeatureExtractor
+    globals()[name] = value
+    return value
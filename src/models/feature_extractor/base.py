@@ -10,6 +10,8 @@ from typing import Any
 
 import pandas as pd
 
+from src.metrics import span
+
 from . import db_queries, pedigree, performance, venue
 from .utils import (
     calc_days_since_last,
@@ -200,33 +202,34 @@ class FastFeatureExtractor:
 
         # 7. Build feature vectors
         features_list = []
-        for entry in entries:
-            features = self._build_features(
-                entry,
-                races,
-                past_stats,
-                jockey_horse_stats=jockey_horse_stats,
-                distance_stats=surface_stats,
-                baba_stats=baba_stats,
-                training_stats=training_stats,
-                interval_stats=interval_stats,
-                pace_predictions=pace_predictions,
-                entries_by_race=entries_by_race,
-                # Extended feature data
-                pedigree_info=pedigree_info,
-                venue_stats=venue_stats,
-                zenso_info=zenso_info,
-                jockey_recent=jockey_recent,
-                sire_stats_turf=sire_stats_turf,
-                sire_stats_dirt=sire_stats_dirt,
-                sire_maiden_stats=sire_maiden_stats,
-                jockey_maiden_stats=jockey_maiden_stats,
-                detailed_stats=detailed_stats,
-                lap_stats=lap_stats,
-                year=year,
-            )
-            if features:
-                features_list.append(features)
+        with span("feature_build", year=year):
+            for entry in entries:
+                features = self._build_features(
+                    entry,
+                    races,
+                    past_stats,
+                    jockey_horse_stats=jockey_horse_stats,
+                    distance_stats=surface_stats,
+                    baba_stats=baba_stats,
+                    training_stats=training_stats,
+                    interval_stats=interval_stats,
+                    pace_predictions=pace_predictions,
+                    entries_by_race=entries_by_race,
+                    # Extended feature data
+                    pedigree_info=pedigree_info,
+                    venue_stats=venue_stats,
+                    zenso_info=zenso_info,
+                    jockey_recent=jockey_recent,
+                    sire_stats_turf=sire_stats_turf,
+                    sire_stats_dirt=sire_stats_dirt,
+                    sire_maiden_stats=sire_maiden_stats,
+                    jockey_maiden_stats=jockey_maiden_stats,
+                    detailed_stats=detailed_stats,
+                    lap_stats=lap_stats,
+                    year=year,
+                )
+                if features:
+                    features_list.append(features)
 
         df = pd.DataFrame(features_list)
 
@@ -10,6 +10,9 @@ Contains all batch query methods for retrieving horse racing data:
 
 import logging
 
+from src.config import FEATURE_USE_FINALIZED_RUNS
+from src.metrics import timed
+
 logger = logging.getLogger(__name__)
 
 SURFACE_FILTERS = {
@@ -17,7 +20,63 @@ SURFACE_FILTERS = {
     "dirt": "(track_code::int IN (24, 25, 26, 27) OR track_code = '51')",
 }
 
+# Past-stats run sources: raw JRA-VAN text columns (cast per query), or finalized_runs
+# (migration 004: finalized runs only, already numeric, covered by idx_finalized_runs_horse)
+_RAW_RUNS = {
+    "table": "umagoto_race_joho",
+    "columns": "u.kakutei_chakujun, u.soha_time, u.kohan_3f, u.corner3_juni, u.corner4_juni",
+    "filter": "AND u.data_kubun = '7' AND u.kakutei_chakujun ~ '^[0-9]+$'",
+    "typed": (
+        "CAST(kakutei_chakujun AS INTEGER) AS chakujun, "
+        "CAST(NULLIF(soha_time, '') AS INTEGER) AS soha_time, "
+        "CAST(NULLIF(kohan_3f, '') AS INTEGER) AS kohan_3f, "
+        "CAST(NULLIF(corner3_juni, '') AS INTEGER) AS corner3_juni, "
+        "CAST(NULLIF(corner4_juni, '') AS INTEGER) AS corner4_juni"
+    ),
+}
+_TYPED_RUNS = {
+    "table": "finalized_runs",
+    "columns": "u.chakujun, u.soha_time, u.kohan_3f, u.corner3_juni, u.corner4_juni",
+    "filter": "",
+    "typed": "chakujun, soha_time, kohan_3f, corner3_juni, corner4_juni",
+}
+
+# Aggregation over the last 10 runs per horse (typed columns of the "recent" CTE)
+_PAST_STATS_AGGREGATE = """
+            SELECT
+                ketto_toroku_bango,
+                COUNT(*) as race_count,
+                AVG(chakujun) as avg_rank,
+                SUM(CASE WHEN chakujun = 1 THEN 1 ELSE 0 END) as win_count,
+                SUM(CASE WHEN chakujun BETWEEN 1 AND 3 THEN 1 ELSE 0 END) as place_count,
+                AVG(soha_time) as avg_time,
+                MIN(soha_time) as best_time,
+                MAX(CASE WHEN rn = 1 THEN soha_time END) as recent_time,
+                AVG(kohan_3f) as avg_last3f,
+                MIN(kohan_3f) as best_last3f,
+                AVG(corner3_juni) as avg_corner3,
+                AVG(corner4_juni) as avg_corner4,
+                MIN(chakujun) as best_finish,
+                MAX(CASE WHEN rn = 1 THEN kishu_code END) as last_jockey,
+                MAX(CASE WHEN rn = 1 THEN kaisai_nen || kaisai_gappi END) as last_race_date,
+                -- Temporal decay weighted averages (decay_factor=0.85)
+                SUM(chakujun * POWER(0.85, rn - 1)) / NULLIF(SUM(POWER(0.85, rn - 1)), 0) as weighted_avg_rank,
+                SUM(CASE WHEN chakujun = 1 THEN POWER(0.85, rn - 1) ELSE 0 END) / NULLIF(SUM(POWER(0.85, rn - 1)), 0) as weighted_win_rate,
+                SUM(CASE WHEN chakujun BETWEEN 1 AND 3 THEN POWER(0.85, rn - 1) ELSE 0 END) / NULLIF(SUM(POWER(0.85, rn - 1)), 0) as weighted_place_rate,
+                SUM(kohan_3f * POWER(0.85, rn - 1)) / NULLIF(SUM(CASE WHEN kohan_3f IS NOT NULL THEN POWER(0.85, rn - 1) ELSE 0 END), 0) as weighted_avg_last3f,
+                -- Corner position progression (3rd corner -> 4th corner)
+                AVG(corner3_juni - corner4_juni) as avg_position_change_3to4,
+                STDDEV(corner3_juni - corner4_juni) as std_position_change_3to4,
+                -- Performance stability
+                STDDEV(chakujun) as rank_stddev,
+                STDDEV(soha_time) as time_stddev,
+                STDDEV(kohan_3f) as last3f_stddev
+            FROM recent
+            GROUP BY ketto_toroku_bango
+"""
 
+
+@timed("query.get_races")
 def get_races(conn, year: int, max_races: int, surface: str | None = None) -> list[dict]:
     """Get race list for a given year.
 
@@ -54,6 +113,7 @@ def get_races(conn, year: int, max_races: int, surface: str | None = None) -> li
     return [dict(zip(cols, row)) for row in rows]
 
 
+@timed("query.get_all_entries")
 def get_all_entries(conn, race_codes: list[str]) -> list[dict]:
     """Batch fetch horse entry data for multiple races.
 
@@ -89,6 +149,7 @@ def get_all_entries(conn, race_codes: list[str]) -> list[dict]:
     return [dict(zip(cols, row)) for row in rows]
 
 
+@timed("query.get_past_stats_batch")
 def get_past_stats_batch(
     conn, kettonums: list[str], entries: list[dict] | None = None
 ) -> dict[str, dict]:
@@ -117,16 +178,18 @@ def get_past_stats_batch(
                 horse_race_map[k] = rc
 
     placeholders = ",".join(["%s"] * len(kettonums))
+    source = _TYPED_RUNS if FEATURE_USE_FINALIZED_RUNS else _RAW_RUNS
 
     # Add condition to exclude current race
     if horse_race_map:
-        # Build VALUES clause for per-horse filtering
+        # Build VALUES clause for per-horse filtering (its placeholders come first in the SQL)
         values_parts = []
-        params = list(kettonums)
+        params = []
         for k in kettonums:
             rc = horse_race_map.get(k, "9999999999999999")  # Include all if not found
             values_parts.append("(%s, %s)")
             params.extend([k, rc])
+        params.extend(kettonums)
 
         sql = f"""
             WITH horse_filter AS (
@@ -136,11 +199,7 @@ def get_past_stats_batch(
                 SELECT
                     u.ketto_toroku_bango,
                     u.race_code,
-                    u.kakutei_chakujun,
-                    u.soha_time,
-                    u.kohan_3f,
-                    u.corner3_juni,
-                    u.corner4_juni,
+                    {source["columns"]},
                     u.kishu_code,
                     u.kaisai_nen,
                     u.kaisai_gappi,
@@ -148,44 +207,19 @@ def get_past_stats_batch(
                         PARTITION BY u.ketto_toroku_bango
                         ORDER BY u.race_code DESC
                     ) as rn
-                FROM umagoto_race_joho u
+                FROM {source["table"]} u
                 JOIN horse_filter hf ON u.ketto_toroku_bango = hf.kettonum
                 WHERE u.ketto_toroku_bango IN ({placeholders})
-                  AND u.data_kubun = '7'
-                  AND u.kakutei_chakujun ~ '^[0-9]+$'
+                  {source["filter"]}
                   AND u.race_code < hf.current_race_code  -- Only races before current
+            ),
+            recent AS (
+                SELECT ketto_toroku_bango, rn, kishu_code, kaisai_nen, kaisai_gappi,
+                       {source["typed"]}
+                FROM ranked
+                WHERE rn <= 10
             )
-            SELECT
-                ketto_toroku_bango,
-                COUNT(*) as race_count,
-                AVG(CAST(kakutei_chakujun AS INTEGER)) as avg_rank,
-                SUM(CASE WHEN kakutei_chakujun = '01' THEN 1 ELSE 0 END) as win_count,
-                SUM(CASE WHEN kakutei_chakujun IN ('01','02','03') THEN 1 ELSE 0 END) as place_count,
-                AVG(CAST(NULLIF(soha_time, '') AS INTEGER)) as avg_time,
-                MIN(CAST(NULLIF(soha_time, '') AS INTEGER)) as best_time,
-                MAX(CASE WHEN rn = 1 THEN CAST(NULLIF(soha_time, '') AS INTEGER) END) as recent_time,
-                AVG(CAST(NULLIF(kohan_3f, '') AS INTEGER)) as avg_last3f,
-                MIN(CAST(NULLIF(kohan_3f, '') AS INTEGER)) as best_last3f,
-                AVG(CAST(NULLIF(corner3_juni, '') AS INTEGER)) as avg_corner3,
-                AVG(CAST(NULLIF(corner4_juni, '') AS INTEGER)) as avg_corner4,
-                MIN(CAST(kakutei_chakujun AS INTEGER)) as best_finish,
-                MAX(CASE WHEN rn = 1 THEN kishu_code END) as last_jockey,
-                MAX(CASE WHEN rn = 1 THEN kaisai_nen || kaisai_gappi END) as last_race_date,
-                -- Temporal decay weighted averages (decay_factor=0.85)
-                SUM(CAST(kakutei_chakujun AS INTEGER) * POWER(0.85, rn - 1)) / NULLIF(SUM(POWER(0.85, rn - 1)), 0) as weighted_avg_rank,
-                SUM(CASE WHEN kakutei_chakujun = '01' THEN POWER(0.85, rn - 1) ELSE 0 END) / NULLIF(SUM(POWER(0.85, rn - 1)), 0) as weighted_win_rate,
-                SUM(CASE WHEN kakutei_chakujun IN ('01','02','03') THEN POWER(0.85, rn - 1) ELSE 0 END) / NULLIF(SUM(POWER(0.85, rn - 1)), 0) as weighted_place_rate,
-                SUM(CAST(NULLIF(kohan_3f, '') AS INTEGER) * POWER(0.85, rn - 1)) / NULLIF(SUM(CASE WHEN kohan_3f IS NOT NULL AND kohan_3f != '' THEN POWER(0.85, rn - 1) ELSE 0 END), 0) as weighted_avg_last3f,
-                -- Corner position progression (3rd corner -> 4th corner)
-                AVG(CAST(NULLIF(corner3_juni, '') AS INTEGER) - CAST(NULLIF(corner4_juni, '') AS INTEGER)) as avg_position_change_3to4,
-                STDDEV(CAST(NULLIF(corner3_juni, '') AS INTEGER) - CAST(NULLIF(corner4_juni, '') AS INTEGER)) as std_position_change_3to4,
-                -- Performance stability
-                STDDEV(CAST(kakutei_chakujun AS INTEGER)) as rank_stddev,
-                STDDEV(CAST(NULLIF(soha_time, '') AS INTEGER)) as time_stddev,
-                STDDEV(CAST(NULLIF(kohan_3f, '') AS INTEGER)) as last3f_stddev
-            FROM ranked
-            WHERE rn <= 10
-            GROUP BY ketto_toroku_bango
+            {_PAST_STATS_AGGREGATE}
         """
     else:
         # Fallback for prediction mode (no entries provided)
@@ -193,55 +227,26 @@ def get_past_stats_batch(
         sql = f"""
             WITH ranked AS (
                 SELECT
-                    ketto_toroku_bango,
-                    kakutei_chakujun,
-                    soha_time,
-                    kohan_3f,
-                    corner3_juni,
-                    corner4_juni,
-                    kishu_code,
-                    kaisai_nen,
-                    kaisai_gappi,
+                    u.ketto_toroku_bango,
+                    {source["columns"]},
+                    u.kishu_code,
+                    u.kaisai_nen,
+                    u.kaisai_gappi,
                     ROW_NUMBER() OVER (
-                        PARTITION BY ketto_toroku_bango
-                        ORDER BY race_code DESC
+                        PARTITION BY u.ketto_toroku_bango
+                        ORDER BY u.race_code DESC
                     ) as rn
-                FROM umagoto_race_joho
-                WHERE ketto_toroku_bango IN ({placeholders})
-                  AND data_kubun = '7'
-                  AND kakutei_chakujun ~ '^[0-9]+$'
+                FROM {source["table"]} u
+                WHERE u.ketto_toroku_bango IN ({placeholders})
+                  {source["filter"]}
+            ),
+            recent AS (
+                SELECT ketto_toroku_bango, rn, kishu_code, kaisai_nen, kaisai_gappi,
+                       {source["typed"]}
+                FROM ranked
+                WHERE rn <= 10
             )
-            SELECT
-                ketto_toroku_bango,
-                COUNT(*) as race_count,
-                AVG(CAST(kakutei_chakujun AS INTEGER)) as avg_rank,
-                SUM(CASE WHEN kakutei_chakujun = '01' THEN 1 ELSE 0 END) as win_count,
-                SUM(CASE WHEN kakutei_chakujun IN ('01','02','03') THEN 1 ELSE 0 END) as place_count,
-                AVG(CAST(NULLIF(soha_time, '') AS INTEGER)) as avg_time,
-                MIN(CAST(NULLIF(soha_time, '') AS INTEGER)) as best_time,
-                MAX(CASE WHEN rn = 1 THEN CAST(NULLIF(soha_time, '') AS INTEGER) END) as recent_time,
-                AVG(CAST(NULLIF(kohan_3f, '') AS INTEGER)) as avg_last3f,
-                MIN(CAST(NULLIF(kohan_3f, '') AS INTEGER)) as best_last3f,
-                AVG(CAST(NULLIF(corner3_juni, '') AS INTEGER)) as avg_corner3,
-                AVG(CAST(NULLIF(corner4_juni, '') AS INTEGER)) as avg_corner4,
-                MIN(CAST(kakutei_chakujun AS INTEGER)) as best_finish,
-                MAX(CASE WHEN rn = 1 THEN kishu_code END) as last_jockey,
-                MAX(CASE WHEN rn = 1 THEN kaisai_nen || kaisai_gappi END) as last_race_date,
-                -- Temporal decay weighted averages (decay_factor=0.85)
-                SUM(CAST(kakutei_chakujun AS INTEGER) * POWER(0.85, rn - 1)) / NULLIF(SUM(POWER(0.85, rn - 1)), 0) as weighted_avg_rank,
-                SUM(CASE WHEN kakutei_chakujun = '01' THEN POWER(0.85, rn - 1) ELSE 0 END) / NULLIF(SUM(POWER(0.85, rn - 1)), 0) as weighted_win_rate,
-                SUM(CASE WHEN kakutei_chakujun IN ('01','02','03') THEN POWER(0.85, rn - 1) ELSE 0 END) / NULLIF(SUM(POWER(0.85, rn - 1)), 0) as weighted_place_rate,
-                SUM(CAST(NULLIF(kohan_3f, '') AS INTEGER) * POWER(0.85, rn - 1)) / NULLIF(SUM(CASE WHEN kohan_3f IS NOT NULL AND kohan_3f != '' THEN POWER(0.85, rn - 1) ELSE 0 END), 0) as weighted_avg_last3f,
-                -- Corner position progression (3rd corner -> 4th corner)
-                AVG(CAST(NULLIF(corner3_juni, '') AS INTEGER) - CAST(NULLIF(corner4_juni, '') AS INTEGER)) as avg_position_change_3to4,
-                STDDEV(CAST(NULLIF(corner3_juni, '') AS INTEGER) - CAST(NULLIF(corner4_juni, '') AS INTEGER)) as std_position_change_3to4,
-                -- Performance stability
-                STDDEV(CAST(kakutei_chakujun AS INTEGER)) as rank_stddev,
-                STDDEV(CAST(NULLIF(soha_time, '') AS INTEGER)) as time_stddev,
-                STDDEV(CAST(NULLIF(kohan_3f, '') AS INTEGER)) as last3f_stddev
-            FROM ranked
-            WHERE rn <= 10
-            GROUP BY ketto_toroku_bango
+            {_PAST_STATS_AGGREGATE}
         """
 
     cur = conn.cursor()
@@ -290,6 +295,7 @@ def get_past_stats_batch(
     return result
 
 
+@timed("query.get_jockey_horse_combo_batch")
 def get_jockey_horse_combo_batch(conn, pairs: list[tuple[str, str]]) -> dict[str, dict]:
     """Batch fetch jockey-horse combination performance.
 
@@ -348,6 +354,7 @@ def get_jockey_horse_combo_batch(conn, pairs: list[tuple[str, str]]) -> dict[str
         cur.close()
 
 
+@timed("query.get_training_stats_batch")
 def get_training_stats_batch(conn, kettonums: list[str]) -> dict[str, dict]:
     """Batch fetch training data (hanro_chokyo + woodchip_chokyo).
 
@@ -411,6 +418,7 @@ def get_training_stats_batch(conn, kettonums: list[str]) -> dict[str, dict]:
         cur.close()
 
 
+@timed("query.cache_jockey_trainer_stats")
 def cache_jockey_trainer_stats(conn, year: int) -> tuple[dict, dict]:
     """Cache jockey and trainer statistics.
 
@@ -475,6 +483,7 @@ def cache_jockey_trainer_stats(conn, year: int) -> tuple[dict, dict]:
     return jockey_cache, trainer_cache
 
 
+@timed("query.get_detailed_stats_batch")
 def get_detailed_stats_batch(
     conn, kettonums: list[str], entries: list[dict] | None = None
 ) -> dict[str, dict]:
@@ -506,11 +515,12 @@ def get_detailed_stats_batch(
 
     if horse_race_map:
         values_parts = []
-        params = list(kettonums)
+        params = []
         for k in kettonums:
             rc = horse_race_map.get(k, "9999999999999999")
             values_parts.append("(%s, %s)")
             params.extend([k, rc])
+        params.extend(kettonums)
 
         sql = f"""
             WITH horse_filter AS (
@@ -608,6 +618,7 @@ def get_detailed_stats_batch(
     return result
 
 
+@timed("query.get_race_lap_stats_batch")
 def get_race_lap_stats_batch(
     conn, kettonums: list[str], entries: list[dict] | None = None
 ) -> dict[str, dict]:
@@ -639,11 +650,12 @@ def get_race_lap_stats_batch(
 
     if horse_race_map:
         values_parts = []
-        params = list(kettonums)
+        params = []
         for k in kettonums:
             rc = horse_race_map.get(k, "9999999999999999")
             values_parts.append("(%s, %s)")
             params.extend([k, rc])
+        params.extend(kettonums)
 
         sql = f"""
             WITH horse_filter AS (
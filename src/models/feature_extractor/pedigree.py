@@ -9,9 +9,12 @@ Contains batch query methods for:
 
 import logging
 
+from src.metrics import timed
+
 logger = logging.getLogger(__name__)
 
 
+@timed("query.get_pedigree_batch")
 def get_pedigree_batch(conn, kettonums: list[str]) -> dict[str, dict]:
     """Batch fetch pedigree information (sire and broodmare sire IDs).
 
@@ -49,6 +52,7 @@ def get_pedigree_batch(conn, kettonums: list[str]) -> dict[str, dict]:
         return {}
 
 
+@timed("query.get_sire_stats_batch")
 def get_sire_stats_batch(
     conn, sire_ids: list[str], year: int, is_turf: bool = True
 ) -> dict[str, dict]:
@@ -114,6 +118,7 @@ def get_sire_stats_batch(
         return {}
 
 
+@timed("query.get_sire_maiden_stats_batch")
 def get_sire_maiden_stats_batch(conn, sire_ids: list[str], year: int) -> dict[str, dict]:
     """Batch fetch sire performance in maiden and newcomer races.
 
@@ -10,9 +10,12 @@ Contains batch query methods for:
 
 import logging
 
+from src.metrics import timed
+
 logger = logging.getLogger(__name__)
 
 
+@timed("query.get_surface_stats_batch")
 def get_surface_stats_batch(
     conn, kettonums: list[str], entries: list[dict] | None = None
 ) -> dict[str, dict]:
@@ -41,13 +44,14 @@ def get_surface_stats_batch(
     placeholders = ",".join(["%s"] * len(kettonums))
 
     if horse_race_map:
-        # Build VALUES clause for per-horse filtering
+        # Build VALUES clause for per-horse filtering (its placeholders come first in the SQL)
         values_parts = []
-        params = list(kettonums)
+        params = []
         for k in kettonums:
             rc = horse_race_map.get(k, "9999999999999999")
             values_parts.append("(%s, %s)")
             params.extend([k, rc])
+        params.extend(kettonums)
 
         # Turf stats
         sql_turf = f"""
@@ -162,6 +166,7 @@ def get_surface_stats_batch(
         return {}
 
 
+@timed("query.get_turn_rates_batch")
 def get_turn_rates_batch(conn, kettonums: list[str]) -> dict[str, dict]:
     """Batch fetch left/right turn performance stats.
 
@@ -238,6 +243,7 @@ def get_turn_rates_batch(conn, kettonums: list[str]) -> dict[str, dict]:
         return {}
 
 
+@timed("query.get_baba_stats_batch")
 def get_baba_stats_batch(
     conn, kettonums: list[str], races: list[dict], entries: list[dict] | None = None
 ) -> dict[str, dict]:
@@ -274,13 +280,14 @@ def get_baba_stats_batch(
     result = {}
 
     if horse_race_map:
-        # Build VALUES clause for per-horse filtering
+        # Build VALUES clause for per-horse filtering (its placeholders come first in the SQL)
         values_parts = []
-        params = list(kettonums)
+        params = []
         for k in kettonums:
             rc = horse_race_map.get(k, "9999999999999999")
             values_parts.append("(%s, %s)")
             params.extend([k, rc])
+        params.extend(kettonums)
 
         for track, baba_name in [("1", "turf"), ("2", "dirt")]:
             for baba_code, baba_suffix in [
@@ -373,6 +380,7 @@ def get_baba_stats_batch(
     return result
 
 
+@timed("query.get_interval_stats_batch")
 def get_interval_stats_batch(
     conn, kettonums: list[str], entries: list[dict] | None = None
 ) -> dict[str, dict]:
@@ -409,13 +417,14 @@ def get_interval_stats_batch(
     result = {}
 
     if horse_race_map:
-        # Build VALUES clause for per-horse filtering
+        # Build VALUES clause for per-horse filtering (its placeholders come first in the SQL)
         values_parts = []
-        params = list(kettonums)
+        params = []
         for k in kettonums:
             rc = horse_race_map.get(k, "9999999999999999")
             values_parts.append("(%s, %s)")
             params.extend([k, rc])
+        params.extend(kettonums)
 
         for interval_name, min_days, max_days in [
             ("rentou", 1, 7),
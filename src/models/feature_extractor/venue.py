@@ -11,6 +11,8 @@ Contains batch query methods for:
 import logging
 from typing import Any
 
+from src.metrics import timed
+
 from .utils import grade_to_rank, safe_int
 
 logger = logging.getLogger(__name__)
@@ -19,6 +21,7 @@ logger = logging.getLogger(__name__)
 SMALL_TRACK_VENUES = {"01", "02", "03", "06", "10"}
 
 
+@timed("query.get_venue_stats_batch")
 def get_venue_stats_batch(
     conn, kettonums: list[str], entries: list[dict] | None = None
 ) -> dict[str, dict]:
@@ -117,6 +120,7 @@ def get_venue_stats_batch(
     return result
 
 
+@timed("query.get_zenso_batch")
 def get_zenso_batch(
     conn, kettonums: list[str], race_codes: list[str], entries: list[dict] | None = None
 ) -> dict[str, dict]:
@@ -148,13 +152,14 @@ def get_zenso_batch(
     placeholders = ",".join(["%s"] * len(kettonums))
 
     if horse_race_map:
-        # Build VALUES clause for per-horse filtering
+        # Build VALUES clause for per-horse filtering (its placeholders come first in the SQL)
         values_parts = []
-        params = list(kettonums)
+        params = []
         for k in kettonums:
             rc = horse_race_map.get(k, "9999999999999999")
             values_parts.append("(%s, %s)")
             params.extend([k, rc])
+        params.extend(kettonums)
 
         # Get last 5 races for each horse (excluding current race)
         sql = f"""
@@ -379,6 +384,7 @@ def get_zenso_batch(
         return {}
 
 
+@timed("query.get_jockey_recent_batch")
 def get_jockey_recent_batch(conn, jockey_codes: list[str], year: int) -> dict[str, dict]:
     """Batch fetch jockey recent performance (current year).
 
@@ -432,6 +438,7 @@ def get_jockey_recent_batch(conn, jockey_codes: list[str], year: int) -> dict[st
         return {}
 
 
+@timed("query.get_jockey_maiden_stats_batch")
 def get_jockey_maiden_stats_batch(conn, jockey_codes: list[str], year: int) -> dict[str, dict]:
     """Batch fetch jockey performance in maiden and newcomer races.
 
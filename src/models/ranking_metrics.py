@@ -0,0 +1,179 @@
+"""
+Group-wise Ranking Metrics
+
+Vectorized per-race ranking metrics (NDCG@k, top-k hit rate, MRR, winner
+rank) on flat NumPy arrays. Races are described by group offsets: rows
+offsets[g]:offsets[g + 1] belong to race g, the same contiguous layout the
+ranking models' group arrays use. Every metric is a handful of array
+operations regardless of the number of races.
+"""
+
+import numpy as np
+
+
+def group_offsets(group_ids) -> np.ndarray:
+    """
+    Compute group offsets from consecutive group labels (e.g. race_code).
+
+    Args:
+        group_ids: Group label per row; rows of a group must be contiguous
+
+    Returns:
+        (n_groups + 1,) start offsets, ending with the row count
+    """
+    ids = np.asarray(group_ids)
+    if len(ids) == 0:
+        return np.zeros(1, dtype=np.int64)
+    starts = np.flatnonzero(np.r_[True, ids[1:] != ids[:-1]])
+    return np.r_[starts, len(ids)].astype(np.int64)
+
+
+def offsets_from_sizes(sizes) -> np.ndarray:
+    """Convert group sizes into group offsets."""
+    return np.r_[0, np.cumsum(sizes, dtype=np.int64)]
+
+
+def contiguous_order(group_ids) -> np.ndarray:
+    """
+    Stable permutation that makes rows of each group contiguous.
+
+    Args:
+        group_ids: Group label per row (any order)
+
+    Returns:
+        Row indices; group_ids[order] is sorted, ties keep row order
+    """
+    return np.argsort(np.asarray(group_ids), kind="stable")
+
+
+def _group_index(offsets: np.ndarray) -> np.ndarray:
+    """Group number of each row."""
+    return np.repeat(np.arange(len(offsets) - 1), np.diff(offsets))
+
+
+def rank_within_groups(scores, offsets: np.ndarray, descending: bool = True) -> np.ndarray:
+    """
+    Rank rows within their group by score.
+
+    Args:
+        scores: Score per row
+        offsets: Group offsets
+        descending: True if higher scores rank first
+
+    Returns:
+        0-based position of each row in its group (ties keep row order,
+        NaN ranks last)
+    """
+    scores = np.asarray(scores, dtype=np.float64)
+    group = _group_index(offsets)
+    order = np.lexsort((-scores if descending else scores, group))
+    ranks = np.empty(len(order), dtype=np.int64)
+    ranks[order] = np.arange(len(order)) - offsets[group[order]]
+    return ranks
+
+
+def _discounted_gain(relevance: np.ndarray, ranks: np.ndarray, k: int) -> np.ndarray:
+    """Per-row DCG contribution (log2 discount, cut off at k)."""
+    discount = 1 / (np.log(ranks + 2) / np.log(2))
+    return np.where(ranks < k, relevance * discount, 0.0)
+
+
+def ndcg_at_k(
+    relevance,
+    scores,
+    offsets: np.ndarray,
+    k: int = 3,
+    min_size: int = 2,
+    descending: bool = True,
+) -> float:
+    """
+    Mean NDCG@k over groups (linear gain, as sklearn.metrics.ndcg_score).
+
+    Args:
+        relevance: Non-negative relevance per row (higher = better)
+        scores: Predicted score per row
+        offsets: Group offsets
+        k: Rank cutoff
+        min_size: Groups smaller than this are skipped
+        descending: True if higher scores rank first
+
+    Returns:
+        Mean NDCG@k (0.0 if no group qualifies)
+    """
+    relevance = np.asarray(relevance, dtype=np.float64)
+    group = _group_index(offsets)
+    n_groups = len(offsets) - 1
+
+    dcg = np.bincount(
+        group,
+        weights=_discounted_gain(relevance, rank_within_groups(scores, offsets, descending), k),
+        minlength=n_groups,
+    )
+    idcg = np.bincount(
+        group,
+        weights=_discounted_gain(relevance, rank_within_groups(relevance, offsets), k),
+        minlength=n_groups,
+    )
+    ndcg = np.divide(dcg, idcg, out=np.zeros(n_groups), where=idcg > 0)
+
+    valid = np.diff(offsets) >= min_size
+    return float(ndcg[valid].mean()) if valid.any() else 0.0
+
+
+def winner_ranks(is_winner, scores, offsets: np.ndarray, descending: bool = True) -> np.ndarray:
+    """
+    Best predicted rank among each group's winners.
+
+    Args:
+        is_winner: Boolean per row (finishing position 1)
+        scores: Predicted score per row
+        offsets: Group offsets
+        descending: True if higher scores rank first
+
+    Returns:
+        (n_groups,) 1-based rank of the best-ranked winner, 0 if the group
+        has no winner
+    """
+    n_groups = len(offsets) - 1
+    winners = np.flatnonzero(np.asarray(is_winner, dtype=bool))
+    ranks = np.full(n_groups, np.iinfo(np.int64).max)
+    np.minimum.at(
+        ranks,
+        _group_index(offsets)[winners],
+        rank_within_groups(scores, offsets, descending)[winners] + 1,
+    )
+    ranks[ranks == np.iinfo(np.int64).max] = 0
+    return ranks
+
+
+def top_k_hit_rate(
+    is_winner,
+    scores,
+    offsets: np.ndarray,
+    k: int = 3,
+    min_size: int = 1,
+    descending: bool = True,
+) -> float:
+    """
+    Share of groups whose winner is within the top k predictions.
+
+    Groups without a winner or smaller than min_size are skipped.
+
+    Returns:
+        Hit rate (0.0 if no group qualifies)
+    """
+    ranks = winner_ranks(is_winner, scores, offsets, descending)
+    valid = (ranks > 0) & (np.diff(offsets) >= min_size)
+    return float((ranks[valid] <= k).mean()) if valid.any() else 0.0
+
+
+def mean_reciprocal_rank(is_winner, scores, offsets: np.ndarray, descending: bool = True) -> float:
+    """
+    Mean reciprocal rank of the winner over groups that have one.
+
+    Returns:
+        MRR (0.0 if no group has a winner)
+    """
+    ranks = winner_ranks(is_winner, scores, offsets, descending)
+    ranks = ranks[ranks > 0]
+    return float((1.0 / ranks).mean()) if len(ranks) > 0 else 0.0
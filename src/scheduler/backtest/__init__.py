@@ -0,0 +1,43 @@
+"""
+Historical Backtest Module
+
+Components for replaying stored or re-scored predictions against payouts
+over arbitrary date ranges.
+"""
+
+from src.scheduler.backtest.data import (
+    fetch_odds_frame,
+    fetch_payouts_frame,
+    load_stored_predictions,
+    rescore_predictions,
+    score_features,
+)
+from src.scheduler.backtest.engine import (
+    make_shards,
+    run_backtest,
+    run_shard,
+)
+from src.scheduler.backtest.strategies import (
+    STRATEGIES,
+    simulate_bets,
+    summarize_races,
+    summarize_strategies,
+)
+
+__all__ = [
+    # Data
+    "load_stored_predictions",
+    "rescore_predictions",
+    "score_features",
+    "fetch_payouts_frame",
+    "fetch_odds_frame",
+    # Strategies
+    "STRATEGIES",
+    "simulate_bets",
+    "summarize_races",
+    "summarize_strategies",
+    # Engine
+    "make_shards",
+    "run_shard",
+    "run_backtest",
+]
@@ -0,0 +1,273 @@
+"""
+Backtest Data Loading Module
+
+Set-based loaders for historical backtests. Every loader returns a flat
+DataFrame (one row per runner or payout) for a date range or race list, so
+a shard of any size costs a constant number of queries.
+"""
+
+import logging
+from datetime import date
+
+import joblib
+import numpy as np
+import pandas as pd
+
+from src.models.feature_extractor import FastFeatureExtractor
+from src.scheduler.result.db_operations import fetch_final_odds_frame
+from src.services.prediction.ensemble import ensemble_predict, ensemble_proba
+
+logger = logging.getLogger(__name__)
+
+# Columns of load_stored_predictions() / rescore_predictions()
+PREDICTION_COLUMNS = ["race_code", "umaban", "pred_rank", "win_prob", "place_prob"]
+
+# Columns of fetch_payouts_frame()
+PAYOUT_COLUMNS = ["race_code", "bet_type", "umaban", "payout"]
+
+# Upper bound on races per year passed to extract_year_data()
+MAX_RACES_PER_YEAR = 10000
+
+
+def _to_umaban(values: pd.Series) -> pd.Series:
+    """Parse horse numbers ("01", 1, " 1") into nullable integers."""
+    return pd.to_numeric(values.astype("string").str.strip(), errors="coerce").astype("Int64")
+
+
+def _rank_by_win_prob(frame: pd.DataFrame) -> pd.Series:
+    """Rank runners within each race by descending win probability."""
+    return frame.groupby("race_code")["win_prob"].rank(method="first", ascending=False)
+
+
+def load_stored_predictions(conn, start: date, end: date) -> pd.DataFrame:
+    """
+    Load stored predictions of all races in a date range.
+
+    ranked_horses is unnested server-side, so one query returns every
+    runner of the latest prediction of each race.
+
+    Args:
+        conn: DB connection
+        start: First race date
+        end: Last race date
+
+    Returns:
+        DataFrame with PREDICTION_COLUMNS (place_prob NaN if not stored)
+    """
+    cur = conn.cursor()
+    cur.execute(
+        """
+        SELECT p.race_id, h.horse_number, h.rank,
+               h.win_probability, h.place_probability
+        FROM (
+            SELECT DISTINCT ON (race_id) race_id, prediction_result
+            FROM predictions
+            WHERE race_date BETWEEN %s AND %s
+            ORDER BY race_id, predicted_at DESC
+        ) p
+        CROSS JOIN LATERAL jsonb_to_recordset(p.prediction_result -> 'ranked_horses')
+            AS h(horse_number text, rank text, win_probability text, place_probability text)
+    """,
+        (start, end),
+    )
+    frame = pd.DataFrame(
+        cur.fetchall(), columns=["race_code", "umaban", "pred_rank", "win_prob", "place_prob"]
+    )
+    cur.close()
+
+    frame["umaban"] = _to_umaban(frame["umaban"])
+    for column in ("pred_rank", "win_prob", "place_prob"):
+        frame[column] = pd.to_numeric(frame[column], errors="coerce")
+    frame = frame[frame["umaban"].notna()]
+
+    # Older predictions may lack rank; fall back to win probability order
+    missing_rank = frame["pred_rank"].isna()
+    if missing_rank.any():
+        frame.loc[missing_rank, "pred_rank"] = _rank_by_win_prob(frame)[missing_rank]
+
+    logger.info(
+        f"Stored predictions loaded: {start} - {end}, "
+        f"{frame['race_code'].nunique()} races, {len(frame)} runners"
+    )
+    return frame[PREDICTION_COLUMNS].reset_index(drop=True)
+
+
+def score_features(features: pd.DataFrame, model_data: dict) -> pd.DataFrame:
+    """
+    Score extracted features with an ensemble model.
+
+    Args:
+        features: Output of FastFeatureExtractor.extract_year_data()
+        model_data: Loaded ensemble model dictionary
+
+    Returns:
+        DataFrame with PREDICTION_COLUMNS
+    """
+    models = model_data.get("models", {})
+    weights = model_data.get("ensemble_weights") or {"xgb": 0.5, "lgb": 0.5, "cb": 0.0}
+    X = features[model_data["feature_names"]].fillna(0)
+
+    xgb_reg = models.get("xgb_regressor") or model_data.get("xgb_model")
+    lgb_reg = models.get("lgb_regressor") or model_data.get("lgb_model")
+    cb_reg = models.get("cb_regressor") or model_data.get("cb_model")
+    if xgb_reg is None or lgb_reg is None:
+        raise ValueError("XGBoost and LightGBM regressors are required")
+
+    scores = ensemble_predict(xgb_reg, lgb_reg, X, weights, cb_model=cb_reg)
+    if model_data.get("model_type") == "ranker":
+        # Ranker: higher = better; normalize to lower = better
+        scores = -scores
+
+    frame = pd.DataFrame(
+        {
+            "race_code": features["race_code"].to_numpy(),
+            "umaban": _to_umaban(features["umaban"]).to_numpy(),
+            "score": scores,
+        }
+    )
+
+    if "xgb_win" in models and "lgb_win" in models:
+        frame["win_prob"] = ensemble_proba(
+            models["xgb_win"],
+            models["lgb_win"],
+            X,
+            weights,
+            cb_clf=models.get("cb_win"),
+            calibrator=models.get("win_calibrator"),
+        )
+    else:
+        # Old format: softmax of negated scores within each race
+        exp_scores = np.exp(-frame["score"])
+        frame["win_prob"] = exp_scores / exp_scores.groupby(frame["race_code"]).transform("sum")
+
+    if "xgb_place" in models and "lgb_place" in models:
+        frame["place_prob"] = ensemble_proba(
+            models["xgb_place"],
+            models["lgb_place"],
+            X,
+            weights,
+            cb_clf=models.get("cb_place"),
+            calibrator=models.get("place_calibrator"),
+        )
+    else:
+        frame["place_prob"] = np.nan
+
+    frame["pred_rank"] = frame.groupby("race_code")["score"].rank(method="first")
+    return frame[PREDICTION_COLUMNS]
+
+
+def rescore_predictions(conn, model_path: str, start: date, end: date) -> pd.DataFrame:
+    """
+    Re-score all races in a date range with a model file.
+
+    Features are extracted a calendar year at a time (with the extractor's
+    leak prevention) and filtered to the date range.
+
+    Args:
+        conn: DB connection
+        model_path: Path to an ensemble model (.pkl)
+        start: First race date
+        end: Last race date
+
+    Returns:
+        DataFrame with PREDICTION_COLUMNS
+    """
+    model_data = joblib.load(model_path)
+    extractor = FastFeatureExtractor(conn)
+    start_key = start.strftime("%Y%m%d")
+    end_key = end.strftime("%Y%m%d")
+
+    frames = []
+    for year in range(start.year, end.year + 1):
+        features = extractor.extract_year_data(year, max_races=MAX_RACES_PER_YEAR)
+        if features is None or len(features) == 0:
+            continue
+        race_dates = features["race_code"].str[:8]
+        features = features[(race_dates >= start_key) & (race_dates <= end_key)]
+        if len(features) > 0:
+            frames.append(score_features(features, model_data))
+
+    if not frames:
+        return pd.DataFrame(columns=PREDICTION_COLUMNS)
+
+    frame = pd.concat(frames, ignore_index=True)
+    logger.info(
+        f"Re-scored predictions: {start} - {end}, "
+        f"{frame['race_code'].nunique()} races, model={model_path}"
+    )
+    return frame
+
+
+def fetch_payouts_frame(conn, race_codes: list[str]) -> pd.DataFrame:
+    """
+    Fetch win and place payouts of the given races.
+
+    Args:
+        conn: DB connection
+        race_codes: Target race codes
+
+    Returns:
+        DataFrame with PAYOUT_COLUMNS; bet_type is "tansho" or "fukusho",
+        payout is yen per 100 yen stake
+    """
+    cur = conn.cursor()
+    # data_kubun: '1'=registration/provisional, '2'=provisional, '7'=confirmed (prefer confirmed)
+    cur.execute(
+        """
+        SELECT DISTINCT ON (race_code) race_code,
+               tansho1_umaban, tansho1_haraimodoshikin,
+               fukusho1_umaban, fukusho1_haraimodoshikin,
+               fukusho2_umaban, fukusho2_haraimodoshikin,
+               fukusho3_umaban, fukusho3_haraimodoshikin
+        FROM haraimodoshi
+        WHERE race_code = ANY(%s)
+          AND data_kubun IN ('1', '2', '7')
+        ORDER BY race_code, data_kubun DESC
+    """,
+        (list(race_codes),),
+    )
+    wide = pd.DataFrame(
+        cur.fetchall(),
+        columns=[
+            "race_code",
+            "tansho1_umaban",
+            "tansho1_payout",
+            "fukusho1_umaban",
+            "fukusho1_payout",
+            "fukusho2_umaban",
+            "fukusho2_payout",
+            "fukusho3_umaban",
+            "fukusho3_payout",
+        ],
+    )
+    cur.close()
+
+    frames = [
+        pd.DataFrame(
+            {
+                "race_code": wide["race_code"],
+                "bet_type": slot.rstrip("123"),
+                "umaban": _to_umaban(wide[f"{slot}_umaban"]),
+                "payout": pd.to_numeric(
+                    wide[f"{slot}_payout"].astype("string").str.strip(), errors="coerce"
+                ),
+            }
+        )
+        for slot in ("tansho1", "fukusho1", "fukusho2", "fukusho3")
+    ]
+    frame = pd.concat(frames, ignore_index=True)
+    frame = frame[frame["umaban"].notna()]
+    frame["payout"] = frame["payout"].fillna(0).astype(np.int64)
+    return frame[PAYOUT_COLUMNS].reset_index(drop=True)
+
+
+def fetch_odds_frame(conn, race_codes: list[str]) -> pd.DataFrame:
+    """
+    Fetch final win and place odds of the given races.
+
+    Returns:
+        DataFrame with columns race_code, umaban (Int64), tansho, fukusho
+    """
+    frame = fetch_final_odds_frame(conn, race_codes=race_codes)
+    frame["umaban"] = _to_umaban(frame["umaban"])
+    return frame[frame["umaban"].notna()].reset_index(drop=True)
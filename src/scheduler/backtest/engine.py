@@ -0,0 +1,230 @@
+"""
+Historical Backtest Engine
+
+Replays any date range: loads stored predictions (or re-scores races with a
+model file), joins haraimodoshi payouts and final odds, and simulates the
+win/place/EV strategies. The range is split into date shards processed in
+parallel worker processes; per-race and per-ticket results are written to
+Parquet files under BACKTEST_OUTPUT_DIR.
+
+Usage:
+    python -m src.scheduler.backtest.engine --start 2023-01-01 --end 2025-12-31
+    python -m src.scheduler.backtest.engine --start 2024-01-01 --end 2024-12-31 \\
+        --model models/ensemble_model_latest.pkl
+"""
+
+import argparse
+import json
+import logging
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from typing import Any
+
+import pandas as pd
+
+from src.config import BACKTEST_OUTPUT_DIR, BACKTEST_SHARD_DAYS, BACKTEST_WORKERS
+from src.db.connection import get_db
+from src.models.ev_recommender import DEFAULT_PLACE_EV_THRESHOLD, DEFAULT_WIN_EV_THRESHOLD
+from src.scheduler.backtest.data import (
+    fetch_odds_frame,
+    fetch_payouts_frame,
+    load_stored_predictions,
+    rescore_predictions,
+)
+from src.scheduler.backtest.strategies import (
+    BET_COLUMNS,
+    simulate_bets,
+    summarize_races,
+    summarize_strategies,
+)
+
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+logger = logging.getLogger(__name__)
+
+
+def make_shards(start: date, end: date, shard_days: int | None) -> list[tuple[date, date]]:
+    """
+    Split a date range into shards that never cross a calendar year.
+
+    Args:
+        start: First date
+        end: Last date (inclusive)
+        shard_days: Days per shard (None for one shard per year)
+
+    Returns:
+        List of (shard_start, shard_end) pairs, inclusive
+    """
+    shards = []
+    current = start
+    while current <= end:
+        shard_end = min(end, date(current.year, 12, 31))
+        if shard_days is not None:
+            shard_end = min(shard_end, current + timedelta(days=shard_days - 1))
+        shards.append((current, shard_end))
+        current = shard_end + timedelta(days=1)
+    return shards
+
+
+def run_shard(
+    start: date,
+    end: date,
+    model_path: str | None = None,
+    win_ev_threshold: float = DEFAULT_WIN_EV_THRESHOLD,
+    place_ev_threshold: float = DEFAULT_PLACE_EV_THRESHOLD,
+) -> tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    Backtest one date shard (runs in a worker process).
+
+    Args:
+        start: First race date
+        end: Last race date
+        model_path: Model to re-score with (None to use stored predictions)
+        win_ev_threshold: EV threshold of the ev_win strategy
+        place_ev_threshold: EV threshold of the ev_place strategy
+
+    Returns:
+        (races, bets) frames from summarize_races() and simulate_bets()
+    """
+    conn = get_db().get_connection()
+    try:
+        if model_path:
+            predictions = rescore_predictions(conn, model_path, start, end)
+        else:
+            predictions = load_stored_predictions(conn, start, end)
+
+        race_codes = predictions["race_code"].unique().tolist()
+        if not race_codes:
+            return pd.DataFrame(), pd.DataFrame(columns=BET_COLUMNS)
+
+        payouts = fetch_payouts_frame(conn, race_codes)
+        odds = fetch_odds_frame(conn, race_codes)
+    finally:
+        conn.close()
+
+    bets = simulate_bets(predictions, payouts, odds, win_ev_threshold, place_ev_threshold)
+    races = summarize_races(predictions, payouts, bets)
+    logger.info(f"Shard done: {start} - {end}, {len(races)} races, {len(bets)} bets")
+    return races, bets
+
+
+def run_backtest(
+    start: date,
+    end: date,
+    model_path: str | None = None,
+    shard_days: int = BACKTEST_SHARD_DAYS,
+    workers: int = BACKTEST_WORKERS,
+    output_dir: str = BACKTEST_OUTPUT_DIR,
+    win_ev_threshold: float = DEFAULT_WIN_EV_THRESHOLD,
+    place_ev_threshold: float = DEFAULT_PLACE_EV_THRESHOLD,
+) -> dict[str, Any]:
+    """
+    Backtest a date range with parallel date shards.
+
+    Re-scoring extracts features a calendar year at a time, so shards are
+    one year each when model_path is given.
+
+    Args:
+        start: First race date
+        end: Last race date
+        model_path: Model to re-score with (None to use stored predictions)
+        shard_days: Days per shard for stored predictions
+        workers: Worker processes (1 to run in-process)
+        output_dir: Directory of the Parquet outputs
+        win_ev_threshold: EV threshold of the ev_win strategy
+        place_ev_threshold: EV threshold of the ev_place strategy
+
+    Returns:
+        Summary with per-strategy results and output file paths
+    """
+    shards = make_shards(start, end, None if model_path else shard_days)
+    logger.info(
+        f"Backtest: {start} - {end}, {len(shards)} shards, workers={workers}, "
+        f"source={'model ' + model_path if model_path else 'stored predictions'}"
+    )
+
+    results: list[tuple[pd.DataFrame, pd.DataFrame]] = []
+    args = (model_path, win_ev_threshold, place_ev_threshold)
+    if workers > 1 and len(shards) > 1:
+        with ProcessPoolExecutor(max_workers=min(workers, len(shards))) as executor:
+            futures = {
+                executor.submit(run_shard, shard_start, shard_end, *args): (shard_start, shard_end)
+                for shard_start, shard_end in shards
+            }
+            for future in as_completed(futures):
+                try:
+                    results.append(future.result())
+                except Exception as e:
+                    shard_start, shard_end = futures[future]
+                    logger.error(f"Shard failed: {shard_start} - {shard_end}: {e}")
+    else:
+        for shard_start, shard_end in shards:
+            try:
+                results.append(run_shard(shard_start, shard_end, *args))
+            except Exception as e:
+                logger.error(f"Shard failed: {shard_start} - {shard_end}: {e}")
+
+    race_frames = [races for races, _ in results if len(races) > 0]
+    if not race_frames:
+        logger.warning(f"No backtest data: {start} - {end}")
+        return {"status": "no_data", "start": str(start), "end": str(end)}
+
+    races = pd.concat(race_frames, ignore_index=True).sort_values("race_code")
+    bets = pd.concat([bets for _, bets in results], ignore_index=True).sort_values(
+        ["race_code", "strategy", "umaban"]
+    )
+
+    out = Path(output_dir)
+    out.mkdir(parents=True, exist_ok=True)
+    suffix = f"_{Path(model_path).stem}" if model_path else ""
+    stem = f"backtest_{start:%Y%m%d}_{end:%Y%m%d}{suffix}"
+    races_path = out / f"{stem}.parquet"
+    bets_path = out / f"{stem}_bets.parquet"
+    races.to_parquet(races_path, index=False)
+    bets.to_parquet(bets_path, index=False)
+
+    summary = {
+        "status": "success",
+        "start": str(start),
+        "end": str(end),
+        "model_path": model_path,
+        "shards": len(shards),
+        "failed_shards": len(shards) - len(results),
+        "races": len(races),
+        "strategies": summarize_strategies(races),
+        "races_path": str(races_path),
+        "bets_path": str(bets_path),
+    }
+    logger.info(f"Backtest saved: {races_path} ({len(races)} races)")
+    return summary
+
+
+def main():
+    """Main execution."""
+    parser = argparse.ArgumentParser(description="Historical backtest")
+    parser.add_argument("--start", "-s", required=True, help="First race date (YYYY-MM-DD)")
+    parser.add_argument("--end", "-e", required=True, help="Last race date (YYYY-MM-DD)")
+    parser.add_argument("--model", "-m", help="Re-score with this model file")
+    parser.add_argument("--shard-days", type=int, default=BACKTEST_SHARD_DAYS)
+    parser.add_argument("--workers", "-w", type=int, default=BACKTEST_WORKERS)
+    parser.add_argument("--output-dir", "-o", default=BACKTEST_OUTPUT_DIR)
+    parser.add_argument("--win-ev", type=float, default=DEFAULT_WIN_EV_THRESHOLD)
+    parser.add_argument("--place-ev", type=float, default=DEFAULT_PLACE_EV_THRESHOLD)
+
+    args = parser.parse_args()
+
+    summary = run_backtest(
+        datetime.strptime(args.start, "%Y-%m-%d").date(),
+        datetime.strptime(args.end, "%Y-%m-%d").date(),
+        model_path=args.model,
+        shard_days=args.shard_days,
+        workers=args.workers,
+        output_dir=args.output_dir,
+        win_ev_threshold=args.win_ev,
+        place_ev_threshold=args.place_ev,
+    )
+    print(json.dumps(summary, ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,157 @@
+"""
+Backtest Strategy Simulation Module
+
+Simulates betting strategies over joined prediction/odds/payout frames.
+All strategies stake a flat 100 yen per ticket:
+
+- win_top1: Win bet on the top-ranked horse
+- place_top1: Place bet on the top-ranked horse
+- ev_win: Win bet on every horse with win_prob * win odds >= threshold
+- ev_place: Place bet on every horse with place_prob * place odds >= threshold
+"""
+
+import pandas as pd
+
+from src.models.ev_recommender import DEFAULT_PLACE_EV_THRESHOLD, DEFAULT_WIN_EV_THRESHOLD
+from src.scheduler.result.db_operations import KEIBAJO_NAMES
+
+# Stake per ticket (yen)
+BET_UNIT = 100
+
+STRATEGIES = ("win_top1", "place_top1", "ev_win", "ev_place")
+
+# Columns of simulate_bets()
+BET_COLUMNS = ["race_code", "strategy", "bet_type", "umaban", "stake", "payout"]
+
+
+def simulate_bets(
+    predictions: pd.DataFrame,
+    payouts: pd.DataFrame,
+    odds: pd.DataFrame,
+    win_ev_threshold: float = DEFAULT_WIN_EV_THRESHOLD,
+    place_ev_threshold: float = DEFAULT_PLACE_EV_THRESHOLD,
+) -> pd.DataFrame:
+    """
+    Place all strategies' bets and settle them against payouts.
+
+    Races without payout data (not yet finalized or cancelled) are skipped.
+
+    Args:
+        predictions: Frame with race_code, umaban, pred_rank, win_prob, place_prob
+        payouts: Frame with race_code, bet_type, umaban, payout
+        odds: Frame with race_code, umaban, tansho, fukusho
+        win_ev_threshold: EV threshold of ev_win
+        place_ev_threshold: EV threshold of ev_place
+
+    Returns:
+        One row per ticket with BET_COLUMNS (payout 0 if lost)
+    """
+    settled = predictions["race_code"].isin(payouts["race_code"])
+    runners = predictions[settled].merge(odds, on=["race_code", "umaban"], how="left")
+    tansho = runners["tansho"].fillna(0)
+    fukusho = runners["fukusho"].fillna(0)
+    is_top1 = runners["pred_rank"] == 1
+
+    selections = {
+        ("win_top1", "tansho"): is_top1,
+        ("place_top1", "fukusho"): is_top1,
+        ("ev_win", "tansho"): (tansho > 0) & (runners["win_prob"] * tansho >= win_ev_threshold),
+        ("ev_place", "fukusho"): (fukusho > 0)
+        & (runners["place_prob"] * fukusho >= place_ev_threshold),
+    }
+    bets = pd.concat(
+        [
+            runners.loc[mask, ["race_code", "umaban"]].assign(strategy=strategy, bet_type=bet_type)
+            for (strategy, bet_type), mask in selections.items()
+        ],
+        ignore_index=True,
+    )
+
+    bets = bets.merge(payouts, on=["race_code", "bet_type", "umaban"], how="left")
+    bets["payout"] = bets["payout"].fillna(0).astype("int64")
+    bets["stake"] = BET_UNIT
+    return bets[BET_COLUMNS]
+
+
+def summarize_races(
+    predictions: pd.DataFrame, payouts: pd.DataFrame, bets: pd.DataFrame
+) -> pd.DataFrame:
+    """
+    Build one row per settled race for storage and the dashboard.
+
+    Args:
+        predictions: Prediction frame passed to simulate_bets()
+        payouts: Payout frame passed to simulate_bets()
+        bets: Output of simulate_bets()
+
+    Returns:
+        Frame with race_code, date, track, race_name, predicted_rank1, actual_rank1,
+        {strategy}_stake / {strategy}_return per strategy, roi (win_top1
+        return rate, %), ev_recommended and ev_hit
+    """
+    winners = payouts[payouts["bet_type"] == "tansho"].drop_duplicates("race_code")
+    races = pd.DataFrame({"race_code": payouts["race_code"].unique()})
+    races = races[races["race_code"].isin(predictions["race_code"])]
+
+    top1 = predictions[predictions["pred_rank"] == 1].drop_duplicates("race_code")
+    races = races.merge(
+        top1[["race_code", "umaban"]].rename(columns={"umaban": "predicted_rank1"}),
+        on="race_code",
+        how="left",
+    ).merge(
+        winners[["race_code", "umaban"]].rename(columns={"umaban": "actual_rank1"}),
+        on="race_code",
+        how="left",
+    )
+    races["date"] = pd.to_datetime(races["race_code"].str[:8], format="%Y%m%d")
+    venue_codes = races["race_code"].str[8:10]
+    races["track"] = venue_codes.map(KEIBAJO_NAMES).fillna(venue_codes)
+    races["race_name"] = races["track"] + " " + races["race_code"].str[14:16].str.lstrip("0") + "R"
+
+    totals = bets.pivot_table(
+        index="race_code",
+        columns="strategy",
+        values=["stake", "payout"],
+        aggfunc="sum",
+        fill_value=0,
+    )
+    for strategy in STRATEGIES:
+        for value, suffix in (("stake", "stake"), ("payout", "return")):
+            column = f"{strategy}_{suffix}"
+            if (value, strategy) in totals.columns:
+                races[column] = races["race_code"].map(totals[(value, strategy)]).fillna(0)
+            else:
+                races[column] = 0
+            races[column] = races[column].astype("int64")
+
+    stake = races["win_top1_stake"]
+    races["roi"] = (races["win_top1_return"] / stake.where(stake > 0) * 100).fillna(0.0)
+    races["ev_recommended"] = races["ev_win_stake"] > 0
+    races["ev_hit"] = races["ev_win_return"] > 0
+    return races.sort_values("race_code").reset_index(drop=True)
+
+
+def summarize_strategies(races: pd.DataFrame) -> dict[str, dict]:
+    """
+    Aggregate per-race totals into per-strategy results.
+
+    Args:
+        races: Output of summarize_races() (any number of shards concatenated)
+
+    Returns:
+        {strategy: {"races", "stake", "return", "hit_races", "return_rate"}}
+    """
+    summary = {}
+    for strategy in STRATEGIES:
+        stake = races[f"{strategy}_stake"]
+        returned = races[f"{strategy}_return"]
+        total_stake = int(stake.sum())
+        total_return = int(returned.sum())
+        summary[strategy] = {
+            "races": int((stake > 0).sum()),
+            "stake": total_stake,
+            "return": total_return,
+            "hit_races": int((returned > 0).sum()),
+            "return_rate": total_return / total_stake if total_stake > 0 else 0.0,
+        }
+    return summary
@@ -17,10 +17,17 @@ import joblib
 import numpy as np
 import pandas as pd
 
+from src.config import FEATURE_USE_SHAP_ADJUSTMENTS
 from src.db.connection import get_db
 from src.models.feature_extractor import FastFeatureExtractor
 from src.models.surface_utils import get_model_path_for_surface, get_surface_type
+from src.scheduler.shap_aggregates import (
+    align_adjustments,
+    load_feature_adjustments,
+    model_version,
+)
 from src.services.prediction.ensemble import ensemble_predict, ensemble_proba
+from src.services.prediction.simulation import simulate_day, strengths_from_predictions
 
 logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
 logger = logging.getLogger(__name__)
@@ -32,7 +39,7 @@ class RacePredictor:
     def __init__(
         self,
         model_path: str = "/app/models/ensemble_model_latest.pkl",
-        use_adjustments: bool = True,
+        use_adjustments: bool = FEATURE_USE_SHAP_ADJUSTMENTS,
     ):
         self.model_path = model_path
         self.model_dir = Path(model_path).parent
@@ -57,13 +64,17 @@ class RacePredictor:
         # Ensemble weights
         self.ensemble_weights: dict[str, float] | None = None
         # Feature adjustment coefficients
+        self.model_version = ""
         self.feature_adjustments: dict[str, float] = {}
+        # Adjustments aligned to each model's feature_names ("mixed", "turf", "dirt")
+        self._adjustment_weights: dict[str, np.ndarray] = {}
         # Surface-specific models (loaded lazily on first use)
         self._surface_models: dict[str, dict] = {}
         self._load_model()
         self._load_surface_models()
         if use_adjustments:
             self._load_feature_adjustments()
+            self._compile_feature_adjustments()
 
     def _load_model(self):
         """Load ensemble_model (supports both old and new formats)."""
@@ -110,6 +121,7 @@ class RacePredictor:
             self.has_classifiers = self.xgb_win is not None and self.lgb_win is not None
 
             self.feature_names = model_data.get("feature_names", [])
+            self.model_version = model_version(model_data)
             logger.info(
                 f"ensemble_model loaded: {len(self.feature_names)} features, "
                 f"classifiers={'yes' if self.has_classifiers else 'no'}, "
@@ -140,11 +152,9 @@ class RacePredictor:
         return None
 
     def _load_feature_adjustments(self):
-        """Load feature adjustment coefficients from DB."""
+        """Load the model's precomputed feature adjustment coefficients from DB."""
         try:
-            from src.scheduler.shap_analyzer import ShapAnalyzer
-
-            self.feature_adjustments = ShapAnalyzer.load_adjustments_from_db()
+            self.feature_adjustments = load_feature_adjustments(self.model_version)
             if self.feature_adjustments:
                 adjusted_count = sum(1 for v in self.feature_adjustments.values() if v != 1.0)
                 logger.info(f"Feature adjustments applied: {adjusted_count} adjustments")
@@ -152,17 +162,36 @@ class RacePredictor:
             logger.warning(f"Feature adjustment loading failed (using defaults): {e}")
             self.feature_adjustments = {}
 
-    def _apply_feature_adjustments(self, X: pd.DataFrame) -> pd.DataFrame:
-        """Apply adjustment coefficients to features."""
+    def _compile_feature_adjustments(self):
+        """Align the adjustment coefficients to each loaded model's feature order."""
+        self._adjustment_weights = {}
         if not self.feature_adjustments:
-            return X
+            return
 
-        X_adjusted = X.copy()
-        for fname, adjustment in self.feature_adjustments.items():
-            if fname in X_adjusted.columns and adjustment != 1.0:
-                X_adjusted[fname] = X_adjusted[fname] * adjustment
+        feature_sets = {"mixed": self.feature_names or []}
+        for surface, model_data in self._surface_models.items():
+            feature_sets[surface] = model_data.get("feature_names", self.feature_names) or []
+        for key, feature_names in feature_sets.items():
+            weights = align_adjustments(self.feature_adjustments, feature_names)
+            if weights is not None:
+                self._adjustment_weights[key] = weights
 
-        return X_adjusted
+    def _apply_feature_adjustments(self, X: pd.DataFrame, model_key: str = "mixed") -> pd.DataFrame:
+        """
+        Convert features to a float32 matrix and apply adjustment coefficients.
+
+        Args:
+            X: Features in the model's feature_names order
+            model_key: "mixed", "turf" or "dirt" (selects the aligned weights)
+
+        Returns:
+            float32 feature frame (same columns and index)
+        """
+        values = X.to_numpy(dtype=np.float32)
+        weights = self._adjustment_weights.get(model_key)
+        if weights is not None:
+            values *= weights
+        return pd.DataFrame(values, columns=X.columns, index=X.index)
 
     def get_upcoming_races(self, target_date: date | None = None) -> list[dict]:
         """Get race entries for the specified date."""
@@ -442,7 +471,8 @@ class RacePredictor:
             X = df[m_feature_names].fillna(0)
 
             # Apply feature adjustment coefficients
-            X = self._apply_feature_adjustments(X)
+            model_key = get_surface_type(track_code) if surface_model_data is not None else "mixed"
+            X = self._apply_feature_adjustments(X, model_key)
 
             # Model availability assertions for type checking
             assert m_xgb is not None, "XGBoost model not loaded"
@@ -602,8 +632,37 @@ class RacePredictor:
             except Exception as e:
                 logger.error(f"Prediction failed {race_code}: {e}")
 
+        self._simulate_races(results["races"])
         return results
 
+    def _simulate_races(self, race_results: list[dict[str, Any]]) -> None:
+        """Attach Monte Carlo race simulations, simulating the day's races in one batch."""
+        race_codes = []
+        strengths = []
+        for race_result in race_results:
+            predictions = race_result["predictions"]
+            try:
+                strengths.append(
+                    strengths_from_predictions(
+                        [int(p["umaban"]) for p in predictions],
+                        win_probs=[p.get("win_prob", 0) for p in predictions],
+                        rank_scores=[p["pred_score"] for p in predictions],
+                    )
+                )
+            except ValueError as e:
+                logger.warning(f"Race simulation skipped {race_result['race_code']}: {e}")
+                continue
+            race_codes.append(race_result["race_code"])
+
+        if not race_codes:
+            return
+
+        summaries = dict(
+            zip(race_codes, simulate_day(race_codes, np.stack(strengths)), strict=True)
+        )
+        for race_result in race_results:
+            race_result["simulation"] = summaries.get(race_result["race_code"])
+
 
 def print_predictions(results: dict):
     """Display prediction results."""
@@ -11,7 +11,10 @@ from src.scheduler.result.analyzer import (
     compare_results,
 )
 from src.scheduler.result.db_operations import (
+    fetch_final_odds_frame,
+    fetch_race_results_frame,
     get_cumulative_stats,
+    get_final_odds,
     get_payouts,
     get_race_results,
     get_recent_race_dates,
@@ -23,11 +26,22 @@ from src.scheduler.result.notifier import (
     send_discord_notification,
     send_weekend_notification,
 )
+from src.scheduler.result.summary import (
+    get_cumulative_summary,
+    get_daily_summaries,
+    get_period_summary,
+    rebuild_dashboard_summary,
+    summary_rates,
+    update_dashboard_summary,
+)
 
 __all__ = [
     # DB operations
     "get_race_results",
     "get_payouts",
+    "get_final_odds",
+    "fetch_race_results_frame",
+    "fetch_final_odds_frame",
     "load_predictions_from_db",
     "save_analysis_to_db",
     "update_accuracy_tracking",
@@ -40,4 +54,11 @@ __all__ = [
     # Notifier
     "send_discord_notification",
     "send_weekend_notification",
+    # Dashboard summary
+    "update_dashboard_summary",
+    "rebuild_dashboard_summary",
+    "get_daily_summaries",
+    "get_cumulative_summary",
+    "get_period_summary",
+    "summary_rates",
 ]
@@ -7,30 +7,27 @@ and calculating accuracy metrics.
 
 import logging
 
+import numpy as np
+import pandas as pd
+
+from src.scheduler.result.db_operations import KEIBAJO_NAMES
+
 logger = logging.getLogger(__name__)
 
 
-def compare_results(
-    predictions: dict,
-    results: list[dict],
-    payouts: dict | None = None,
-    final_odds: dict | None = None,
-) -> dict:
-    """
-    Compare predictions with actual results (EV recommendation and axis horse format).
+# EV threshold used when recalculating recommendations from final odds
+EV_THRESHOLD = 1.5
 
-    Args:
-        predictions: Prediction data dictionary
-        results: List of race results
-        payouts: Optional payout data
-        final_odds: Optional final odds data {race_code: {umaban: {'tansho': x, 'fukusho': y}}}
+# Stake per bet (yen)
+BET_UNIT = 100
 
-    Returns:
-        Comparison result dictionary
-    """
-    final_odds = final_odds or {}
-    comparison = {
-        "date": predictions["date"],
+RANKING_LABELS = ["1着", "2着", "3着", "4着以下"]
+
+
+def _empty_comparison(target_date: str) -> dict:
+    """Create an empty comparison result."""
+    return {
+        "date": target_date,
         "total_races": 0,
         "analyzed_races": 0,
         "stats": {
@@ -70,11 +67,7 @@ def compare_results(
         },
         # Ranking stats (position distribution for ranks 1-5)
         "ranking_stats": {
-            1: {"1着": 0, "2着": 0, "3着": 0, "4着以下": 0, "出走": 0},
-            2: {"1着": 0, "2着": 0, "3着": 0, "4着以下": 0, "出走": 0},
-            3: {"1着": 0, "2着": 0, "3着": 0, "4着以下": 0, "出走": 0},
-            4: {"1着": 0, "2着": 0, "3着": 0, "4着以下": 0, "出走": 0},
-            5: {"1着": 0, "2着": 0, "3着": 0, "4着以下": 0, "出走": 0},
+            rank: {"1着": 0, "2着": 0, "3着": 0, "4着以下": 0, "出走": 0} for rank in range(1, 6)
         },
         # Return rate calculation (100 yen each on top 1 prediction)
         "return_stats": {
@@ -108,424 +101,603 @@ def compare_results(
         },
     }
 
-    payouts = payouts or {}
 
-    # Map by race code
-    results_map = {r["race_code"]: r for r in results}
+def _none_if_nan(value):
+    """Missing values (NaN/NA from frames) as None, so details stay valid JSON."""
+    return None if pd.isna(value) else value
 
-    for pred_race in predictions.get("races", []):
-        race_code = pred_race["race_code"]
-        comparison["total_races"] += 1
 
-        if race_code not in results_map:
-            continue
+def _to_umaban(values) -> pd.Series:
+    """Normalize horse numbers ("06", 6, " 6") to nullable integers."""
+    return pd.to_numeric(pd.Series(values, dtype="object"), errors="coerce").astype("Int64")
 
-        actual = results_map[race_code]
-        comparison["analyzed_races"] += 1
-
-        # Get all horses and top 3 predictions
-        all_horses = pred_race.get("all_horses", [])
-        pred_top3 = pred_race.get("top3", [])
-        pred_top3_umaban = [str(int(p["umaban"])) for p in pred_top3]
-
-        # Actual results (TOP3)
-        actual_results = actual["results"]
-        actual_top3 = [str(int(r["umaban"])) for r in actual_results[:3] if r["chakujun"] <= 3]
-        winner_umaban = actual_top3[0] if actual_top3 else None
-
-        # Race info
-        keibajo = actual["keibajo"]
-        kyori = actual.get("kyori", 0)
-        track = actual.get("track", "不明")
-        field_size = len(actual_results)
-
-        # Distance category
-        try:
-            kyori_int = int(kyori) if kyori else 0
-        except Exception:
-            kyori_int = 0
-        if kyori_int <= 1400:
-            distance_cat = "短距離"
-        elif kyori_int <= 1800:
-            distance_cat = "マイル"
-        elif kyori_int <= 2200:
-            distance_cat = "中距離"
-        else:
-            distance_cat = "長距離"
 
-        # Field size category
-        if field_size <= 10:
-            field_cat = "少頭数(~10)"
-        elif field_size <= 14:
-            field_cat = "中頭数(11-14)"
-        else:
-            field_cat = "多頭数(15~)"
+def _prediction_frame(pred_races: list[dict]) -> pd.DataFrame:
+    """One row per predicted horse: race_idx, pred_rank, umaban, probabilities."""
+    rows = [
+        (
+            race_idx,
+            rank,
+            h.get("horse_number"),
+            h.get("win_probability", 0),
+            h.get("place_probability", 0),
+            h.get("confidence", 0),
+        )
+        for race_idx, pred_race in enumerate(pred_races)
+        for rank, h in enumerate(pred_race.get("all_horses", []), start=1)
+    ]
+    frame = pd.DataFrame(
+        rows,
+        columns=["race_idx", "pred_rank", "horse_number", "win_prob", "place_prob", "confidence"],
+    )
+    frame["umaban"] = _to_umaban(frame["horse_number"])
+    for column in ("win_prob", "place_prob", "confidence"):
+        frame[column] = pd.to_numeric(frame[column], errors="coerce").fillna(0.0)
+    return frame
+
+
+def _results_frames(results: list[dict] | pd.DataFrame) -> tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    Split race results into a per-race and a per-runner frame.
 
-        # Calculate stats
-        race_result = {
-            "race_code": race_code,
-            "keibajo": keibajo,
-            "race_number": actual["race_number"],
-            "kyori": kyori,
-            "track": track,
-            "field_size": field_size,
-            "pred_top3": pred_top3_umaban,
-            "actual_top3": actual_top3,
-            "hits": {},
-            "winner_rank": None,  # Winner's predicted rank
-        }
+    Accepts the list returned by get_race_results() or the frame returned by
+    fetch_race_results_frame().
+    """
+    if isinstance(results, pd.DataFrame):
+        frame = results
+        is_turf = frame["track_code"].astype("string").str.startswith("1").fillna(False)
+        frame = frame.assign(
+            keibajo=frame["keibajo_code"].map(lambda c: KEIBAJO_NAMES.get(c, c)),
+            race_number=frame["race_bango"],
+            track=is_turf.map({True: "芝", False: "ダ"}),
+        )
+        race_meta = frame.drop_duplicates("race_code")[
+            ["race_code", "keibajo", "race_number", "kyori", "track"]
+        ]
+        runners = frame[frame["umaban"].notna()][
+            ["race_code", "umaban", "chakujun", "bamei", "ninki", "odds"]
+        ]
+    else:
+        race_meta = pd.DataFrame(
+            [
+                (
+                    r["race_code"],
+                    r["keibajo"],
+                    r["race_number"],
+                    r.get("kyori", 0),
+                    r.get("track", "不明"),
+                )
+                for r in results
+            ],
+            columns=["race_code", "keibajo", "race_number", "kyori", "track"],
+            dtype=object,
+        )
+        runners = pd.DataFrame(
+            [
+                (
+                    r["race_code"],
+                    h["umaban"],
+                    h["chakujun"],
+                    h.get("bamei", ""),
+                    h.get("ninki"),
+                    h.get("tansho_odds", 0) or h.get("odds", 0),
+                )
+                for r in results
+                for h in r["results"]
+            ],
+            columns=["race_code", "umaban", "chakujun", "bamei", "ninki", "odds"],
+        )
 
-        # Calculate winner's predicted rank (for MRR) and record winner details
-        if winner_umaban and all_horses:
-            for idx, h in enumerate(all_horses):
-                h_umaban = str(h.get("horse_number", ""))
-                if h_umaban == winner_umaban:
-                    winner_rank = idx + 1
-                    race_result["winner_rank"] = winner_rank
-                    race_result["winner_predicted_prob"] = h.get("win_probability", 0)
-                    comparison["stats"]["mrr_sum"] += 1.0 / winner_rank
-                    break
-
-        # Record winner info from actual results
-        if actual_results:
-            winner_res = actual_results[0]
-            race_result["winner"] = {
-                "bamei": winner_res.get("bamei", ""),
-                "umaban": winner_umaban or "",
-                "odds": float(winner_res.get("tansho_odds", 0) or winner_res.get("odds", 0) or 0),
-                "ninki": int(winner_res.get("ninki", 0) or 0),
-            }
+    race_meta = race_meta.drop_duplicates("race_code")
+    runners = runners.assign(
+        umaban=_to_umaban(runners["umaban"]),
+        chakujun=pd.to_numeric(runners["chakujun"], errors="coerce").fillna(99).astype(int),
+        ninki=pd.to_numeric(runners["ninki"], errors="coerce").fillna(0).astype(int),
+        odds=pd.to_numeric(runners["odds"], errors="coerce").fillna(0.0),
+    ).reset_index(drop=True)
+    race_meta = race_meta.merge(
+        runners.groupby("race_code").size().rename("field_size"),
+        left_on="race_code",
+        right_index=True,
+        how="left",
+    ).fillna({"field_size": 0})
+    return race_meta, runners
+
+
+def _payout_frames(payouts: dict) -> tuple[pd.DataFrame, pd.DataFrame]:
+    """Win payouts per race and place payouts per (race_code, umaban)."""
+    tansho = pd.DataFrame(
+        [
+            (race_code, p.get("tansho_umaban"), p.get("tansho_payout", 0))
+            for race_code, p in payouts.items()
+            if p
+        ],
+        columns=["race_code", "tansho_umaban", "tansho_payout"],
+    )
+    tansho["tansho_umaban"] = _to_umaban(tansho["tansho_umaban"])
+    tansho["has_payout"] = True
+
+    fukusho = pd.DataFrame(
+        [
+            (race_code, fk.get("umaban", ""), fk.get("payout", 0))
+            for race_code, p in payouts.items()
+            for fk in p.get("fukusho", [])
+            if fk.get("umaban")
+        ],
+        columns=["race_code", "umaban", "fukusho_payout"],
+    )
+    fukusho["umaban"] = _to_umaban(fukusho["umaban"])
+    return tansho, fukusho.drop_duplicates(["race_code", "umaban"])
+
+
+def _fukusho_odds_frame(final_odds: dict | pd.DataFrame | None) -> pd.DataFrame:
+    """Final place odds per (race_code, umaban)."""
+    if isinstance(final_odds, pd.DataFrame):
+        frame = final_odds[["race_code", "umaban", "fukusho"]]
+    else:
+        frame = pd.DataFrame(
+            [
+                (race_code, umaban, odds.get("fukusho", 0))
+                for race_code, race_odds in (final_odds or {}).items()
+                for umaban, odds in race_odds.items()
+            ],
+            columns=["race_code", "umaban", "fukusho"],
+        )
+    frame = frame.assign(
+        umaban=_to_umaban(frame["umaban"]),
+        fukusho_odds=pd.to_numeric(frame["fukusho"], errors="coerce").fillna(0.0),
+    )
+    return frame[["race_code", "umaban", "fukusho_odds"]].drop_duplicates(
+        ["race_code", "umaban"], keep="last"
+    )
+
+
+def _ev_recommendations(
+    pred_races: list[dict], races: pd.DataFrame, horses: pd.DataFrame
+) -> tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    Select EV-recommended horses (win, place) of every analyzed race.
 
-        # Top 1 prediction wins
-        if pred_top3_umaban and actual_top3:
-            if pred_top3_umaban[0] == actual_top3[0]:
-                comparison["stats"]["top1_hit"] += 1
-                comparison["stats"]["tansho_hit"] += 1
-                race_result["hits"]["tansho"] = True
-
-            # Top 1 prediction in top 3
-            if pred_top3_umaban[0] in actual_top3:
-                comparison["stats"]["top1_in_top3"] += 1
-                comparison["stats"]["fukusho_hit"] += 1
-                race_result["hits"]["fukusho"] = True
-
-        # Winner in top 3 predictions
-        if winner_umaban and winner_umaban in pred_top3_umaban:
-            comparison["stats"]["top3_cover"] += 1
-            race_result["hits"]["top3_cover"] = True
-        elif winner_umaban and race_result["winner_rank"] and race_result["winner_rank"] > 3:
-            # Missed (winner ranked 4th or lower)
-            comparison["misses"].append(
-                {
-                    "race": f"{keibajo}{actual['race_number']}R",
-                    "winner_rank": race_result["winner_rank"],
-                    "winner": winner_umaban,
-                }
-            )
+    Uses recommendations saved at prediction time; races predicted before
+    they were saved are recalculated from final odds (EV >= 1.5).
+    """
+    saved = {
+        race_idx: pred_races[race_idx].get("ev_recommendations")
+        for race_idx in races.index
+        if pred_races[race_idx].get("ev_recommendations")
+    }
 
-        # TOP3 prediction matches all top 3
-        if len(pred_top3_umaban) >= 3 and len(actual_top3) >= 3:
-            if set(pred_top3_umaban[:3]) == set(actual_top3[:3]):
-                comparison["stats"]["top3_hit"] += 1
-                comparison["stats"]["sanrenpuku_hit"] += 1
-                race_result["hits"]["sanrenpuku"] = True
-
-        # Exacta (1-2 prediction matches 1-2)
-        if len(pred_top3_umaban) >= 2 and len(actual_top3) >= 2:
-            if set(pred_top3_umaban[:2]) == set(actual_top3[:2]):
-                comparison["stats"]["umaren_hit"] += 1
-                race_result["hits"]["umaren"] = True
-
-        # Ranking stats (what position did rank 1-5 predictions finish)
-        actual_results_map = {str(int(r["umaban"])): r["chakujun"] for r in actual_results}
-        for rank in range(1, 6):  # Ranks 1-5
-            if rank <= len(all_horses):
-                pred_umaban = str(all_horses[rank - 1].get("horse_number", ""))
-                comparison["ranking_stats"][rank]["出走"] += 1
-
-                if pred_umaban in actual_results_map:
-                    actual_pos = actual_results_map[pred_umaban]
-                    if actual_pos == 1:
-                        comparison["ranking_stats"][rank]["1着"] += 1
-                    elif actual_pos == 2:
-                        comparison["ranking_stats"][rank]["2着"] += 1
-                    elif actual_pos == 3:
-                        comparison["ranking_stats"][rank]["3着"] += 1
-                    else:
-                        comparison["ranking_stats"][rank]["4着以下"] += 1
-                else:
-                    # Scratched, etc.
-                    comparison["ranking_stats"][rank]["4着以下"] += 1
-
-        # EV recommendation stats (EV >= 1.5 horses)
-        race_payout = payouts.get(race_code, {})
-
-        # Use saved EV recommendations if available (from prediction time)
-        saved_ev_recs = pred_race.get("ev_recommendations")
-        tansho_ev_recommended = []  # Win EV >= 1.5
-        fukusho_ev_recommended = []  # Place EV >= 1.5
-
-        if saved_ev_recs:
-            # Use saved recommendations from prediction time
-            for rec in saved_ev_recs.get("win_recommendations", []):
-                h_num = rec.get("horse_number")
-                # Find horse in all_horses
-                for h in all_horses:
-                    if h.get("horse_number") == h_num:
-                        tansho_ev_recommended.append(h)
-                        break
-            for rec in saved_ev_recs.get("place_recommendations", []):
-                h_num = rec.get("horse_number")
-                for h in all_horses:
-                    if h.get("horse_number") == h_num:
-                        fukusho_ev_recommended.append(h)
-                        break
-        else:
-            # Fallback: recalculate with final odds (for old predictions without ev_recommendations)
-            # Build odds map from actual results (win odds from umagoto_race_joho)
-            odds_map = {}
-            for r in actual_results:
-                r_umaban = str(int(r["umaban"])) if r.get("umaban") else None
-                if r_umaban and r.get("odds"):
-                    odds_map[r_umaban] = r["odds"]
-
-            # Also build fukusho odds map from final_odds if available
-            fukusho_odds_map = {}
-            if final_odds and race_code in final_odds:
-                for umaban, odds_data in final_odds[race_code].items():
-                    fukusho_odds_map[str(int(umaban))] = odds_data.get("fukusho", 0)
-
-            for h in all_horses:
-                h_umaban = str(int(h.get("horse_number", 0)))
-                win_prob = h.get("win_probability", 0)
-                place_prob = h.get("place_probability", 0)
-                tansho_odds = odds_map.get(h_umaban, 0)
-                fukusho_odds = fukusho_odds_map.get(h_umaban, 0)
-
-                # Win EV check
-                if tansho_odds > 0 and win_prob > 0:
-                    win_ev = win_prob * tansho_odds
-                    if win_ev >= 1.5:
-                        tansho_ev_recommended.append(h)
-
-                # Place EV check
-                if fukusho_odds > 0 and place_prob > 0:
-                    place_ev = place_prob * fukusho_odds
-                    if place_ev >= 1.5:
-                        fukusho_ev_recommended.append(h)
-
-        # Count races with any EV recommendation
-        if tansho_ev_recommended or fukusho_ev_recommended:
-            comparison["ev_stats"]["ev_rec_races"] += 1
-
-        # Win EV recommendations
-        comparison["ev_stats"]["ev_rec_count"] += len(tansho_ev_recommended)
-        for h in tansho_ev_recommended:
-            h_umaban = str(int(h.get("horse_number", 0)))
-            comparison["ev_stats"]["ev_tansho_investment"] += 100
-
-            if h_umaban in actual_results_map:
-                actual_pos = actual_results_map[h_umaban]
-                if actual_pos == 1:
-                    comparison["ev_stats"]["ev_rec_tansho_hit"] += 1
-                    if race_payout:
-                        tansho_payout = race_payout.get("tansho_payout", 0)
-                        comparison["ev_stats"]["ev_tansho_return"] += tansho_payout
-
-        # Place EV recommendations
-        comparison["ev_stats"]["ev_rec_fukusho_count"] = comparison["ev_stats"].get(
-            "ev_rec_fukusho_count", 0
-        ) + len(fukusho_ev_recommended)
-        for h in fukusho_ev_recommended:
-            h_umaban = str(int(h.get("horse_number", 0)))
-            comparison["ev_stats"]["ev_fukusho_investment"] += 100
-
-            if h_umaban in actual_results_map:
-                actual_pos = actual_results_map[h_umaban]
-                if actual_pos <= 3:
-                    comparison["ev_stats"]["ev_rec_fukusho_hit"] += 1
-                    if race_payout:
-                        for fk in race_payout.get("fukusho", []):
-                            fk_umaban = fk.get("umaban", "")
-                            if fk_umaban and str(int(fk_umaban)) == h_umaban:
-                                comparison["ev_stats"]["ev_fukusho_return"] += fk.get("payout", 0)
-                                break
-
-        race_result["ev_recommended_tansho"] = [
-            str(int(h.get("horse_number", 0))) for h in tansho_ev_recommended
+    # Saved recommendations: first matching horse of all_horses per entry
+    first_horses = horses.drop_duplicates(["race_idx", "horse_number"])
+    selected = []
+    for key in ("win_recommendations", "place_recommendations"):
+        recs = pd.DataFrame(
+            [
+                (race_idx, rec.get("horse_number"))
+                for race_idx, ev_recs in saved.items()
+                for rec in ev_recs.get(key, [])
+            ],
+            columns=["race_idx", "horse_number"],
+        )
+        selected.append(recs.merge(first_horses, on=["race_idx", "horse_number"]))
+
+    # Fallback: recalculate with final odds
+    fallback = horses[~horses["race_idx"].isin(list(saved))]
+    win_ev = fallback["win_prob"] * fallback["odds"]
+    place_ev = fallback["place_prob"] * fallback["fukusho_odds"]
+    tansho = pd.concat(
+        [
+            selected[0],
+            fallback[
+                (fallback["odds"] > 0) & (fallback["win_prob"] > 0) & (win_ev >= EV_THRESHOLD)
+            ],
         ]
-        race_result["ev_recommended_fukusho"] = [
-            str(int(h.get("horse_number", 0))) for h in fukusho_ev_recommended
+    )
+    fukusho = pd.concat(
+        [
+            selected[1],
+            fallback[
+                (fallback["fukusho_odds"] > 0)
+                & (fallback["place_prob"] > 0)
+                & (place_ev >= EV_THRESHOLD)
+            ],
         ]
+    )
+    return tansho, fukusho
+
+
+def _labels(values: pd.Series) -> pd.Series:
+    """Horse numbers as display labels ("6"), None if missing."""
+    labels = values.fillna(0).astype(np.int64).astype(str).astype(object)
+    return labels.where(values.notna(), None)
+
+
+def _labels_by_race(horses: pd.DataFrame) -> dict[int, list[str]]:
+    """Horse number labels grouped by race_idx (row order kept)."""
+    labels: dict[int, list[str]] = {}
+    for race_idx, umaban in zip(horses["race_idx"].tolist(), _labels(horses["umaban"])):
+        race_labels = labels.setdefault(race_idx, [])
+        if umaban is not None:
+            race_labels.append(umaban)
+    return labels
+
+
+def _category_stats(races: pd.DataFrame, column: str) -> dict:
+    """Aggregate hits and returns per category value (in first-seen order)."""
+    paid = races["has_payout"]
+    frame = pd.DataFrame(
+        {
+            "key": races[column],
+            "races": 1,
+            "top1_hit": races["hit_tansho"].astype(int),
+            "top1_in_top3": races["hit_fukusho"].astype(int),
+            "top3_cover": races["hit_top3_cover"].astype(int),
+            "tansho_investment": paid * BET_UNIT,
+            "tansho_return": races["cat_tansho_return"],
+            "fukusho_investment": paid * BET_UNIT,
+            "fukusho_return": races["cat_fukusho_return"],
+        }
+    )
+    grouped = frame.groupby("key", sort=False, dropna=False).sum()
+    return {
+        _none_if_nan(key): {k: int(v) for k, v in row.items()} for key, row in grouped.iterrows()
+    }
 
-        # Axis horse stats (horse with highest place probability)
-        axis_horse = (
-            max(all_horses, key=lambda h: h.get("place_probability", 0)) if all_horses else None
-        )
-        if axis_horse:
-            comparison["axis_stats"]["axis_races"] += 1
-            axis_umaban = str(int(axis_horse.get("horse_number", 0)))
-            comparison["axis_stats"]["axis_tansho_investment"] += 100
-            comparison["axis_stats"]["axis_fukusho_investment"] += 100
-
-            if axis_umaban in actual_results_map:
-                actual_pos = actual_results_map[axis_umaban]
-                if actual_pos == 1:
-                    comparison["axis_stats"]["axis_tansho_hit"] += 1
-                    # Win payout
-                    if race_payout:
-                        comparison["axis_stats"]["axis_tansho_return"] += race_payout.get(
-                            "tansho_payout", 0
-                        )
-                elif actual_pos == 2:
-                    comparison["axis_stats"]["axis_2nd_hit"] += 1
-                elif actual_pos == 3:
-                    comparison["axis_stats"]["axis_3rd_hit"] += 1
-                if actual_pos <= 3:
-                    comparison["axis_stats"]["axis_fukusho_hit"] += 1
-                    # Place payout
-                    if race_payout:
-                        for fk in race_payout.get("fukusho", []):
-                            fk_umaban = fk.get("umaban", "")
-                            if fk_umaban and str(int(fk_umaban)) == axis_umaban:
-                                comparison["axis_stats"]["axis_fukusho_return"] += fk.get(
-                                    "payout", 0
-                                )
-                                break
 
-            race_result["axis_horse"] = axis_umaban
-            race_result["axis_fukusho"] = (
-                axis_umaban in actual_results_map and actual_results_map[axis_umaban] <= 3
-            )
+def _distance_category(kyori: pd.Series) -> pd.Series:
+    """Distance category label of each race."""
+    kyori_int = pd.to_numeric(kyori, errors="coerce").fillna(0)
+    return pd.Series(
+        np.select(
+            [kyori_int <= 1400, kyori_int <= 1800, kyori_int <= 2200],
+            ["短距離", "マイル", "中距離"],
+            default="長距離",
+        ),
+        index=kyori.index,
+    )
 
-        # Return rate calculation (with payout data) - top 1 prediction based (reference)
-        if race_payout and all_horses:
-            # Compare horse numbers as integers ("6" == "06")
-            pred_1st_num = (
-                str(int(all_horses[0].get("horse_number", 0))) if len(all_horses) > 0 else None
-            )
 
-            # Win (100 yen on top 1 prediction)
-            comparison["return_stats"]["tansho_investment"] += 100
-            tansho_umaban = race_payout.get("tansho_umaban", "")
-            if pred_1st_num and tansho_umaban:
-                tansho_umaban_num = str(int(tansho_umaban)) if tansho_umaban.strip() else ""
-                if tansho_umaban_num == pred_1st_num:
-                    comparison["return_stats"]["tansho_return"] += race_payout.get(
-                        "tansho_payout", 0
-                    )
-
-            # Place (100 yen on top 1 prediction)
-            comparison["return_stats"]["fukusho_investment"] += 100
-            fukusho_hits = race_payout.get("fukusho", [])
-            for fk in fukusho_hits:
-                fk_umaban = fk.get("umaban", "")
-                if fk_umaban:
-                    fk_umaban_num = str(int(fk_umaban)) if fk_umaban.strip() else ""
-                    if fk_umaban_num == pred_1st_num:
-                        comparison["return_stats"]["fukusho_return"] += fk.get("payout", 0)
-                        break
-
-        # Popularity stats (from top 1 prediction's popularity)
-        pred_1st_umaban = str(int(all_horses[0].get("horse_number", 0))) if all_horses else None
-        pred_1st_ninki = None
-        for res in actual_results:
-            if str(int(res["umaban"])) == pred_1st_umaban:
-                pred_1st_ninki = res.get("ninki")
-                break
-
-        if pred_1st_ninki:
-            # Determine popularity category
-            if pred_1st_ninki <= 3:
-                pop_cat = "1-3番人気"
-            elif pred_1st_ninki <= 6:
-                pop_cat = "4-6番人気"
-            elif pred_1st_ninki <= 9:
-                pop_cat = "7-9番人気"
-            else:
-                pop_cat = "10番人気以下"
-
-            comparison["popularity_stats"][pop_cat]["対象"] += 1
-            if race_result["hits"].get("tansho"):
-                comparison["popularity_stats"][pop_cat]["的中"] += 1
-            if race_result["hits"].get("fukusho"):
-                comparison["popularity_stats"][pop_cat]["複勝圏"] += 1
-            race_result["pred_1st_ninki"] = pred_1st_ninki
-
-        # Confidence stats (from top 1 prediction's confidence)
-        pred_1st_confidence = all_horses[0].get("confidence", 0) if all_horses else 0
-        if pred_1st_confidence >= 0.80:
-            conf_cat = "高(80%以上)"
-        elif pred_1st_confidence >= 0.60:
-            conf_cat = "中(60-80%)"
-        else:
-            conf_cat = "低(60%未満)"
+def _field_category(field_size: pd.Series) -> pd.Series:
+    """Field size category label of each race."""
+    return pd.Series(
+        np.select(
+            [field_size <= 10, field_size <= 14],
+            ["少頭数(~10)", "中頭数(11-14)"],
+            default="多頭数(15~)",
+        ),
+        index=field_size.index,
+    )
 
-        comparison["confidence_stats"][conf_cat]["対象"] += 1
-        if race_result["hits"].get("tansho"):
-            comparison["confidence_stats"][conf_cat]["的中"] += 1
-        if race_result["hits"].get("fukusho"):
-            comparison["confidence_stats"][conf_cat]["複勝圏"] += 1
-        race_result["pred_1st_confidence"] = pred_1st_confidence
 
-        comparison["races"].append(race_result)
+def compare_results(
+    predictions: dict,
+    results: list[dict] | pd.DataFrame,
+    payouts: dict | None = None,
+    final_odds: dict | pd.DataFrame | None = None,
+) -> dict:
+    """
+    Compare predictions with actual results (EV recommendation and axis horse format).
+
+    Predictions, results, payouts and odds are joined once into per-horse
+    and per-race frames; hit, ROI, ranking, popularity, confidence and
+    calibration aggregates are computed with vectorized operations and
+    groupby, so long backtests scale with the number of rows.
+
+    Args:
+        predictions: Prediction data dictionary
+        results: List of race results, or frame from fetch_race_results_frame()
+        payouts: Optional payout data
+        final_odds: Optional final odds data {race_code: {umaban: {'tansho': x, 'fukusho': y}}}
+            or frame from fetch_final_odds_frame()
+
+    Returns:
+        Comparison result dictionary
+    """
+    comparison = _empty_comparison(predictions["date"])
+    pred_races = predictions.get("races", [])
+    comparison["total_races"] = len(pred_races)
+    if not pred_races or len(results) == 0:
+        return comparison
+
+    race_meta, runners = _results_frames(results)
+    tansho_payouts, fukusho_payouts = _payout_frames(payouts or {})
+
+    # Analyzed races (prediction order), indexed by position in predictions
+    races = (
+        pd.DataFrame(
+            {
+                "race_idx": range(len(pred_races)),
+                "race_code": [r["race_code"] for r in pred_races],
+            }
+        )
+        .merge(race_meta, on="race_code")
+        .merge(tansho_payouts, on="race_code", how="left")
+        .sort_values("race_idx")
+        .set_index("race_idx")
+    )
+    races["has_payout"] = races["has_payout"].eq(True)
+    races["tansho_payout"] = races["tansho_payout"].fillna(0)
+    comparison["analyzed_races"] = len(races)
+    if races.empty:
+        return comparison
+
+    # Per predicted horse, joined with finishing positions, payouts and odds
+    horses = (
+        _prediction_frame(pred_races)
+        .merge(races[["race_code"]], left_on="race_idx", right_index=True)
+        .merge(
+            runners.drop_duplicates(["race_code", "umaban"], keep="last")[
+                ["race_code", "umaban", "chakujun", "odds"]
+            ],
+            on=["race_code", "umaban"],
+            how="left",
+        )
+        .merge(
+            runners.drop_duplicates(["race_code", "umaban"])[["race_code", "umaban", "ninki"]],
+            on=["race_code", "umaban"],
+            how="left",
+        )
+        .merge(fukusho_payouts, on=["race_code", "umaban"], how="left")
+        .merge(_fukusho_odds_frame(final_odds), on=["race_code", "umaban"], how="left")
+        .sort_values(["race_idx", "pred_rank"])
+        .reset_index(drop=True)
+    )
+    horses["pos"] = horses["chakujun"].fillna(99).astype(int)
+    horses["odds"] = horses["odds"].fillna(0.0)
+    horses["ninki"] = horses["ninki"].fillna(0).astype(int)
+    horses["fukusho_payout"] = horses["fukusho_payout"].fillna(0)
+    horses["fukusho_odds"] = horses["fukusho_odds"].fillna(0.0)
+    by_race = horses.groupby("race_idx")
+
+    # Predicted and actual top 3
+    for rank in (1, 2, 3):
+        ranked = horses[horses["pred_rank"] == rank].set_index("race_idx")
+        races[f"p{rank}"] = ranked["umaban"]
+    races["n_horses"] = by_race.size().reindex(races.index, fill_value=0)
+    first = horses[horses["pred_rank"] == 1].set_index("race_idx")
+
+    top = runners.groupby("race_code").head(3)
+    top = top[top["chakujun"] <= 3].assign(k=lambda f: f.groupby("race_code").cumcount() + 1)
+    actual = top.pivot(index="race_code", columns="k", values="umaban")
+    for rank in (1, 2, 3):
+        column = actual[rank] if rank in actual.columns else pd.Series(dtype="Int64")
+        races[f"a{rank}"] = races["race_code"].map(column).astype("Int64")
+    races["winner"] = races["a1"]
+
+    # Winner's predicted rank (MRR)
+    winner_rows = horses[
+        horses["umaban"].eq(horses["race_idx"].map(races["winner"])).fillna(False)
+    ].drop_duplicates("race_idx")
+    winner_rows = winner_rows.set_index("race_idx")
+    races["winner_rank"] = winner_rows["pred_rank"]
+    races["winner_prob"] = winner_rows["win_prob"]
+    comparison["stats"]["mrr_sum"] = float((1.0 / races["winner_rank"].dropna()).sum())
+
+    # Hits
+    p1, p2, p3 = races["p1"], races["p2"], races["p3"]
+    a1, a2, a3 = races["a1"], races["a2"], races["a3"]
+    races["hit_tansho"] = (p1 == a1).fillna(False).astype(bool)
+    races["hit_fukusho"] = ((p1 == a1) | (p1 == a2) | (p1 == a3)).fillna(False).astype(bool)
+    races["hit_top3_cover"] = (
+        ((races["winner"] == p1) | (races["winner"] == p2) | (races["winner"] == p3))
+        .fillna(False)
+        .astype(bool)
+    )
+    pred_top3 = races[["p1", "p2", "p3"]]
+    actual_top3 = races[["a1", "a2", "a3"]]
+    full_top3 = pred_top3.notna().all(axis=1) & actual_top3.notna().all(axis=1)
+    races["hit_sanrenpuku"] = full_top3 & (
+        np.sort(pred_top3.fillna(-1).to_numpy(dtype=np.int64), axis=1)
+        == np.sort(actual_top3.fillna(-1).to_numpy(dtype=np.int64), axis=1)
+    ).all(axis=1)
+    races["hit_umaren"] = (
+        (((p1 == a1) & (p2 == a2)) | ((p1 == a2) & (p2 == a1))).fillna(False).astype(bool)
+    )
+
+    stats = comparison["stats"]
+    stats["top1_hit"] = stats["tansho_hit"] = int(races["hit_tansho"].sum())
+    stats["top1_in_top3"] = stats["fukusho_hit"] = int(races["hit_fukusho"].sum())
+    stats["top3_cover"] = int(races["hit_top3_cover"].sum())
+    stats["top3_hit"] = stats["sanrenpuku_hit"] = int(races["hit_sanrenpuku"].sum())
+    stats["umaren_hit"] = int(races["hit_umaren"].sum())
+
+    # Ranking stats (what position did rank 1-5 predictions finish)
+    top5 = horses[horses["pred_rank"] <= 5]
+    labels = np.select(
+        [top5["pos"] == 1, top5["pos"] == 2, top5["pos"] == 3], RANKING_LABELS[:3], "4着以下"
+    )
+    counts = pd.crosstab(top5["pred_rank"], labels) if not top5.empty else pd.DataFrame()
+    for rank, row in counts.iterrows():
+        entry = comparison["ranking_stats"][int(rank)]
+        for label, value in row.items():
+            entry[label] = int(value)
+        entry["出走"] = int(row.sum())
+
+    # EV recommendation stats
+    ev_tansho, ev_fukusho = _ev_recommendations(pred_races, races, horses)
+    ev_tansho_hits = ev_tansho[ev_tansho["pos"] == 1]
+    ev_fukusho_hits = ev_fukusho[ev_fukusho["pos"] <= 3]
+    ev_stats = comparison["ev_stats"]
+    ev_stats["ev_rec_races"] = len(set(ev_tansho["race_idx"]) | set(ev_fukusho["race_idx"]))
+    ev_stats["ev_rec_count"] = len(ev_tansho)
+    ev_stats["ev_rec_fukusho_count"] = len(ev_fukusho)
+    ev_stats["ev_tansho_investment"] = len(ev_tansho) * BET_UNIT
+    ev_stats["ev_fukusho_investment"] = len(ev_fukusho) * BET_UNIT
+    ev_stats["ev_rec_tansho_hit"] = len(ev_tansho_hits)
+    ev_stats["ev_rec_fukusho_hit"] = len(ev_fukusho_hits)
+    ev_stats["ev_tansho_return"] = int(ev_tansho_hits["race_idx"].map(races["tansho_payout"]).sum())
+    ev_stats["ev_fukusho_return"] = int(ev_fukusho_hits["fukusho_payout"].sum())
+
+    # Axis horse stats (horse with highest place probability)
+    axis = horses.loc[by_race["place_prob"].idxmax()].set_index("race_idx")
+    axis_stats = comparison["axis_stats"]
+    axis_stats["axis_races"] = len(axis)
+    axis_stats["axis_tansho_investment"] = len(axis) * BET_UNIT
+    axis_stats["axis_fukusho_investment"] = len(axis) * BET_UNIT
+    axis_stats["axis_tansho_hit"] = int((axis["pos"] == 1).sum())
+    axis_stats["axis_2nd_hit"] = int((axis["pos"] == 2).sum())
+    axis_stats["axis_3rd_hit"] = int((axis["pos"] == 3).sum())
+    axis_stats["axis_fukusho_hit"] = int((axis["pos"] <= 3).sum())
+    axis_paid = races["has_payout"].reindex(axis.index)
+    axis_stats["axis_tansho_return"] = int(
+        races["tansho_payout"].reindex(axis.index)[(axis["pos"] == 1) & axis_paid].sum()
+    )
+    axis_stats["axis_fukusho_return"] = int(axis["fukusho_payout"][axis["pos"] <= 3].sum())
+
+    # Return rate calculation - top 1 prediction based (reference)
+    races["has_payout"] &= races["n_horses"] > 0
+    paid = races["has_payout"]
+    first_fukusho = first["fukusho_payout"].reindex(races.index).fillna(0)
+    tansho_win = (races["tansho_umaban"] == p1).fillna(False).astype(bool)
+    return_stats = comparison["return_stats"]
+    return_stats["tansho_investment"] = return_stats["fukusho_investment"] = (
+        int(paid.sum()) * BET_UNIT
+    )
+    return_stats["tansho_return"] = int(races["tansho_payout"][paid & tansho_win].sum())
+    return_stats["fukusho_return"] = int(first_fukusho[paid].sum())
+
+    # Popularity stats (from top 1 prediction's popularity)
+    races["pred_1st_ninki"] = first["ninki"].reindex(races.index).fillna(0).astype(int)
+    with_ninki = races[races["pred_1st_ninki"] > 0]
+    popularity = pd.cut(
+        with_ninki["pred_1st_ninki"],
+        bins=[0, 3, 6, 9, np.inf],
+        labels=list(comparison["popularity_stats"]),
+    )
+    for category, group in with_ninki.groupby(popularity, observed=True):
+        comparison["popularity_stats"][category] = {
+            "的中": int(group["hit_tansho"].sum()),
+            "複勝圏": int(group["hit_fukusho"].sum()),
+            "対象": len(group),
+        }
 
-        # Per-race return for category aggregation
-        race_tansho_payout = 0
-        race_fukusho_payout = 0
-        has_race_payout = bool(race_payout and all_horses)
-        if has_race_payout:
-            cat_pred_1st = str(int(all_horses[0].get("horse_number", 0)))
-            if race_result["hits"].get("tansho"):
-                race_tansho_payout = race_payout.get("tansho_payout", 0)
-            if race_result["hits"].get("fukusho"):
-                for fk in race_payout.get("fukusho", []):
-                    fk_umaban = fk.get("umaban", "")
-                    if fk_umaban and str(int(fk_umaban)).strip() == cat_pred_1st:
-                        race_fukusho_payout = fk.get("payout", 0)
-                        break
-
-        # Category-based aggregation
-        for cat_name, _cat_key, cat_val in [
-            ("by_venue", keibajo, keibajo),
-            ("by_distance", distance_cat, distance_cat),
-            ("by_field_size", field_cat, field_cat),
-            ("by_track", track, track),
-        ]:
-            if cat_val not in comparison[cat_name]:
-                comparison[cat_name][cat_val] = {
-                    "races": 0,
-                    "top1_hit": 0,
-                    "top1_in_top3": 0,
-                    "top3_cover": 0,
-                    "tansho_investment": 0,
-                    "tansho_return": 0,
-                    "fukusho_investment": 0,
-                    "fukusho_return": 0,
+    # Confidence stats (from top 1 prediction's confidence)
+    races["pred_1st_confidence"] = first["confidence"].reindex(races.index).fillna(0)
+    confidence = np.select(
+        [races["pred_1st_confidence"] >= 0.80, races["pred_1st_confidence"] >= 0.60],
+        ["高(80%以上)", "中(60-80%)"],
+        default="低(60%未満)",
+    )
+    for category, group in races.groupby(confidence):
+        comparison["confidence_stats"][category] = {
+            "的中": int(group["hit_tansho"].sum()),
+            "複勝圏": int(group["hit_fukusho"].sum()),
+            "対象": len(group),
+        }
+
+    # Category-based aggregation
+    races["distance_cat"] = _distance_category(races["kyori"])
+    races["field_cat"] = _field_category(races["field_size"])
+    races["cat_tansho_return"] = races["tansho_payout"].where(paid & races["hit_tansho"], 0)
+    races["cat_fukusho_return"] = first_fukusho.where(paid & races["hit_fukusho"], 0)
+    for cat_name, column in (
+        ("by_venue", "keibajo"),
+        ("by_distance", "distance_cat"),
+        ("by_field_size", "field_cat"),
+        ("by_track", "track"),
+    ):
+        comparison[cat_name] = _category_stats(races, column)
+
+    # Calibration data collection (win probability bins by 10% increments)
+    calibrated = races.index.intersection(first.index)
+    win_bins = (np.floor(first.loc[calibrated, "win_prob"] * 10) * 10).astype(int)
+    calibration = pd.DataFrame(
+        {"bin": win_bins.astype(str) + "%", "hit": races.loc[calibrated, "hit_tansho"]}
+    )
+    for win_bin, group in calibration.groupby("bin", sort=False):
+        comparison["calibration"]["win_prob_bins"][win_bin] = {
+            "count": len(group),
+            "hit": int(group["hit"].sum()),
+        }
+
+    # Per-race details
+    ev_tansho_lists = _labels_by_race(ev_tansho)
+    ev_fukusho_lists = _labels_by_race(ev_fukusho)
+    winners = runners.drop_duplicates("race_code")
+    winner_info = dict(
+        zip(
+            winners["race_code"],
+            zip(winners["bamei"], winners["odds"].tolist(), winners["ninki"].tolist()),
+        )
+    )
+    axis_info = dict(zip(axis.index, zip(_labels(axis["umaban"]), axis["pos"].tolist())))
+    for column in ("p1", "p2", "p3", "a1", "a2", "a3", "winner"):
+        races[column] = _labels(races[column])
+
+    detail_columns = [
+        "race_code",
+        "keibajo",
+        "race_number",
+        "kyori",
+        "track",
+        "field_size",
+        "p1",
+        "p2",
+        "p3",
+        "a1",
+        "a2",
+        "a3",
+        "winner",
+        "winner_rank",
+        "winner_prob",
+        "hit_tansho",
+        "hit_fukusho",
+        "hit_top3_cover",
+        "hit_sanrenpuku",
+        "hit_umaren",
+        "pred_1st_ninki",
+        "pred_1st_confidence",
+    ]
+    for race in races[detail_columns].reset_index().to_dict("records"):
+        race_idx = race["race_idx"]
+        race_code = race["race_code"]
+        hits = {
+            key: True
+            for key in ("tansho", "fukusho", "top3_cover", "sanrenpuku", "umaren")
+            if race[f"hit_{key}"]
+        }
+        winner_umaban = race["winner"]
+        winner_rank = None if pd.isna(race["winner_rank"]) else int(race["winner_rank"])
+        race_result = {
+            "race_code": race_code,
+            "keibajo": _none_if_nan(race["keibajo"]),
+            "race_number": _none_if_nan(race["race_number"]),
+            "kyori": _none_if_nan(race["kyori"]),
+            "track": _none_if_nan(race["track"]),
+            "field_size": int(race["field_size"]),
+            "pred_top3": [u for u in (race["p1"], race["p2"], race["p3"]) if u is not None],
+            "actual_top3": [u for u in (race["a1"], race["a2"], race["a3"]) if u is not None],
+            "hits": hits,
+            "winner_rank": winner_rank,
+        }
+        if winner_rank is not None:
+            race_result["winner_predicted_prob"] = float(race["winner_prob"])
+        if race_code in winner_info:
+            bamei, odds, ninki = winner_info[race_code]
+            race_result["winner"] = {
+                "bamei": bamei,
+                "umaban": winner_umaban or "",
+                "odds": float(odds),
+                "ninki": int(ninki),
+            }
+        if winner_umaban and not hits.get("top3_cover") and winner_rank and winner_rank > 3:
+            comparison["misses"].append(
+                {
+                    "race": f"{race['keibajo']}{race['race_number']}R",
+                    "winner_rank": winner_rank,
+                    "winner": winner_umaban,
                 }
-            comparison[cat_name][cat_val]["races"] += 1
-            if race_result["hits"].get("tansho"):
-                comparison[cat_name][cat_val]["top1_hit"] += 1
-            if race_result["hits"].get("fukusho"):
-                comparison[cat_name][cat_val]["top1_in_top3"] += 1
-            if race_result["hits"].get("top3_cover"):
-                comparison[cat_name][cat_val]["top3_cover"] += 1
-            if has_race_payout:
-                comparison[cat_name][cat_val]["tansho_investment"] += 100
-                comparison[cat_name][cat_val]["tansho_return"] += race_tansho_payout
-                comparison[cat_name][cat_val]["fukusho_investment"] += 100
-                comparison[cat_name][cat_val]["fukusho_return"] += race_fukusho_payout
-
-        # Calibration data collection
-        if pred_top3 and len(pred_top3) > 0:
-            win_prob = pred_top3[0].get("win_prob", 0)
-            # Bin by 10% increments
-            win_bin = f"{int(win_prob * 10) * 10}%"
-            if win_bin not in comparison["calibration"]["win_prob_bins"]:
-                comparison["calibration"]["win_prob_bins"][win_bin] = {"count": 0, "hit": 0}
-            comparison["calibration"]["win_prob_bins"][win_bin]["count"] += 1
-            if race_result["hits"].get("tansho"):
-                comparison["calibration"]["win_prob_bins"][win_bin]["hit"] += 1
+            )
+        race_result["ev_recommended_tansho"] = ev_tansho_lists.get(race_idx, [])
+        race_result["ev_recommended_fukusho"] = ev_fukusho_lists.get(race_idx, [])
+        if race_idx in axis_info:
+            axis_umaban, axis_pos = axis_info[race_idx]
+            race_result["axis_horse"] = axis_umaban
+            race_result["axis_fukusho"] = axis_pos <= 3
+        if race["pred_1st_ninki"]:
+            race_result["pred_1st_ninki"] = int(race["pred_1st_ninki"])
+        race_result["pred_1st_confidence"] = float(race["pred_1st_confidence"])
+        comparison["races"].append(race_result)
 
     return comparison
 
@@ -10,6 +10,9 @@ import logging
 from datetime import date, timedelta
 from typing import Any
 
+import pandas as pd
+
+from src.config import FINALIZED_RUNS_REFRESH_DAYS
 from src.db.connection import get_db
 
 logger = logging.getLogger(__name__)
@@ -28,98 +31,221 @@ KEIBAJO_NAMES = {
     "10": "小倉",
 }
 
-
-def get_race_results(target_date: date) -> list[dict]:
+# Columns of fetch_race_results_frame()
+RESULT_FRAME_COLUMNS = [
+    "race_code",
+    "keibajo_code",
+    "race_bango",
+    "kyori",
+    "track_code",
+    "umaban",
+    "chakujun",
+    "bamei",
+    "ninki",
+    "odds",
+]
+
+# Columns of fetch_final_odds_frame()
+FINAL_ODDS_FRAME_COLUMNS = ["race_code", "umaban", "tansho", "fukusho"]
+
+
+def _race_filter(
+    target_dates: list[date] | None, race_codes: list[str] | None, alias: str = "r"
+) -> tuple[str, tuple]:
+    """Build a race_shosai WHERE clause for a set of dates or race codes."""
+    if race_codes is not None:
+        return f"{alias}.race_code = ANY(%s)", (list(race_codes),)
+    dates = target_dates or []
+    return (
+        f"{alias}.kaisai_nen = ANY(%s) AND {alias}.kaisai_nen || {alias}.kaisai_gappi = ANY(%s)",
+        (
+            sorted({str(d.year) for d in dates}),
+            [d.strftime("%Y%m%d") for d in dates],
+        ),
+    )
+
+
+def _parse_scaled(values: pd.Series, scale: float = 1.0) -> pd.Series:
+    """Parse JRA-VAN numeric strings (NaN if blank or invalid)."""
+    return pd.to_numeric(values.astype("string").str.strip(), errors="coerce") / scale
+
+
+def _empty_final_odds_frame() -> pd.DataFrame:
+    """fetch_final_odds_frame() result without rows (same dtypes as with rows)."""
+    return pd.DataFrame(
+        {
+            "race_code": pd.Series(dtype="str"),
+            "umaban": pd.Series(dtype="string"),
+            "tansho": pd.Series(dtype="Float64"),
+            "fukusho": pd.Series(dtype="Float64"),
+        }
+    )
+
+
+def fetch_race_results_frame(
+    conn, target_dates: list[date] | None = None, race_codes: list[str] | None = None
+) -> pd.DataFrame:
     """
-    Get race results for a specific date.
+    Fetch finishing positions of all races on the given dates in one query.
 
     Args:
-        target_date: Target date
+        conn: DB connection
+        target_dates: Target dates (ignored if race_codes is given)
+        race_codes: Target race codes
 
     Returns:
-        List of race result dictionaries
+        One row per runner (ordered by race_code, chakujun) with columns
+        race_code, keibajo_code, race_bango, kyori, track_code, umaban,
+        chakujun, bamei, ninki, odds. Races without runners have one row
+        with umaban NaN.
     """
-    db = get_db()
-    conn = db.get_connection()
+    where, params = _race_filter(target_dates, race_codes)
+
+    cur = conn.cursor()
+    # data_kubun: 6=provisional (all horses+passing order), 7=confirmed results
+    cur.execute(
+        f"""
+        SELECT r.race_code, r.keibajo_code, r.race_bango, r.kyori, r.track_code,
+               u.umaban, u.kakutei_chakujun, u.bamei, u.tansho_ninkijun, u.tansho_odds
+        FROM (
+            SELECT DISTINCT r.race_code, r.keibajo_code, r.race_bango,
+                   r.kyori, r.track_code
+            FROM race_shosai r
+            WHERE {where}
+              AND r.data_kubun IN ('6', '7')
+        ) r
+        LEFT JOIN umagoto_race_joho u
+          ON u.race_code = r.race_code
+         AND u.data_kubun IN ('6', '7')
+        ORDER BY r.race_code, u.kakutei_chakujun::int
+    """,
+        params,
+    )
+    frame = pd.DataFrame(cur.fetchall(), columns=RESULT_FRAME_COLUMNS)
+    cur.close()
+
+    # Odds stored as 4-digit string, e.g. "0772" = 77.2x
+    frame["ninki"] = _parse_scaled(frame["ninki"])
+    frame["odds"] = _parse_scaled(frame["odds"], 10.0)
+    frame["chakujun"] = _parse_scaled(frame["chakujun"]).fillna(99)
+    return frame
+
+
+def fetch_final_odds_frame(
+    conn, target_dates: list[date] | None = None, race_codes: list[str] | None = None
+) -> pd.DataFrame:
+    """
+    Fetch final win and place odds of all races on the given dates.
 
-    try:
-        cur = conn.cursor()
-        kaisai_gappi = target_date.strftime("%m%d")
-        kaisai_nen = str(target_date.year)
+    Uses a constant number of queries (race list, win odds, place odds)
+    regardless of race count.
 
-        # Get races with confirmed or provisional results
-        # data_kubun: 6=provisional (all horses+passing order), 7=confirmed results
+    Args:
+        conn: DB connection
+        target_dates: Target dates (ignored if race_codes is given)
+        race_codes: Target race codes
+
+    Returns:
+        One row per (race_code, umaban) with columns race_code, umaban,
+        tansho, fukusho (NaN if the horse has no odds of that type); empty
+        if there are no races or no odds yet
+    """
+    cur = conn.cursor()
+    if race_codes is None:
+        where, params = _race_filter(target_dates, None)
         cur.execute(
-            """
-            SELECT DISTINCT r.race_code, r.keibajo_code, r.race_bango,
-                   r.kyori, r.track_code
+            f"""
+            SELECT DISTINCT r.race_code
             FROM race_shosai r
-            WHERE r.kaisai_nen = %s
-              AND r.kaisai_gappi = %s
+            WHERE {where}
               AND r.data_kubun IN ('6', '7')
-            ORDER BY r.race_code
         """,
-            (kaisai_nen, kaisai_gappi),
+            params,
+        )
+        race_codes = [row[0] for row in cur.fetchall()]
+    if not race_codes:
+        cur.close()
+        return _empty_final_odds_frame()
+
+    frames = []
+    # Place odds use the minimum odds
+    for table, column, name in (
+        ("odds1_tansho", "odds", "tansho"),
+        ("odds1_fukusho", "odds_saitei", "fukusho"),
+    ):
+        cur.execute(
+            f"""
+            SELECT race_code, umaban, {column}
+            FROM {table}
+            WHERE race_code = ANY(%s)
+        """,
+            (list(race_codes),),
         )
+        frame = pd.DataFrame(cur.fetchall(), columns=["race_code", "umaban", name])
+        frame["umaban"] = frame["umaban"].astype("string").str.strip()
+        frame[name] = _parse_scaled(frame[name], 10.0).fillna(0.0)
+        frames.append(frame.drop_duplicates(["race_code", "umaban"], keep="last"))
+    cur.close()
 
-        races = []
-        for row in cur.fetchall():
-            race_code = row[0]
+    # Merging two empty frames fails on pandas 3 (untyped empty columns)
+    if all(frame.empty for frame in frames):
+        return _empty_final_odds_frame()
+    return frames[0].merge(frames[1], on=["race_code", "umaban"], how="outer", sort=False)
 
-            # Get finishing position, popularity, and odds for each race
-            cur.execute(
-                """
-                SELECT umaban, kakutei_chakujun, bamei, tansho_ninkijun, tansho_odds
-                FROM umagoto_race_joho
-                WHERE race_code = %s
-                  AND data_kubun IN ('6', '7')
-                ORDER BY kakutei_chakujun::int
-            """,
-                (race_code,),
-            )
 
-            results = []
-            for r in cur.fetchall():
-                ninki = None
-                if r[3] and r[3].strip():
-                    try:
-                        ninki = int(r[3])
-                    except Exception:
-                        pass
-                # Parse odds (stored as 4-digit string, e.g. "0772" = 77.2x)
-                odds = None
-                if r[4] and r[4].strip():
-                    try:
-                        odds = int(r[4]) / 10.0
-                    except Exception:
-                        pass
-                results.append(
-                    {
-                        "umaban": r[0],
-                        "chakujun": int(r[1]) if r[1] else 99,
-                        "bamei": r[2],
-                        "ninki": ninki,  # Win popularity rank
-                        "odds": odds,  # Win odds
-                    }
-                )
+def get_race_results(target_date: date) -> list[dict]:
+    """
+    Get race results for a specific date.
 
-            races.append(
-                {
-                    "race_code": race_code,
-                    "keibajo": KEIBAJO_NAMES.get(row[1], row[1]),
-                    "race_number": row[2],
-                    "kyori": row[3],
-                    "track": "芝" if row[4] and row[4].startswith("1") else "ダ",
-                    "results": results,
-                }
-            )
+    Args:
+        target_date: Target date
 
-        cur.close()
-        return races
+    Returns:
+        List of race result dictionaries
+    """
+    db = get_db()
+    conn = db.get_connection()
 
+    try:
+        frame = fetch_race_results_frame(conn, target_dates=[target_date])
     finally:
         conn.close()
 
+    races = []
+    for race_code, group in frame.groupby("race_code", sort=False):
+        first = group.iloc[0]
+        runners = group[group["umaban"].notna()]
+        results = [
+            {
+                "umaban": umaban,
+                "chakujun": int(chakujun),
+                "bamei": bamei,
+                "ninki": None if pd.isna(ninki) else int(ninki),  # Win popularity rank
+                "odds": None if pd.isna(odds) else float(odds),  # Win odds
+            }
+            for umaban, chakujun, bamei, ninki, odds in zip(
+                runners["umaban"],
+                runners["chakujun"],
+                runners["bamei"],
+                runners["ninki"],
+                runners["odds"],
+            )
+        ]
+        track_code = first["track_code"]
+        is_turf = isinstance(track_code, str) and track_code.startswith("1")
+        races.append(
+            {
+                "race_code": race_code,
+                "keibajo": KEIBAJO_NAMES.get(first["keibajo_code"], first["keibajo_code"]),
+                "race_number": first["race_bango"],
+                "kyori": first["kyori"],
+                "track": "芝" if is_turf else "ダ",
+                "results": results,
+            }
+        )
+
+    return races
+
 
 def get_payouts(target_date: date) -> dict[str, dict]:
     """
@@ -209,72 +335,18 @@ def get_final_odds(target_date: date) -> dict[str, dict]:
     conn = db.get_connection()
 
     try:
-        cur = conn.cursor()
-        kaisai_gappi = target_date.strftime("%m%d")
-        kaisai_nen = str(target_date.year)
-
-        # Get race codes for the date
-        cur.execute(
-            """
-            SELECT DISTINCT race_code
-            FROM race_shosai
-            WHERE kaisai_nen = %s AND kaisai_gappi = %s
-              AND data_kubun IN ('6', '7')
-        """,
-            (kaisai_nen, kaisai_gappi),
-        )
-        race_codes = [row[0] for row in cur.fetchall()]
-
-        if not race_codes:
-            cur.close()
-            return {}
+        frame = fetch_final_odds_frame(conn, target_dates=[target_date])
 
         all_odds: dict[str, dict] = {}
+        for race_code, umaban, tansho, fukusho in zip(
+            frame["race_code"], frame["umaban"], frame["tansho"], frame["fukusho"]
+        ):
+            race_odds = all_odds.setdefault(race_code, {}).setdefault(umaban, {})
+            if pd.notna(tansho):
+                race_odds["tansho"] = float(tansho)
+            if pd.notna(fukusho):
+                race_odds["fukusho"] = float(fukusho)
 
-        for race_code in race_codes:
-            race_odds: dict[str, dict[str, float]] = {}
-
-            # Get win odds from odds1_tansho
-            cur.execute(
-                """
-                SELECT umaban, odds
-                FROM odds1_tansho
-                WHERE race_code = %s
-            """,
-                (race_code,),
-            )
-            for row in cur.fetchall():
-                umaban = str(row[0]).strip()
-                try:
-                    odds = float(row[1]) / 10 if row[1] else 0
-                except (ValueError, TypeError):
-                    odds = 0
-                if umaban not in race_odds:
-                    race_odds[umaban] = {}
-                race_odds[umaban]["tansho"] = odds
-
-            # Get place odds from odds1_fukusho (use minimum odds)
-            cur.execute(
-                """
-                SELECT umaban, odds_saitei
-                FROM odds1_fukusho
-                WHERE race_code = %s
-            """,
-                (race_code,),
-            )
-            for row in cur.fetchall():
-                umaban = str(row[0]).strip()
-                try:
-                    odds = float(row[1]) / 10 if row[1] else 0
-                except (ValueError, TypeError):
-                    odds = 0
-                if umaban not in race_odds:
-                    race_odds[umaban] = {}
-                race_odds[umaban]["fukusho"] = odds
-
-            all_odds[race_code] = race_odds
-
-        cur.close()
         logger.info(f"Final odds retrieved: {len(all_odds)} races")
         return all_odds
 
@@ -665,3 +737,39 @@ def get_recent_race_dates(days_back: int = 7) -> list:
         return dates
     finally:
         conn.close()
+
+
+def refresh_finalized_runs(target_date: date) -> int | None:
+    """
+    Re-copy recent finalized runs into finalized_runs (migration 004).
+
+    Runs on or after target_date - FINALIZED_RUNS_REFRESH_DAYS are rebuilt from
+    umagoto_race_joho, so late result corrections are picked up as well.
+
+    Args:
+        target_date: Date whose results were just collected
+
+    Returns:
+        Number of rows copied, or None on failure (e.g. migration not applied)
+    """
+    db = get_db()
+    conn = db.get_connection()
+    if not conn:
+        logger.error("DB connection failed")
+        return None
+
+    since = target_date - timedelta(days=FINALIZED_RUNS_REFRESH_DAYS)
+    try:
+        cur = conn.cursor()
+        cur.execute("SELECT refresh_finalized_runs(%s)", (since.strftime("%Y%m%d"),))
+        rows = cur.fetchone()[0]
+        conn.commit()
+        cur.close()
+        logger.info(f"finalized_runs refreshed since {since}: {rows} rows")
+        return rows
+    except Exception as e:
+        logger.error(f"Error refreshing finalized_runs: {e}")
+        conn.rollback()
+        return None
+    finally:
+        conn.close()
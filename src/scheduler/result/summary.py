@@ -0,0 +1,434 @@
+"""
+Dashboard Summary Module
+
+Daily and cumulative accuracy, ROI and calibration rollups for the Streamlit
+dashboard (migration 005).
+
+dashboard_daily_summary holds one row of counts per analysis date and
+dashboard_cumulative_summary the running totals up to each date, so the
+all-time figures are the latest cumulative row and any period's figures are
+the difference of two rows. Both are updated by the result collector when an
+analysis is saved; rates and ROI are derived from the counts on read.
+
+Usage:
+    update_dashboard_summary(analysis)    # after save_analysis_to_db()
+    python -m src.scheduler.result.summary --rebuild    # backfill from analysis_results
+"""
+
+import json
+import logging
+from datetime import date
+
+from src.db.connection import get_db
+
+logger = logging.getLogger(__name__)
+
+# Count columns shared by the daily and cumulative tables
+COUNT_COLUMNS = (
+    "total_races",
+    "analyzed_races",
+    "tansho_hit",
+    "fukusho_hit",
+    "umaren_hit",
+    "sanrenpuku_hit",
+    "top3_cover",
+    "mrr_sum",
+    "tansho_investment",
+    "tansho_return",
+    "fukusho_investment",
+    "fukusho_return",
+    "axis_races",
+    "axis_fukusho_hit",
+    "axis_fukusho_investment",
+    "axis_fukusho_return",
+)
+
+# Top-1 win probability bins (10% wide) of the calibration counts
+CALIBRATION_BINS = 10
+
+SUMMARY_COLUMNS = (*COUNT_COLUMNS, "calib_races", "calib_hits")
+
+
+def _calibration_index(bin_name: str) -> int:
+    """Bin index of a calculate_accuracy() calibration key ("30%" -> 3)."""
+    return min(max(int(bin_name.rstrip("%")) // 10, 0), CALIBRATION_BINS - 1)
+
+
+def daily_summary(acc: dict) -> dict:
+    """
+    Build a daily summary row from calculate_accuracy() output.
+
+    Args:
+        acc: Accuracy dictionary (analysis["accuracy"])
+
+    Returns:
+        {summary_date, COUNT_COLUMNS..., calib_races, calib_hits}
+    """
+    raw_stats = acc.get("raw_stats", {})
+    return_rates = acc.get("return_rates", {})
+    axis_stats = acc.get("axis_stats", {})
+    analyzed = acc.get("analyzed_races", 0)
+
+    calib_races = [0] * CALIBRATION_BINS
+    calib_hits = [0] * CALIBRATION_BINS
+    for bin_name, data in acc.get("calibration", {}).items():
+        i = _calibration_index(bin_name)
+        count = data.get("count", 0)
+        calib_races[i] += count
+        calib_hits[i] += round(count * data.get("actual_rate", 0) / 100)
+
+    return {
+        "summary_date": acc.get("date"),
+        "total_races": acc.get("total_races", 0),
+        "analyzed_races": analyzed,
+        "tansho_hit": raw_stats.get("tansho_hit", 0),
+        "fukusho_hit": raw_stats.get("fukusho_hit", 0),
+        "umaren_hit": raw_stats.get("umaren_hit", 0),
+        "sanrenpuku_hit": raw_stats.get("sanrenpuku_hit", 0),
+        "top3_cover": raw_stats.get("top3_cover", 0),
+        "mrr_sum": (acc.get("accuracy", {}).get("mrr") or 0) * analyzed,
+        "tansho_investment": return_rates.get("tansho_investment", 0),
+        "tansho_return": return_rates.get("tansho_return", 0),
+        "fukusho_investment": return_rates.get("fukusho_investment", 0),
+        "fukusho_return": return_rates.get("fukusho_return", 0),
+        "axis_races": axis_stats.get("axis_races", 0),
+        "axis_fukusho_hit": axis_stats.get("axis_fukusho_hit", 0),
+        "axis_fukusho_investment": axis_stats.get("axis_fukusho_investment", 0),
+        "axis_fukusho_return": axis_stats.get("axis_fukusho_return", 0),
+        "calib_races": calib_races,
+        "calib_hits": calib_hits,
+    }
+
+
+def accumulate(previous: dict | None, daily: dict) -> dict:
+    """
+    Cumulative row for a date: the previous cumulative row plus that day's counts.
+
+    Args:
+        previous: Cumulative row of the preceding analysis date (None for the first)
+        daily: Daily summary row
+
+    Returns:
+        Cumulative row (summary_date, days, COUNT_COLUMNS..., calib_races, calib_hits)
+    """
+    row = {"summary_date": daily["summary_date"], "days": 1}
+    for col in COUNT_COLUMNS:
+        row[col] = daily[col]
+    row["calib_races"] = list(daily["calib_races"])
+    row["calib_hits"] = list(daily["calib_hits"])
+
+    if previous:
+        row["days"] += previous["days"]
+        for col in COUNT_COLUMNS:
+            row[col] += previous[col]
+        for col in ("calib_races", "calib_hits"):
+            row[col] = [a + b for a, b in zip(row[col], previous[col], strict=True)]
+    return row
+
+
+def difference(later: dict, earlier: dict | None) -> dict:
+    """
+    Period totals between two cumulative rows (after earlier, up to later).
+
+    Args:
+        later: Cumulative row at the end of the period
+        earlier: Cumulative row just before the period (None: from the start)
+
+    Returns:
+        Row of period totals (days, COUNT_COLUMNS..., calib_races, calib_hits)
+    """
+    if earlier is None:
+        return dict(later)
+
+    row = {"summary_date": later["summary_date"], "days": later["days"] - earlier["days"]}
+    for col in COUNT_COLUMNS:
+        row[col] = later[col] - earlier[col]
+    for col in ("calib_races", "calib_hits"):
+        row[col] = [a - b for a, b in zip(later[col], earlier[col], strict=True)]
+    return row
+
+
+def summary_rates(row: dict) -> dict:
+    """
+    Hit rates (%), MRR, ROI (%) and calibration of a daily, cumulative or period row.
+
+    Rates are None when there is nothing to divide by.
+
+    Returns:
+        {tansho_rate, fukusho_rate, umaren_rate, sanrenpuku_rate, top3_cover_rate, mrr,
+         tansho_roi, fukusho_roi, axis_fukusho_roi,
+         calibration: [{bin, races, predicted_rate, actual_rate}]}
+    """
+
+    def pct(numerator: float, denominator: float) -> float | None:
+        return numerator / denominator * 100 if denominator else None
+
+    races = row["analyzed_races"]
+    rates = {
+        "tansho_rate": pct(row["tansho_hit"], races),
+        "fukusho_rate": pct(row["fukusho_hit"], races),
+        "umaren_rate": pct(row["umaren_hit"], races),
+        "sanrenpuku_rate": pct(row["sanrenpuku_hit"], races),
+        "top3_cover_rate": pct(row["top3_cover"], races),
+        "mrr": row["mrr_sum"] / races if races else None,
+        "tansho_roi": pct(row["tansho_return"], row["tansho_investment"]),
+        "fukusho_roi": pct(row["fukusho_return"], row["fukusho_investment"]),
+        "axis_fukusho_roi": pct(row["axis_fukusho_return"], row["axis_fukusho_investment"]),
+    }
+    rates["calibration"] = [
+        {
+            "bin": f"{i * 10}%",
+            "races": n,
+            "predicted_rate": i * 10 + 5,
+            "actual_rate": pct(hits, n),
+        }
+        for i, (n, hits) in enumerate(zip(row["calib_races"], row["calib_hits"], strict=True))
+        if n
+    ]
+    return rates
+
+
+# =============================================================================
+# Maintenance (result collector)
+# =============================================================================
+
+
+def _upsert(cur, table: str, row: dict) -> None:
+    """Insert or replace a summary row keyed by summary_date."""
+    columns = ["summary_date", *(["days"] if "days" in row else []), *SUMMARY_COLUMNS]
+    updates = ", ".join(f"{c} = EXCLUDED.{c}" for c in columns[1:])
+    cur.execute(
+        f"""
+        INSERT INTO {table} ({", ".join(columns)}) VALUES ({", ".join(["%s"] * len(columns))})
+        ON CONFLICT (summary_date) DO UPDATE SET {updates}, updated_at = CURRENT_TIMESTAMP
+        """,
+        [row[c] for c in columns],
+    )
+
+
+def _fetch_rows(cur, query: str, params: tuple = ()) -> list[dict]:
+    """Run a query and return rows as dictionaries."""
+    cur.execute(query, params)
+    names = [d[0] for d in cur.description]
+    return [dict(zip(names, r, strict=True)) for r in cur.fetchall()]
+
+
+def _write_summaries(cur, daily_rows: list[dict]) -> None:
+    """
+    Upsert daily rows and recompute the cumulative rows from the earliest of them.
+
+    Later dates are re-accumulated as well, so re-analyzing an old date keeps
+    every following running total consistent.
+    """
+    for row in daily_rows:
+        _upsert(cur, "dashboard_daily_summary", row)
+
+    start = min(row["summary_date"] for row in daily_rows)
+    columns = ", ".join(("summary_date", *SUMMARY_COLUMNS))
+    previous = _fetch_rows(
+        cur,
+        f"""
+        SELECT summary_date, days, {", ".join(SUMMARY_COLUMNS)}
+        FROM dashboard_cumulative_summary
+        WHERE summary_date < %s ORDER BY summary_date DESC LIMIT 1
+        """,
+        (start,),
+    )
+    following = _fetch_rows(
+        cur,
+        f"SELECT {columns} FROM dashboard_daily_summary WHERE summary_date >= %s "
+        "ORDER BY summary_date",
+        (start,),
+    )
+
+    cumulative = previous[0] if previous else None
+    for daily in following:
+        cumulative = accumulate(cumulative, daily)
+        _upsert(cur, "dashboard_cumulative_summary", cumulative)
+
+
+def update_dashboard_summary(analysis: dict) -> bool:
+    """
+    Update the dashboard rollups with a saved analysis.
+
+    Args:
+        analysis: collect_and_analyze() result
+
+    Returns:
+        True if successful, False otherwise
+    """
+    if analysis.get("status") != "success":
+        return False
+
+    acc = analysis.get("accuracy", {})
+    if "error" in acc or not acc.get("date"):
+        return False
+
+    db = get_db()
+    conn = db.get_connection()
+    if not conn:
+        logger.error("DB connection failed")
+        return False
+
+    try:
+        cur = conn.cursor()
+        _write_summaries(cur, [daily_summary(acc)])
+        conn.commit()
+        cur.close()
+        logger.info(f"Dashboard summary updated: {acc['date']}")
+        return True
+    except Exception as e:
+        logger.error(f"Error updating dashboard summary: {e}")
+        conn.rollback()
+        return False
+    finally:
+        conn.close()
+
+
+def rebuild_dashboard_summary() -> int:
+    """
+    Rebuild both summary tables from every row of analysis_results.
+
+    Returns:
+        Number of analysis dates summarized (-1 on failure)
+    """
+    db = get_db()
+    conn = db.get_connection()
+    if not conn:
+        logger.error("DB connection failed")
+        return -1
+
+    try:
+        cur = conn.cursor()
+        cur.execute(
+            """
+            SELECT analysis_date, total_races, analyzed_races,
+                   tansho_hit, fukusho_hit, umaren_hit, sanrenpuku_hit, top3_cover,
+                   mrr, detail_data
+            FROM analysis_results
+            ORDER BY analysis_date
+            """
+        )
+        daily_rows = []
+        for row in cur.fetchall():
+            detail = row[9] or {}
+            if isinstance(detail, str):
+                detail = json.loads(detail)
+            acc = {
+                "date": row[0],
+                "total_races": row[1],
+                "analyzed_races": row[2],
+                "raw_stats": dict(
+                    zip(
+                        ("tansho_hit", "fukusho_hit", "umaren_hit", "sanrenpuku_hit", "top3_cover"),
+                        row[3:8],
+                        strict=True,
+                    )
+                ),
+                "accuracy": {"mrr": row[8]},
+                "return_rates": detail.get("return_rates", {}),
+                "axis_stats": detail.get("axis_stats", {}),
+                "calibration": detail.get("calibration", {}),
+            }
+            daily_rows.append(daily_summary(acc))
+
+        cur.execute("TRUNCATE dashboard_daily_summary, dashboard_cumulative_summary")
+        if daily_rows:
+            _write_summaries(cur, daily_rows)
+        conn.commit()
+        cur.close()
+        logger.info(f"Dashboard summary rebuilt: {len(daily_rows)} dates")
+        return len(daily_rows)
+    except Exception as e:
+        logger.error(f"Error rebuilding dashboard summary: {e}")
+        conn.rollback()
+        return -1
+    finally:
+        conn.close()
+
+
+# =============================================================================
+# Read path (dashboard)
+# =============================================================================
+
+
+def get_daily_summaries(conn, since: date) -> list[dict]:
+    """
+    Daily summary rows from a date on, oldest first.
+
+    Args:
+        conn: psycopg2 connection
+        since: First date to include
+    """
+    cur = conn.cursor()
+    try:
+        columns = ", ".join(("summary_date", *SUMMARY_COLUMNS))
+        return _fetch_rows(
+            cur,
+            f"SELECT {columns} FROM dashboard_daily_summary WHERE summary_date >= %s "
+            "ORDER BY summary_date",
+            (since,),
+        )
+    finally:
+        cur.close()
+
+
+def get_cumulative_summary(conn, before: date | None = None) -> dict | None:
+    """
+    Latest cumulative row (all-time totals), or the latest one before a date.
+
+    Args:
+        conn: psycopg2 connection
+        before: Only consider rows strictly before this date
+
+    Returns:
+        Cumulative row with updated_at, or None if there is none
+    """
+    cur = conn.cursor()
+    try:
+        where = "WHERE summary_date < %s" if before else ""
+        rows = _fetch_rows(
+            cur,
+            f"""
+            SELECT summary_date, days, {", ".join(SUMMARY_COLUMNS)}, updated_at
+            FROM dashboard_cumulative_summary {where}
+            ORDER BY summary_date DESC LIMIT 1
+            """,
+            (before,) if before else (),
+        )
+        return rows[0] if rows else None
+    finally:
+        cur.close()
+
+
+def get_period_summary(conn, since: date) -> dict | None:
+    """
+    Totals of the analysis dates from a date on (two cumulative rows).
+
+    Args:
+        conn: psycopg2 connection
+        since: First date of the period
+
+    Returns:
+        Period row, or None if there is no analysis in the period
+    """
+    latest = get_cumulative_summary(conn)
+    if latest is None or latest["summary_date"] < since:
+        return None
+    return difference(latest, get_cumulative_summary(conn, before=since))
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Dashboard summary tables")
+    parser.add_argument(
+        "--rebuild", action="store_true", help="Rebuild from all analysis_results rows"
+    )
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+    if args.rebuild:
+        print(f"Summarized {rebuild_dashboard_summary()} analysis dates")
+    else:
+        parser.print_help()
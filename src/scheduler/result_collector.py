@@ -9,6 +9,7 @@ Collects race results and compares with predictions.
 import logging
 from datetime import date, datetime, timedelta
 
+from src.config import FEATURE_USE_FINALIZED_RUNS
 from src.scheduler.result.analyzer import (
     calculate_accuracy,
     compare_results,
@@ -21,6 +22,7 @@ from src.scheduler.result.db_operations import (
     get_race_results,
     get_recent_race_dates,
     load_predictions_from_db,
+    refresh_finalized_runs,
     save_analysis_to_db,
     update_accuracy_tracking,
 )
@@ -28,6 +30,7 @@ from src.scheduler.result.notifier import (
     send_discord_notification,
     send_weekend_notification,
 )
+from src.scheduler.result.summary import update_dashboard_summary
 
 logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
 logger = logging.getLogger(__name__)
@@ -76,6 +79,10 @@ class ResultCollector:
 
         logger.info(f"Retrieved results for {len(results)} races")
 
+        # Results are in: update the typed copy read by feature extraction
+        if FEATURE_USE_FINALIZED_RUNS:
+            refresh_finalized_runs(target_date)
+
         # Get payout data
         payouts = get_payouts(target_date)
 
@@ -91,8 +98,11 @@ class ResultCollector:
         return {"status": "success", "comparison": comparison, "accuracy": accuracy}
 
     def save_analysis_to_db(self, analysis: dict) -> bool:
-        """Save analysis results to DB."""
-        return save_analysis_to_db(analysis)
+        """Save analysis results to DB and update the dashboard summary tables."""
+        saved = save_analysis_to_db(analysis)
+        if saved:
+            update_dashboard_summary(analysis)
+        return saved
 
     def update_accuracy_tracking(self, stats: dict) -> bool:
         """Update cumulative accuracy tracking."""
@@ -716,7 +726,6 @@ def collect_weekend_results():
                             if adj != 1.0:
                                 direction = "↓suppress" if adj < 1.0 else "↑boost"
                                 print(f"  {fname}: {adj:.2f} ({direction})")
-                        shap_analyzer.save_adjustments_to_db(adjustments)
                 else:
                     print("No SHAP analysis data")
             else:
@@ -14,6 +14,7 @@ from src.scheduler.retrain.evaluator import (
 from src.scheduler.retrain.manager import (
     backup_current_model,
     deploy_new_model,
+    record_deployment,
 )
 from src.scheduler.retrain.notifier import (
     send_retrain_notification,
@@ -38,6 +39,7 @@ __all__ = [
     # Manager
     "backup_current_model",
     "deploy_new_model",
+    "record_deployment",
     # Notifier
     "send_retrain_notification",
 ]
@@ -15,6 +15,7 @@ import psycopg2.extras
 
 from src.db.connection import get_db
 from src.models.feature_extractor import FastFeatureExtractor
+from src.models.ranking_metrics import contiguous_order, group_offsets, winner_ranks
 from src.services.prediction.ensemble import ensemble_proba
 
 logger = logging.getLogger(__name__)
@@ -257,30 +258,27 @@ def evaluate_model(
         except Exception:
             eval_result["place_auc"] = 0.5
 
-    # Top-3 coverage (calculated per race)
-    df_eval = df.copy()
-    df_eval["pred_rank"] = reg_pred
-
-    if "race_code" in df_eval.columns:
-        top3_hits = 0
-        total_races = 0
-
-        for _race_code, race_df in df_eval.groupby("race_code"):
-            race_df_sorted = race_df.sort_values("pred_rank", ascending=sort_ascending)
-            top3_pred = race_df_sorted.head(3)["target"].values
-            if any(t == 1 for t in top3_pred):
-                top3_hits += 1
-            total_races += 1
-
-        eval_result["top3_coverage"] = float(top3_hits / total_races) if total_races > 0 else 0
+    # Top-3 coverage (calculated per race, races without a winner count as misses)
+    if "race_code" in df.columns:
+        race_codes = df["race_code"].to_numpy()
+        order = contiguous_order(race_codes)
+        ranks = winner_ranks(
+            df["target"].to_numpy()[order] == 1,
+            np.asarray(reg_pred)[order],
+            group_offsets(race_codes[order]),
+            descending=not sort_ascending,
+        )
+        eval_result["top3_coverage"] = (
+            float(((ranks > 0) & (ranks <= 3)).mean()) if len(ranks) > 0 else 0
+        )
 
     # Return simulation (top-1 per race)
-    returns = simulate_returns(df_eval, reg_pred, payouts, ascending=sort_ascending)
+    returns = simulate_returns(df, reg_pred, payouts, ascending=sort_ascending)
     eval_result.update(returns)
 
     # EV-based return simulation (matching production betting logic)
     if tansho_odds and win_prob is not None:
-        ev_returns = simulate_ev_returns(df_eval, win_prob, tansho_odds, payouts)
+        ev_returns = simulate_ev_returns(df, win_prob, tansho_odds, payouts)
         eval_result.update(ev_returns)
 
     # Log output
@@ -372,6 +370,35 @@ def get_payouts_for_year(conn, year: int) -> dict:
         return {}
 
 
+def _umaban_keys(values: pd.Series) -> pd.Series:
+    """Format horse numbers as payout/odds dictionary keys ("3", not "03")."""
+    return pd.to_numeric(values).astype(np.int64).astype(str)
+
+
+def _flatten_payouts(payouts: dict) -> tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    Flatten the payout dictionary into win and place frames.
+
+    Returns:
+        (tansho, fukusho) frames with columns race_code, umaban, payout.
+        Place rows keep the first entry per (race_code, umaban).
+    """
+    tansho_rows = []
+    fukusho_rows = []
+    for race_code, payout_data in payouts.items():
+        tansho_info = payout_data.get("tansho", {})
+        tansho_rows.append((race_code, tansho_info.get("umaban"), tansho_info.get("payout", 0)))
+        for fuku in payout_data.get("fukusho", []):
+            fukusho_rows.append((race_code, fuku.get("umaban"), fuku.get("payout", 0)))
+
+    columns = ["race_code", "umaban", "payout"]
+    tansho = pd.DataFrame(tansho_rows, columns=columns)
+    fukusho = pd.DataFrame(fukusho_rows, columns=columns).drop_duplicates(
+        ["race_code", "umaban"], keep="first"
+    )
+    return tansho, fukusho
+
+
 def simulate_returns(
     df: pd.DataFrame, predictions: np.ndarray, payouts: dict, ascending: bool = True
 ) -> dict:
@@ -387,44 +414,33 @@ def simulate_returns(
     Returns:
         Return statistics dictionary
     """
-    df_sim = df.copy()
-    df_sim["pred_rank"] = predictions
-
-    tansho_bet = 0
-    tansho_win = 0
-    fukusho_bet = 0
-    fukusho_win = 0
-
     # Check horse number column (umaban or horse_number)
-    umaban_col = "umaban" if "umaban" in df_sim.columns else "horse_number"
-    if "race_code" not in df_sim.columns or umaban_col not in df_sim.columns:
+    umaban_col = "umaban" if "umaban" in df.columns else "horse_number"
+    if "race_code" not in df.columns or umaban_col not in df.columns:
         logger.warning(
-            f"Missing columns for return calculation: race_code={('race_code' in df_sim.columns)}, {umaban_col}={(umaban_col in df_sim.columns)}"
+            f"Missing columns for return calculation: race_code={('race_code' in df.columns)}, {umaban_col}={(umaban_col in df.columns)}"
         )
         return {"tansho_return": 0, "fukusho_return": 0}
 
-    for race_code, race_df in df_sim.groupby("race_code"):
-        race_df_sorted = race_df.sort_values("pred_rank", ascending=ascending)
-        if len(race_df_sorted) == 0:
-            continue
-
-        top1 = race_df_sorted.iloc[0]
-        pred_umaban = str(int(top1[umaban_col]))
-
-        payout_data = payouts.get(race_code, {})
+    runners = pd.DataFrame(
+        {
+            "race_code": df["race_code"].to_numpy(),
+            "umaban": df[umaban_col].to_numpy(),
+            "pred_rank": np.asarray(predictions),
+        }
+    ).dropna(subset=["race_code"])
 
-        # Win bet
-        tansho_bet += 100
-        tansho_info = payout_data.get("tansho", {})
-        if tansho_info.get("umaban") == pred_umaban:
-            tansho_win += tansho_info.get("payout", 0)
+    # Top prediction per race (stable sort keeps the first row on ties)
+    top1 = runners.sort_values(
+        ["race_code", "pred_rank"], ascending=[True, ascending]
+    ).drop_duplicates("race_code")
+    top1 = top1.assign(umaban=_umaban_keys(top1["umaban"]))[["race_code", "umaban"]]
+    tansho, fukusho = _flatten_payouts(payouts)
 
-        # Place bet
-        fukusho_bet += 100
-        for fuku in payout_data.get("fukusho", []):
-            if fuku.get("umaban") == pred_umaban:
-                fukusho_win += fuku.get("payout", 0)
-                break
+    tansho_bet = 100 * len(top1)
+    tansho_win = int(top1.merge(tansho, on=["race_code", "umaban"])["payout"].sum())
+    fukusho_bet = 100 * len(top1)
+    fukusho_win = int(top1.merge(fukusho, on=["race_code", "umaban"])["payout"].sum())
 
     return {
         "tansho_return": float(tansho_win / tansho_bet) if tansho_bet > 0 else 0,
@@ -500,47 +516,43 @@ def simulate_ev_returns(
     Returns:
         EV-based return statistics
     """
-    df_sim = df.copy()
-    df_sim["win_prob"] = win_probs
-
-    umaban_col = "umaban" if "umaban" in df_sim.columns else "horse_number"
-    if "race_code" not in df_sim.columns or umaban_col not in df_sim.columns:
+    umaban_col = "umaban" if "umaban" in df.columns else "horse_number"
+    if "race_code" not in df.columns or umaban_col not in df.columns:
         return {"ev_tansho_return": 0, "ev_bet_count": 0, "ev_race_count": 0}
 
-    total_bet = 0
-    total_win = 0
-    bet_count = 0
-    races_with_bets = 0
-
-    for race_code, race_df in df_sim.groupby("race_code"):
-        race_odds = tansho_odds.get(race_code, {})
-        if not race_odds:
-            continue
-
-        payout_data = payouts.get(race_code, {})
-        tansho_info = payout_data.get("tansho", {})
-        winning_umaban = tansho_info.get("umaban")
-        winning_payout = tansho_info.get("payout", 0)
-
-        race_bet = False
-        for _, row in race_df.iterrows():
-            umaban = str(int(row[umaban_col]))
-            win_prob = row["win_prob"]
-            odds = race_odds.get(umaban, 0)
-
-            if odds <= 0 or win_prob <= 0:
-                continue
-
-            ev = win_prob * odds
-            if ev >= ev_threshold:
-                total_bet += 100
-                bet_count += 1
-                race_bet = True
-                if umaban == winning_umaban:
-                    total_win += winning_payout
-
-        if race_bet:
-            races_with_bets += 1
+    runners = pd.DataFrame(
+        {
+            "race_code": df["race_code"].to_numpy(),
+            "umaban": df[umaban_col].to_numpy(),
+            "win_prob": np.asarray(win_probs, dtype=np.float64),
+        }
+    ).dropna(subset=["race_code"])
+    runners["umaban"] = _umaban_keys(runners["umaban"])
+
+    odds = pd.DataFrame(
+        [
+            (race_code, umaban, value)
+            for race_code, race_odds in tansho_odds.items()
+            for umaban, value in race_odds.items()
+        ],
+        columns=["race_code", "umaban", "odds"],
+    )
+    runners = runners.merge(odds, on=["race_code", "umaban"], how="left")
+    runners["odds"] = runners["odds"].fillna(0)
+
+    bets = runners[
+        (runners["odds"] > 0)
+        & (runners["win_prob"] > 0)
+        & (runners["win_prob"] * runners["odds"] >= ev_threshold)
+    ]
+
+    tansho, _ = _flatten_payouts(payouts)
+    hits = bets.merge(tansho, on=["race_code", "umaban"])
+
+    bet_count = len(bets)
+    total_bet = 100 * bet_count
+    total_win = int(hits["payout"].sum())
+    races_with_bets = int(bets["race_code"].nunique())
 
     return {
         "ev_tansho_return": float(total_win / total_bet) if total_bet > 0 else 0,
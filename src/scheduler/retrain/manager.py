@@ -11,6 +11,8 @@ import subprocess
 from datetime import datetime
 from pathlib import Path
 
+from src.models.artifact_index import index_deployed_model
+
 logger = logging.getLogger(__name__)
 
 
@@ -58,6 +60,23 @@ def deploy_new_model(new_model_path: str, current_model_path: Path, backup_dir:
     shutil.move(new_model_path, current_model_path)
     logger.info(f"New model deployed: {current_model_path}")
 
+    record_deployment(current_model_path)
+
+
+def record_deployment(model_path: Path) -> None:
+    """
+    Add a deployed model to the artifact index.
+
+    Index failures are logged and never fail the deployment.
+
+    Args:
+        model_path: Path of the deployed model file
+    """
+    try:
+        index_deployed_model(model_path)
+    except Exception as e:
+        logger.warning(f"Artifact index update failed ({model_path.name}): {e}")
+
 
 def git_commit_and_push_model(
     model_path: Path,
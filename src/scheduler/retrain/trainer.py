@@ -19,6 +19,7 @@ from sklearn.linear_model import LogisticRegression
 from src.db.connection import get_db
 from src.models.calibration import EnsembleCalibrator
 from src.models.feature_extractor import FastFeatureExtractor
+from src.models.ranking_metrics import group_offsets, ndcg_at_k, top_k_hit_rate
 
 logger = logging.getLogger(__name__)
 
@@ -260,25 +261,12 @@ def train_new_model(
         # ===== Ranking group information =====
         race_codes_series = df["race_code"]
 
-        def _compute_group_sizes(race_codes: pd.Series) -> list[int]:
-            """Compute group sizes from consecutive race_code values."""
-            groups = []
-            current = None
-            count = 0
-            for rc in race_codes:
-                if rc != current:
-                    if current is not None:
-                        groups.append(count)
-                    current = rc
-                    count = 1
-                else:
-                    count += 1
-            if current is not None:
-                groups.append(count)
-            return groups
-
-        group_train = _compute_group_sizes(race_codes_series[:train_end])
-        group_calib = _compute_group_sizes(race_codes_series[train_end:calib_end])
+        # Group offsets of consecutive race_code values (rows of a race are contiguous)
+        offsets_train = group_offsets(race_codes_series[:train_end].to_numpy())
+        offsets_calib = group_offsets(race_codes_series[train_end:calib_end].to_numpy())
+        group_train = np.diff(offsets_train).tolist()
+        group_calib = np.diff(offsets_calib).tolist()
+        is_winner_val = y_win_val.to_numpy() == 1
 
         # Ranking target: higher = better (invert finishing position)
         max_rank = int(y.max())
@@ -289,7 +277,7 @@ def train_new_model(
         # ===== Hyperparameter optimization (Optuna) =====
         import optuna
         from catboost import Pool as CbPool
-        from sklearn.metrics import ndcg_score, roc_auc_score as _roc_auc
+        from sklearn.metrics import roc_auc_score as _roc_auc
 
         optuna.logging.set_verbosity(optuna.logging.WARNING)
 
@@ -346,21 +334,7 @@ def train_new_model(
                 # Top-3 coverage from ranking ensemble
                 _rp = (_xgb_r.predict(X_val) * 0.33 + _lgb_r.predict(X_val) * 0.34
                         + _cb_r.predict(X_val) * 0.33)
-                _val_df = df.iloc[train_end:calib_end].copy()
-                _val_df["_score"] = _rp
-                _t3_hits = 0
-                _t3_total = 0
-                for _, _g in _val_df.groupby("race_code"):
-                    if len(_g) < 3:
-                        continue
-                    _w = _g[_g["target"] == 1]
-                    if len(_w) == 0:
-                        continue
-                    _top3 = _g.sort_values("_score", ascending=False).head(3).index
-                    if _w.index[0] in _top3:
-                        _t3_hits += 1
-                    _t3_total += 1
-                top3_cov = _t3_hits / _t3_total if _t3_total > 0 else 0
+                top3_cov = top_k_hit_rate(is_winner_val, _rp, offsets_calib, k=3, min_size=3)
 
                 # Win classifier
                 _win_w = len(y_win_train[y_win_train == 0]) / max(len(y_win_train[y_win_train == 1]), 1)
@@ -497,15 +471,7 @@ def train_new_model(
         cb_pred = cb_reg.predict(X_val)
         ensemble_pred = xgb_pred * XGB_WEIGHT + lgb_pred * LGB_WEIGHT + cb_pred * CB_WEIGHT
 
-        ndcg_scores_list = []
-        start = 0
-        for gs in group_calib:
-            if gs >= 2:
-                yt = y_rank_val.values[start:start + gs].reshape(1, -1)
-                yp = ensemble_pred[start:start + gs].reshape(1, -1)
-                ndcg_scores_list.append(ndcg_score(yt, yp, k=3))
-            start += gs
-        ranking_ndcg = float(np.mean(ndcg_scores_list)) if ndcg_scores_list else 0.0
+        ranking_ndcg = ndcg_at_k(y_rank_val.to_numpy(), ensemble_pred, offsets_calib, k=3)
         logger.info(f"Ranking NDCG@3 (3-model ensemble): {ranking_ndcg:.4f}")
 
         # ===== 2. Win classification models =====
@@ -737,25 +703,13 @@ def train_new_model(
         # Top-3 coverage (test data)
         top3_coverage = 0.0
         if "race_code" in df.columns:
-            test_df = df.iloc[calib_end:].copy()
-            test_df["pred_score"] = ensemble_pred_test
-            test_df["win_prob"] = calibrated_win_test
-
-            top3_hits = 0
-            total_races = 0
-            for _race_code, group in test_df.groupby("race_code"):
-                if len(group) < 3:
-                    continue
-                winner = group[group["target"] == 1]
-                if len(winner) == 0:
-                    continue
-                sorted_group = group.sort_values("pred_score", ascending=False)
-                top3_horses = sorted_group.head(3).index.tolist()
-                if winner.index[0] in top3_horses:
-                    top3_hits += 1
-                total_races += 1
-
-            top3_coverage = top3_hits / total_races if total_races > 0 else 0
+            top3_coverage = top_k_hit_rate(
+                y_win_test.to_numpy() == 1,
+                ensemble_pred_test,
+                group_offsets(race_codes_series[calib_end:].to_numpy()),
+                k=3,
+                min_size=3,
+            )
         else:
             logger.warning("race_code column not found, skipping Top-3 coverage")
 
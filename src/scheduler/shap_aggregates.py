@@ -0,0 +1,419 @@
+"""
+SHAP Contribution Store and Feature Adjustment Aggregates
+
+Per-race SHAP contributions and the rolling feature adjustments derived from
+them (migration 006).
+
+shap_race_contributions keeps, for every analyzed race, the contribution
+vector (REAL[], aligned to the model's feature_names) of the axis horse and
+the EV-recommended horses, keyed by model version. A race is explained once
+per model; later analyses of the same window read the stored arrays.
+
+shap_feature_aggregates keeps one row per model version with exponentially
+decayed sums of the axis horse contributions, split by whether it placed.
+Each update folds in only the stored rows not folded yet (rows stored late for
+an earlier date are added with that date's decayed weight) and stores the
+resulting adjustment vector. RacePredictor applies it only when
+FEATURE_USE_SHAP_ADJUSTMENTS is enabled.
+
+Usage:
+    update_feature_adjustments(model_version, feature_names)    # after analyze_dates()
+    load_feature_adjustments(model_version)    # feature name -> coefficient
+"""
+
+import logging
+from datetime import date
+
+import numpy as np
+
+from src.db.connection import get_db
+
+logger = logging.getLogger(__name__)
+
+# =============================================================================
+# Adjustment Settings
+# =============================================================================
+
+# Half-life of a race day's weight in the decayed aggregates
+HALF_LIFE_DAYS = 28.0
+
+# Place/miss contribution difference below which a feature is left at 1.0
+ADJUSTMENT_THRESHOLD = 0.1
+
+# Coefficient = 1 + difference * scale, clipped to [min, max]
+ADJUSTMENT_SCALE = 0.5
+ADJUSTMENT_MIN = 0.5
+ADJUSTMENT_MAX = 1.5
+
+# Per-horse columns of shap_race_contributions (besides the keys and the array)
+HORSE_COLUMNS = (
+    "bamei",
+    "chakujun",
+    "is_axis",
+    "is_ev",
+    "win_prob",
+    "place_prob",
+    "win_ev",
+)
+
+
+def model_version(model_data: dict) -> str:
+    """
+    Key identifying a trained model.
+
+    The version string is shared by every retrain of the same architecture,
+    so the training timestamp is appended.
+    """
+    version = str(model_data.get("version") or "unknown")
+    trained_at = model_data.get("trained_at")
+    return f"{version}@{trained_at}" if trained_at else version
+
+
+# =============================================================================
+# Aggregates
+# =============================================================================
+
+
+def empty_aggregate(feature_names: list[str]) -> dict:
+    """Aggregate state with no races folded in."""
+    n = len(feature_names)
+    return {
+        "feature_names": list(feature_names),
+        "place_sum": np.zeros(n, dtype=np.float64),
+        "place_weight": 0.0,
+        "miss_sum": np.zeros(n, dtype=np.float64),
+        "miss_weight": 0.0,
+        "races": 0,
+        "last_race_date": None,
+    }
+
+
+def fold_day(
+    aggregate: dict,
+    race_date: date,
+    place: np.ndarray,
+    miss: np.ndarray,
+    half_life_days: float = HALF_LIFE_DAYS,
+) -> dict:
+    """
+    Add a race day's axis contributions to the decayed sums.
+
+    A day after last_race_date decays the aggregate to that day first; a day
+    on or before it (rows stored late) is added with its own decayed weight,
+    which gives the same sums as folding the days in date order.
+
+    Args:
+        aggregate: Current state (updated in place)
+        race_date: Race date being folded in
+        place: Contribution rows of axis horses that placed (n x features)
+        miss: Contribution rows of axis horses that missed (n x features)
+        half_life_days: Days after which a race's weight halves
+
+    Returns:
+        The aggregate
+    """
+    last = aggregate["last_race_date"]
+    weight = 1.0
+    if last is not None and race_date > last:
+        decay = 0.5 ** ((race_date - last).days / half_life_days)
+        aggregate["place_sum"] *= decay
+        aggregate["place_weight"] *= decay
+        aggregate["miss_sum"] *= decay
+        aggregate["miss_weight"] *= decay
+    elif last is not None:
+        weight = 0.5 ** ((last - race_date).days / half_life_days)
+
+    if len(place):
+        aggregate["place_sum"] += place.sum(axis=0) * weight
+        aggregate["place_weight"] += len(place) * weight
+    if len(miss):
+        aggregate["miss_sum"] += miss.sum(axis=0) * weight
+        aggregate["miss_weight"] += len(miss) * weight
+    aggregate["races"] += len(place) + len(miss)
+    if last is None or race_date > last:
+        aggregate["last_race_date"] = race_date
+    return aggregate
+
+
+def adjustment_vector(aggregate: dict) -> np.ndarray:
+    """
+    Adjustment coefficients aligned to the aggregate's feature_names.
+
+    A feature whose decayed mean contribution is higher when the axis horse
+    placed is boosted (> 1.0); one that is higher when it missed is
+    suppressed (< 1.0).
+    """
+    n = len(aggregate["feature_names"])
+    if not aggregate["place_weight"] or not aggregate["miss_weight"]:
+        return np.ones(n, dtype=np.float32)
+
+    diff = (
+        aggregate["place_sum"] / aggregate["place_weight"]
+        - aggregate["miss_sum"] / aggregate["miss_weight"]
+    )
+    adjustments = np.clip(1.0 + diff * ADJUSTMENT_SCALE, ADJUSTMENT_MIN, ADJUSTMENT_MAX)
+    adjustments[np.abs(diff) < ADJUSTMENT_THRESHOLD] = 1.0
+    return np.round(adjustments, 4).astype(np.float32)
+
+
+def align_adjustments(adjustments: dict[str, float], feature_names: list[str]) -> np.ndarray | None:
+    """
+    Adjustment coefficients as a float32 vector in a model's feature order.
+
+    Features without a coefficient get 1.0.
+
+    Returns:
+        The vector, or None if every coefficient is 1.0 (nothing to apply)
+    """
+    weights = np.fromiter(
+        (adjustments.get(name, 1.0) for name in feature_names),
+        dtype=np.float32,
+        count=len(feature_names),
+    )
+    return weights if np.any(weights != 1.0) else None
+
+
+# =============================================================================
+# Contribution store
+# =============================================================================
+
+
+def save_race_contributions(
+    conn, version: str, race_code: str, race_date: date, horses: list[dict]
+) -> None:
+    """
+    Store the analyzed horses of a race (replacing earlier rows for the model).
+
+    The rows start unfolded; the next update_feature_adjustments() adds them.
+
+    Args:
+        conn: psycopg2 connection (committed by the caller)
+        version: model_version() of the explained model
+        race_code: Race code
+        race_date: Race date
+        horses: Rows with umaban, HORSE_COLUMNS and contributions (array)
+    """
+    cur = conn.cursor()
+    try:
+        cur.execute(
+            "DELETE FROM shap_race_contributions WHERE model_version = %s AND race_code = %s",
+            (version, race_code),
+        )
+        columns = ("model_version", "race_code", "race_date", "umaban", *HORSE_COLUMNS)
+        for horse in horses:
+            cur.execute(
+                f"""
+                INSERT INTO shap_race_contributions ({", ".join(columns)}, contributions)
+                VALUES ({", ".join(["%s"] * (len(columns) + 1))})
+                """,
+                [
+                    version,
+                    race_code,
+                    race_date,
+                    horse["umaban"],
+                    *(horse.get(c) for c in HORSE_COLUMNS),
+                    [float(v) for v in horse["contributions"]],
+                ],
+            )
+    finally:
+        cur.close()
+
+
+def load_race_contributions(conn, version: str, race_codes: list[str]) -> dict[str, list[dict]]:
+    """
+    Stored horses of the given races for a model.
+
+    Returns:
+        race_code -> horse rows (contributions as float32 arrays); races that
+        were never analyzed with this model are absent
+    """
+    if not race_codes:
+        return {}
+
+    cur = conn.cursor()
+    try:
+        cur.execute(
+            f"""
+            SELECT race_code, umaban, {", ".join(HORSE_COLUMNS)}, contributions
+            FROM shap_race_contributions
+            WHERE model_version = %s AND race_code = ANY(%s)
+            ORDER BY race_code, umaban
+            """,
+            (version, list(race_codes)),
+        )
+        races: dict[str, list[dict]] = {}
+        for row in cur.fetchall():
+            horse = dict(zip(("umaban", *HORSE_COLUMNS), row[1:-1], strict=True))
+            horse["contributions"] = np.asarray(row[-1], dtype=np.float32)
+            races.setdefault(row[0], []).append(horse)
+        return races
+    finally:
+        cur.close()
+
+
+def _take_unfolded_axis_rows(conn, version: str) -> list[tuple]:
+    """
+    Mark the model's unfolded axis rows as folded and return them.
+
+    Runs in the caller's transaction, so a failed update leaves them unfolded.
+
+    Returns:
+        (race_date, placed, contributions) rows, oldest first
+    """
+    cur = conn.cursor()
+    try:
+        cur.execute(
+            """
+            UPDATE shap_race_contributions SET folded = TRUE
+            WHERE model_version = %s AND is_axis AND NOT folded
+            RETURNING race_date, chakujun <= 3, contributions
+            """,
+            (version,),
+        )
+        return sorted(cur.fetchall(), key=lambda row: row[0])
+    finally:
+        cur.close()
+
+
+# =============================================================================
+# Aggregate store
+# =============================================================================
+
+
+def _load_aggregate(cur, version: str) -> dict | None:
+    cur.execute(
+        """
+        SELECT feature_names, place_sum, place_weight, miss_sum, miss_weight,
+               races, last_race_date
+        FROM shap_feature_aggregates
+        WHERE model_version = %s
+        FOR UPDATE
+        """,
+        (version,),
+    )
+    row = cur.fetchone()
+    if row is None:
+        return None
+    return {
+        "feature_names": list(row[0]),
+        "place_sum": np.asarray(row[1], dtype=np.float64),
+        "place_weight": float(row[2]),
+        "miss_sum": np.asarray(row[3], dtype=np.float64),
+        "miss_weight": float(row[4]),
+        "races": int(row[5]),
+        "last_race_date": row[6],
+    }
+
+
+def _save_aggregate(cur, version: str, aggregate: dict, adjustments: np.ndarray) -> None:
+    cur.execute(
+        """
+        INSERT INTO shap_feature_aggregates (
+            model_version, feature_names, place_sum, place_weight, miss_sum, miss_weight,
+            races, last_race_date, adjustments
+        ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
+        ON CONFLICT (model_version) DO UPDATE SET
+            place_sum = EXCLUDED.place_sum,
+            place_weight = EXCLUDED.place_weight,
+            miss_sum = EXCLUDED.miss_sum,
+            miss_weight = EXCLUDED.miss_weight,
+            races = EXCLUDED.races,
+            last_race_date = EXCLUDED.last_race_date,
+            adjustments = EXCLUDED.adjustments,
+            updated_at = CURRENT_TIMESTAMP
+        """,
+        (
+            version,
+            aggregate["feature_names"],
+            aggregate["place_sum"].tolist(),
+            aggregate["place_weight"],
+            aggregate["miss_sum"].tolist(),
+            aggregate["miss_weight"],
+            aggregate["races"],
+            aggregate["last_race_date"],
+            adjustments.tolist(),
+        ),
+    )
+
+
+def update_feature_adjustments(version: str, feature_names: list[str]) -> dict[str, float] | None:
+    """
+    Fold the model's newly stored axis rows into its aggregates.
+
+    Args:
+        version: model_version() of the explained model
+        feature_names: Feature order of the stored contribution arrays
+
+    Returns:
+        Feature name -> adjustment coefficient, or None on failure
+    """
+    db = get_db()
+    conn = db.get_connection()
+    if not conn:
+        logger.error("DB connection failed")
+        return None
+
+    try:
+        cur = conn.cursor()
+        aggregate = _load_aggregate(cur, version) or empty_aggregate(feature_names)
+
+        rows = _take_unfolded_axis_rows(conn, version)
+        n_features = len(aggregate["feature_names"])
+        days: dict[date, tuple[list, list]] = {}
+        for race_date, placed, contributions in rows:
+            if len(contributions) != n_features:
+                continue
+            days.setdefault(race_date, ([], []))[0 if placed else 1].append(contributions)
+        for race_date, (place, miss) in days.items():
+            fold_day(
+                aggregate,
+                race_date,
+                np.asarray(place, dtype=np.float64).reshape(-1, n_features),
+                np.asarray(miss, dtype=np.float64).reshape(-1, n_features),
+            )
+
+        adjustments = adjustment_vector(aggregate)
+        _save_aggregate(cur, version, aggregate, adjustments)
+        conn.commit()
+        cur.close()
+        logger.info(
+            f"Feature adjustments updated: {len(rows)} new races on {len(days)} dates, "
+            f"{aggregate['races']} races ({version})"
+        )
+        return dict(zip(aggregate["feature_names"], adjustments.tolist(), strict=True))
+    except Exception as e:
+        logger.error(f"Feature adjustment update error: {e}")
+        conn.rollback()
+        return None
+    finally:
+        conn.close()
+
+
+def load_feature_adjustments(version: str) -> dict[str, float]:
+    """
+    Precomputed adjustment coefficients of a model.
+
+    Returns:
+        Feature name -> coefficient (empty if the model has no aggregates yet)
+    """
+    db = get_db()
+    conn = db.get_connection()
+    if not conn:
+        return {}
+
+    try:
+        cur = conn.cursor()
+        cur.execute(
+            """
+            SELECT feature_names, adjustments FROM shap_feature_aggregates
+            WHERE model_version = %s
+            """,
+            (version,),
+        )
+        row = cur.fetchone()
+        cur.close()
+        if not row:
+            return {}
+        return dict(zip(row[0], (float(v) for v in row[1]), strict=True))
+    finally:
+        conn.close()
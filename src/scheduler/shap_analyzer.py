@@ -25,6 +25,12 @@ except ImportError:
 
 from src.db.connection import get_db
 from src.models.feature_extractor import FastFeatureExtractor
+from src.scheduler.shap_aggregates import (
+    load_race_contributions,
+    model_version,
+    save_race_contributions,
+    update_feature_adjustments,
+)
 
 logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
 logger = logging.getLogger(__name__)
@@ -38,6 +44,7 @@ class ShapAnalyzer:
         self.xgb_model: Any = None
         self.lgb_model: Any = None
         self.feature_names: list[str] = []
+        self.model_version = ""
         self.explainer: Any = None
         self._load_model()
 
@@ -59,7 +66,8 @@ class ShapAnalyzer:
                 self.lgb_model = models_dict.get("lightgbm")
 
             self.feature_names = model_data.get("feature_names", [])
-            logger.info(f"Model loaded: {len(self.feature_names)} features")
+            self.model_version = model_version(model_data)
+            logger.info(f"Model loaded: {len(self.feature_names)} features ({self.model_version})")
 
             # Initialize SHAP Explainer (using XGBoost)
             if SHAP_AVAILABLE and self.xgb_model is not None:
@@ -314,34 +322,35 @@ class ShapAnalyzer:
             logger.error(f"SHAP value calculation error: {e}")
             return None
 
-    def analyze_race(self, race_code: str, prediction: dict) -> dict | None:
-        """Analyze a single race (EV recommendation and axis horse format)."""
-        # Extract features
-        df = self.extract_features_for_race(race_code)
-        if df is None or df.empty:
-            return None
+    def _explain_race(self, race_code: str, prediction: dict) -> list[dict] | None:
+        """
+        SHAP contributions of a race's axis horse and EV recommended horses.
 
+        Returns:
+            Horse rows (umaban, bamei, chakujun, flags, probabilities and the
+            contribution array aligned to feature_names), or None
+        """
         # Get horses from prediction result
         ranked_horses = prediction.get("prediction_result", {}).get("ranked_horses", [])
         if not ranked_horses:
             return None
 
+        # Extract features
+        df = self.extract_features_for_race(race_code)
+        if df is None or df.empty:
+            return None
+
         # Identify EV recommended horses (EV >= 1.5)
-        ev_recommended = []
+        ev_recommended = {}
         for h in ranked_horses:
             win_prob = h.get("win_probability", 0)
             odds = h.get("predicted_odds", 0)
-            if odds > 0 and win_prob > 0:
-                win_ev = win_prob * odds
-                if win_ev >= 1.5:
-                    ev_recommended.append(h)
+            if odds > 0 and win_prob > 0 and win_prob * odds >= 1.5:
+                ev_recommended[str(h.get("horse_number", "")).zfill(2)] = h
 
         # Identify axis horse (highest place probability)
-        axis_horse = (
-            max(ranked_horses, key=lambda h: h.get("place_probability", 0))
-            if ranked_horses
-            else None
-        )
+        axis_horse = max(ranked_horses, key=lambda h: h.get("place_probability", 0))
+        axis_umaban = str(axis_horse.get("horse_number", "")).zfill(2)
 
         # Extract features only
         X = df[self.feature_names].fillna(0)
@@ -351,72 +360,127 @@ class ShapAnalyzer:
         if shap_values is None:
             return None
 
-        # Axis horse analysis
-        axis_umaban = str(axis_horse.get("horse_number", "")).zfill(2) if axis_horse else None
-        axis_analysis = None
-        if axis_umaban and axis_horse:
-            horse_row = df[df["umaban"].astype(str).str.zfill(2) == axis_umaban]
-            if not horse_row.empty:
-                actual_chakujun = int(horse_row["actual_chakujun"].iloc[0])
-                horse_idx = horse_row.index[0]
-                horse_shap = shap_values[horse_idx]
-                axis_contributions = {
-                    fname: float(horse_shap[i]) for i, fname in enumerate(self.feature_names)
+        umabans = df["umaban"].astype(str).str.zfill(2)
+        horses = []
+        for umaban in sorted({axis_umaban, *ev_recommended}):
+            positions = np.flatnonzero(umabans.to_numpy() == umaban)
+            if not len(positions):
+                continue
+            pos = positions[0]
+            h = ev_recommended.get(umaban, axis_horse)
+            win_prob = h.get("win_probability", 0)
+            horses.append(
+                {
+                    "umaban": umaban,
+                    "bamei": h.get("horse_name", ""),
+                    "chakujun": int(df["actual_chakujun"].iloc[pos]),
+                    "is_axis": umaban == axis_umaban,
+                    "is_ev": umaban in ev_recommended,
+                    "win_prob": win_prob,
+                    "place_prob": h.get("place_probability", 0),
+                    "win_ev": win_prob * h.get("predicted_odds", 0),
+                    "contributions": np.asarray(shap_values[pos], dtype=np.float32),
                 }
+            )
+        return horses
+
+    @staticmethod
+    def _race_analysis(race_code: str, horses: list[dict]) -> dict:
+        """Analysis of a race from its explained horses."""
+        axis_analysis = None
+        for h in horses:
+            if h["is_axis"]:
                 axis_analysis = {
-                    "umaban": axis_umaban,
-                    "bamei": axis_horse.get("horse_name", ""),
-                    "actual_chakujun": actual_chakujun,
-                    "is_place": actual_chakujun <= 3,
-                    "place_prob": axis_horse.get("place_probability", 0),
-                    "feature_contributions": axis_contributions,
+                    "umaban": h["umaban"],
+                    "bamei": h["bamei"],
+                    "actual_chakujun": h["chakujun"],
+                    "is_place": h["chakujun"] <= 3,
+                    "place_prob": h["place_prob"],
+                    "contributions": h["contributions"],
                 }
 
-        # EV recommended horses analysis
-        ev_analyses = []
-        for h in ev_recommended:
-            h_umaban = str(h.get("horse_number", "")).zfill(2)
-            horse_row = df[df["umaban"].astype(str).str.zfill(2) == h_umaban]
-            if not horse_row.empty:
-                actual_chakujun = int(horse_row["actual_chakujun"].iloc[0])
-                horse_idx = horse_row.index[0]
-                horse_shap = shap_values[horse_idx]
-                ev_contributions = {
-                    fname: float(horse_shap[i]) for i, fname in enumerate(self.feature_names)
-                }
-                win_prob = h.get("win_probability", 0)
-                odds = h.get("predicted_odds", 0)
-                ev_analyses.append(
-                    {
-                        "umaban": h_umaban,
-                        "bamei": h.get("horse_name", ""),
-                        "actual_chakujun": actual_chakujun,
-                        "is_hit": actual_chakujun == 1,
-                        "is_place": actual_chakujun <= 3,
-                        "win_ev": win_prob * odds,
-                        "win_prob": win_prob,
-                        "feature_contributions": ev_contributions,
-                    }
-                )
+        ev_analyses = [
+            {
+                "umaban": h["umaban"],
+                "bamei": h["bamei"],
+                "actual_chakujun": h["chakujun"],
+                "is_hit": h["chakujun"] == 1,
+                "is_place": h["chakujun"] <= 3,
+                "win_ev": h["win_ev"],
+                "win_prob": h["win_prob"],
+                "contributions": h["contributions"],
+            }
+            for h in horses
+            if h["is_ev"]
+        ]
 
         return {
             "race_code": race_code,
             "axis_analysis": axis_analysis,
             "ev_analyses": ev_analyses,
-            "has_ev_rec": len(ev_recommended) > 0,
+            "has_ev_rec": len(ev_analyses) > 0,
         }
 
+    def analyze_race(self, race_code: str, prediction: dict) -> dict | None:
+        """Analyze a single race (EV recommendation and axis horse format)."""
+        horses = self._explain_race(race_code, prediction)
+        if horses is None:
+            return None
+        return self._race_analysis(race_code, horses)
+
+    def _get_race_contributions(self, target_date: date, predictions: list[dict]) -> dict:
+        """
+        Explained horses of a date's races, computing only races not yet stored.
+
+        Newly explained races are saved to shap_race_contributions under the
+        model version, so re-analyzing a window only explains new races.
+        """
+        race_codes = [p["race_code"] for p in predictions]
+        db = get_db()
+        conn = db.get_connection()
+        if not conn:
+            return {p["race_code"]: self._explain_race(p["race_code"], p) for p in predictions}
+
+        try:
+            stored = load_race_contributions(conn, self.model_version, race_codes)
+            computed = 0
+            for pred in predictions:
+                race_code = pred["race_code"]
+                if race_code in stored:
+                    continue
+                horses = self._explain_race(race_code, pred)
+                if horses:
+                    save_race_contributions(
+                        conn, self.model_version, race_code, target_date, horses
+                    )
+                    stored[race_code] = horses
+                    computed += 1
+            conn.commit()
+            logger.info(
+                f"SHAP contributions ({target_date}): {computed} computed, "
+                f"{len(stored) - computed} stored"
+            )
+            return stored
+        except Exception as e:
+            logger.error(f"SHAP contribution store error: {e}")
+            conn.rollback()
+            return {p["race_code"]: self._explain_race(p["race_code"], p) for p in predictions}
+        finally:
+            conn.close()
+
     def analyze_dates(self, target_dates: list[date]) -> dict:
         """Analyze races across multiple dates (EV recommendation and axis horse format)."""
         all_analyses = []
 
         for target_date in target_dates:
             predictions = self.get_predictions_from_db(target_date)
+            race_horses = self._get_race_contributions(target_date, predictions)
 
             for pred in predictions:
                 race_code = pred["race_code"]
-                analysis = self.analyze_race(race_code, pred)
-                if analysis:
+                horses = race_horses.get(race_code)
+                if horses:
+                    analysis = self._race_analysis(race_code, horses)
                     analysis["date"] = str(target_date)
                     all_analyses.append(analysis)
 
@@ -442,46 +506,23 @@ class ShapAnalyzer:
         for a in all_analyses:
             for ev in a.get("ev_analyses", []):
                 if ev.get("is_hit"):
-                    ev_hits.append({"feature_contributions": ev["feature_contributions"]})
+                    ev_hits.append(ev["contributions"])
                 elif not ev.get("is_place"):
-                    ev_misses.append({"feature_contributions": ev["feature_contributions"]})
+                    ev_misses.append(ev["contributions"])
 
-        # Aggregate axis horse feature contributions
-        axis_place_contributions = self._aggregate_contributions(
-            [
-                {"feature_contributions": a["axis_analysis"]["feature_contributions"]}
-                for a in axis_places
-            ]
+        # Mean contribution vectors (None when a group is empty)
+        axis_place_mean = self._mean_contributions(
+            [a["axis_analysis"]["contributions"] for a in axis_places]
         )
-        axis_miss_contributions = self._aggregate_contributions(
-            [
-                {"feature_contributions": a["axis_analysis"]["feature_contributions"]}
-                for a in axis_misses
-            ]
+        axis_miss_mean = self._mean_contributions(
+            [a["axis_analysis"]["contributions"] for a in axis_misses]
         )
+        ev_hit_mean = self._mean_contributions(ev_hits)
+        ev_miss_mean = self._mean_contributions(ev_misses)
 
-        # Aggregate EV recommended horse feature contributions
-        ev_hit_contributions = self._aggregate_contributions(ev_hits)
-        ev_miss_contributions = self._aggregate_contributions(ev_misses)
-
-        # Calculate difference (hit - miss)
-        axis_diff = {}
-        all_features = set(axis_place_contributions.keys()) | set(axis_miss_contributions.keys())
-        for fname in all_features:
-            place_val = axis_place_contributions.get(fname, 0)
-            miss_val = axis_miss_contributions.get(fname, 0)
-            axis_diff[fname] = place_val - miss_val
-
-        ev_diff = {}
-        all_features = set(ev_hit_contributions.keys()) | set(ev_miss_contributions.keys())
-        for fname in all_features:
-            hit_val = ev_hit_contributions.get(fname, 0)
-            miss_val = ev_miss_contributions.get(fname, 0)
-            ev_diff[fname] = hit_val - miss_val
-
-        # Sort by importance
-        sorted_axis_diff = sorted(axis_diff.items(), key=lambda x: abs(x[1]), reverse=True)
-        sorted_ev_diff = sorted(ev_diff.items(), key=lambda x: abs(x[1]), reverse=True)
+        # Calculate difference (hit - miss), sorted by importance
+        axis_diff = self._top_differences(axis_place_mean, axis_miss_mean)
+        ev_diff = self._top_differences(ev_hit_mean, ev_miss_mean)
 
         # Aggregate EV recommended horse performance
         total_ev_count = sum(len(a.get("ev_analyses", [])) for a in all_analyses)
@@ -500,18 +541,18 @@ class ShapAnalyzer:
             "axis_place_count": len(axis_places),
             "axis_miss_count": len(axis_misses),
             "axis_place_rate": len(axis_places) / len(all_analyses) * 100 if all_analyses else 0,
-            "axis_place_contributions": axis_place_contributions,
-            "axis_miss_contributions": axis_miss_contributions,
-            "axis_diff_contributions": dict(sorted_axis_diff[:20]),
+            "axis_place_contributions": self._contribution_dict(axis_place_mean),
+            "axis_miss_contributions": self._contribution_dict(axis_miss_mean),
+            "axis_diff_contributions": axis_diff,
             # EV recommendation performance
             "ev_rec_count": total_ev_count,
             "ev_tansho_hits": ev_tansho_hits,
             "ev_fukusho_hits": ev_fukusho_hits,
             "ev_tansho_rate": ev_tansho_hits / total_ev_count * 100 if total_ev_count > 0 else 0,
             "ev_fukusho_rate": ev_fukusho_hits / total_ev_count * 100 if total_ev_count > 0 else 0,
-            "ev_hit_contributions": ev_hit_contributions,
-            "ev_miss_contributions": ev_miss_contributions,
-            "ev_diff_contributions": dict(sorted_ev_diff[:20]),
+            "ev_hit_contributions": self._contribution_dict(ev_hit_mean),
+            "ev_miss_contributions": self._contribution_dict(ev_miss_mean),
+            "ev_diff_contributions": ev_diff,
             "analyses": all_analyses,
         }
 
@@ -519,15 +560,15 @@ class ShapAnalyzer:
         """Analyze weekend races (wrapper for backward compatibility)."""
         return self.analyze_dates([saturday, sunday])
 
-    def calculate_feature_adjustments(
-        self, analysis: dict, threshold: float = 0.1
-    ) -> dict[str, float]:
+    def calculate_feature_adjustments(self, analysis: dict) -> dict[str, float]:
         """
-        SHAP分析結果から特徴量調整係数を計算
+        SHAP分析結果で特徴量調整係数を更新
+
+        analyze_dates() が保存した軸馬の寄与度のうち未加算の行だけを指数減衰集計
+        (shap_feature_aggregates) に加算し、調整係数を再計算する。
 
         Args:
             analysis: analyze_dates()の結果
-            threshold: 調整対象とする差分の閾値
 
         Returns:
             特徴量名 → 調整係数（1.0が基準、<1.0は抑制、>1.0は強化）
@@ -535,30 +576,7 @@ class ShapAnalyzer:
         if analysis.get("status") != "success":
             return {}
 
-        diff = analysis.get("diff_contributions", {})
-        analysis.get("hit_contributions", {})
-        analysis.get("miss_contributions", {})
-
-        adjustments = {}
-
-        for fname in self.feature_names:
-            diff_val = diff.get(fname, 0)
-
-            # Only adjust if difference exceeds threshold
-            if abs(diff_val) < threshold:
-                adjustments[fname] = 1.0
-                continue
-
-            # High when miss (diff < 0) -> suppress (coefficient < 1.0)
-            # High when hit (diff > 0) -> boost (coefficient > 1.0)
-            # Scale: diff_val * 0.5 for max +/-50% adjustment
-            adjustment = 1.0 + (diff_val * 0.5)
-
-            # Limit to range 0.5-1.5
-            adjustment = max(0.5, min(1.5, adjustment))
-            adjustments[fname] = round(adjustment, 4)
-
-        return adjustments
+        return update_feature_adjustments(self.model_version, self.feature_names) or {}
 
     def save_adjustments_to_db(
         self, adjustments: dict[str, float], analysis_date: date | None = None
@@ -653,20 +671,29 @@ class ShapAnalyzer:
             if conn:
                 conn.close()
 
-    def _aggregate_contributions(self, analyses: list[dict]) -> dict[str, float]:
-        """Aggregate feature contributions."""
-        if not analyses:
-            return {}
+    @staticmethod
+    def _mean_contributions(vectors: list[np.ndarray]) -> np.ndarray | None:
+        """Mean of contribution vectors (None if there are none)."""
+        if not vectors:
+            return None
+        return np.vstack(vectors).mean(axis=0, dtype=np.float64)
 
-        aggregated: dict[str, list[float]] = {}
-        for analysis in analyses:
-            for fname, value in analysis.get("feature_contributions", {}).items():
-                if fname not in aggregated:
-                    aggregated[fname] = []
-                aggregated[fname].append(value)
+    def _contribution_dict(self, vector: np.ndarray | None) -> dict[str, float]:
+        """Feature name -> contribution (empty for None)."""
+        if vector is None:
+            return {}
+        return dict(zip(self.feature_names, vector.tolist(), strict=True))
 
-        # Calculate mean
-        return {fname: float(np.mean(values)) for fname, values in aggregated.items()}
+    def _top_differences(
+        self, hit: np.ndarray | None, miss: np.ndarray | None, top: int = 20
+    ) -> dict[str, float]:
+        """Largest hit - miss differences by absolute value (a missing side counts as 0)."""
+        if hit is None and miss is None:
+            return {}
+        zeros = np.zeros(len(self.feature_names))
+        diff = (zeros if hit is None else hit) - (zeros if miss is None else miss)
+        order = np.argsort(-np.abs(diff), kind="stable")[:top]
+        return {self.feature_names[i]: float(diff[i]) for i in order}
 
     def generate_report(self, analysis: dict) -> str:
         """Generate analysis report (EV recommendation and axis horse format)."""
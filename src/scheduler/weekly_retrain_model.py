@@ -14,8 +14,13 @@ import shutil
 from datetime import date, datetime
 from pathlib import Path
 
+from src.models.artifact_index import index_retrain_result
 from src.scheduler.retrain.evaluator import compare_models
-from src.scheduler.retrain.manager import deploy_new_model, git_commit_and_push_model
+from src.scheduler.retrain.manager import (
+    deploy_new_model,
+    git_commit_and_push_model,
+    record_deployment,
+)
 from src.scheduler.retrain.notifier import send_retrain_notification
 from src.scheduler.retrain.trainer import train_new_model
 
@@ -106,6 +111,7 @@ class WeeklyRetrain:
             import shutil
 
             shutil.move(new_model_path, self.current_model_path)
+            record_deployment(self.current_model_path)
             result["deployed"] = True
             result["comparison"] = {"note": "initial_deployment"}
             logger.info("Initial deployment complete")
@@ -140,6 +146,11 @@ class WeeklyRetrain:
         with open(result_path, "w", encoding="utf-8") as f:
             json.dump(result, f, ensure_ascii=False, indent=2)
 
+        try:
+            index_retrain_result(result, self.model_dir, source=result_path.name)
+        except Exception as e:
+            logger.warning(f"Artifact index update failed: {e}")
+
         return result
 
 
@@ -191,6 +202,7 @@ class WeeklyRetrain:
             else:
                 # Initial deployment
                 shutil.move(new_path, surface_latest)
+                record_deployment(surface_latest)
                 surface_result["deployed"] = True
                 surface_result["comparison"] = {"note": "initial_deployment"}
                 logger.info(f"Initial {surface} model deployment")
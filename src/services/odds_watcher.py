@@ -0,0 +1,473 @@
+"""
+Real-time Odds Watcher
+
+Maintains an in-memory snapshot of the latest win/place odds for the day's
+races. The time-series odds tables are polled incrementally, optionally woken
+early by PostgreSQL LISTEN/NOTIFY.
+
+Each race keeps its own watermark (latest happyo_tsukihi_jifun seen and the
+number of rows at that time). Polls read rows at or after the watermark, so
+rows ingested late for one race and an announcement whose rows arrive across
+two polls are not skipped; an announcement with no new rows is not reported
+as a change.
+
+EVRecommender reads the snapshot through get_latest_odds(), so API and
+Discord EV calculations issue no odds queries while the watcher is running.
+Registered final predictions have their EV recomputed on the watcher thread,
+only for races whose odds changed (and newly registered races), and
+get_latest_ev() returns the result without any computation.
+
+Usage:
+    from src.services.odds_watcher import start_odds_watcher, stop_odds_watcher
+
+    watcher = start_odds_watcher()
+    watcher.register_prediction(race_code, ranked_horses, prediction_id)
+    watcher.add_listener(lambda race_code, ev: ...)  # Called from the watcher thread
+    ...
+    stop_odds_watcher()
+"""
+
+import logging
+import select
+import threading
+import time
+from collections.abc import Callable
+from dataclasses import dataclass, field
+from datetime import date, datetime
+from typing import Any
+
+from src.config import (
+    ODDS_WATCHER_NOTIFY_CHANNEL,
+    ODDS_WATCHER_POLL_SECONDS,
+)
+from src.db.connection import get_db
+from src.models.ev_recommender import JST, EVRecommender, format_odds_time
+
+logger = logging.getLogger(__name__)
+
+# Snapshots are treated as stale when no poll succeeded for this many intervals
+STALE_POLL_INTERVALS = 4
+
+OddsRows = dict[str, tuple[str | None, dict[str, float]]]
+
+EVListener = Callable[[str, dict[str, Any]], None]
+
+
+@dataclass
+class OddsSnapshot:
+    """Latest win/place odds of a race."""
+
+    race_code: str
+    tansho: dict[str, float] = field(default_factory=dict)  # "1" -> 3.5
+    fukusho: dict[str, float] = field(default_factory=dict)  # "1" -> 1.4 (minimum)
+    announced_at: str | None = None  # happyo_tsukihi_jifun (MMDDHHMM)
+    updated_at: float = 0.0  # time.monotonic() of the last change
+
+    @property
+    def odds_time(self) -> str | None:
+        """Announcement time as "YYYY-MM-DD HH:MM"."""
+        return format_odds_time(self.announced_at)
+
+
+def _parse_odds(value: Any) -> float:
+    """Parse a raw odds value (10x) into decimal odds, 0 if invalid."""
+    try:
+        return float(value) / 10
+    except (ValueError, TypeError):
+        return 0.0
+
+
+class OddsWatcher:
+    """Incremental odds poller with an in-memory latest-odds snapshot."""
+
+    def __init__(
+        self,
+        poll_seconds: float = ODDS_WATCHER_POLL_SECONDS,
+        notify_channel: str | None = ODDS_WATCHER_NOTIFY_CHANNEL,
+    ):
+        """
+        Args:
+            poll_seconds: Poll interval (upper bound on update latency)
+            notify_channel: LISTEN channel that triggers an immediate poll (None to disable)
+        """
+        self.poll_seconds = poll_seconds
+        self.notify_channel = notify_channel
+
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._thread: threading.Thread | None = None
+
+        self._target_date: date | None = None
+        self._last_poll = 0.0
+        self._snapshots: dict[str, OddsSnapshot] = {}
+        # table -> race_code -> (latest happyo_tsukihi_jifun, rows at that time)
+        self._watermarks: dict[str, dict[str, tuple[str, int]]] = {}
+        self._has_fukusho_jikeiretsu: bool | None = None
+        # race_code -> (prediction_id, ranked_horses) of the latest registered prediction
+        self._predictions: dict[str, tuple[str | None, list[dict]]] = {}
+        self._ev_results: dict[str, dict[str, Any]] = {}
+        self._pending_ev: set[str] = set()
+        self._listeners: list[EVListener] = []
+        self._recommender: EVRecommender | None = None
+
+    # ------------------------------------------------------------------
+    # Lifecycle
+    # ------------------------------------------------------------------
+
+    def start(self) -> None:
+        """Start the background polling thread."""
+        if self.is_running:
+            logger.warning("Odds watcher already running")
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name="odds-watcher", daemon=True)
+        self._thread.start()
+        logger.info(f"Odds watcher started: poll={self.poll_seconds}s")
+
+    def stop(self) -> None:
+        """Stop the background polling thread."""
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.poll_seconds + 5)
+            self._thread = None
+        logger.info("Odds watcher stopped")
+
+    @property
+    def is_running(self) -> bool:
+        """Whether the polling thread is alive."""
+        return self._thread is not None and self._thread.is_alive()
+
+    # ------------------------------------------------------------------
+    # Hot-path reads (no DB access)
+    # ------------------------------------------------------------------
+
+    def get_snapshot(self, race_code: str) -> OddsSnapshot | None:
+        """
+        Get the latest odds snapshot of a race.
+
+        Returns None if the race is unknown or polling has stalled (e.g. DB
+        outage), so callers fall back to querying the database.
+        """
+        if not self.is_running:
+            return None
+        if time.monotonic() - self._last_poll > self.poll_seconds * STALE_POLL_INTERVALS:
+            return None
+        with self._lock:
+            return self._snapshots.get(race_code)
+
+    def get_ev(self, race_code: str, prediction_id: str | None = None) -> dict[str, Any] | None:
+        """
+        Get the latest EV recommendations of a registered race.
+
+        Args:
+            race_code: Race code
+            prediction_id: Only return EV computed for this prediction (None for any)
+
+        Returns:
+            Same format as EVRecommender.get_recommendations, plus "prediction_id".
+            None if not computed yet or polling has stalled.
+        """
+        if self.get_snapshot(race_code) is None:
+            return None
+        with self._lock:
+            ev = self._ev_results.get(race_code)
+        if ev is None or (prediction_id is not None and ev["prediction_id"] != prediction_id):
+            return None
+        return ev
+
+    # ------------------------------------------------------------------
+    # Registration
+    # ------------------------------------------------------------------
+
+    def register_prediction(
+        self, race_code: str, ranked_horses: list[dict], prediction_id: str | None = None
+    ) -> None:
+        """
+        Register a race's prediction for EV recomputation on odds changes.
+
+        Only stores the prediction; its EV is computed by the next poll, off
+        the caller's path.
+
+        Args:
+            race_code: Race code
+            ranked_horses: Prediction results (containing win_probability, place_probability)
+            prediction_id: Saved prediction ID
+        """
+        with self._lock:
+            self._predictions[race_code] = (prediction_id, ranked_horses)
+            self._ev_results.pop(race_code, None)
+            self._pending_ev.add(race_code)
+
+    def add_listener(self, listener: EVListener) -> None:
+        """
+        Add a callback invoked with (race_code, ev_result) after EV changes.
+
+        Callbacks run on the watcher thread; async consumers should hand off
+        with asyncio.run_coroutine_threadsafe.
+        """
+        self._listeners.append(listener)
+
+    # ------------------------------------------------------------------
+    # Polling
+    # ------------------------------------------------------------------
+
+    def poll_once(self, conn) -> set[str]:
+        """
+        Fetch odds announced since the last poll, update snapshots and recompute EV.
+
+        EV is recomputed for registered races among the changed ones, and for
+        races registered since the last poll.
+
+        Args:
+            conn: psycopg2 connection
+
+        Returns:
+            Race codes whose odds changed
+        """
+        today = datetime.now(JST).date()
+        race_prefix = today.strftime("%Y%m%d") + "%"
+        if today != self._target_date:
+            # New day: drop the previous card (keeping predictions registered for today)
+            with self._lock:
+                self._target_date = today
+                self._snapshots.clear()
+                self._watermarks.clear()
+                self._ev_results.clear()
+                self._predictions = {
+                    race_code: prediction
+                    for race_code, prediction in self._predictions.items()
+                    if race_code.startswith(race_prefix[:-1])
+                }
+                self._pending_ev = set(self._predictions)
+
+        cur = conn.cursor()
+        try:
+            if self._has_fukusho_jikeiretsu is None:
+                cur.execute(
+                    """
+                    SELECT 1 FROM information_schema.tables
+                    WHERE table_name = 'odds1_fukusho_jikeiretsu'
+                """
+                )
+                self._has_fukusho_jikeiretsu = cur.fetchone() is not None
+
+            tansho = self._poll_table(cur, "odds1_tansho_jikeiretsu", "odds", race_prefix)
+            fukusho: OddsRows
+            if self._has_fukusho_jikeiretsu:
+                fukusho = self._poll_table(
+                    cur, "odds1_fukusho_jikeiretsu", "odds_saitei", race_prefix
+                )
+            else:
+                fukusho = self._fetch_final_fukusho(cur, list(tansho))
+        finally:
+            cur.close()
+
+        changed = set(tansho) | set(fukusho)
+        now = time.monotonic()
+        self._last_poll = now
+        with self._lock:
+            for race_code in changed:
+                snapshot = self._snapshots.setdefault(race_code, OddsSnapshot(race_code))
+                if race_code in tansho:
+                    snapshot.announced_at, snapshot.tansho = tansho[race_code]
+                if race_code in fukusho:
+                    _, snapshot.fukusho = fukusho[race_code]
+                snapshot.updated_at = now
+
+            pending = self._pending_ev
+            self._pending_ev = set()
+        if changed:
+            logger.debug(f"Odds updated: {len(changed)} races")
+        self._recompute_ev(changed | pending)
+        return changed
+
+    def _poll_table(self, cur, table: str, value_column: str, race_prefix: str) -> OddsRows:
+        """
+        Fetch rows at or after each race's watermark, keeping each race's latest announcement.
+
+        Rows at the watermark time are read again and the race is reported only
+        if that announcement gained rows, so rows inserted across two polls
+        with the same timestamp are picked up without repeating a change.
+        """
+        watermarks = self._watermarks.setdefault(table, {})
+        cur.execute(
+            f"""
+            SELECT t.race_code, t.umaban, t.{value_column}, t.happyo_tsukihi_jifun
+            FROM {table} t
+            LEFT JOIN unnest(%s::text[], %s::text[]) AS w(race_code, happyo_tsukihi_jifun)
+                ON w.race_code = t.race_code
+            WHERE t.race_code LIKE %s
+              AND t.happyo_tsukihi_jifun >= COALESCE(w.happyo_tsukihi_jifun, '')
+            ORDER BY t.race_code, t.happyo_tsukihi_jifun
+        """,
+            (
+                list(watermarks),
+                [announced_at for announced_at, _ in watermarks.values()],
+                race_prefix,
+            ),
+        )
+
+        latest: dict[str, tuple[str, dict[str, float]]] = {}
+        row_counts: dict[str, int] = {}
+        for race_code, umaban, value, announced_at in cur.fetchall():
+            current = latest.get(race_code)
+            if current is None or announced_at > current[0]:
+                current = (announced_at, {})
+                latest[race_code] = current
+                row_counts[race_code] = 0
+            row_counts[race_code] += 1
+            odds = _parse_odds(value)
+            if odds > 0:
+                current[1][str(umaban).strip().lstrip("0") or "0"] = odds
+
+        changed: OddsRows = {}
+        for race_code, (announced_at, odds_map) in latest.items():
+            watermark = (announced_at, row_counts[race_code])
+            if watermarks.get(race_code) != watermark:
+                watermarks[race_code] = watermark
+                changed[race_code] = (announced_at, odds_map)
+        return changed
+
+    def _fetch_final_fukusho(self, cur, race_codes: list[str]) -> OddsRows:
+        """Fetch place odds from the final odds table for races whose win odds changed."""
+        if not race_codes:
+            return {}
+        cur.execute(
+            """
+            SELECT race_code, umaban, odds_saitei
+            FROM odds1_fukusho
+            WHERE race_code = ANY(%s)
+        """,
+            (race_codes,),
+        )
+        result: OddsRows = {}
+        for race_code, umaban, value in cur.fetchall():
+            odds = _parse_odds(value)
+            if odds > 0:
+                result.setdefault(race_code, (None, {}))[1][
+                    str(umaban).strip().lstrip("0") or "0"
+                ] = odds
+        return result
+
+    def _recompute_ev(self, race_codes: set[str]) -> None:
+        """Recompute EV for registered races among race_codes and notify listeners."""
+        with self._lock:
+            targets = [
+                (race_code, *self._predictions[race_code], self._snapshots[race_code])
+                for race_code in race_codes
+                if race_code in self._predictions and race_code in self._snapshots
+            ]
+        if not targets:
+            return
+
+        if self._recommender is None:
+            self._recommender = EVRecommender()
+
+        for race_code, prediction_id, ranked_horses, snapshot in targets:
+            ev = self._recommender.recommend_from_odds(
+                race_code,
+                ranked_horses,
+                snapshot.tansho,
+                snapshot.fukusho,
+                "realtime",
+                snapshot.odds_time,
+            )
+            ev["prediction_id"] = prediction_id
+            with self._lock:
+                # Skip if a newer prediction was registered meanwhile
+                if self._predictions.get(race_code, (None,))[0] != prediction_id:
+                    continue
+                self._ev_results[race_code] = ev
+            for listener in self._listeners:
+                try:
+                    listener(race_code, ev)
+                except Exception as e:
+                    logger.warning(f"Odds watcher listener error: race_code={race_code}, {e}")
+
+    def _run(self) -> None:
+        """Polling loop with reconnect on errors."""
+        while not self._stop_event.is_set():
+            conn = None
+            try:
+                conn = get_db().get_connection()
+                conn.autocommit = True
+                if self.notify_channel:
+                    cur = conn.cursor()
+                    cur.execute(f"LISTEN {self.notify_channel}")
+                    cur.close()
+
+                while not self._stop_event.is_set():
+                    self.poll_once(conn)
+                    self._wait(conn)
+
+            except Exception as e:
+                logger.error(f"Odds watcher error (reconnecting): {e}")
+                self._stop_event.wait(self.poll_seconds)
+            finally:
+                if conn is not None:
+                    try:
+                        conn.close()
+                    except Exception:
+                        pass
+
+    def _wait(self, conn) -> None:
+        """Wait for the next poll, waking early on NOTIFY."""
+        if not self.notify_channel:
+            self._stop_event.wait(self.poll_seconds)
+            return
+
+        readable, _, _ = select.select([conn], [], [], self.poll_seconds)
+        if readable:
+            conn.poll()
+            conn.notifies.clear()
+
+
+# Global watcher (one per process)
+_watcher: OddsWatcher | None = None
+
+
+def get_odds_watcher() -> OddsWatcher | None:
+    """Get the running odds watcher, if any."""
+    return _watcher
+
+
+def get_latest_odds(race_code: str) -> OddsSnapshot | None:
+    """
+    Get the latest odds snapshot of a race without touching the database.
+
+    Returns:
+        OddsSnapshot, or None if no watcher is running or the race is unknown
+    """
+    if _watcher is None:
+        return None
+    return _watcher.get_snapshot(race_code)
+
+
+def get_latest_ev(race_code: str, prediction_id: str | None = None) -> dict[str, Any] | None:
+    """
+    Get the EV recommendations the watcher last computed for a registered race.
+
+    Returns:
+        EV recommendations, or None if no watcher is running or EV is not computed
+    """
+    if _watcher is None:
+        return None
+    return _watcher.get_ev(race_code, prediction_id)
+
+
+def start_odds_watcher(**kwargs) -> OddsWatcher:
+    """Start the process-wide odds watcher (idempotent)."""
+    global _watcher
+    if _watcher is None:
+        _watcher = OddsWatcher(**kwargs)
+    if not _watcher.is_running:
+        _watcher.start()
+    return _watcher
+
+
+def stop_odds_watcher() -> None:
+    """Stop the process-wide odds watcher."""
+    global _watcher
+    if _watcher is not None:
+        _watcher.stop()
+        _watcher = None
@@ -2,34 +2,13 @@
 Prediction Service Module
 
 Modular components for race prediction generation, adjustment, and persistence.
+
+Exports are imported on first access: the API imports persistence and
+track_adjustment at startup, while ml_engine (numpy, pandas, model files)
+loads only when a prediction is computed.
 """
 
-from src.services.prediction.bias_adjustment import (
-    apply_bias_to_scores,
-    load_bias_for_date,
-)
-from src.services.prediction.ml_engine import (
-    compute_ml_predictions,
-    extract_future_race_features,
-)
-from src.services.prediction.persistence import (
-    get_prediction_by_id,
-    get_predictions_by_race,
-    save_prediction,
-)
-from src.services.prediction.result_generator import (
-    convert_to_prediction_response,
-    generate_ml_only_prediction,
-    generate_mock_prediction,
-)
-from src.services.prediction.track_adjustment import (
-    BABA_CONDITION_MAP,
-    VENUE_CODE_MAP,
-    WEATHER_CODE_MAP,
-    apply_track_condition_adjustment,
-    get_current_track_condition,
-    get_horse_baba_performance,
-)
+import importlib
 
 __all__ = [
     # Bias adjustment
@@ -54,3 +33,32 @@ __all__ = [
     "get_prediction_by_id",
     "get_predictions_by_race",
 ]
+
+_LAZY_EXPORTS = {
+    "load_bias_for_date": "bias_adjustment",
+    "apply_bias_to_scores": "bias_adjustment",
+    "get_current_track_condition": "track_adjustment",
+    "get_horse_baba_performance": "track_adjustment",
+    "apply_track_condition_adjustment": "track_adjustment",
+    "VENUE_CODE_MAP": "track_adjustment",
+    "BABA_CONDITION_MAP": "track_adjustment",
+    "WEATHER_CODE_MAP": "track_adjustment",
+    "extract_future_race_features": "ml_engine",
+    "compute_ml_predictions": "ml_engine",
+    "generate_mock_prediction": "result_generator",
+    "generate_ml_only_prediction": "result_generator",
+    "convert_to_prediction_response": "result_generator",
+    "save_prediction": "persistence",
+    "get_prediction_by_id": "persistence",
+    "get_predictions_by_race": "persistence",
+}
+
+
+def __getattr__(name: str):
+    """Import a lazy export from its submodule on first access."""
+    module = _LAZY_EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f".{module}", __name__), name)
+    globals()[name] = value
+    return value
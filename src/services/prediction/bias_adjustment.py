@@ -51,6 +51,45 @@ def load_bias_for_date(target_date: str) -> dict | None:
     return None
 
 
+def load_intraday_bias(conn, race_id: str) -> dict | None:
+    """
+    Load same-day bias from races already finalized on the race's card.
+
+    Only used for races held today (JST); for past dates the day's later
+    results would leak into the prediction.
+
+    Args:
+        conn: DB connection (psycopg2)
+        race_id: Race ID (16 digits)
+
+    Returns:
+        Bias data dictionary, or None if too few races have finished at the venue
+    """
+    import time
+    from datetime import datetime, timedelta, timezone
+
+    from src.config import INTRADAY_BIAS_MIN_RACES, INTRADAY_BIAS_REFRESH_SECONDS
+    from src.features.intraday_bias import get_intraday_tracker
+
+    try:
+        race_date = datetime.strptime(race_id[:8], "%Y%m%d").date()
+    except ValueError:
+        return None
+    if race_date != datetime.now(timezone(timedelta(hours=9))).date():
+        return None
+
+    tracker = get_intraday_tracker(race_date)
+    try:
+        if time.monotonic() - tracker.last_refresh >= INTRADAY_BIAS_REFRESH_SECONDS:
+            tracker.refresh(conn)
+    except Exception as e:
+        logger.error(f"Error refreshing intra-day bias: {e}")
+
+    if tracker.race_count(race_id[8:10]) < INTRADAY_BIAS_MIN_RACES:
+        return None
+    return tracker.result().to_dict()
+
+
 def apply_bias_to_scores(
     ml_scores: dict[str, Any], race_id: str, horses: list[dict], bias_data: dict
 ) -> dict[str, Any]:
@@ -0,0 +1,264 @@
+"""
+Feature Snapshot Module
+
+Pre-race feature snapshots for staged final predictions.
+
+The evening before race day, every race's history-based features are
+computed once and stored in race_feature_snapshots. On race day only a few
+columns change: body weight (bataiju, zogen_sa), scratches and the track
+condition. The final prediction patches those columns into the snapshot
+and re-scores, so its latency is dominated by model inference instead of
+history queries. A snapshot whose horses or jockeys no longer match the
+entries is rejected and the features are rebuilt from scratch.
+"""
+
+import json
+import logging
+from datetime import date
+from typing import TYPE_CHECKING
+
+from src.models.feature_extractor.utils import safe_int
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# Race-level relative features: (base column, relative column)
+FIELD_RELATIVE_FEATURES = [
+    ("speed_index_avg", "speed_vs_field"),
+    ("win_rate", "winrate_vs_field"),
+    ("weighted_avg_rank", "rank_vs_field"),
+    ("jockey_win_rate", "jockey_vs_field"),
+    ("consistency_score", "consistency_vs_field"),
+]
+
+# ijo_kubun_code: 1 = scratched (出走取消), 2 = excluded at the start (発走除外)
+SCRATCH_CODES = ("1", "2")
+
+# Non-numeric columns of a feature frame
+_TEXT_COLUMNS = ("race_code", "bamei")
+
+
+def add_field_relative_features(df: "pd.DataFrame") -> "pd.DataFrame":
+    """
+    Add race-level relative features (same as extract_year_data post-processing).
+
+    Args:
+        df: Feature frame with race_code
+
+    Returns:
+        The frame, with {feature}_vs_field columns set in place
+    """
+    if "race_code" in df.columns and len(df) > 0:
+        for col, new_col in FIELD_RELATIVE_FEATURES:
+            if col in df.columns:
+                race_means = df.groupby("race_code")[col].transform("mean")
+                df[new_col] = df[col] - race_means
+    return df
+
+
+def is_scratched(entry: dict) -> bool:
+    """Check whether an entry is scratched or has no horse number."""
+    return (
+        safe_int(entry.get("umaban"), 0) < 1
+        or (entry.get("ijo_kubun_code") or "").strip() in SCRATCH_CODES
+    )
+
+
+def fetch_race_day_entries(conn, race_id: str) -> list[dict]:
+    """
+    Fetch the race-day columns of a race's entries.
+
+    Args:
+        conn: DB connection
+        race_id: Race ID (16 digits)
+
+    Returns:
+        Entries with umaban, ketto_toroku_bango, kishu_code, bataiju, zogen_sa
+        and ijo_kubun_code
+    """
+    cur = conn.cursor()
+    try:
+        cur.execute(
+            """
+            SELECT umaban, ketto_toroku_bango, kishu_code, bataiju, zogen_sa, ijo_kubun_code
+            FROM umagoto_race_joho
+            WHERE race_code = %s
+              AND data_kubun IN ('1', '2', '3', '4', '5', '6')
+        """,
+            (race_id,),
+        )
+        cols = [d[0] for d in cur.description]
+        return [dict(zip(cols, row)) for row in cur.fetchall()]
+    finally:
+        cur.close()
+
+
+def fetch_race_conditions(conn, race_id: str) -> dict:
+    """
+    Fetch a race's track code and current track condition codes.
+
+    Returns:
+        {"track_code", "shiba_babajotai_code", "dirt_babajotai_code"} (empty if not found)
+    """
+    cur = conn.cursor()
+    try:
+        cur.execute(
+            """
+            SELECT track_code, shiba_babajotai_code, dirt_babajotai_code
+            FROM race_shosai
+            WHERE race_code = %s
+              AND data_kubun IN ('1', '2', '3', '4', '5', '6')
+            LIMIT 1
+        """,
+            (race_id,),
+        )
+        row = cur.fetchone()
+        return dict(zip([d[0] for d in cur.description], row)) if row else {}
+    finally:
+        cur.close()
+
+
+def get_race_ids_for_date(conn, race_date: date) -> list[str]:
+    """Race IDs on a date's card."""
+    cur = conn.cursor()
+    try:
+        cur.execute(
+            """
+            SELECT DISTINCT race_code
+            FROM race_shosai
+            WHERE kaisai_nen = %s
+              AND kaisai_gappi = %s
+              AND data_kubun IN ('1', '2', '3', '4', '5', '6')
+            ORDER BY race_code
+        """,
+            (f"{race_date:%Y}", f"{race_date:%m%d}"),
+        )
+        return [row[0] for row in cur.fetchall()]
+    finally:
+        cur.close()
+
+
+def save_snapshot(conn, race_id: str, features: "pd.DataFrame", entries: list[dict]) -> None:
+    """
+    Store a race's feature snapshot (replaces any previous one).
+
+    Args:
+        conn: DB connection
+        race_id: Race ID (16 digits)
+        features: Feature frame of the race
+        entries: Entries the features were computed from (fetch_race_day_entries)
+    """
+    identity = {
+        str(safe_int(e.get("umaban"), 0)): [e.get("ketto_toroku_bango"), e.get("kishu_code")]
+        for e in entries
+        if not is_scratched(e)
+    }
+    race_date = date(int(race_id[:4]), int(race_id[4:6]), int(race_id[6:8]))
+
+    cur = conn.cursor()
+    try:
+        cur.execute(
+            """
+            INSERT INTO race_feature_snapshots (race_code, race_date, features, entries)
+            VALUES (%s, %s, %s::jsonb, %s::jsonb)
+            ON CONFLICT (race_code) DO UPDATE SET
+                race_date = EXCLUDED.race_date,
+                features = EXCLUDED.features,
+                entries = EXCLUDED.entries,
+                created_at = CURRENT_TIMESTAMP
+        """,
+            (race_id, race_date, features.to_json(orient="records"), json.dumps(identity)),
+        )
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cur.close()
+
+
+def load_snapshot(conn, race_id: str) -> "tuple[pd.DataFrame, dict] | None":
+    """
+    Load a race's feature snapshot.
+
+    Returns:
+        (features, entries) as stored by save_snapshot(), or None if there is none
+    """
+    import pandas as pd
+
+    cur = conn.cursor()
+    try:
+        cur.execute(
+            "SELECT features, entries FROM race_feature_snapshots WHERE race_code = %s",
+            (race_id,),
+        )
+        row = cur.fetchone()
+    except Exception as e:
+        conn.rollback()
+        logger.warning(f"Feature snapshot load failed: {e}")
+        return None
+    finally:
+        cur.close()
+
+    if not row:
+        return None
+
+    features = pd.DataFrame(row[0])
+    for col in features.columns:
+        if col not in _TEXT_COLUMNS:
+            features[col] = pd.to_numeric(features[col], errors="coerce")
+    return features, row[1]
+
+
+def patch_snapshot(
+    features: "pd.DataFrame", snapshot_entries: dict, entries: list[dict], conditions: dict
+) -> "pd.DataFrame | None":
+    """
+    Apply race-day data to a feature snapshot.
+
+    Scratched horses are dropped, body weight and track condition columns are
+    overwritten (as build_features derives them) and field-relative features
+    are recomputed over the remaining runners.
+
+    Args:
+        features: Snapshot feature frame
+        snapshot_entries: Snapshot entries (umaban -> [ketto_toroku_bango, kishu_code])
+        entries: Current entries (fetch_race_day_entries)
+        conditions: Current race conditions (fetch_race_conditions)
+
+    Returns:
+        Patched feature frame, or None if a runner's horse or jockey changed
+        since the snapshot (features must be rebuilt)
+    """
+    runners = {}
+    for entry in entries:
+        if is_scratched(entry):
+            continue
+        umaban = safe_int(entry.get("umaban"), 0)
+        identity = [entry.get("ketto_toroku_bango"), entry.get("kishu_code")]
+        if snapshot_entries.get(str(umaban)) != identity:
+            logger.info(f"Snapshot entry changed: umaban={umaban}")
+            return None
+        runners[umaban] = entry
+
+    df = features[features["umaban"].isin(list(runners))].copy()
+    if len(df) != len(runners):
+        return None
+
+    df["horse_weight"] = [safe_int(runners[u].get("bataiju"), 480) for u in df["umaban"]]
+    df["weight_diff"] = [safe_int(runners[u].get("zogen_sa"), 0) for u in df["umaban"]]
+    if "days_since_last_race" in df.columns:
+        df["weight_rest_interaction"] = df["weight_diff"] * df["days_since_last_race"] / 100.0
+
+    track_code = conditions.get("track_code") or ""
+    is_turf = track_code.startswith("1") if track_code else True
+    baba_code = (
+        conditions.get("shiba_babajotai_code", "1")
+        if is_turf
+        else conditions.get("dirt_babajotai_code", "1")
+    )
+    df["baba_condition"] = safe_int(baba_code, 1)
+
+    return add_field_relative_features(df.reset_index(drop=True))
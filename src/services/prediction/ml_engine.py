@@ -7,13 +7,22 @@ Handles feature extraction for future races and ensemble model predictions.
 
 import logging
 import os
+from datetime import date
 from pathlib import Path
 from typing import Any
 
-import numpy as np
-
+from src.metrics import span
 from src.models.surface_utils import get_model_path_for_surface, get_surface_type
-from src.services.prediction.ensemble import ensemble_predict, ensemble_proba, ensemble_proba_with_ci
+from src.services.prediction.feature_snapshot import (
+    add_field_relative_features,
+    fetch_race_conditions,
+    fetch_race_day_entries,
+    get_race_ids_for_date,
+    is_scratched,
+    load_snapshot,
+    patch_snapshot,
+    save_snapshot,
+)
 
 logger = logging.getLogger(__name__)
 
@@ -45,11 +54,89 @@ def _load_model_cached(model_path: Path) -> dict:
         return cached["data"]
 
     logger.info(f"Loading model from disk: {model_path.name}")
-    data = joblib.load(model_path)
+    with span("model_load", model=model_path.name):
+        data = joblib.load(model_path)
     _model_cache[path_str] = {"mtime": current_mtime, "data": data}
     return data
 
 
+def _get_model_path_for_race(conn, race_id: str) -> Path:
+    """Select the surface-specific model file for a race."""
+    # Get track_code from DB to determine surface type
+    track_code = None
+    try:
+        cur = conn.cursor()
+        cur.execute(
+            "SELECT track_code FROM race_shosai WHERE race_code = %s LIMIT 1",
+            (race_id,),
+        )
+        row = cur.fetchone()
+        track_code = row[0] if row else None
+        cur.close()
+    except Exception as e:
+        logger.warning(f"Failed to get track_code: {e}")
+
+    surface = get_surface_type(track_code)
+    model_path = get_model_path_for_surface(ML_MODEL_DIR, surface)
+    logger.info(f"Surface: {surface}, model: {model_path.name}")
+    return model_path
+
+
+def warm_race_model(race_id: str) -> str | None:
+    """
+    Load a race's model into the cache ahead of its prediction.
+
+    Args:
+        race_id: Race ID (16 digits)
+
+    Returns:
+        Model file name, or None if no model is available
+    """
+    from src.db.connection import get_db
+
+    conn = get_db().get_connection()
+    if not conn:
+        logger.warning("DB connection failed for model warm-up")
+        return None
+
+    try:
+        model_path = _get_model_path_for_race(conn, race_id)
+    finally:
+        conn.close()
+
+    if not model_path.exists():
+        logger.warning(f"ML model not found: {model_path}")
+        return None
+
+    _load_model_cached(model_path)
+    return model_path.name
+
+
+def warm_models() -> list[str]:
+    """
+    Load every surface model and the prediction stack into memory.
+
+    Imports numpy, pandas and the feature extractor and unpickles each
+    surface's model (which imports xgboost/lightgbm/catboost), so the first
+    prediction after startup pays none of it.
+
+    Returns:
+        Loaded model file names
+    """
+    # Imported for the side effect: the request path then finds them in sys.modules
+    import src.services.prediction.ensemble  # noqa: F401 (numpy)
+    from src.models.feature_extractor import FastFeatureExtractor  # noqa: F401 (pandas)
+
+    loaded = []
+    for surface in ("turf", "dirt", "obstacle"):
+        model_path = get_model_path_for_surface(ML_MODEL_DIR, surface)
+        if model_path.name in loaded or not model_path.exists():
+            continue
+        _load_model_cached(model_path)
+        loaded.append(model_path.name)
+    return loaded
+
+
 def extract_future_race_features(conn, race_id: str, extractor, year: int):
     """
     Extract features for a future race.
@@ -98,7 +185,7 @@ def extract_future_race_features(conn, race_id: str, extractor, year: int):
             race_code, umaban, wakuban, ketto_toroku_bango,
             seibetsu_code, barei, futan_juryo,
             blinker_shiyo_kubun, kishu_code, chokyoshi_code,
-            bataiju, zogen_sa, bamei
+            bataiju, zogen_sa, bamei, ijo_kubun_code
         FROM umagoto_race_joho
         WHERE race_code = %s
           AND data_kubun IN ('1', '2', '3', '4', '5', '6')
@@ -115,16 +202,8 @@ def extract_future_race_features(conn, race_id: str, extractor, year: int):
         cur.close()
         return pd.DataFrame()
 
-    # Filter out horse_number 0 (scratched or registration-only entries)
-    valid_entries = []
-    for e in entries:
-        umaban = e.get("umaban", "00")
-        try:
-            if int(umaban) >= 1:
-                valid_entries.append(e)
-        except (ValueError, TypeError):
-            pass
-    entries = valid_entries
+    # Filter out horse_number 0 (registration-only entries) and scratched horses
+    entries = [e for e in entries if not is_scratched(e)]
 
     logger.info(f"Future race entries: {len(entries)} horses")
 
@@ -132,8 +211,9 @@ def extract_future_race_features(conn, race_id: str, extractor, year: int):
     kettonums = [e["ketto_toroku_bango"] for e in entries if e.get("ketto_toroku_bango")]
     past_stats = extractor._get_past_stats_batch(kettonums)
 
-    # 4. Cache jockey/trainer stats
-    extractor._cache_jockey_trainer_stats(year)
+    # 4. Cache jockey/trainer stats (once per extractor when building several races)
+    if not extractor._jockey_cache:
+        extractor._cache_jockey_trainer_stats(year)
 
     # 5. Get additional data
     jh_pairs = [
@@ -183,54 +263,141 @@ def extract_future_race_features(conn, race_id: str, extractor, year: int):
 
     # 6. Build features (with dummy finishing position)
     features_list = []
-    for entry in entries:
-        entry["kakutei_chakujun"] = "01"  # Dummy for prediction
-
-        features = extractor._build_features(
-            entry,
-            races,
-            past_stats,
-            jockey_horse_stats=jockey_horse_stats,
-            distance_stats=surface_stats,
-            training_stats=training_stats,
-            venue_stats=venue_stats,
-            pedigree_info=pedigree_info,
-            zenso_info=zenso_info,
-            jockey_recent=jockey_recent,
-            sire_stats_turf=sire_stats_turf,
-            sire_stats_dirt=sire_stats_dirt,
-            sire_maiden_stats=sire_maiden_stats,
-            jockey_maiden_stats=jockey_maiden_stats,
-            detailed_stats=detailed_stats,
-            lap_stats=lap_stats,
-            year=year,
-        )
-        if features:
-            features["bamei"] = entry.get("bamei", "")
-            features_list.append(features)
+    with span("feature_build", race_id=race_id):
+        for entry in entries:
+            entry["kakutei_chakujun"] = "01"  # Dummy for prediction
+
+            features = extractor._build_features(
+                entry,
+                races,
+                past_stats,
+                jockey_horse_stats=jockey_horse_stats,
+                distance_stats=surface_stats,
+                training_stats=training_stats,
+                venue_stats=venue_stats,
+                pedigree_info=pedigree_info,
+                zenso_info=zenso_info,
+                jockey_recent=jockey_recent,
+                sire_stats_turf=sire_stats_turf,
+                sire_stats_dirt=sire_stats_dirt,
+                sire_maiden_stats=sire_maiden_stats,
+                jockey_maiden_stats=jockey_maiden_stats,
+                detailed_stats=detailed_stats,
+                lap_stats=lap_stats,
+                year=year,
+            )
+            if features:
+                features["bamei"] = entry.get("bamei", "")
+                features_list.append(features)
 
     cur.close()
 
     if not features_list:
         return pd.DataFrame()
 
-    df = pd.DataFrame(features_list)
-
     # Race-level relative features (same as extract_year_data post-processing)
-    if "race_code" in df.columns and len(df) > 0:
-        relative_pairs = [
-            ("speed_index_avg", "speed_vs_field"),
-            ("win_rate", "winrate_vs_field"),
-            ("weighted_avg_rank", "rank_vs_field"),
-            ("jockey_win_rate", "jockey_vs_field"),
-            ("consistency_score", "consistency_vs_field"),
-        ]
-        for col, new_col in relative_pairs:
-            if col in df.columns:
-                race_means = df.groupby("race_code")[col].transform("mean")
-                df[new_col] = df[col] - race_means
-
-    return df
+    return add_field_relative_features(pd.DataFrame(features_list))
+
+
+def build_feature_snapshots(race_date: date, race_ids: list[str] | None = None) -> list[str]:
+    """
+    Compute and store pre-race feature snapshots.
+
+    Runs the evening before race day; one extractor is shared by all races
+    so jockey/trainer statistics are cached once.
+
+    Args:
+        race_date: Race date
+        race_ids: Race IDs to build (default: the date's whole card)
+
+    Returns:
+        Race IDs whose snapshot was stored
+    """
+    from src.db.connection import get_db
+    from src.models.feature_extractor import FastFeatureExtractor
+
+    conn = get_db().get_connection()
+    if not conn:
+        logger.warning("DB connection failed for feature snapshots")
+        return []
+
+    saved = []
+    try:
+        if race_ids is None:
+            race_ids = get_race_ids_for_date(conn, race_date)
+        extractor = FastFeatureExtractor(conn)
+        for race_id in race_ids:
+            try:
+                df = extract_future_race_features(conn, race_id, extractor, int(race_id[:4]))
+                if len(df) == 0:
+                    logger.warning(f"No entries for feature snapshot: {race_id}")
+                    continue
+                save_snapshot(conn, race_id, df, fetch_race_day_entries(conn, race_id))
+                saved.append(race_id)
+            except Exception as e:
+                conn.rollback()
+                logger.warning(f"Feature snapshot failed: race_id={race_id}, error={e}")
+    finally:
+        conn.close()
+
+    logger.info(f"Feature snapshots stored: {race_date}, {len(saved)}/{len(race_ids)} races")
+    return saved
+
+
+def ensure_feature_snapshot(race_id: str) -> bool:
+    """
+    Make sure a race has a usable feature snapshot.
+
+    Builds one if the evening run missed the race or its entries changed
+    (e.g. a jockey change), so the final prediction can patch and re-score.
+
+    Args:
+        race_id: Race ID (16 digits)
+
+    Returns:
+        True if a usable snapshot exists
+    """
+    from src.db.connection import get_db
+
+    conn = get_db().get_connection()
+    if not conn:
+        logger.warning("DB connection failed for feature snapshot check")
+        return False
+
+    try:
+        if _load_patched_snapshot(conn, race_id) is not None:
+            return True
+    finally:
+        conn.close()
+
+    race_date = date(int(race_id[:4]), int(race_id[4:6]), int(race_id[6:8]))
+    return bool(build_feature_snapshots(race_date, [race_id]))
+
+
+def _load_patched_snapshot(conn, race_id: str):
+    """
+    Load a race's feature snapshot with race-day data applied.
+
+    Returns:
+        pd.DataFrame of features, or None if there is no usable snapshot
+    """
+    snapshot = load_snapshot(conn, race_id)
+    if snapshot is None:
+        return None
+
+    features, snapshot_entries = snapshot
+    race_df = patch_snapshot(
+        features,
+        snapshot_entries,
+        fetch_race_day_entries(conn, race_id),
+        fetch_race_conditions(conn, race_id),
+    )
+    if race_df is None or len(race_df) == 0:
+        logger.info(f"Feature snapshot outdated, rebuilding: {race_id}")
+        return None
+
+    logger.info(f"Using feature snapshot: {race_id} ({len(race_df)} horses)")
+    return race_df
 
 
 def compute_ml_predictions(
@@ -251,6 +418,7 @@ def compute_ml_predictions(
     logger.info(f"Computing ML predictions: race_id={race_id}, horses={len(horses)}")
 
     try:
+        import numpy as np
         import pandas as pd
 
         from src.db.connection import get_db
@@ -258,6 +426,12 @@ def compute_ml_predictions(
         from src.services.prediction.bias_adjustment import (
             apply_bias_to_scores,
             load_bias_for_date,
+            load_intraday_bias,
+        )
+        from src.services.prediction.ensemble import (
+            ensemble_predict,
+            ensemble_proba,
+            ensemble_proba_with_ci,
         )
         from src.services.prediction.track_adjustment import (
             apply_track_condition_adjustment,
@@ -274,24 +448,8 @@ def compute_ml_predictions(
             return {}
 
         try:
-            # Get track_code from DB to determine surface type
-            track_code = None
-            try:
-                cur = conn.cursor()
-                cur.execute(
-                    "SELECT track_code FROM race_shosai WHERE race_code = %s LIMIT 1",
-                    (race_id,),
-                )
-                row = cur.fetchone()
-                track_code = row[0] if row else None
-                cur.close()
-            except Exception as e:
-                logger.warning(f"Failed to get track_code: {e}")
-
             # Select and load model based on surface type (cached)
-            surface = get_surface_type(track_code)
-            model_path = get_model_path_for_surface(ML_MODEL_DIR, surface)
-            logger.info(f"Surface: {surface}, model: {model_path.name}")
+            model_path = _get_model_path_for_race(conn, race_id)
 
             if not model_path.exists():
                 logger.warning(f"ML model not found: {model_path}")
@@ -348,19 +506,28 @@ def compute_ml_predictions(
                 f"CatBoost={'yes' if has_catboost else 'no'}"
             )
 
-            # Feature extraction (using same FastFeatureExtractor as training)
-            extractor = FastFeatureExtractor(conn)
-            year = int(race_id[:4])
-            logger.info(f"Extracting features for race {race_id}...")
+            # Pre-race snapshot with race-day data patched in (history queries skipped)
+            race_df = _load_patched_snapshot(conn, race_id)
 
-            # First try to get confirmed data (past races)
-            df = extractor.extract_year_data(year, max_races=10000)
-            race_df = df[df["race_code"] == race_id].copy() if len(df) > 0 else pd.DataFrame()
+            if race_df is None:
+                # Feature extraction (using same FastFeatureExtractor as training)
+                with span("feature_extraction", race_id=race_id):
+                    extractor = FastFeatureExtractor(conn)
+                    year = int(race_id[:4])
+                    logger.info(f"Extracting features for race {race_id}...")
 
-            # If no confirmed data, extract features directly for future race
-            if len(race_df) == 0:
-                logger.info(f"No confirmed data, extracting features for future race: {race_id}")
-                race_df = extract_future_race_features(conn, race_id, extractor, year)
+                    # First try to get confirmed data (past races)
+                    df = extractor.extract_year_data(year, max_races=10000)
+                    race_df = (
+                        df[df["race_code"] == race_id].copy() if len(df) > 0 else pd.DataFrame()
+                    )
+
+                    # If no confirmed data, extract features directly for future race
+                    if len(race_df) == 0:
+                        logger.info(
+                            f"No confirmed data, extracting features for future race: {race_id}"
+                        )
+                        race_df = extract_future_race_features(conn, race_id, extractor, year)
 
             if len(race_df) == 0:
                 logger.warning(f"No data for race: {race_id}")
@@ -384,10 +551,11 @@ def compute_ml_predictions(
                 return {}
 
             # Regression prediction (rank scores)
-            rank_scores = ensemble_predict(
-                xgb_model, lgb_model, X, ensemble_weights,
-                cb_model=cb_model if has_catboost else None,
-            )
+            with span("ensemble.rank", race_id=race_id):
+                rank_scores = ensemble_predict(
+                    xgb_model, lgb_model, X, ensemble_weights,
+                    cb_model=cb_model if has_catboost else None,
+                )
 
             # Detect model type (ranker vs regressor)
             is_ranker = model_data.get("model_type") == "ranker"
@@ -398,32 +566,35 @@ def compute_ml_predictions(
                 n_horses = len(X)
 
                 # Win probability (with confidence interval)
-                win_probs, win_std = ensemble_proba_with_ci(
-                    xgb_win, lgb_win, X, ensemble_weights,
-                    cb_clf=cb_win if has_catboost else None,
-                    calibrator=win_calibrator,
-                )
+                with span("ensemble.win", race_id=race_id):
+                    win_probs, win_std = ensemble_proba_with_ci(
+                        xgb_win, lgb_win, X, ensemble_weights,
+                        cb_clf=cb_win if has_catboost else None,
+                        calibrator=win_calibrator,
+                    )
                 if win_calibrator is not None:
                     logger.info("Applied win_calibrator")
 
                 # Quinella probability
                 if has_quinella:
-                    quinella_probs = ensemble_proba(
-                        xgb_quinella, lgb_quinella, X, ensemble_weights,
-                        cb_clf=cb_quinella if has_catboost else None,
-                        calibrator=quinella_calibrator,
-                    )
+                    with span("ensemble.quinella", race_id=race_id):
+                        quinella_probs = ensemble_proba(
+                            xgb_quinella, lgb_quinella, X, ensemble_weights,
+                            cb_clf=cb_quinella if has_catboost else None,
+                            calibrator=quinella_calibrator,
+                        )
                     if quinella_calibrator is not None:
                         logger.info("Applied quinella_calibrator")
                 else:
                     quinella_probs = None
 
                 # Place probability
-                place_probs = ensemble_proba(
-                    xgb_place, lgb_place, X, ensemble_weights,
-                    cb_clf=cb_place if has_catboost else None,
-                    calibrator=place_calibrator,
-                )
+                with span("ensemble.place", race_id=race_id):
+                    place_probs = ensemble_proba(
+                        xgb_place, lgb_place, X, ensemble_weights,
+                        cb_clf=cb_place if has_catboost else None,
+                        calibrator=place_calibrator,
+                    )
                 if place_calibrator is not None:
                     logger.info("Applied place_calibrator")
 
@@ -466,62 +637,69 @@ def compute_ml_predictions(
             # Debug: Check ML scores
             sample_scores = list(ml_scores.items())[:3]
             for umaban, data in sample_scores:
-                logger.info(
+                logger.debug(
                     f"DEBUG ml_score[{umaban}]: win={data.get('win_probability', 0)*100:.4f}%"
                 )
 
             # Apply bias
-            from datetime import date, timedelta
-
-            bias_date_str = bias_date or os.environ.get("KEIBA_BIAS_DATE")
-
-            if bias_date_str:
-                bias_data = load_bias_for_date(bias_date_str)
-                if bias_data:
-                    logger.info(f"Applying bias: {bias_date_str}")
-                    ml_scores = apply_bias_to_scores(ml_scores, race_id, horses, bias_data)
+            from datetime import timedelta
+
+            with span("bias_adjustment", race_id=race_id):
+                bias_date_str = bias_date or os.environ.get("KEIBA_BIAS_DATE")
+                # Same-day bias from finalized races on today's card
+                intraday_bias = None if bias_date_str else load_intraday_bias(conn, race_id)
+
+                if bias_date_str:
+                    bias_data = load_bias_for_date(bias_date_str)
+                    if bias_data:
+                        logger.info(f"Applying bias: {bias_date_str}")
+                        ml_scores = apply_bias_to_scores(ml_scores, race_id, horses, bias_data)
+                    else:
+                        logger.warning(f"Bias file not found: {bias_date_str}")
+                elif intraday_bias:
+                    logger.info(f"Same-day bias applied: {intraday_bias['total_races']} races")
+                    ml_scores = apply_bias_to_scores(ml_scores, race_id, horses, intraday_bias)
                 else:
-                    logger.warning(f"Bias file not found: {bias_date_str}")
-            else:
-                race_year = int(race_id[:4])
-                race_month = int(race_id[6:8])
-                race_day = int(race_id[8:10])
-                try:
-                    race_date = date(race_year, race_month, race_day)
-                    if race_date.weekday() == 6:  # Sunday
-                        saturday_date = race_date - timedelta(days=1)
-                        bias_data = load_bias_for_date(saturday_date.isoformat())
-                        if bias_data:
-                            logger.info(f"Auto-detected bias applied: {saturday_date}")
-                            ml_scores = apply_bias_to_scores(
-                                ml_scores, race_id, horses, bias_data
-                            )
-                except (ValueError, IndexError) as e:
-                    logger.warning(f"Bias application skipped: {e}")
+                    race_year = int(race_id[:4])
+                    race_month = int(race_id[6:8])
+                    race_day = int(race_id[8:10])
+                    try:
+                        race_date = date(race_year, race_month, race_day)
+                        if race_date.weekday() == 6:  # Sunday
+                            saturday_date = race_date - timedelta(days=1)
+                            bias_data = load_bias_for_date(saturday_date.isoformat())
+                            if bias_data:
+                                logger.info(f"Auto-detected bias applied: {saturday_date}")
+                                ml_scores = apply_bias_to_scores(
+                                    ml_scores, race_id, horses, bias_data
+                                )
+                    except (ValueError, IndexError) as e:
+                        logger.warning(f"Bias application skipped: {e}")
 
             # Apply track condition adjustment for final predictions
             if is_final:
-                logger.info("Final prediction: applying track condition adjustment")
-                track_condition = get_current_track_condition(conn, race_id)
-                if track_condition and track_condition.get("condition", 0) > 0:
-                    kettonums = [
-                        h.get("ketto_toroku_bango", "")
-                        for h in horses
-                        if h.get("ketto_toroku_bango")
-                    ]
-                    if kettonums:
-                        baba_performance = get_horse_baba_performance(
-                            conn,
-                            kettonums,
-                            track_condition["track_type"],
-                            track_condition["condition"],
-                        )
-                        if baba_performance:
-                            ml_scores = apply_track_condition_adjustment(
-                                ml_scores, horses, track_condition, baba_performance
+                with span("track_adjustment", race_id=race_id):
+                    logger.info("Final prediction: applying track condition adjustment")
+                    track_condition = get_current_track_condition(conn, race_id)
+                    if track_condition and track_condition.get("condition", 0) > 0:
+                        kettonums = [
+                            h.get("ketto_toroku_bango", "")
+                            for h in horses
+                            if h.get("ketto_toroku_bango")
+                        ]
+                        if kettonums:
+                            baba_performance = get_horse_baba_performance(
+                                conn,
+                                kettonums,
+                                track_condition["track_type"],
+                                track_condition["condition"],
                             )
-                else:
-                    logger.info("No track condition data, skipping adjustment")
+                            if baba_performance:
+                                ml_scores = apply_track_condition_adjustment(
+                                    ml_scores, horses, track_condition, baba_performance
+                                )
+                    else:
+                        logger.info("No track condition data, skipping adjustment")
 
             return ml_scores
 
@@ -24,6 +24,7 @@ from src.db.table_names import (
     COL_RACE_NAME,
 )
 from src.exceptions import DatabaseQueryError
+from src.metrics import span
 from src.services.prediction.track_adjustment import VENUE_CODE_MAP
 
 logger = logging.getLogger(__name__)
@@ -88,15 +89,16 @@ async def save_prediction(prediction_data: PredictionResponse) -> str:
             else:
                 race_date = prediction_data.race_date
 
-            result = await conn.fetchrow(
-                sql,
-                prediction_id,
-                prediction_data.race_id,
-                race_date,
-                prediction_data.is_final,
-                json.dumps(prediction_result_dict),  # JSON string for asyncpg JSONB
-                prediction_data.predicted_at,
-            )
+            with span("db_save", race_id=prediction_data.race_id):
+                result = await conn.fetchrow(
+                    sql,
+                    prediction_id,
+                    prediction_data.race_id,
+                    race_date,
+                    prediction_data.is_final,
+                    json.dumps(prediction_result_dict),  # JSON string for asyncpg JSONB
+                    prediction_data.predicted_at,
+                )
 
             if not result:
                 raise DatabaseQueryError("Failed to save prediction result")
@@ -15,6 +15,7 @@ from src.api.schemas.prediction import (
     PositionDistribution,
     PredictionResponse,
     PredictionResult,
+    RaceSimulation,
 )
 from src.db.table_names import (
     COL_JYOCD,
@@ -28,6 +29,75 @@ from src.services.prediction.track_adjustment import VENUE_CODE_MAP
 logger = logging.getLogger(__name__)
 
 
+def _simulate_positions(
+    race_data: dict[str, Any], scored_horses: list[dict[str, Any]]
+) -> dict[str, Any] | None:
+    """
+    Run the (cached) Monte Carlo race simulation for scored horses.
+
+    Args:
+        race_data: Race data
+        scored_horses: Horses with horse_number, win_probability, rank_score
+
+    Returns:
+        Simulation summary, or None if strengths are unavailable
+    """
+    if not scored_horses:
+        return None
+
+    from src.services.prediction.simulation import simulate_race, strengths_from_predictions
+
+    try:
+        strengths = strengths_from_predictions(
+            [h["horse_number"] for h in scored_horses],
+            win_probs=[h["win_probability"] for h in scored_horses],
+            rank_scores=[h["rank_score"] for h in scored_horses],
+        )
+    except ValueError as e:
+        logger.warning(f"Race simulation skipped: {e}")
+        return None
+
+    race_id = race_data.get("race", {}).get(COL_RACE_ID, "")
+    return simulate_race(race_id, strengths)
+
+
+def simulation_result(summary: dict[str, Any]) -> dict[str, Any]:
+    """
+    Convert a simulation summary into the RaceSimulation response format.
+
+    Args:
+        summary: Simulation summary from the simulation module
+
+    Returns:
+        Dictionary matching RaceSimulation
+    """
+    horses = [
+        {
+            "horse_number": int(number),
+            "position_distribution": horse["position_distribution"],
+            "win_probability": horse["win_probability"],
+            "win_ci_lower": horse["win_ci"][0],
+            "win_ci_upper": horse["win_ci"][1],
+            "place_probability": horse["place_probability"],
+            "place_ci_lower": horse["place_ci"][0],
+            "place_ci_upper": horse["place_ci"][1],
+        }
+        for number, horse in summary["horses"].items()
+    ]
+    horses.sort(key=lambda h: h["win_probability"], reverse=True)
+
+    exotic_probabilities = [
+        {"bet_type": bet_type, **entry}
+        for bet_type, entries in summary.get("exotic", {}).items()
+        for entry in entries
+    ]
+    return {
+        "n_draws": summary["n_draws"],
+        "horses": horses,
+        "exotic_probabilities": exotic_probabilities,
+    }
+
+
 def generate_mock_prediction(race_id: str, is_final: bool) -> PredictionResponse:
     """
     Generate mock prediction (probability-based ranking format).
@@ -195,8 +265,18 @@ def generate_ml_only_prediction(
 
     scored_horses.sort(key=composite_score, reverse=True)
 
+    # Monte Carlo race simulation (Plackett-Luce on win probabilities): returned with
+    # the prediction, and splits 2nd/3rd when the quinella/place models gave no output
+    simulation = _simulate_positions(race_data, scored_horses)
+    simulated_horses = simulation["horses"] if simulation else {}
+
     def calc_position_distribution(
-        win_prob: float, quinella_prob: float | None, place_prob: float | None, rank: int, n: int
+        win_prob: float,
+        quinella_prob: float | None,
+        place_prob: float | None,
+        rank: int,
+        n: int,
+        simulated: dict[str, float] | None = None,
     ) -> dict[str, float]:
         """
         Estimate position distribution from win/quinella/place probabilities.
@@ -204,6 +284,8 @@ def generate_ml_only_prediction(
         If quinella model exists:
           2nd place prob = quinella prob - win prob
           3rd place prob = place prob - quinella prob
+        Otherwise the 2nd/3rd split comes from the race simulation, falling
+        back to fixed heuristics only when no simulation is available.
         """
         # 1st place = win probability
         first = win_prob
@@ -215,7 +297,11 @@ def generate_ml_only_prediction(
         elif place_prob is not None:
             # When quinella model not available (legacy compatibility)
             remaining_place = max(0, place_prob - first)
-            if rank <= 3:
+            sim_2nd_3rd = simulated["second"] + simulated["third"] if simulated else 0.0
+            if simulated and sim_2nd_3rd > 0:
+                second = remaining_place * simulated["second"] / sim_2nd_3rd
+                third = remaining_place - second
+            elif rank <= 3:
                 second = remaining_place * 0.55
                 third = remaining_place * 0.45
             elif rank <= 6:
@@ -224,6 +310,10 @@ def generate_ml_only_prediction(
             else:
                 second = remaining_place * 0.45
                 third = remaining_place * 0.55
+        elif simulated:
+            # Legacy format: simulated distribution from win probabilities
+            second = simulated["second"]
+            third = simulated["third"]
         else:
             # Legacy format: estimate from win probability
             second = min(win_prob * 1.5, 0.3) if rank <= 5 else win_prob * 0.5
@@ -248,8 +338,14 @@ def generate_ml_only_prediction(
         model_place_prob = h.get("place_probability")  # Place prob from model
 
         # Calculate position distribution (for display) - using quinella model
+        sim_horse = simulated_horses.get(str(h["horse_number"]))
         pos_dist = calc_position_distribution(
-            win_prob, model_quinella_prob, model_place_prob, rank, n_horses
+            win_prob,
+            model_quinella_prob,
+            model_place_prob,
+            rank,
+            n_horses,
+            simulated=sim_horse["position_distribution"] if sim_horse else None,
         )
 
         # Quinella: prefer model value, otherwise calculate from distribution
@@ -351,6 +447,7 @@ def generate_ml_only_prediction(
         "dark_horses": dark_horses,  # Dark horse candidates
         "prediction_confidence": round(prediction_confidence, 4),
         "model_info": "ensemble_model",
+        "simulation": simulation_result(simulation) if simulation else None,
     }
 
 
@@ -444,6 +541,9 @@ def convert_to_prediction_response(
         quinella_ranking=ml_result.get("quinella_ranking"),
         place_ranking=ml_result.get("place_ranking"),
         dark_horses=ml_result.get("dark_horses"),
+        simulation=(
+            RaceSimulation(**ml_result["simulation"]) if ml_result.get("simulation") else None
+        ),
         prediction_confidence=ml_result.get("prediction_confidence", 0.5),
         model_info=ml_result.get("model_info", "ensemble_model"),
     )
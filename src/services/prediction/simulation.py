@@ -0,0 +1,304 @@
+"""
+Race Simulation Module
+
+Monte Carlo simulation of full race outcomes under a Plackett-Luce model.
+Finishing orders are sampled with the Gumbel-max trick (sorting
+log-strength + Gumbel noise), vectorized across draws and across all races
+of a day, and seeded for reproducibility.
+
+Outputs per race:
+    - Finish-position distribution for every horse
+    - 95% Monte Carlo confidence intervals for win/place probabilities
+    - Trifecta outcome frequencies, and the most likely combinations of every
+      exotic ticket type derived from them
+
+Summaries are cached per prediction (strengths + seed + draws), so repeated
+requests for the same prediction cost a dictionary lookup. simulate_day()
+simulates all uncached races of a day in one batch.
+"""
+
+import hashlib
+import logging
+from collections import OrderedDict
+from collections.abc import Sequence
+from typing import Any
+
+import numpy as np
+
+from src.cache import TTL_SIMULATION, cache_get, cache_set
+from src.config import SIMULATION_N_DRAWS, SIMULATION_SEED
+from src.models.exotic_probabilities import (
+    EXOTIC_TICKET_SIZES,
+    MAX_HORSES,
+    ExoticProbabilities,
+    probabilities_from_trifecta,
+)
+
+logger = logging.getLogger(__name__)
+
+# z-score for 95% confidence intervals
+Z_95 = 1.96
+
+# Most likely combinations kept per exotic ticket type
+EXOTIC_TOP_N = 10
+
+# Process-local cache of simulation summaries (in front of Redis)
+_LOCAL_CACHE_SIZE = 256
+_local_cache: OrderedDict[str, dict[str, Any]] = OrderedDict()
+
+
+def strengths_from_predictions(
+    horse_numbers: Sequence[int],
+    win_probs: Sequence[float] | None = None,
+    rank_scores: Sequence[float] | None = None,
+    temperature: float = 1.0,
+) -> np.ndarray:
+    """
+    Build Plackett-Luce strengths on the 18-horse axis.
+
+    Calibrated win probabilities are used directly (PL win marginals then
+    equal the model's win probabilities). Without them, strengths are a
+    softmax of negated rank scores (lower score = stronger).
+
+    Args:
+        horse_numbers: Horse numbers (1-18).
+        win_probs: Win probabilities (optional).
+        rank_scores: Ranker scores, lower is better (optional).
+        temperature: Softmax temperature for rank scores.
+
+    Returns:
+        (18,) strengths summing to 1; 0 for horse numbers not in the field.
+
+    Raises:
+        ValueError: No usable strengths.
+    """
+    numbers = np.asarray(horse_numbers, dtype=np.int64)
+    valid = (numbers >= 1) & (numbers <= MAX_HORSES)
+    strengths = np.zeros(MAX_HORSES, dtype=np.float64)
+
+    if win_probs is not None and np.nansum(np.asarray(win_probs, dtype=np.float64)) > 0:
+        values = np.clip(np.nan_to_num(np.asarray(win_probs, dtype=np.float64)), 0.0, None)
+    elif rank_scores is not None and len(rank_scores) > 0:
+        scores = -np.asarray(rank_scores, dtype=np.float64) / temperature
+        values = np.exp(scores - scores[valid].max())
+    else:
+        raise ValueError("Either win_probs or rank_scores is required")
+
+    strengths[numbers[valid] - 1] = values[valid]
+    total = strengths.sum()
+    if total <= 0:
+        raise ValueError("Strengths must have a positive sum")
+    return strengths / total
+
+
+def sample_finishing_orders(
+    strengths: np.ndarray, n_draws: int, rng: np.random.Generator
+) -> np.ndarray:
+    """
+    Sample finishing orders for one or more races.
+
+    Args:
+        strengths: (n_races, 18) Plackett-Luce strengths (0 = not running).
+        n_draws: Number of simulated races per race.
+        rng: Random generator.
+
+    Returns:
+        (n_races, n_draws, 18) horse indices in finishing order. Non-runners
+        sort last.
+    """
+    with np.errstate(divide="ignore"):
+        log_strengths = np.log(strengths)
+    gumbel = rng.gumbel(size=(strengths.shape[0], n_draws, MAX_HORSES))
+    keys = log_strengths[:, None, :] + gumbel
+    return np.argsort(-keys, axis=2, kind="stable")
+
+
+def _summarize(strengths: np.ndarray, orders: np.ndarray) -> dict[str, Any]:
+    """Aggregate sampled finishing orders of one race into a summary."""
+    n_draws = orders.shape[0]
+    runners = np.flatnonzero(strengths > 0)
+    n_runners = len(runners)
+
+    # position_counts[h, k] = number of draws where horse h finished k-th
+    cells = orders * MAX_HORSES + np.arange(MAX_HORSES)[None, :]
+    position_counts = np.bincount(cells.ravel(), minlength=MAX_HORSES * MAX_HORSES).reshape(
+        MAX_HORSES, MAX_HORSES
+    )
+
+    # Trifecta outcome frequencies keyed by packed combination index
+    top3 = orders[:, :3]
+    combo = (top3[:, 0] * MAX_HORSES + top3[:, 1]) * MAX_HORSES + top3[:, 2]
+    combo_ids, combo_counts = np.unique(combo, return_counts=True)
+    trifecta_counts = {str(int(i)): int(c) for i, c in zip(combo_ids, combo_counts, strict=True)}
+
+    win = position_counts[:, 0] / n_draws
+    place = position_counts[:, :3].sum(axis=1) / n_draws
+    win_se = np.sqrt(win * (1 - win) / n_draws)
+    place_se = np.sqrt(place * (1 - place) / n_draws)
+
+    horses = {}
+    for h in runners:
+        dist = position_counts[h, :n_runners] / n_draws
+        horses[str(h + 1)] = {
+            "position_distribution": {
+                "first": round(float(dist[0]), 4),
+                "second": round(float(dist[1]) if n_runners > 1 else 0.0, 4),
+                "third": round(float(dist[2]) if n_runners > 2 else 0.0, 4),
+                "out_of_place": round(float(dist[3:].sum()), 4),
+            },
+            "position_probabilities": [round(float(p), 4) for p in dist],
+            "win_probability": round(float(win[h]), 4),
+            "win_ci": [
+                round(float(max(0.0, win[h] - Z_95 * win_se[h])), 4),
+                round(float(min(1.0, win[h] + Z_95 * win_se[h])), 4),
+            ],
+            "place_probability": round(float(place[h]), 4),
+            "place_ci": [
+                round(float(max(0.0, place[h] - Z_95 * place_se[h])), 4),
+                round(float(min(1.0, place[h] + Z_95 * place_se[h])), 4),
+            ],
+        }
+
+    summary = {"n_draws": n_draws, "horses": horses, "trifecta_counts": trifecta_counts}
+    summary["exotic"] = _top_exotics(simulated_exotic_probabilities(summary))
+    return summary
+
+
+def _top_exotics(exotic: ExoticProbabilities, limit: int = EXOTIC_TOP_N) -> dict[str, list]:
+    """Most likely combinations of every exotic ticket type, best first."""
+    top: dict[str, list] = {}
+    for ticket_type in EXOTIC_TICKET_SIZES:
+        probabilities = exotic.ticket(ticket_type)
+        flat = probabilities.ravel()
+        candidates = np.flatnonzero(flat > 0)
+        order = candidates[np.argsort(-flat[candidates], kind="stable")][:limit]
+        coords = np.unravel_index(order, probabilities.shape)
+        top[ticket_type] = [
+            {
+                "numbers": [int(c[n]) + 1 for c in coords],
+                "probability": round(float(flat[i]), 4),
+            }
+            for n, i in enumerate(order)
+        ]
+    return top
+
+
+def simulate_races(
+    strengths: np.ndarray,
+    n_draws: int = SIMULATION_N_DRAWS,
+    seed: int = SIMULATION_SEED,
+) -> list[dict[str, Any]]:
+    """
+    Simulate several races in one vectorized batch.
+
+    Args:
+        strengths: (n_races, 18) Plackett-Luce strengths.
+        n_draws: Number of simulated races per race.
+        seed: Random seed.
+
+    Returns:
+        List of simulation summaries (one per race).
+    """
+    strengths = np.atleast_2d(np.asarray(strengths, dtype=np.float64))
+    rng = np.random.default_rng(seed)
+    orders = sample_finishing_orders(strengths, n_draws, rng)
+    return [_summarize(strengths[r], orders[r]) for r in range(strengths.shape[0])]
+
+
+def _cache_key(race_id: str, strengths: np.ndarray, n_draws: int, seed: int) -> str:
+    """Build a cache key identifying one prediction's simulation."""
+    digest = hashlib.sha1(np.round(strengths, 6).tobytes()).hexdigest()[:16]
+    return f"simulation:{race_id}:{digest}:{n_draws}:{seed}"
+
+
+def simulate_day(
+    race_ids: Sequence[str],
+    strengths: np.ndarray,
+    n_draws: int = SIMULATION_N_DRAWS,
+    seed: int = SIMULATION_SEED,
+) -> list[dict[str, Any]]:
+    """
+    Simulate a day's races with caching per prediction.
+
+    Races already simulated for the same strengths are read from the cache;
+    the rest are simulated together in one simulate_races() batch.
+
+    Args:
+        race_ids: Race IDs (cache namespace), one per strengths row.
+        strengths: (n_races, 18) Plackett-Luce strengths.
+        n_draws: Number of simulated races per race.
+        seed: Random seed.
+
+    Returns:
+        Simulation summaries in race_ids order.
+    """
+    strengths = np.atleast_2d(np.asarray(strengths, dtype=np.float64))
+    keys = [
+        _cache_key(race_id, row, n_draws, seed)
+        for race_id, row in zip(race_ids, strengths, strict=True)
+    ]
+
+    summaries: list[dict[str, Any] | None] = []
+    for key in keys:
+        summary = _local_cache.get(key)
+        if summary is None:
+            summary = cache_get(key)
+        else:
+            _local_cache.move_to_end(key)
+        summaries.append(summary)
+
+    missing = [i for i, summary in enumerate(summaries) if summary is None]
+    if missing:
+        simulated = simulate_races(strengths[missing], n_draws=n_draws, seed=seed)
+        for i, summary in zip(missing, simulated, strict=True):
+            cache_set(keys[i], summary, ttl=TTL_SIMULATION)
+            summaries[i] = summary
+        logger.debug(f"Races simulated: {len(missing)}/{len(keys)}, draws={n_draws}")
+
+    results = [summary for summary in summaries if summary is not None]
+    for key, summary in zip(keys, results, strict=True):
+        _local_cache[key] = summary
+        _local_cache.move_to_end(key)
+    while len(_local_cache) > _LOCAL_CACHE_SIZE:
+        _local_cache.popitem(last=False)
+    return results
+
+
+def simulate_race(
+    race_id: str,
+    strengths: np.ndarray,
+    n_draws: int = SIMULATION_N_DRAWS,
+    seed: int = SIMULATION_SEED,
+) -> dict[str, Any]:
+    """
+    Simulate a race with caching per prediction.
+
+    Args:
+        race_id: Race ID (cache namespace).
+        strengths: (18,) Plackett-Luce strengths.
+        n_draws: Number of simulated races.
+        seed: Random seed.
+
+    Returns:
+        Simulation summary.
+    """
+    return simulate_day([race_id], strengths[None, :], n_draws=n_draws, seed=seed)[0]
+
+
+def simulated_exotic_probabilities(summary: dict[str, Any]) -> ExoticProbabilities:
+    """
+    Convert a simulation summary into exotic ticket probabilities.
+
+    Args:
+        summary: Simulation summary from simulate_race/simulate_races.
+
+    Returns:
+        ExoticProbabilities estimated from trifecta outcome frequencies.
+    """
+    trifecta = np.zeros(MAX_HORSES**3, dtype=np.float64)
+    counts = summary["trifecta_counts"]
+    if counts:
+        indices = np.fromiter((int(i) for i in counts), dtype=np.int64, count=len(counts))
+        trifecta[indices] = np.fromiter(counts.values(), dtype=np.float64, count=len(counts))
+    trifecta /= summary["n_draws"]
+    return probabilities_from_trifecta(trifecta.reshape((MAX_HORSES,) * 3))
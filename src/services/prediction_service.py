@@ -5,12 +5,15 @@ Service layer for generating, saving, and retrieving race predictions.
 Uses ML ensemble models (XGBoost + LightGBM + CatBoost) for probability-based ranking.
 """
 
+import asyncio
 import logging
 import os
+from datetime import datetime
 
 from src.api.schemas.prediction import (
     EVRecommendationEntry,
     EVRecommendations,
+    ExoticEVRecommendationEntry,
     PredictionResponse,
 )
 from src.exceptions import (
@@ -18,7 +21,14 @@ from src.exceptions import (
     PredictionError,
 )
 from src.models.ev_recommender import EVRecommender
-from src.services.prediction.ml_engine import compute_ml_predictions
+from src.services.odds_watcher import get_latest_ev, get_odds_watcher
+from src.services.prediction.ml_engine import (
+    build_feature_snapshots,
+    compute_ml_predictions,
+    ensure_feature_snapshot,
+    warm_models,
+    warm_race_model,
+)
 from src.services.prediction.persistence import (
     get_prediction_by_id,
     get_predictions_by_race,
@@ -33,6 +43,66 @@ from src.services.prediction.result_generator import (
 logger = logging.getLogger(__name__)
 
 
+def _ev_entries(ev_recs: dict) -> tuple[list[EVRecommendationEntry], list[EVRecommendationEntry]]:
+    """Convert EVRecommender win/place recommendations to schema entries."""
+    win_recs = [
+        EVRecommendationEntry(
+            horse_number=r["horse_number"],
+            horse_name=r["horse_name"],
+            bet_type="win",
+            probability=r["win_probability"],
+            odds=r["odds"],
+            expected_value=r["expected_value"],
+        )
+        for r in ev_recs.get("win_recommendations", [])
+    ]
+    place_recs = [
+        EVRecommendationEntry(
+            horse_number=r["horse_number"],
+            horse_name=r["horse_name"],
+            bet_type="place",
+            probability=r["place_probability"],
+            odds=r["odds"],
+            expected_value=r["expected_value"],
+        )
+        for r in ev_recs.get("place_recommendations", [])
+    ]
+    return win_recs, place_recs
+
+
+def apply_latest_ev(prediction: PredictionResponse) -> PredictionResponse:
+    """
+    Replace a final prediction's win/place EV with the odds watcher's latest.
+
+    The watcher recomputes EV of registered predictions as odds change; the
+    stored recommendations are kept when it has none for this prediction.
+
+    Args:
+        prediction: Saved prediction
+
+    Returns:
+        The same prediction, updated in place
+    """
+    result = prediction.prediction_result
+    if not prediction.is_final or result.ev_recommendations is None:
+        return prediction
+
+    ev_recs = get_latest_ev(prediction.race_id, prediction.prediction_id)
+    if ev_recs is None:
+        return prediction
+
+    win_recs, place_recs = _ev_entries(ev_recs)
+    result.ev_recommendations = result.ev_recommendations.model_copy(
+        update={
+            "win_recommendations": win_recs,
+            "place_recommendations": place_recs,
+            "odds_source": ev_recs.get("odds_source", "realtime"),
+            "odds_time": ev_recs.get("odds_time"),
+        }
+    )
+    return prediction
+
+
 def _is_mock_mode() -> bool:
     """Check if running in mock mode."""
     return os.getenv("DB_MODE", "local") == "mock"
@@ -109,19 +179,19 @@ async def generate_prediction(
         )
 
         # 5. Calculate EV recommendations (using realtime odds for final predictions)
+        ranked_horses = [
+            {
+                "horse_number": h.horse_number,
+                "horse_name": h.horse_name,
+                "win_probability": h.win_probability,
+                "place_probability": h.place_probability,
+                "rank": h.rank,
+            }
+            for h in prediction_response.prediction_result.ranked_horses
+        ]
         if is_final:
             try:
                 ev_recommender = EVRecommender()
-                ranked_horses = [
-                    {
-                        "horse_number": h.horse_number,
-                        "horse_name": h.horse_name,
-                        "win_probability": h.win_probability,
-                        "place_probability": h.place_probability,
-                        "rank": h.rank,
-                    }
-                    for h in prediction_response.prediction_result.ranked_horses
-                ]
                 ev_recs = ev_recommender.get_recommendations(
                     race_code=race_id,
                     ranked_horses=ranked_horses,
@@ -129,37 +199,32 @@ async def generate_prediction(
                 )
 
                 # Convert to schema format
-                win_recs = [
-                    EVRecommendationEntry(
-                        horse_number=r["horse_number"],
-                        horse_name=r["horse_name"],
-                        bet_type="win",
-                        probability=r["win_probability"],
-                        odds=r["odds"],
-                        expected_value=r["expected_value"],
-                    )
-                    for r in ev_recs.get("win_recommendations", [])
-                ]
-                place_recs = [
-                    EVRecommendationEntry(
-                        horse_number=r["horse_number"],
-                        horse_name=r["horse_name"],
-                        bet_type="place",
-                        probability=r["place_probability"],
+                win_recs, place_recs = _ev_entries(ev_recs)
+
+                exotic_recs = [
+                    ExoticEVRecommendationEntry(
+                        bet_type=bet_type,
+                        numbers=r["numbers"],
+                        probability=r["probability"],
                         odds=r["odds"],
                         expected_value=r["expected_value"],
                     )
-                    for r in ev_recs.get("place_recommendations", [])
+                    for bet_type, recs in ev_recommender.get_exotic_recommendations(
+                        race_code=race_id, ranked_horses=ranked_horses
+                    ).items()
+                    for r in recs
                 ]
 
                 prediction_response.prediction_result.ev_recommendations = EVRecommendations(
                     win_recommendations=win_recs,
                     place_recommendations=place_recs,
+                    exotic_recommendations=exotic_recs,
                     odds_source=ev_recs.get("odds_source", "realtime"),
                     odds_time=ev_recs.get("odds_time"),
                 )
                 logger.info(
-                    f"EV recommendations calculated: win={len(win_recs)}, place={len(place_recs)}"
+                    f"EV recommendations calculated: win={len(win_recs)}, place={len(place_recs)}, "
+                    f"exotic={len(exotic_recs)}"
                 )
             except Exception as e:
                 logger.warning(f"EV recommendation calculation failed (skipped): {e}")
@@ -168,6 +233,11 @@ async def generate_prediction(
         prediction_id = await save_prediction(prediction_response)
         prediction_response.prediction_id = prediction_id
 
+        # Keep EV current as odds move (recomputed by the odds watcher on its next poll)
+        watcher = get_odds_watcher()
+        if is_final and watcher is not None:
+            watcher.register_prediction(race_id, ranked_horses, prediction_id)
+
         logger.info(f"ML prediction completed: prediction_id={prediction_id}")
         return prediction_response
 
@@ -180,12 +250,87 @@ async def generate_prediction(
         raise PredictionError(f"Error during prediction generation: {e}") from e
 
 
+async def warm_prediction(race_id: str) -> dict:
+    """
+    Warm caches shortly before a race's final prediction.
+
+    Loads the race's surface model into the model cache and builds the race's
+    feature snapshot if the evening run missed it or its entries changed, so
+    the final prediction only patches race-day columns and re-scores.
+
+    Args:
+        race_id: Race ID (16 digits)
+
+    Returns:
+        {"race_id", "model", "snapshot"}; model is None if no model file is available
+
+    Raises:
+        MissingDataError: If the race does not exist
+    """
+    if _is_mock_mode():
+        return {"race_id": race_id, "model": None, "snapshot": False}
+
+    from src.db.async_connection import get_connection
+    from src.db.queries import check_race_exists
+
+    async with get_connection() as conn:
+        if not await check_race_exists(conn, race_id):
+            raise MissingDataError(f"Race not found: race_id={race_id}")
+
+    # Model loading and feature extraction are blocking; keep them off the event loop
+    model_name = await asyncio.to_thread(warm_race_model, race_id)
+    has_snapshot = await asyncio.to_thread(ensure_feature_snapshot, race_id)
+    logger.info(
+        f"Prediction warmed: race_id={race_id}, model={model_name}, snapshot={has_snapshot}"
+    )
+    return {"race_id": race_id, "model": model_name, "snapshot": has_snapshot}
+
+
+async def warm_startup_models() -> list[str]:
+    """
+    Load the surface models in a worker thread (API startup warm-up).
+
+    Returns:
+        Loaded model file names (empty in mock mode or on failure)
+    """
+    if _is_mock_mode():
+        return []
+
+    try:
+        loaded = await asyncio.to_thread(warm_models)
+    except Exception as e:
+        logger.warning(f"Model warm-up failed: {e}")
+        return []
+    logger.info(f"Models warmed: {loaded}")
+    return loaded
+
+
+async def snapshot_race_features(race_date: str) -> list[str]:
+    """
+    Store pre-race feature snapshots for a date's card (evening run).
+
+    Args:
+        race_date: Race date (YYYY-MM-DD format)
+
+    Returns:
+        Race IDs whose snapshot was stored
+    """
+    if _is_mock_mode():
+        return []
+
+    target_date = datetime.strptime(race_date, "%Y-%m-%d").date()
+    return await asyncio.to_thread(build_feature_snapshots, target_date)
+
+
 # Re-export persistence functions for backward compatibility
 __all__ = [
     "generate_prediction",
+    "warm_prediction",
+    "snapshot_race_features",
     "save_prediction",
     "get_prediction_by_id",
     "get_predictions_by_race",
+    "apply_latest_ev",
 ]
 
 
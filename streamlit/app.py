@@ -7,7 +7,8 @@ Displays hit rates, ROI, and model statistics from database.
 
 import os
 import sys
-from datetime import datetime
+from contextlib import contextmanager
+from datetime import date, datetime, timedelta
 from pathlib import Path
 
 import pandas as pd
@@ -19,6 +20,13 @@ import streamlit as st
 # Add project root to path
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
+from src.scheduler.result.summary import (  # noqa: E402
+    get_cumulative_summary,
+    get_daily_summaries,
+    get_period_summary,
+    summary_rates,
+)
+
 # Page configuration
 st.set_page_config(
     page_title="競馬予想ダッシュボード",
@@ -33,116 +41,108 @@ st.set_page_config(
 # =============================================================================
 
 
-def get_db_connection():
-    """Get database connection."""
+@st.cache_resource
+def get_db_pool():
+    """Connection pool shared by every session (created once per server process)."""
+    from psycopg2.pool import ThreadedConnectionPool
+
+    return ThreadedConnectionPool(
+        1,
+        4,
+        host=os.getenv("DB_HOST", "host.docker.internal"),
+        port=os.getenv("DB_PORT", "5432"),
+        database=os.getenv("DB_NAME", "keiba_db"),
+        user=os.getenv("DB_USER", "postgres"),
+        password=os.getenv("DB_PASSWORD", ""),
+    )
+
+
+@contextmanager
+def pooled_connection():
+    """Borrow a pooled connection (yields None if the database is unavailable)."""
     try:
-        import psycopg2
-
-        conn = psycopg2.connect(
-            host=os.getenv("DB_HOST", "host.docker.internal"),
-            port=os.getenv("DB_PORT", "5432"),
-            database=os.getenv("DB_NAME", "keiba_db"),
-            user=os.getenv("DB_USER", "postgres"),
-            password=os.getenv("DB_PASSWORD", ""),
-        )
-        return conn
+        db_pool = get_db_pool()
+        conn = db_pool.getconn()
     except Exception as e:
         st.error(f"DB接続エラー: {e}")
-        return None
+        yield None
+        return
+
+    try:
+        yield conn
+    finally:
+        # End the read transaction; drop connections the server closed
+        if not conn.closed:
+            conn.rollback()
+        db_pool.putconn(conn, close=bool(conn.closed))
 
 
 @st.cache_data(ttl=300)
 def get_analysis_results(days: int = 30) -> pd.DataFrame:
-    """Get analysis results from database."""
-    conn = get_db_connection()
-    if not conn:
-        return pd.DataFrame()
+    """Get daily results (dashboard_daily_summary), newest first."""
+    with pooled_connection() as conn:
+        if conn is None:
+            return pd.DataFrame()
+        try:
+            rows = get_daily_summaries(conn, date.today() - timedelta(days=days))
+        except Exception as e:
+            st.error(f"データ取得エラー: {e}")
+            return pd.DataFrame()
 
-    try:
-        query = """
-            SELECT
-                analysis_date,
-                total_races,
-                analyzed_races,
-                tansho_hit,
-                fukusho_hit,
-                umaren_hit,
-                sanrenpuku_hit,
-                top3_cover,
-                tansho_rate,
-                fukusho_rate,
-                umaren_rate,
-                sanrenpuku_rate,
-                top3_cover_rate,
-                mrr,
-                tansho_roi,
-                fukusho_roi,
-                axis_fukusho_roi,
-                tansho_investment,
-                tansho_return,
-                fukusho_investment,
-                fukusho_return
-            FROM analysis_results
-            WHERE analysis_date >= CURRENT_DATE - INTERVAL '%s days'
-            ORDER BY analysis_date DESC
-        """
-        df = pd.read_sql_query(query, conn, params=(days,))
-        return df
-    except Exception as e:
-        st.error(f"データ取得エラー: {e}")
+    if not rows:
         return pd.DataFrame()
-    finally:
-        conn.close()
+    records = [
+        {"analysis_date": r["summary_date"], "analyzed_races": r["analyzed_races"]}
+        | {k: v for k, v in summary_rates(r).items() if k != "calibration"}
+        for r in rows
+    ]
+    return pd.DataFrame(records).sort_values("analysis_date", ascending=False)
 
 
 @st.cache_data(ttl=300)
 def get_cumulative_stats() -> dict | None:
-    """Get cumulative statistics."""
-    conn = get_db_connection()
-    if not conn:
-        return None
+    """Get all-time statistics (latest dashboard_cumulative_summary row)."""
+    with pooled_connection() as conn:
+        if conn is None:
+            return None
+        try:
+            row = get_cumulative_summary(conn)
+        except Exception as e:
+            st.error(f"累積統計取得エラー: {e}")
+            return None
 
-    try:
-        cur = conn.cursor()
-        cur.execute(
-            """
-            SELECT
-                total_races,
-                total_tansho_hit,
-                total_fukusho_hit,
-                total_umaren_hit,
-                total_sanrenpuku_hit,
-                cumulative_tansho_rate,
-                cumulative_fukusho_rate,
-                cumulative_umaren_rate,
-                cumulative_sanrenpuku_rate,
-                last_updated
-            FROM accuracy_tracking
-            LIMIT 1
-        """
-        )
-        row = cur.fetchone()
-        cur.close()
-
-        if row:
-            return {
-                "total_races": row[0] or 0,
-                "tansho_hit": row[1] or 0,
-                "fukusho_hit": row[2] or 0,
-                "umaren_hit": row[3] or 0,
-                "sanrenpuku_hit": row[4] or 0,
-                "tansho_rate": row[5] or 0,
-                "fukusho_rate": row[6] or 0,
-                "umaren_rate": row[7] or 0,
-                "sanrenpuku_rate": row[8] or 0,
-                "last_updated": row[9],
-            }
+    if not row:
         return None
-    except Exception as e:
-        st.error(f"累積統計取得エラー: {e}")
+    rates = summary_rates(row)
+    return {
+        "total_races": row["analyzed_races"],
+        "tansho_hit": row["tansho_hit"],
+        "fukusho_hit": row["fukusho_hit"],
+        "umaren_hit": row["umaren_hit"],
+        "sanrenpuku_hit": row["sanrenpuku_hit"],
+        "tansho_rate": rates["tansho_rate"] or 0,
+        "fukusho_rate": rates["fukusho_rate"] or 0,
+        "umaren_rate": rates["umaren_rate"] or 0,
+        "sanrenpuku_rate": rates["sanrenpuku_rate"] or 0,
+        "last_updated": row["updated_at"].strftime("%Y-%m-%d %H:%M"),
+    }
+
+
+@st.cache_data(ttl=300)
+def get_period_stats(days: int) -> dict | None:
+    """Get totals, rates and calibration of the selected period (two cumulative rows)."""
+    with pooled_connection() as conn:
+        if conn is None:
+            return None
+        try:
+            row = get_period_summary(conn, date.today() - timedelta(days=days))
+        except Exception as e:
+            st.error(f"期間集計取得エラー: {e}")
+            return None
+
+    if not row:
         return None
-    finally:
-        conn.close()
+    return row | summary_rates(row)
 
 
 @st.cache_data(ttl=600)
@@ -179,42 +179,41 @@ def get_model_info() -> dict | None:
         pass  # Fall through to database lookup
 
     # Fallback: try to get model info from database
-    conn = get_db_connection()
-    if conn:
-        try:
-            cur = conn.cursor()
-            cur.execute(
+    row = None
+    with pooled_connection() as conn:
+        if conn is not None:
+            try:
+                cur = conn.cursor()
+                cur.execute(
+                    """
+                    SELECT model_version, calibration_data, created_at
+                    FROM model_calibration
+                    WHERE is_active = TRUE
+                    ORDER BY created_at DESC
+                    LIMIT 1
                 """
-                SELECT model_version, calibration_data, created_at
-                FROM model_calibration
-                WHERE is_active = TRUE
-                ORDER BY created_at DESC
-                LIMIT 1
-            """
-            )
-            row = cur.fetchone()
-            cur.close()
-
-            if row:
-                import json
-
-                calibration_data = row[1]
-                if isinstance(calibration_data, str):
-                    calibration_data = json.loads(calibration_data)
-
-                return {
-                    "trained_at": row[2].strftime("%Y-%m-%d %H:%M") if row[2] else "不明",
-                    "version": row[0] or "不明",
-                    "feature_count": calibration_data.get("feature_count", "不明"),
-                    "win_auc": calibration_data.get("win_auc"),
-                    "place_auc": calibration_data.get("place_auc"),
-                    "weights": calibration_data.get("weights", {}),
-                    "samples": calibration_data.get("samples"),
-                }
-        except Exception:
-            pass
-        finally:
-            conn.close()
+                )
+                row = cur.fetchone()
+                cur.close()
+            except Exception:
+                pass
+
+    if row:
+        import json
+
+        calibration_data = row[1]
+        if isinstance(calibration_data, str):
+            calibration_data = json.loads(calibration_data)
+
+        return {
+            "trained_at": row[2].strftime("%Y-%m-%d %H:%M") if row[2] else "不明",
+            "version": row[0] or "不明",
+            "feature_count": calibration_data.get("feature_count", "不明"),
+            "win_auc": calibration_data.get("win_auc"),
+            "place_auc": calibration_data.get("place_auc"),
+            "weights": calibration_data.get("weights", {}),
+            "samples": calibration_data.get("samples"),
+        }
 
     # Return default values if all else fails
     return {
@@ -278,6 +277,7 @@ st.markdown("機械学習アンサンブルモデル（XGBoost + LightGBM + CatB
 
 # Load data
 analysis_df = get_analysis_results(selected_days)
+period = get_period_stats(selected_days)
 cumulative = get_cumulative_stats()
 model_info = get_model_info()
 
@@ -552,21 +552,21 @@ st.markdown("---")
 # Recent Period Summary
 # =============================================================================
 
-if not analysis_df.empty:
+if period:
     st.markdown(f"## 📋 {date_range}の集計")
 
-    total_races = analysis_df["analyzed_races"].sum()
-    total_tansho = analysis_df["tansho_hit"].sum()
-    total_fukusho = analysis_df["fukusho_hit"].sum()
+    total_races = period["analyzed_races"]
+    total_tansho = period["tansho_hit"]
+    total_fukusho = period["fukusho_hit"]
 
-    # ROI calculation from investment/return totals
-    total_tansho_inv = analysis_df["tansho_investment"].sum()
-    total_tansho_ret = analysis_df["tansho_return"].sum()
-    total_fukusho_inv = analysis_df["fukusho_investment"].sum()
-    total_fukusho_ret = analysis_df["fukusho_return"].sum()
+    # ROI from the period's investment/return totals
+    total_tansho_inv = period["tansho_investment"]
+    total_tansho_ret = period["tansho_return"]
+    total_fukusho_inv = period["fukusho_investment"]
+    total_fukusho_ret = period["fukusho_return"]
 
-    tansho_roi = (total_tansho_ret / total_tansho_inv * 100) if total_tansho_inv > 0 else 0
-    fukusho_roi = (total_fukusho_ret / total_fukusho_inv * 100) if total_fukusho_inv > 0 else 0
+    tansho_roi = period["tansho_roi"] or 0
+    fukusho_roi = period["fukusho_roi"] or 0
 
     col1, col2, col3, col4, col5 = st.columns(5)
 
@@ -601,6 +601,37 @@ if not analysis_df.empty:
             help=f"投資{total_fukusho_inv:,}円 → 回収{total_fukusho_ret:,}円",
         )
 
+    if period["calibration"]:
+        st.subheader("キャリブレーション（TOP1予想の単勝確率と実際の勝率）")
+        calib_df = pd.DataFrame(period["calibration"])
+        fig_calib = go.Figure()
+        fig_calib.add_trace(
+            go.Bar(
+                x=calib_df["bin"],
+                y=calib_df["actual_rate"],
+                name="実際の勝率",
+                marker_color="#1f77b4",
+                customdata=calib_df["races"],
+                hovertemplate="%{x}: %{y:.1f}% (%{customdata}R)<extra></extra>",
+            )
+        )
+        fig_calib.add_trace(
+            go.Scatter(
+                x=calib_df["bin"],
+                y=calib_df["predicted_rate"],
+                mode="lines+markers",
+                name="予測確率（区間中央）",
+                line={"color": "gray", "dash": "dash"},
+            )
+        )
+        fig_calib.update_layout(
+            xaxis_title="予測単勝確率",
+            yaxis_title="勝率 (%)",
+            height=350,
+            legend={"x": 0.02, "y": 0.98},
+        )
+        st.plotly_chart(fig_calib, use_container_width=True)
+
 st.markdown("---")
 
 # =============================================================================
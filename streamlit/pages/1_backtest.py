@@ -21,6 +21,26 @@ st.set_page_config(
 st.title("📊 バックテスト結果")
 st.markdown("過去の予想精度とパフォーマンス分析")
 
+# Columns this page plots (the race parquet has many more)
+PLOT_COLUMNS = [
+    "date",
+    "race_name",
+    "track",
+    "predicted_rank1",
+    "actual_rank1",
+    "roi",
+    "ev_recommended",
+]
+
+
+@st.cache_data
+def read_race_results(path: str, mtime: float) -> pd.DataFrame:
+    """Read the plotted columns of a race parquet (cached per file version)."""
+    import pyarrow.parquet as pq
+
+    available = set(pq.read_schema(path).names)
+    return pd.read_parquet(path, columns=[c for c in PLOT_COLUMNS if c in available])
+
 
 def load_results():
     """Load backtest results."""
@@ -28,6 +48,15 @@ def load_results():
     if not results_dir.exists():
         return None
 
+    # Per-race results written by src.scheduler.backtest.engine (newest first)
+    race_files = [
+        file
+        for file in sorted(results_dir.glob("*.parquet"), reverse=True)
+        if not file.stem.endswith("_bets")
+    ]
+    if race_files:
+        return read_race_results(str(race_files[0]), race_files[0].stat().st_mtime)
+
     results = []
     for file in sorted(results_dir.glob("*.json"), reverse=True):
         try:
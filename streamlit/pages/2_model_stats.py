@@ -4,12 +4,36 @@ Model Statistics Page
 Displays ML model information and feature importance.
 """
 
-import streamlit as st
+import sys
+from pathlib import Path
+
 import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
-from pathlib import Path
-import json
+
+import streamlit as st
+
+# Add project root to path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from src.models.artifact_index import (  # noqa: E402
+    IMPORTANCE_TABLE,
+    RUNS_TABLE,
+    index_mtime,
+    read_index,
+)
+
+MODEL_DIR = Path("models")
+MODEL_LABELS = {"mixed": "全体モデル", "turf": "芝モデル", "dirt": "ダートモデル"}
+
+
+@st.cache_data
+def load_index_slice(
+    table: str, columns: tuple[str, ...], model: str, version: float
+) -> pd.DataFrame:
+    """Read a column slice of the artifact index (cached until the index changes)."""
+    return read_index(MODEL_DIR, table, columns=list(columns), model=model)
+
 
 st.set_page_config(
     page_title="モデル統計",
@@ -72,68 +96,80 @@ st.markdown("---")
 
 st.markdown("## 📈 学習履歴")
 
-# Sample training history
-training_history = pd.DataFrame(
-    {
-        "date": pd.date_range(end="2025-01-28", periods=10, freq="W"),
-        "train_auc": [0.68, 0.69, 0.70, 0.70, 0.71, 0.71, 0.72, 0.72, 0.72, 0.72],
-        "val_auc": [0.66, 0.67, 0.68, 0.68, 0.69, 0.69, 0.70, 0.70, 0.71, 0.72],
-        "train_samples": [
-            100000,
-            105000,
-            110000,
-            112000,
-            115000,
-            118000,
-            120000,
-            122000,
-            124000,
-            125000,
-        ],
-    }
+model_name = st.selectbox(
+    "モデル",
+    list(MODEL_LABELS),
+    format_func=lambda name: MODEL_LABELS[name],
 )
+index_version = index_mtime(MODEL_DIR)
 
-col1, col2 = st.columns(2)
+training_history = load_index_slice(
+    RUNS_TABLE,
+    ("date", "win_auc", "place_auc", "new_win_auc", "samples", "deployed"),
+    model_name,
+    index_version,
+)
 
-with col1:
-    fig_auc = go.Figure()
-    fig_auc.add_trace(
-        go.Scatter(
-            x=training_history["date"],
-            y=training_history["train_auc"],
-            name="Training AUC",
-            mode="lines+markers",
-        )
+if training_history.empty:
+    st.info(
+        "学習履歴のインデックスがありません"
+        "（`python -m src.models.artifact_index --rebuild` で作成できます）"
     )
-    fig_auc.add_trace(
-        go.Scatter(
-            x=training_history["date"],
-            y=training_history["val_auc"],
-            name="Validation AUC",
-            mode="lines+markers",
+else:
+    training_history = training_history.assign(
+        date=pd.to_datetime(training_history["date"])
+    ).sort_values("date")
+
+    col1, col2 = st.columns(2)
+
+    with col1:
+        fig_auc = go.Figure()
+        fig_auc.add_trace(
+            go.Scatter(
+                x=training_history["date"],
+                y=training_history["win_auc"],
+                name="単勝AUC (学習時)",
+                mode="lines+markers",
+            )
         )
-    )
-    fig_auc.update_layout(
-        title="AUC推移",
-        xaxis_title="日付",
-        yaxis_title="AUC",
-        height=350,
-    )
-    st.plotly_chart(fig_auc, use_container_width=True)
-
-with col2:
-    fig_samples = px.line(
-        training_history,
-        x="date",
-        y="train_samples",
-        title="学習サンプル数推移",
-    )
-    fig_samples.update_layout(
-        xaxis_title="日付",
-        yaxis_title="サンプル数",
-        height=350,
-    )
-    st.plotly_chart(fig_samples, use_container_width=True)
+        fig_auc.add_trace(
+            go.Scatter(
+                x=training_history["date"],
+                y=training_history["place_auc"],
+                name="複勝AUC (学習時)",
+                mode="lines+markers",
+            )
+        )
+        fig_auc.add_trace(
+            go.Scatter(
+                x=training_history["date"],
+                y=training_history["new_win_auc"],
+                name="単勝AUC (検証年)",
+                mode="lines+markers",
+            )
+        )
+        fig_auc.update_layout(
+            title="AUC推移",
+            xaxis_title="日付",
+            yaxis_title="AUC",
+            height=350,
+        )
+        st.plotly_chart(fig_auc, use_container_width=True)
+
+    with col2:
+        fig_samples = px.line(
+            training_history,
+            x="date",
+            y="samples",
+            title="学習サンプル数推移",
+            markers=True,
+        )
+        fig_samples.update_layout(
+            xaxis_title="日付",
+            yaxis_title="サンプル数",
+            height=350,
+        )
+        st.plotly_chart(fig_samples, use_container_width=True)
 
 st.markdown("---")
 
@@ -143,74 +179,48 @@ st.markdown("---")
 
 st.markdown("## 🎯 特徴量重要度")
 
-# Sample feature importance
-feature_importance = pd.DataFrame(
-    {
-        "feature": [
-            "speed_index",
-            "jockey_win_rate",
-            "horse_career_win_rate",
-            "trainer_win_rate",
-            "distance_aptitude",
-            "track_condition_score",
-            "recent_form_score",
-            "weight_ratio",
-            "draw_advantage",
-            "class_score",
-            "age_factor",
-            "rest_days",
-        ],
-        "importance": [0.15, 0.12, 0.11, 0.09, 0.08, 0.08, 0.07, 0.07, 0.06, 0.06, 0.05, 0.05],
-        "category": [
-            "パフォーマンス",
-            "騎手",
-            "馬",
-            "調教師",
-            "距離",
-            "馬場",
-            "調子",
-            "体重",
-            "枠",
-            "クラス",
-            "馬齢",
-            "休養",
-        ],
-    }
-).sort_values("importance", ascending=True)
-
-col1, col2 = st.columns([2, 1])
+feature_importance = load_index_slice(
+    IMPORTANCE_TABLE,
+    ("trained_at", "feature", "importance", "rank"),
+    model_name,
+    index_version,
+)
 
-with col1:
-    fig_importance = px.bar(
-        feature_importance,
-        x="importance",
-        y="feature",
-        orientation="h",
-        title="特徴量重要度 (Top 12)",
-        color="category",
-    )
-    fig_importance.update_layout(
-        xaxis_title="重要度",
-        yaxis_title="特徴量",
-        height=500,
+if feature_importance.empty:
+    st.info("デプロイ済みモデルの特徴量重要度がありません")
+else:
+    # Latest deployed model only
+    latest = feature_importance["trained_at"].max()
+    feature_importance = feature_importance[feature_importance["trained_at"] == latest]
+    top_n = st.slider("表示件数", min_value=10, max_value=50, value=20, step=5)
+    top_features = feature_importance.nsmallest(top_n, "rank").sort_values(
+        "importance", ascending=True
     )
-    st.plotly_chart(fig_importance, use_container_width=True)
 
-with col2:
-    st.markdown("### カテゴリ別")
-    category_importance = (
-        feature_importance.groupby("category")["importance"].sum().reset_index()
-    )
-    category_importance = category_importance.sort_values("importance", ascending=False)
+    col1, col2 = st.columns([2, 1])
 
-    fig_category = px.pie(
-        category_importance,
-        values="importance",
-        names="category",
-        title="カテゴリ別重要度",
-    )
-    fig_category.update_layout(height=400)
-    st.plotly_chart(fig_category, use_container_width=True)
+    with col1:
+        fig_importance = px.bar(
+            top_features,
+            x="importance",
+            y="feature",
+            orientation="h",
+            title=f"特徴量重要度 (Top {top_n})",
+        )
+        fig_importance.update_layout(
+            xaxis_title="重要度",
+            yaxis_title="特徴量",
+            height=max(400, top_n * 22),
+        )
+        st.plotly_chart(fig_importance, use_container_width=True)
+
+    with col2:
+        st.markdown(f"### 学習日時: {latest[:16]}")
+        st.dataframe(
+            feature_importance.nsmallest(top_n, "rank")[["rank", "feature", "importance"]],
+            use_container_width=True,
+            hide_index=True,
+        )
 
 st.markdown("---")
 
@@ -324,9 +334,8 @@ st.markdown("---")
 
 st.markdown("## 📁 モデルファイル")
 
-model_dir = Path("models")
-if model_dir.exists():
-    model_files = list(model_dir.glob("*.pkl"))
+if MODEL_DIR.exists():
+    model_files = list(MODEL_DIR.glob("*.pkl"))
     if model_files:
         file_info = []
         for f in model_files:
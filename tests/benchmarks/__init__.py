@@ -0,0 +1,5 @@
+"""
+Benchmarks for the feature-extraction and inference hot paths.
+
+Run with: python -m tests.benchmarks --scale day
+"""
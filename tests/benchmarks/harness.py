@@ -0,0 +1,222 @@
+"""
+Benchmark Harness
+
+Measures throughput, latency percentiles and peak RSS for a benchmark
+operation, and compares results against a JSON baseline.
+
+Each benchmark runs in a fresh process (spawn) so peak RSS reflects that
+benchmark alone rather than everything the runner loaded before it.
+
+Usage:
+    result = run_isolated(suites.run_suite, "batch_prediction", context)
+    regressions = compare([result], load_baseline("baseline.json"), tolerance=0.2)
+"""
+
+import json
+import multiprocessing
+import resource
+import sys
+import time
+from collections.abc import Callable
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict, dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+
+BASELINE_VERSION = 1
+
+
+@dataclass
+class BenchmarkResult:
+    """Measurements of one benchmark."""
+
+    name: str
+    unit: str  # What one item is (race, horse, ...)
+    mode: str  # Data source ("db" or "memory"); only equal modes are compared
+    params: dict[str, Any] = field(default_factory=dict)
+    iterations: int = 0
+    items: int = 0
+    total_seconds: float = 0.0
+    throughput: float = 0.0  # items / second
+    latency_ms: dict[str, float] = field(default_factory=dict)  # Per iteration
+    peak_rss_mb: float = 0.0
+    rss_growth_mb: float = 0.0  # Peak RSS increase during the measured iterations
+    skipped: str | None = None
+
+    @property
+    def key(self) -> str:
+        """Baseline key (name and mode)."""
+        return f"{self.name}[{self.mode}]"
+
+
+def peak_rss_mb() -> float:
+    """Peak resident set size of this process in MB."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is bytes on macOS, kilobytes on Linux
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def latency_summary(latencies_ms: list[float]) -> dict[str, float]:
+    """p50/p95/p99/mean/max of per-iteration latencies."""
+    if not latencies_ms:
+        return {}
+    values = np.asarray(latencies_ms)
+    return {
+        "p50": round(float(np.percentile(values, 50)), 3),
+        "p95": round(float(np.percentile(values, 95)), 3),
+        "p99": round(float(np.percentile(values, 99)), 3),
+        "mean": round(float(values.mean()), 3),
+        "max": round(float(values.max()), 3),
+    }
+
+
+def measure(
+    name: str,
+    unit: str,
+    mode: str,
+    operations: list[Callable[[], int]],
+    warmup: int = 1,
+    params: dict[str, Any] | None = None,
+) -> BenchmarkResult:
+    """
+    Time a list of operations.
+
+    Args:
+        name: Benchmark name
+        unit: Item unit for throughput
+        mode: Data source ("db" or "memory")
+        operations: One callable per iteration, each returning the items it processed
+        warmup: Leading operations run untimed (model/JIT/cache warm-up)
+        params: Parameters recorded with the result
+
+    Returns:
+        BenchmarkResult
+    """
+    for op in operations[:warmup]:
+        op()
+
+    rss_before = peak_rss_mb()
+    latencies = []
+    items = 0
+    start = time.perf_counter()
+    for op in operations[warmup:] or operations:
+        op_start = time.perf_counter()
+        items += op()
+        latencies.append((time.perf_counter() - op_start) * 1000)
+    total = time.perf_counter() - start
+    peak = peak_rss_mb()
+
+    return BenchmarkResult(
+        name=name,
+        unit=unit,
+        mode=mode,
+        params=params or {},
+        iterations=len(latencies),
+        items=items,
+        total_seconds=round(total, 4),
+        throughput=round(items / total, 3) if total > 0 else 0.0,
+        latency_ms=latency_summary(latencies),
+        peak_rss_mb=round(peak, 1),
+        rss_growth_mb=round(peak - rss_before, 1),
+    )
+
+
+def run_isolated(func: Callable[..., BenchmarkResult], *args: Any) -> BenchmarkResult:
+    """Run func(*args) in a fresh spawned process and return its result."""
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=1, mp_context=context) as pool:
+        return pool.submit(func, *args).result()
+
+
+def load_baseline(path: str | Path) -> dict[str, dict]:
+    """
+    Load a baseline file.
+
+    Returns:
+        {result key: result dict}, empty if the file does not exist
+    """
+    path = Path(path)
+    if not path.exists():
+        return {}
+    with open(path, encoding="utf-8") as f:
+        data = json.load(f)
+    return {f"{r['name']}[{r['mode']}]": r for r in data.get("results", [])}
+
+
+def save_baseline(path: str | Path, results: list[BenchmarkResult], meta: dict[str, Any]) -> None:
+    """Write results as a baseline file."""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    data = {
+        "version": BASELINE_VERSION,
+        "created_at": datetime.now().isoformat(timespec="seconds"),
+        "meta": meta,
+        "results": [asdict(r) for r in results if r.skipped is None],
+    }
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, indent=2)
+        f.write("\n")
+
+
+def compare(
+    results: list[BenchmarkResult], baseline: dict[str, dict], tolerance: float = 0.2
+) -> list[str]:
+    """
+    Compare results with a baseline.
+
+    A regression is throughput lower, p95 latency higher or peak RSS higher
+    than the baseline by more than the tolerance (fraction).
+
+    Returns:
+        Regression descriptions (empty if none)
+    """
+    regressions = []
+    for result in results:
+        base = baseline.get(result.key)
+        if result.skipped is not None or base is None:
+            continue
+        if base.get("params") != result.params:
+            # Different scale/model size: not comparable
+            continue
+
+        if result.throughput < base["throughput"] * (1 - tolerance):
+            regressions.append(
+                f"{result.key}: throughput {result.throughput:.2f} < "
+                f"baseline {base['throughput']:.2f} {result.unit}/s"
+            )
+        p95 = result.latency_ms.get("p95")
+        base_p95 = base.get("latency_ms", {}).get("p95")
+        if p95 is not None and base_p95 and p95 > base_p95 * (1 + tolerance):
+            regressions.append(f"{result.key}: p95 latency {p95:.1f}ms > baseline {base_p95:.1f}ms")
+        if result.peak_rss_mb > base["peak_rss_mb"] * (1 + tolerance):
+            regressions.append(
+                f"{result.key}: peak RSS {result.peak_rss_mb:.0f}MB > "
+                f"baseline {base['peak_rss_mb']:.0f}MB"
+            )
+    return regressions
+
+
+def format_table(results: list[BenchmarkResult], baseline: dict[str, dict] | None = None) -> str:
+    """Human-readable result table (with baseline throughput deltas if given)."""
+    lines = [
+        f"{'benchmark':<32} {'items/s':>10} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} "
+        f"{'RSS MB':>8} {'vs base':>8}"
+    ]
+    for r in results:
+        if r.skipped is not None:
+            lines.append(f"{r.key:<32} skipped: {r.skipped}")
+            continue
+        delta = ""
+        base = (baseline or {}).get(r.key)
+        if base and base.get("params") == r.params and base["throughput"] > 0:
+            delta = f"{(r.throughput / base['throughput'] - 1) * 100:+.1f}%"
+        lat = r.latency_ms
+        lines.append(
+            f"{r.key:<32} {r.throughput:>10.2f} {lat.get('p50', 0):>9.1f} "
+            f"{lat.get('p95', 0):>9.1f} {lat.get('p99', 0):>9.1f} {r.peak_rss_mb:>8.0f} "
+            f"{delta:>8}"
+        )
+    return "\n".join(lines)
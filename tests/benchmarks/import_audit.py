@@ -0,0 +1,156 @@
+"""
+Import-Time Audit
+
+Runs `python -X importtime -c "import <module>"` in a fresh interpreter and
+reports the slowest imports, which heavy libraries were loaded and the import
+chain that first pulled each of them in.
+
+Usage:
+    python -m tests.benchmarks.import_audit src.api.main
+    python -m tests.benchmarks.import_audit src.cli.video_export --top 30
+"""
+
+import os
+import re
+import subprocess
+import sys
+from dataclasses import dataclass, field
+from pathlib import Path
+
+# Libraries that must only load on code paths that use them
+HEAVY_MODULES = (
+    "pandas",
+    "numpy",
+    "scipy",
+    "sklearn",
+    "xgboost",
+    "lightgbm",
+    "catboost",
+    "shap",
+    "joblib",
+    "pyarrow",
+    "matplotlib",
+)
+
+_LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)")
+
+REPO_ROOT = Path(__file__).resolve().parents[2]
+
+
+@dataclass
+class ImportRecord:
+    """One line of -X importtime output."""
+
+    module: str
+    self_us: int
+    cumulative_us: int
+    depth: int
+    chain: tuple[str, ...] = field(default_factory=tuple)  # Importers, outermost first
+
+
+@dataclass
+class ImportReport:
+    """Parsed import-time profile of one module."""
+
+    target: str
+    records: list[ImportRecord]
+
+    @property
+    def total_ms(self) -> float:
+        """Cumulative import time of the target module."""
+        # The outermost record (a module can also appear nested under its own package)
+        times = [r.cumulative_us for r in self.records if r.module == self.target]
+        return max(times) / 1000 if times else 0.0
+
+    def loaded(self, module: str) -> bool:
+        """Whether the module (or a submodule) was imported."""
+        return any(r.module == module or r.module.startswith(module + ".") for r in self.records)
+
+    def heavy_loaded(self, heavy: tuple[str, ...] = HEAVY_MODULES) -> dict[str, ImportRecord]:
+        """Heavy top-level packages that were imported (package -> its import record)."""
+        found = {}
+        for r in self.records:
+            if r.module in heavy and r.module not in found:
+                found[r.module] = r
+        return found
+
+    def slowest(self, top: int = 20) -> list[ImportRecord]:
+        """Imports with the highest self time."""
+        return sorted(self.records, key=lambda r: r.self_us, reverse=True)[:top]
+
+
+def parse_importtime(stderr: str, target: str) -> ImportReport:
+    """
+    Parse -X importtime output into records with their import chains.
+
+    The output lists a module after everything it imported, one indentation
+    level (two spaces) deeper per nesting level; a module's importer is the next
+    line that appears at a shallower depth.
+    """
+    parsed = []
+    for line in stderr.splitlines():
+        match = _LINE.match(line)
+        if match:
+            self_us, cumulative_us, indent, module = match.groups()
+            parsed.append(ImportRecord(module, int(self_us), int(cumulative_us), len(indent) // 2))
+
+    # Walk backwards: the open stack holds the importers of the current line
+    stack: list[ImportRecord] = []
+    for record in reversed(parsed):
+        while stack and stack[-1].depth >= record.depth:
+            stack.pop()
+        record.chain = tuple(r.module for r in stack)
+        stack.append(record)
+    return ImportReport(target=target, records=parsed)
+
+
+def audit(module: str, env: dict[str, str] | None = None) -> ImportReport:
+    """
+    Import a module in a fresh interpreter with -X importtime.
+
+    Raises:
+        RuntimeError: If the import fails
+    """
+    run_env = {**os.environ, "PYTHONDONTWRITEBYTECODE": "1", **(env or {})}
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+        cwd=REPO_ROOT,
+        env=run_env,
+    )
+    if proc.returncode != 0:
+        last_line = proc.stderr.strip().splitlines()[-1] if proc.stderr.strip() else ""
+        raise RuntimeError(f"import {module} failed: {last_line}")
+    return parse_importtime(proc.stderr, module)
+
+
+def format_report(report: ImportReport, top: int = 20) -> str:
+    """Human-readable report: total, heavy libraries with their chains, slowest imports."""
+    lines = [f"import {report.target}: {report.total_ms:.1f}ms"]
+    heavy = report.heavy_loaded()
+    if heavy:
+        lines.append("")
+        lines.append("Heavy libraries loaded:")
+        for name, record in heavy.items():
+            chain = " -> ".join((*record.chain, name))
+            lines.append(f"  {name:<12} {record.cumulative_us / 1000:>8.1f}ms  {chain}")
+    lines.append("")
+    lines.append(f"Slowest imports (self time, top {top}):")
+    for r in report.slowest(top):
+        lines.append(f"  {r.self_us / 1000:>8.1f}ms  {r.module}")
+    return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Import-time audit")
+    parser.add_argument("modules", nargs="+", help="Modules to import")
+    parser.add_argument("--top", type=int, default=20, help="Slowest imports to list")
+    args = parser.parse_args()
+
+    for i, name in enumerate(args.modules):
+        if i:
+            print()
+        print(format_report(audit(name), top=args.top))
@@ -0,0 +1,384 @@
+"""
+Benchmark Suites
+
+Hot-path benchmarks run against a synthetic dataset:
+
+    - year_extraction: FastFeatureExtractor.extract_year_data (requires DB)
+    - single_race_prediction: Per-race features + ensemble heads, one race at a time
+    - batch_prediction: All card races through the ensemble in one call
+    - ev_computation: EVRecommender.recommend_from_odds per race
+
+With a PostgreSQL DSN, feature extraction runs the production SQL against the
+synthetic rows loaded into schema bench_synthetic ("db" mode). Without one, the
+prediction suites use a deterministic in-memory feature matrix ("memory" mode)
+and time inference only.
+
+prepare() runs in the parent process (data generation, DB load, model
+training); run_suite() runs in a fresh child process per benchmark and only
+loads the prepared artifacts.
+"""
+
+import logging
+import os
+from dataclasses import dataclass, field
+from pathlib import Path
+
+import joblib
+import numpy as np
+import pandas as pd
+
+from tests.benchmarks.harness import BenchmarkResult, measure
+from tests.benchmarks.synthetic_data import BENCH_SCHEMA, SyntheticDataset, generate
+
+logger = logging.getLogger(__name__)
+
+SUITES = ("year_extraction", "single_race_prediction", "batch_prediction", "ev_computation")
+
+# Training set cap (most recent finalized entries)
+MAX_TRAINING_ROWS = 20000
+
+# Columns never used as features (same as the retrain trainer)
+EXCLUDE_COLUMNS = ["race_code", "umaban", "bamei", "target", "kakutei_chakujun", "kettonum"]
+
+# In-memory feature matrix: columns carrying signal from the latent strength
+N_SIGNAL_FEATURES = 12
+
+
+@dataclass
+class BenchContext:
+    """Benchmark configuration and prepared artifact location (picklable)."""
+
+    scale: str
+    seed: int
+    workdir: str
+    dsn: str | None = None
+    n_estimators: int = 300
+    max_depth: int = 7
+    repeat: int = 3  # Iterations of the whole-card/whole-year benchmarks
+    params: dict = field(default_factory=dict)
+
+    @property
+    def mode(self) -> str:
+        return "db" if self.dsn else "memory"
+
+    def path(self, name: str) -> Path:
+        return Path(self.workdir) / name
+
+
+def connect(dsn: str):
+    """psycopg2 connection reading the synthetic schema."""
+    import psycopg2
+
+    return psycopg2.connect(dsn, options=f"-c search_path={BENCH_SCHEMA}")
+
+
+def memory_features(dataset: SyntheticDataset, mask: np.ndarray) -> pd.DataFrame:
+    """
+    Deterministic stand-in feature matrix for the selected entries.
+
+    Uses the production feature names; the first N_SIGNAL_FEATURES columns are
+    noisy views of the latent strength so the models learn a real signal.
+    """
+    from src.services.prediction.feature_names import FEATURE_DISPLAY_NAMES
+
+    entries = dataset.tables["umagoto_race_joho"]
+    strength = dataset.strength[mask]
+    n = int(mask.sum())
+    rng = np.random.default_rng(dataset.seed + n)
+
+    names = [name for name in FEATURE_DISPLAY_NAMES if name not in EXCLUDE_COLUMNS]
+    values = rng.normal(0.0, 1.0, (n, len(names))).astype(np.float64)
+    for i in range(N_SIGNAL_FEATURES):
+        values[:, i] = strength + rng.normal(0.0, 0.5 + 0.1 * i, n)
+
+    df = pd.DataFrame(values, columns=names)
+    df.insert(0, "race_code", entries.loc[mask, "race_code"].to_numpy())
+    df.insert(1, "umaban", entries.loc[mask, "umaban"].astype(int).to_numpy())
+    df["target"] = pd.to_numeric(entries.loc[mask, "kakutei_chakujun"]).to_numpy()
+    return df
+
+
+def _train_models(df: pd.DataFrame, ctx: BenchContext) -> dict:
+    """Train XGB/LGB ranking, win and place heads (trainer layout, fixed params)."""
+    import lightgbm as lgb
+    import xgboost as xgb
+
+    from src.models.ranking_metrics import group_offsets
+
+    df = df.sort_values("race_code", kind="stable").tail(MAX_TRAINING_ROWS)
+    numeric_cols = df.select_dtypes(include=[np.number]).columns.tolist()
+    feature_names = [c for c in numeric_cols if c not in EXCLUDE_COLUMNS]
+    X = df[feature_names].fillna(0)
+    y = df["target"].astype(int)
+    groups = np.diff(group_offsets(df["race_code"].to_numpy())).tolist()
+
+    params = {
+        "n_estimators": ctx.n_estimators,
+        "max_depth": ctx.max_depth,
+        "learning_rate": 0.03,
+        "subsample": 0.8,
+        "colsample_bytree": 0.8,
+        "random_state": ctx.seed,
+    }
+    y_rank = int(y.max()) - y + 1
+    models = {
+        "xgb_regressor": xgb.XGBRanker(objective="rank:ndcg", **params).fit(
+            X, y_rank, group=groups
+        ),
+        "lgb_regressor": lgb.LGBMRanker(objective="lambdarank", verbose=-1, **params).fit(
+            X, y_rank, group=groups
+        ),
+    }
+    for head, target in (("win", y == 1), ("place", y <= 3)):
+        target = target.astype(int)
+        models[f"xgb_{head}"] = xgb.XGBClassifier(**params).fit(X, target)
+        models[f"lgb_{head}"] = lgb.LGBMClassifier(verbose=-1, **params).fit(X, target)
+
+    return {
+        "models": models,
+        "feature_names": feature_names,
+        "ensemble_weights": {"xgb": 0.5, "lgb": 0.5, "cb": 0.0},
+        "model_type": "ranker",
+    }
+
+
+def _card_features_from_db(ctx: BenchContext, race_codes: list[str], year: int) -> pd.DataFrame:
+    """Card features through the production future-race path (one shared extractor)."""
+    from src.models.feature_extractor import FastFeatureExtractor
+    from src.services.prediction.ml_engine import extract_future_race_features
+
+    conn = connect(ctx.dsn)
+    try:
+        extractor = FastFeatureExtractor(conn)
+        frames = [
+            extract_future_race_features(conn, race_code, extractor, year)
+            for race_code in race_codes
+        ]
+    finally:
+        conn.close()
+    return pd.concat([f for f in frames if len(f) > 0], ignore_index=True)
+
+
+def prepare(ctx: BenchContext) -> dict:
+    """
+    Generate data, load it (db mode), train models and save artifacts to ctx.workdir.
+
+    Returns:
+        Metadata about the prepared dataset
+    """
+    from tests.benchmarks.synthetic_data import load_into_postgres
+
+    dataset = generate(ctx.scale, seed=ctx.seed)
+    entries = dataset.tables["umagoto_race_joho"]
+    finalized = (entries["data_kubun"] == "7").to_numpy()
+    card = ~finalized
+    card_races = dataset.card_race_codes
+    history_year = dataset.history_years[-1]
+
+    if ctx.dsn:
+        from src.models.feature_extractor import FastFeatureExtractor
+
+        conn = connect(ctx.dsn)
+        try:
+            load_into_postgres(dataset, conn)
+            train_df = FastFeatureExtractor(conn).extract_year_data(history_year, max_races=10000)
+        finally:
+            conn.close()
+        card_df = _card_features_from_db(ctx, card_races, dataset.card_date.year)
+    else:
+        train_df = memory_features(dataset, finalized)
+        card_df = memory_features(dataset, card)
+
+    model_data = _train_models(train_df, ctx)
+
+    # Odds of the card ("1" -> 3.5), as EVRecommender expects
+    odds = {}
+    tansho = dataset.tables["odds1_tansho"]
+    fukusho = dataset.tables["odds1_fukusho"]
+    for race_code in card_races:
+        t = tansho[tansho["race_code"] == race_code]
+        f = fukusho[fukusho["race_code"] == race_code]
+        odds[race_code] = (
+            dict(zip(t["umaban"].astype(int).astype(str), t["odds"].astype(int) / 10)),
+            dict(zip(f["umaban"].astype(int).astype(str), f["odds_saitei"].astype(int) / 10)),
+        )
+
+    joblib.dump(model_data, ctx.path("model.pkl"))
+    joblib.dump(card_df, ctx.path("card_features.pkl"))
+    joblib.dump(odds, ctx.path("card_odds.pkl"))
+    joblib.dump({"card_races": card_races, "history_year": history_year}, ctx.path("meta.pkl"))
+
+    return {
+        "rows": dataset.row_counts(),
+        "card_races": len(card_races),
+        "history_year": history_year,
+        "training_rows": len(train_df),
+        "features": len(model_data["feature_names"]),
+    }
+
+
+def _predict(model_data: dict, X: pd.DataFrame) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Rank scores, win and place probabilities (compute_ml_predictions' ensemble calls)."""
+    from src.services.prediction.ensemble import (
+        ensemble_predict,
+        ensemble_proba,
+        ensemble_proba_with_ci,
+    )
+
+    models = model_data["models"]
+    weights = model_data["ensemble_weights"]
+    rank_scores = ensemble_predict(models["xgb_regressor"], models["lgb_regressor"], X, weights)
+    win_probs, _ = ensemble_proba_with_ci(models["xgb_win"], models["lgb_win"], X, weights)
+    place_probs = ensemble_proba(models["xgb_place"], models["lgb_place"], X, weights)
+    return rank_scores, win_probs, place_probs
+
+
+def _model_matrix(df: pd.DataFrame, feature_names: list[str]) -> pd.DataFrame:
+    """Align a feature frame to the model's columns (missing -> 0)."""
+    return df.reindex(columns=feature_names, fill_value=0).fillna(0)
+
+
+def _bench_year_extraction(ctx: BenchContext, meta: dict) -> BenchmarkResult:
+    from src.models.feature_extractor import FastFeatureExtractor
+
+    conn = connect(ctx.dsn)
+    try:
+
+        def extract_year() -> int:
+            df = FastFeatureExtractor(conn).extract_year_data(meta["history_year"], max_races=10000)
+            return int(df["race_code"].nunique()) if len(df) else 0
+
+        return measure(
+            "year_extraction",
+            "race",
+            ctx.mode,
+            [extract_year] * (ctx.repeat + 1),
+            params=ctx.params,
+        )
+    finally:
+        conn.close()
+
+
+def _bench_single_race(ctx: BenchContext, meta: dict) -> BenchmarkResult:
+    model_data = joblib.load(ctx.path("model.pkl"))
+    feature_names = model_data["feature_names"]
+    card_df = joblib.load(ctx.path("card_features.pkl"))
+    year = int(meta["card_races"][0][:4])
+
+    conn = connect(ctx.dsn) if ctx.dsn else None
+    try:
+
+        def make_op(race_code: str):
+            def predict_one() -> int:
+                if conn is not None:
+                    from src.models.feature_extractor import FastFeatureExtractor
+                    from src.services.prediction.ml_engine import extract_future_race_features
+
+                    # A fresh extractor per race, as compute_ml_predictions does
+                    race_df = extract_future_race_features(
+                        conn, race_code, FastFeatureExtractor(conn), year
+                    )
+                else:
+                    race_df = card_df[card_df["race_code"] == race_code]
+                _predict(model_data, _model_matrix(race_df, feature_names))
+                return 1
+
+            return predict_one
+
+        races = meta["card_races"]
+        return measure(
+            "single_race_prediction",
+            "race",
+            ctx.mode,
+            [make_op(races[0])] + [make_op(r) for r in races],
+            params=ctx.params,
+        )
+    finally:
+        if conn is not None:
+            conn.close()
+
+
+def _bench_batch(ctx: BenchContext, meta: dict) -> BenchmarkResult:
+    model_data = joblib.load(ctx.path("model.pkl"))
+    feature_names = model_data["feature_names"]
+    card_df = joblib.load(ctx.path("card_features.pkl"))
+    races = meta["card_races"]
+
+    def predict_card() -> int:
+        df = _card_features_from_db(ctx, races, int(races[0][:4])) if ctx.dsn else card_df
+        _predict(model_data, _model_matrix(df, feature_names))
+        return len(races)
+
+    return measure(
+        "batch_prediction",
+        "race",
+        ctx.mode,
+        [predict_card] * (ctx.repeat + 1),
+        params=ctx.params,
+    )
+
+
+def _bench_ev(ctx: BenchContext, meta: dict) -> BenchmarkResult:
+    # recommend_from_odds is pure; the recommender's DB handle is never used here
+    os.environ["DB_MODE"] = "mock"
+    from src.models.ev_recommender import EVRecommender
+
+    model_data = joblib.load(ctx.path("model.pkl"))
+    card_df = joblib.load(ctx.path("card_features.pkl"))
+    odds = joblib.load(ctx.path("card_odds.pkl"))
+    recommender = EVRecommender()
+
+    # Model output per race (inference is not part of this benchmark)
+    _, win_probs, place_probs = _predict(
+        model_data, _model_matrix(card_df, model_data["feature_names"])
+    )
+    card_df = card_df.assign(win_probability=win_probs, place_probability=place_probs)
+    ranked_by_race = {}
+    for race_code, race_df in card_df.groupby("race_code", sort=False):
+        race_df = race_df.sort_values("win_probability", ascending=False)
+        ranked_by_race[race_code] = [
+            {
+                "horse_number": int(row.umaban),
+                "horse_name": "",
+                "win_probability": float(row.win_probability),
+                "place_probability": float(row.place_probability),
+                "rank": rank,
+            }
+            for rank, row in enumerate(race_df.itertuples(), 1)
+        ]
+
+    def make_op(race_code: str):
+        tansho, fukusho = odds[race_code]
+        ranked = ranked_by_race.get(race_code, [])
+
+        def recommend() -> int:
+            recommender.recommend_from_odds(race_code, ranked, tansho, fukusho, "final", None)
+            return 1
+
+        return recommend
+
+    races = [r for r in meta["card_races"] if r in ranked_by_race]
+    # The per-race op is sub-millisecond: repeat the card for stable percentiles
+    ops = [make_op(r) for r in races] * max(ctx.repeat * 10, 1)
+    return measure("ev_computation", "race", "memory", ops, warmup=len(races), params=ctx.params)
+
+
+_SUITE_FUNCS = {
+    "year_extraction": _bench_year_extraction,
+    "single_race_prediction": _bench_single_race,
+    "batch_prediction": _bench_batch,
+    "ev_computation": _bench_ev,
+}
+
+
+def run_suite(name: str, ctx: BenchContext) -> BenchmarkResult:
+    """Run one benchmark (entry point of the isolated child process)."""
+    logging.basicConfig(level=logging.WARNING)
+    logging.getLogger().setLevel(logging.WARNING)
+
+    if name == "year_extraction" and not ctx.dsn:
+        return BenchmarkResult(
+            name=name, unit="race", mode="db", params=ctx.params, skipped="no BENCH_DB_DSN"
+        )
+    meta = joblib.load(ctx.path("meta.pkl"))
+    return _SUITE_FUNCS[name](ctx, meta)
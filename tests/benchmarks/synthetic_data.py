@@ -0,0 +1,636 @@
+"""
+Synthetic JRA-VAN Data Generator
+
+Deterministic JRA-VAN style rows for benchmarks: race_shosai, umagoto_race_joho,
+kyosoba_master2 (pedigree), hanro_chokyo (training), odds1_tansho and
+odds1_fukusho. Every column is text in JRA-VAN's code formats (zero-padded
+codes, times in tenths, odds x10), so the production SQL runs unchanged on a
+database loaded with these rows.
+
+Scales (finalized race days of history):
+    - day: 1 race day
+    - season: every weekend of one year
+    - decade: 10 seasons
+
+A pre-race card (data_kubun '2', no results) is generated on CARD_DATE, the
+race day after the history. Horses keep racing across days with a rest between
+runs and retire after a career, so history-based features (past stats, sire
+stats, jockey/horse combos) have realistic depth at larger scales.
+
+Usage:
+    from tests.benchmarks.synthetic_data import generate, load_into_postgres
+
+    dataset = generate("season", seed=42)
+    load_into_postgres(dataset, conn)  # Tables in schema bench_synthetic
+"""
+
+import io
+import logging
+from dataclasses import dataclass
+from datetime import date, timedelta
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# Finalized race days of history per scale (JRA races on Saturdays and Sundays)
+RACE_DAYS_PER_SEASON = 104
+SCALES: dict[str, int] = {
+    "day": 1,
+    "season": RACE_DAYS_PER_SEASON,
+    "decade": 10 * RACE_DAYS_PER_SEASON,
+}
+
+# Pre-race card date (a Saturday); history runs backwards over the preceding weekends
+CARD_DATE = date(2025, 1, 4)
+
+# Schema the rows are loaded into (search_path makes production SQL resolve to it)
+BENCH_SCHEMA = "bench_synthetic"
+
+VENUES_PER_DAY = 3
+RACES_PER_VENUE = 12
+MIN_FIELD_SIZE = 8
+MAX_FIELD_SIZE = 18
+N_ACTIVE_HORSES = 6000  # Horses in training at any time
+CAREER_RUNS = (6, 30)  # Runs before retirement (inclusive range)
+MIN_REST_DAYS = 3  # Race days between two runs of a horse
+N_JOCKEYS = 140
+N_TRAINERS = 220
+N_SIRES = 80
+N_BROODMARE_SIRES = 160
+
+TURF_TRACKS = ("10", "11", "17", "18")
+DIRT_TRACKS = ("24", "25")
+TURF_DISTANCES = (1200, 1400, 1600, 1800, 2000, 2200, 2400)
+DIRT_DISTANCES = (1000, 1200, 1400, 1600, 1700, 1800)
+CLASS_CODES = ("005", "010", "016", "999")
+MAIDEN_CODE = "701"
+BABA_CODES = (1, 2, 3, 4)  # 良, 稍重, 重, 不良
+BABA_WEIGHTS = (0.7, 0.15, 0.1, 0.05)
+
+# Table columns (all text, as in the PC-KEIBA schema)
+TABLE_COLUMNS: dict[str, tuple[str, ...]] = {
+    "race_shosai": (
+        "race_code",
+        "data_kubun",
+        "kaisai_nen",
+        "kaisai_gappi",
+        "keibajo_code",
+        "kaisai_kai",
+        "kaisai_nichime",
+        "race_bango",
+        "kyosomei_hondai",
+        "grade_code",
+        "kyoso_joken_code_2sai",
+        "kyoso_joken_code_3sai",
+        "kyori",
+        "track_code",
+        "hasso_jikoku",
+        "shiba_babajotai_code",
+        "dirt_babajotai_code",
+        *(f"lap_time{i}" for i in range(1, 20)),
+    ),
+    "umagoto_race_joho": (
+        "race_code",
+        "data_kubun",
+        "kaisai_nen",
+        "kaisai_gappi",
+        "keibajo_code",
+        "race_bango",
+        "wakuban",
+        "umaban",
+        "ketto_toroku_bango",
+        "bamei",
+        "seibetsu_code",
+        "barei",
+        "chokyoshi_code",
+        "futan_juryo",
+        "blinker_shiyo_kubun",
+        "kishu_code",
+        "bataiju",
+        "zogen_sa",
+        "ijo_kubun_code",
+        "kakutei_chakujun",
+        "soha_time",
+        "corner1_juni",
+        "corner2_juni",
+        "corner3_juni",
+        "corner4_juni",
+        "tansho_odds",
+        "tansho_ninkijun",
+        "kohan_4f",
+        "kohan_3f",
+    ),
+    "kyosoba_master2": (
+        "ketto_toroku_bango",
+        "bamei",
+        "seibetsu_code",
+        "seinengappi",
+        "ketto1_hanshoku_toroku_bango",
+        "ketto3_hanshoku_toroku_bango",
+        "chokyoshi_code",
+    ),
+    "hanro_chokyo": (
+        "ketto_toroku_bango",
+        "chokyo_nengappi",
+        "tracen_kubun",
+        "time_gokei_4furlong",
+        "time_gokei_3furlong",
+        "lap_time_1furlong",
+    ),
+    "odds1_tansho": ("race_code", "umaban", "odds", "ninki"),
+    "odds1_fukusho": ("race_code", "umaban", "odds_saitei", "odds_saikou", "ninki"),
+}
+
+# Indexes created after loading (mirrors the lookups of the production queries)
+TABLE_INDEXES: dict[str, tuple[str, ...]] = {
+    "race_shosai": ("race_code", "kaisai_nen"),
+    "umagoto_race_joho": ("race_code", "ketto_toroku_bango", "kishu_code", "kaisai_nen"),
+    "kyosoba_master2": ("ketto_toroku_bango",),
+    "hanro_chokyo": ("ketto_toroku_bango",),
+    "odds1_tansho": ("race_code",),
+    "odds1_fukusho": ("race_code",),
+}
+
+
+@dataclass
+class SyntheticDataset:
+    """Generated tables plus the latent values behind them."""
+
+    scale: str
+    seed: int
+    card_date: date
+    tables: dict[str, pd.DataFrame]
+    # Per-entry latent strength (ability + jockey skill), aligned with umagoto_race_joho
+    strength: np.ndarray
+
+    @property
+    def card_race_codes(self) -> list[str]:
+        """Race codes of the pre-race card."""
+        races = self.tables["race_shosai"]
+        return races.loc[races["data_kubun"] == "2", "race_code"].tolist()
+
+    @property
+    def history_years(self) -> list[int]:
+        """Years with finalized races (oldest first)."""
+        races = self.tables["race_shosai"]
+        years = races.loc[races["data_kubun"] == "7", "kaisai_nen"].astype(int).unique()
+        return sorted(years.tolist())
+
+    def row_counts(self) -> dict[str, int]:
+        """Rows per table."""
+        return {name: len(df) for name, df in self.tables.items()}
+
+
+def race_days_before(card_date: date, n_days: int) -> list[date]:
+    """The n_days Saturdays/Sundays before card_date (oldest first)."""
+    days = []
+    current = card_date - timedelta(days=1)
+    while len(days) < n_days:
+        if current.weekday() in (5, 6):
+            days.append(current)
+        current -= timedelta(days=1)
+    return days[::-1]
+
+
+def wakuban_for_field(n: int) -> np.ndarray:
+    """JRA frame numbers for a field of n horses (outer frames take the extra horses)."""
+    if n <= 8:
+        return np.arange(1, n + 1)
+    base, extra = divmod(n, 8)
+    sizes = [base] * (8 - extra) + [base + 1] * extra
+    return np.repeat(np.arange(1, 9), sizes)
+
+
+def _zfill(values: np.ndarray, width: int) -> np.ndarray:
+    """Zero-padded text codes of integer values."""
+    return np.char.zfill(np.asarray(values, dtype=np.int64).astype(str), width)
+
+
+def _ranks(values: np.ndarray) -> np.ndarray:
+    """1-based ranks of values (smallest first)."""
+    ranks = np.empty(len(values), dtype=np.int64)
+    ranks[np.argsort(values, kind="stable")] = np.arange(1, len(values) + 1)
+    return ranks
+
+
+class _Generator:
+    """Stateful generator: horse population, jockeys and per-race simulation."""
+
+    def __init__(self, seed: int):
+        self.rng = np.random.default_rng(seed)
+        rng = self.rng
+        self.jockey_skill = rng.normal(0.0, 1.0, N_JOCKEYS)
+        self.trainer_of: list[int] = []
+        self.ability: list[float] = []
+        self.style: list[float] = []  # 0 = front runner, 1 = closer
+        self.body_weight: list[int] = []
+        self.birth_year: list[int] = []
+        self.sex: list[int] = []
+        self.sire: list[int] = []
+        self.bms: list[int] = []
+        self.runs_left: list[int] = []
+        self.last_day: list[int] = []
+        self.active: list[int] = []
+
+    def _new_horse(self, year: int) -> int:
+        rng = self.rng
+        idx = len(self.ability)
+        self.ability.append(float(rng.normal(0.0, 1.0)))
+        self.style.append(float(rng.beta(2.0, 2.0)))
+        self.body_weight.append(int(rng.normal(470, 25)))
+        self.birth_year.append(year - int(rng.choice([2, 3, 3, 4, 5])))
+        self.sex.append(int(rng.choice([1, 2, 3], p=[0.5, 0.4, 0.1])))
+        self.sire.append(int(rng.integers(N_SIRES)))
+        self.bms.append(int(rng.integers(N_BROODMARE_SIRES)))
+        self.trainer_of.append(int(rng.integers(N_TRAINERS)))
+        self.runs_left.append(int(rng.integers(CAREER_RUNS[0], CAREER_RUNS[1] + 1)))
+        self.last_day.append(-MIN_REST_DAYS)
+        return idx
+
+    def _pick_runners(self, day_index: int, year: int, n_runners: int) -> np.ndarray:
+        """Rested active horses for a race day (the pool is topped up as horses retire)."""
+        while len(self.active) < N_ACTIVE_HORSES:
+            self.active.append(self._new_horse(year))
+        last_day = np.asarray(self.last_day)
+        active = np.asarray(self.active)
+        eligible = active[last_day[active] <= day_index - MIN_REST_DAYS]
+        while len(eligible) < n_runners:
+            eligible = np.append(eligible, self._new_horse(year))
+            self.active.append(int(eligible[-1]))
+        runners = self.rng.choice(eligible, n_runners, replace=False)
+
+        retired = set()
+        for h in runners:
+            self.last_day[h] = day_index
+            self.runs_left[h] -= 1
+            if self.runs_left[h] <= 0:
+                retired.add(int(h))
+        if retired:
+            self.active = [h for h in self.active if h not in retired]
+        return runners
+
+    def race_day(self, day_index: int, race_date: date, finalized: bool):
+        """Simulate one race day: race rows, entry columns and per-entry strength."""
+        rng = self.rng
+        year = race_date.year
+        venues = rng.choice(np.arange(1, 11), VENUES_PER_DAY, replace=False)
+        field_sizes = rng.integers(
+            MIN_FIELD_SIZE, MAX_FIELD_SIZE + 1, VENUES_PER_DAY * RACES_PER_VENUE
+        )
+        runners = self._pick_runners(day_index, year, int(field_sizes.sum()))
+        ability = np.asarray(self.ability)
+        style = np.asarray(self.style)
+
+        races: list[dict] = []
+        entries: dict[str, list[np.ndarray]] = {}
+        strengths: list[np.ndarray] = []
+
+        def add(column: str, values) -> None:
+            entries.setdefault(column, []).append(np.asarray(values))
+
+        offset = 0
+        for v_i, venue in enumerate(venues):
+            kai = (day_index // 8) % 5 + 1
+            nichime = day_index % 8 + 1
+            shiba_baba = int(rng.choice(BABA_CODES, p=BABA_WEIGHTS))
+            dirt_baba = int(rng.choice(BABA_CODES, p=BABA_WEIGHTS))
+            for race_no in range(1, RACES_PER_VENUE + 1):
+                n = int(field_sizes[v_i * RACES_PER_VENUE + race_no - 1])
+                horses = runners[offset : offset + n]
+                offset += n
+
+                is_turf = bool(rng.random() < 0.55)
+                kyori = int(rng.choice(TURF_DISTANCES if is_turf else DIRT_DISTANCES))
+                track_code = str(rng.choice(TURF_TRACKS if is_turf else DIRT_TRACKS))
+                baba = shiba_baba if is_turf else dirt_baba
+                grade = ""
+                if race_no == 11 and rng.random() < 0.3:
+                    grade = str(rng.choice(["A", "B", "C", "D"], p=[0.1, 0.2, 0.4, 0.3]))
+                joken = MAIDEN_CODE if race_no <= 3 else str(rng.choice(CLASS_CODES))
+                race_code = f"{race_date:%Y%m%d}{venue:02d}{kai:02d}{nichime:02d}{race_no:02d}"
+
+                # Finishing order from latent strength plus race-day noise
+                jockeys = rng.choice(N_JOCKEYS, n, replace=False)
+                strength = ability[horses] + 0.3 * self.jockey_skill[jockeys]
+                finish = _ranks(-(strength + rng.normal(0.0, 1.0, n)))
+
+                # Times (seconds): winner by distance/surface/going, gaps behind
+                pace = 0.059 if is_turf else 0.0615
+                winner_time = kyori * pace * (1 + 0.006 * (baba - 1)) + rng.normal(0, 0.6)
+                gaps = np.concatenate([[0.0], np.cumsum(np.abs(rng.normal(0.25, 0.2, n - 1)))])
+                times = winner_time + gaps[finish - 1]
+                last3f = (
+                    (34.5 if is_turf else 37.0)
+                    + 0.15 * (finish - 1)
+                    - 0.8 * (style[horses] - 0.5)
+                    + rng.normal(0.0, 0.5, n)
+                )
+                last4f = last3f + 11.8 + rng.normal(0.0, 0.3, n)
+                position = style[horses] + rng.normal(0.0, 0.25, n)
+                corners = [_ranks(position + rng.normal(0.0, 0.15, n)) for _ in range(3)]
+                corners.append(_ranks(position))
+
+                # Win odds from the market's view of strength (20% takeout)
+                market = np.exp(1.3 * strength)
+                win_odds = np.clip(np.round(0.8 / (market / market.sum()), 1), 1.1, 999.9)
+                ninki = _ranks(win_odds)
+
+                laps = np.zeros(19)
+                n_laps = kyori // 200
+                lap_shape = 1 + 0.04 * np.cos(np.linspace(0, np.pi, n_laps))
+                laps[:n_laps] = winner_time * lap_shape / lap_shape.sum() + rng.normal(
+                    0, 0.15, n_laps
+                )
+
+                post_minutes = 10 * 60 + 5 + (race_no - 1) * 35 + v_i * 10
+                races.append(
+                    {
+                        "race_code": race_code,
+                        "data_kubun": "7" if finalized else "2",
+                        "kaisai_nen": f"{race_date:%Y}",
+                        "kaisai_gappi": f"{race_date:%m%d}",
+                        "keibajo_code": f"{venue:02d}",
+                        "kaisai_kai": f"{kai:02d}",
+                        "kaisai_nichime": f"{nichime:02d}",
+                        "race_bango": f"{race_no:02d}",
+                        "kyosomei_hondai": "ベンチマークステークス" if grade else "",
+                        "grade_code": grade,
+                        "kyoso_joken_code_2sai": "000",
+                        "kyoso_joken_code_3sai": joken,
+                        "kyori": str(kyori),
+                        "track_code": track_code,
+                        "hasso_jikoku": f"{post_minutes // 60:02d}{post_minutes % 60:02d}",
+                        "shiba_babajotai_code": str(shiba_baba),
+                        "dirt_babajotai_code": str(dirt_baba),
+                        **{
+                            f"lap_time{i + 1}": (
+                                f"{int(round(laps[i] * 10)):03d}"
+                                if finalized and i < n_laps
+                                else ""
+                            )
+                            for i in range(19)
+                        },
+                    }
+                )
+
+                add("race_code", np.full(n, race_code))
+                add("race_no", np.full(n, race_no))
+                add("venue", np.full(n, venue))
+                add("horse", horses)
+                add("jockey", jockeys)
+                add("umaban", np.arange(1, n + 1))
+                add("wakuban", wakuban_for_field(n))
+                add("finish", finish)
+                add("time", np.round(times * 10).astype(np.int64))
+                add("last3f", np.round(last3f * 10).astype(np.int64))
+                add("last4f", np.round(last4f * 10).astype(np.int64))
+                for c in range(4):
+                    add(f"corner{c + 1}", corners[c])
+                add("win_odds", np.round(win_odds * 10).astype(np.int64))
+                add("ninki", ninki)
+                add("weight_change", 2 * np.round(rng.normal(0.0, 2.0, n)).astype(np.int64))
+                add("blinker", (rng.random(n) < 0.1).astype(np.int64))
+                strengths.append(strength)
+
+        columns = {name: np.concatenate(parts) for name, parts in entries.items()}
+        return races, columns, np.concatenate(strengths)
+
+    def horse_columns(self, horses: np.ndarray) -> dict[str, np.ndarray]:
+        """Per-horse attribute arrays for entry rows."""
+        return {
+            "birth_year": np.asarray(self.birth_year)[horses],
+            "sex": np.asarray(self.sex)[horses],
+            "trainer": np.asarray(self.trainer_of)[horses],
+            "body_weight": np.asarray(self.body_weight)[horses],
+        }
+
+
+def _kettonum(birth_year: np.ndarray, horse: np.ndarray) -> np.ndarray:
+    """10-digit pedigree registration numbers (birth year + serial)."""
+    return np.char.add(birth_year.astype(str), np.char.add("1", _zfill(horse, 5)))
+
+
+def _entry_frame(
+    gen: _Generator,
+    columns: dict[str, np.ndarray],
+    race_dates: np.ndarray,
+    finalized: np.ndarray,
+) -> pd.DataFrame:
+    """Format entry columns as umagoto_race_joho rows."""
+    horse = columns["horse"]
+    attrs = gen.horse_columns(horse)
+    race_years = np.array([int(d[:4]) for d in race_dates])
+    n = len(horse)
+    body_weight = attrs["body_weight"] + columns["weight_change"]
+    weight_change = columns["weight_change"]
+    futan = np.where(attrs["sex"] == 2, 540, 560) - 10 * (race_years - attrs["birth_year"] == 2)
+
+    def result(values: np.ndarray, width: int, empty: str = "") -> np.ndarray:
+        return np.where(finalized, _zfill(values, width), empty)
+
+    return pd.DataFrame(
+        {
+            "race_code": columns["race_code"],
+            "data_kubun": np.where(finalized, "7", "2"),
+            "kaisai_nen": np.array([d[:4] for d in race_dates]),
+            "kaisai_gappi": np.array([d[4:8] for d in race_dates]),
+            "keibajo_code": _zfill(columns["venue"], 2),
+            "race_bango": _zfill(columns["race_no"], 2),
+            "wakuban": columns["wakuban"].astype(str),
+            "umaban": _zfill(columns["umaban"], 2),
+            "ketto_toroku_bango": _kettonum(attrs["birth_year"], horse),
+            "bamei": np.char.add("ベンチホース", _zfill(horse, 5)),
+            "seibetsu_code": attrs["sex"].astype(str),
+            "barei": _zfill(race_years - attrs["birth_year"], 2),
+            "chokyoshi_code": _zfill(attrs["trainer"] + 1000, 5),
+            "futan_juryo": _zfill(futan, 3),
+            "blinker_shiyo_kubun": columns["blinker"].astype(str),
+            "kishu_code": _zfill(columns["jockey"] + 1000, 5),
+            "bataiju": _zfill(body_weight, 3),
+            "zogen_sa": weight_change.astype(str),
+            "ijo_kubun_code": np.full(n, "0"),
+            "kakutei_chakujun": result(columns["finish"], 2, "00"),
+            "soha_time": result((columns["time"] // 600) * 1000 + columns["time"] % 600, 4),
+            "corner1_juni": result(columns["corner1"], 2, "00"),
+            "corner2_juni": result(columns["corner2"], 2, "00"),
+            "corner3_juni": result(columns["corner3"], 2, "00"),
+            "corner4_juni": result(columns["corner4"], 2, "00"),
+            "tansho_odds": _zfill(columns["win_odds"], 4),
+            "tansho_ninkijun": _zfill(columns["ninki"], 2),
+            "kohan_4f": result(columns["last4f"], 3),
+            "kohan_3f": result(columns["last3f"], 3),
+        }
+    )
+
+
+def generate(scale: str = "day", seed: int = 42, card_date: date = CARD_DATE) -> SyntheticDataset:
+    """
+    Generate a deterministic synthetic dataset.
+
+    Args:
+        scale: "day", "season" or "decade" (see SCALES)
+        seed: Random seed (same seed and scale give identical tables)
+        card_date: Date of the pre-race card
+
+    Returns:
+        SyntheticDataset with finalized history and the pre-race card
+    """
+    if scale not in SCALES:
+        raise ValueError(f"Unknown scale: {scale!r}. Use one of {sorted(SCALES)}.")
+
+    gen = _Generator(seed)
+    days = race_days_before(card_date, SCALES[scale]) + [card_date]
+
+    race_rows: list[dict] = []
+    parts: dict[str, list[np.ndarray]] = {}
+    strengths = []
+    race_dates = []
+    finalized_flags = []
+    for day_index, race_date in enumerate(days):
+        finalized = race_date != card_date
+        races, columns, strength = gen.race_day(day_index, race_date, finalized)
+        race_rows.extend(races)
+        for name, values in columns.items():
+            parts.setdefault(name, []).append(values)
+        strengths.append(strength)
+        n = len(strength)
+        race_dates.append(np.full(n, f"{race_date:%Y%m%d}"))
+        finalized_flags.append(np.full(n, finalized))
+
+    columns = {name: np.concatenate(values) for name, values in parts.items()}
+    entry_dates = np.concatenate(race_dates)
+    finalized = np.concatenate(finalized_flags)
+    umagoto = _entry_frame(gen, columns, entry_dates, finalized)
+
+    # Pedigree master for every horse that ran
+    horses = np.unique(columns["horse"])
+    attrs = gen.horse_columns(horses)
+    kyosoba = pd.DataFrame(
+        {
+            "ketto_toroku_bango": _kettonum(attrs["birth_year"], horses),
+            "bamei": np.char.add("ベンチホース", _zfill(horses, 5)),
+            "seibetsu_code": attrs["sex"].astype(str),
+            "seinengappi": np.char.add(attrs["birth_year"].astype(str), "0401"),
+            "ketto1_hanshoku_toroku_bango": np.char.add(
+                "11", _zfill(np.asarray(gen.sire)[horses], 8)
+            ),
+            "ketto3_hanshoku_toroku_bango": np.char.add(
+                "12", _zfill(np.asarray(gen.bms)[horses], 8)
+            ),
+            "chokyoshi_code": _zfill(attrs["trainer"] + 1000, 5),
+        }
+    )
+
+    # One slope workout a week before each run
+    rng = gen.rng
+    n_entries = len(umagoto)
+    workout_dates = pd.to_datetime(entry_dates, format="%Y%m%d") - pd.Timedelta(days=7)
+    hanro = pd.DataFrame(
+        {
+            "ketto_toroku_bango": umagoto["ketto_toroku_bango"].to_numpy(),
+            "chokyo_nengappi": workout_dates.strftime("%Y%m%d").to_numpy(),
+            "tracen_kubun": rng.integers(0, 2, n_entries).astype(str),
+            "time_gokei_4furlong": _zfill(rng.normal(520, 15, n_entries).round(), 3),
+            "time_gokei_3furlong": _zfill(rng.normal(382, 12, n_entries).round(), 3),
+            "lap_time_1furlong": _zfill(rng.normal(125, 4, n_entries).round(), 3),
+        }
+    )
+
+    win_odds = columns["win_odds"]
+    place_low = np.maximum(10, np.round(10 + (win_odds - 10) * 0.22)).astype(np.int64)
+    tansho = pd.DataFrame(
+        {
+            "race_code": umagoto["race_code"].to_numpy(),
+            "umaban": umagoto["umaban"].to_numpy(),
+            "odds": umagoto["tansho_odds"].to_numpy(),
+            "ninki": umagoto["tansho_ninkijun"].to_numpy(),
+        }
+    )
+    fukusho = pd.DataFrame(
+        {
+            "race_code": umagoto["race_code"].to_numpy(),
+            "umaban": umagoto["umaban"].to_numpy(),
+            "odds_saitei": _zfill(place_low, 4),
+            "odds_saikou": _zfill(np.round(place_low * 1.6), 4),
+            "ninki": umagoto["tansho_ninkijun"].to_numpy(),
+        }
+    )
+
+    tables = {
+        "race_shosai": pd.DataFrame(race_rows, columns=list(TABLE_COLUMNS["race_shosai"])),
+        "umagoto_race_joho": umagoto,
+        "kyosoba_master2": kyosoba,
+        "hanro_chokyo": hanro,
+        "odds1_tansho": tansho,
+        "odds1_fukusho": fukusho,
+    }
+    dataset = SyntheticDataset(
+        scale=scale,
+        seed=seed,
+        card_date=card_date,
+        tables=tables,
+        strength=np.concatenate(strengths),
+    )
+    logger.info(f"Synthetic dataset ({scale}, seed={seed}): {dataset.row_counts()}")
+    return dataset
+
+
+def load_into_postgres(dataset: SyntheticDataset, conn, schema: str = BENCH_SCHEMA) -> None:
+    """
+    Load a dataset into its own schema (dropped and recreated).
+
+    Connections that should read it set search_path to the schema, e.g.
+    psycopg2.connect(dsn, options=f"-c search_path={BENCH_SCHEMA}").
+
+    Args:
+        dataset: Generated dataset
+        conn: psycopg2 connection
+        schema: Target schema (never a production schema)
+    """
+    cur = conn.cursor()
+    try:
+        cur.execute(f"DROP SCHEMA IF EXISTS {schema} CASCADE")
+        cur.execute(f"CREATE SCHEMA {schema}")
+        for table, df in dataset.tables.items():
+            columns = TABLE_COLUMNS[table]
+            column_defs = ", ".join(f"{col} TEXT" for col in columns)
+            cur.execute(f"CREATE TABLE {schema}.{table} ({column_defs})")
+
+            buffer = io.StringIO()
+            df[list(columns)].to_csv(buffer, index=False, header=False)
+            buffer.seek(0)
+            cur.copy_expert(
+                f"COPY {schema}.{table} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv)",
+                buffer,
+            )
+            for col in TABLE_INDEXES.get(table, ()):
+                cur.execute(f"CREATE INDEX ON {schema}.{table} ({col})")
+            cur.execute(f"ANALYZE {schema}.{table}")
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cur.close()
+    logger.info(f"Loaded synthetic dataset into schema {schema}: {dataset.row_counts()}")
+
+
+def dump_csv(dataset: SyntheticDataset, output_dir: str) -> list[str]:
+    """
+    Write each table as CSV with a header (for loading with psql \\copy).
+
+    Returns:
+        Written file paths
+    """
+    from pathlib import Path
+
+    out = Path(output_dir)
+    out.mkdir(parents=True, exist_ok=True)
+    paths = []
+    for table, df in dataset.tables.items():
+        path = out / f"{table}.csv"
+        df[list(TABLE_COLUMNS[table])].to_csv(path, index=False)
+        paths.append(str(path))
+    return paths
@@ -0,0 +1,174 @@
+"""
+Integration tests for odds API endpoints.
+
+Tests conditional GET (ETag / If-None-Match) and delta responses of
+/api/v1/odds/{race_id} using FastAPI TestClient with the odds queries mocked.
+"""
+
+import os
+from contextlib import asynccontextmanager
+from unittest.mock import AsyncMock, patch
+
+import pytest
+
+pytest.importorskip("fastapi")
+
+from fastapi import FastAPI  # noqa: E402
+from fastapi.testclient import TestClient  # noqa: E402
+
+# Ensure mock mode
+os.environ["DB_MODE"] = "mock"
+
+RACE_ID = "2025012506010911"
+VERSION = "20250125153012"
+
+WIN_PLACE = {
+    "win": [{"umaban": 1, "odds": 3.5}, {"umaban": 2, "odds": 5.0}],
+    "place": [{"umaban": 1, "odds_min": 1.2, "odds_max": 1.8}],
+}
+
+
+@pytest.fixture
+def odds_api():
+    """Client for the odds router with the DB queries mocked."""
+    from src.api.routes import odds
+
+    @asynccontextmanager
+    async def fake_connection():
+        yield AsyncMock()
+
+    app = FastAPI()
+    app.include_router(odds.router, prefix="/api/v1")
+
+    with (
+        patch.object(odds, "get_connection", fake_connection),
+        patch.object(odds, "check_race_exists", AsyncMock(return_value=True)),
+        patch.object(odds, "get_odds_version", AsyncMock(return_value=VERSION)),
+        patch.object(odds, "get_odds_win_place", AsyncMock(return_value=WIN_PLACE)) as win_place,
+    ):
+        with TestClient(app) as client:
+            yield client, win_place
+
+
+class TestConditionalGet:
+    """Test ETag and If-None-Match handling."""
+
+    def test_full_response_has_etag(self, odds_api):
+        """Test a full snapshot carries the version ETag."""
+        client, _ = odds_api
+        response = client.get(f"/api/v1/odds/{RACE_ID}")
+
+        assert response.status_code == 200
+        assert response.headers["ETag"] == f'"win-{VERSION}"'
+        data = response.json()
+        assert data["version"] == VERSION
+        assert data["is_delta"] is False
+        assert len(data["odds"]) == 2
+
+    def test_if_none_match_returns_304(self, odds_api):
+        """Test a matching If-None-Match returns 304 without fetching odds."""
+        client, win_place = odds_api
+        response = client.get(
+            f"/api/v1/odds/{RACE_ID}", headers={"If-None-Match": f'W/"win-{VERSION}"'}
+        )
+
+        assert response.status_code == 304
+        assert response.headers["ETag"] == f'"win-{VERSION}"'
+        win_place.assert_not_awaited()
+
+    def test_stale_etag_returns_odds(self, odds_api):
+        """Test an older ETag gets the current odds."""
+        client, _ = odds_api
+        response = client.get(
+            f"/api/v1/odds/{RACE_ID}", headers={"If-None-Match": '"win-20250125150000"'}
+        )
+
+        assert response.status_code == 200
+
+
+class TestDeltaResponse:
+    """Test delta responses with since."""
+
+    def test_delta_passes_since(self, odds_api):
+        """Test since is passed to the query and the response is flagged as delta."""
+        client, win_place = odds_api
+        response = client.get(f"/api/v1/odds/{RACE_ID}", params={"since": "20250125150000"})
+
+        assert response.status_code == 200
+        assert response.json()["is_delta"] is True
+        assert win_place.await_args.kwargs["updated_since"] == "20250125150000"
+
+    def test_delta_etag_differs_from_full(self, odds_api):
+        """Test a full snapshot's ETag does not validate a delta request (and back)."""
+        client, _ = odds_api
+        full_etag = client.get(f"/api/v1/odds/{RACE_ID}").headers["ETag"]
+        params = {"since": "20250125150000"}
+
+        delta = client.get(
+            f"/api/v1/odds/{RACE_ID}", params=params, headers={"If-None-Match": full_etag}
+        )
+        assert delta.status_code == 200
+        assert delta.headers["ETag"] != full_etag
+
+        repeated = client.get(
+            f"/api/v1/odds/{RACE_ID}",
+            params=params,
+            headers={"If-None-Match": delta.headers["ETag"]},
+        )
+        assert repeated.status_code == 304
+
+        full = client.get(
+            f"/api/v1/odds/{RACE_ID}", headers={"If-None-Match": delta.headers["ETag"]}
+        )
+        assert full.status_code == 200
+
+    def test_invalid_since_is_rejected(self, odds_api):
+        """Test since must be a digits-only version."""
+        client, _ = odds_api
+        response = client.get(f"/api/v1/odds/{RACE_ID}", params={"since": "abc"})
+
+        assert response.status_code == 422
+
+
+class TestOddsTable:
+    """Test the packed odds table endpoint."""
+
+    def test_packed_table(self, odds_api):
+        """Test the body is the streamed array with decoding headers and ETag."""
+        client, _ = odds_api
+        from src.api.routes import odds
+
+        async def fake_packed(conn, race_id, ticket_type):
+            yield b"\x23\x00\x00\x00"
+            yield bytes(4 * (18**2 - 1))
+
+        with patch.object(odds, "iter_exotic_odds_packed", fake_packed):
+            response = client.get(
+                f"/api/v1/odds/{RACE_ID}/table", params={"ticket_type": "quinella"}
+            )
+
+        assert response.status_code == 200
+        assert response.headers["content-type"] == "application/octet-stream"
+        assert response.headers["X-Odds-Base"] == "18"
+        assert response.headers["X-Odds-Combination-Size"] == "2"
+        assert response.headers["ETag"] == f'"quinella-table-{VERSION}"'
+        assert len(response.content) == 4 * 18**2
+        assert response.content[:4] == b"\x23\x00\x00\x00"
+
+    def test_packed_table_304(self, odds_api):
+        """Test a matching If-None-Match skips streaming."""
+        client, _ = odds_api
+        response = client.get(
+            f"/api/v1/odds/{RACE_ID}/table",
+            params={"ticket_type": "trio"},
+            headers={"If-None-Match": f'"trio-table-{VERSION}"'},
+        )
+
+        assert response.status_code == 304
+
+    def test_packed_table_rejects_win(self, odds_api):
+        """Test single-horse ticket types are rejected."""
+        client, _ = odds_api
+        response = client.get(f"/api/v1/odds/{RACE_ID}/table", params={"ticket_type": "win"})
+
+        assert response.status_code == 400
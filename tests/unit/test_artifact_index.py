@@ -0,0 +1,113 @@
+"""
+Unit tests for the model artifact index.
+
+Tests runs rows from retrain results, feature importance from a model
+pickle, upserts by key and column-slice reads.
+"""
+
+from types import SimpleNamespace
+
+import joblib
+import pytest
+
+from src.models.artifact_index import (
+    ARTIFACTS_TABLE,
+    IMPORTANCE_TABLE,
+    RUNS_TABLE,
+    index_deployed_model,
+    index_retrain_result,
+    model_key,
+    read_index,
+)
+
+
+def make_retrain_result(run_date: str, win_auc: float) -> dict:
+    """retrain_result_*.json-shaped dictionary with one surface model."""
+    comparison = {
+        "status": "success",
+        "old_eval": {"win_auc": 0.80, "tansho_return": 0.7},
+        "new_eval": {"win_auc": 0.82, "tansho_return": 0.8},
+        "improvement": 0.01,
+        "test_samples": 1000,
+    }
+    return {
+        "date": run_date,
+        "deployed": True,
+        "training": {"status": "success", "win_auc": win_auc, "samples": 5000},
+        "comparison": comparison,
+        "surface_models": {
+            "turf": {
+                "surface": "turf",
+                "deployed": False,
+                "training": {"status": "success", "win_auc": win_auc - 0.01, "samples": 3000},
+                "comparison": comparison,
+            },
+            "dirt": {"surface": "dirt", "deployed": False, "error": "no data"},
+        },
+    }
+
+
+class TestRuns:
+    """Test the runs table."""
+
+    def test_rows_per_model_and_upsert(self, tmp_path):
+        """Test one row per trained model; re-indexing a date replaces its rows."""
+        assert index_retrain_result(make_retrain_result("2026-10-06", 0.76), tmp_path) == 2
+        index_retrain_result(make_retrain_result("2026-10-13", 0.77), tmp_path)
+        index_retrain_result(make_retrain_result("2026-10-13", 0.78), tmp_path)
+
+        runs = read_index(tmp_path, RUNS_TABLE)
+        assert len(runs) == 4
+        assert set(runs["model"]) == {"mixed", "turf"}
+
+        mixed = read_index(tmp_path, RUNS_TABLE, columns=["date", "win_auc"], model="mixed")
+        assert list(mixed.columns) == ["date", "win_auc"]
+        assert list(mixed["date"]) == ["2026-10-06", "2026-10-13"]
+        assert mixed["win_auc"].iloc[-1] == pytest.approx(0.78)
+
+        turf = read_index(tmp_path, RUNS_TABLE, model="turf")
+        assert not turf["deployed"].any()
+        assert turf["new_win_auc"].iloc[0] == pytest.approx(0.82)
+
+    def test_missing_table_is_empty(self, tmp_path):
+        """Test reading before anything was indexed returns an empty frame."""
+        df = read_index(tmp_path, RUNS_TABLE, columns=["date", "win_auc"])
+        assert df.empty
+        assert list(df.columns) == ["date", "win_auc"]
+
+
+class TestDeployedModel:
+    """Test the artifacts and feature importance tables."""
+
+    def test_importance_from_win_classifiers(self, tmp_path):
+        """Test importances of both classifiers are normalized and averaged."""
+        model_path = tmp_path / "ensemble_model_turf_latest.pkl"
+        joblib.dump(
+            {
+                "models": {
+                    "xgb_win": SimpleNamespace(feature_importances_=[2.0, 6.0, 2.0]),
+                    "lgb_win": SimpleNamespace(feature_importances_=[10, 30, 60]),
+                },
+                "feature_names": ["speed", "jockey", "draw"],
+                "trained_at": "2026-10-13T23:40:00",
+                "version": "v6_ranking_ensemble",
+                "win_auc": 0.77,
+            },
+            model_path,
+        )
+
+        row = index_deployed_model(model_path)
+        assert row["model"] == "turf"
+
+        artifacts = read_index(tmp_path, ARTIFACTS_TABLE, columns=["version", "win_auc"])
+        assert artifacts["version"].iloc[0] == "v6_ranking_ensemble"
+
+        importance = read_index(tmp_path, IMPORTANCE_TABLE, model="turf").set_index("feature")
+        assert importance.loc["jockey", "importance"] == pytest.approx(0.45)
+        assert importance.loc["draw", "importance"] == pytest.approx(0.4)
+        assert importance.loc["jockey", "rank"] == 1
+
+    def test_model_key(self):
+        """Test model names from deployed file names."""
+        assert model_key("models/ensemble_model_latest.pkl") == "mixed"
+        assert model_key("models/ensemble_model_dirt_latest.pkl") == "dirt"
@@ -0,0 +1,106 @@
+"""
+Unit tests for the historical backtest engine.
+
+Tests date sharding and strategy settlement on synthetic frames.
+"""
+
+from datetime import date
+
+import pandas as pd
+
+from src.scheduler.backtest.engine import make_shards
+from src.scheduler.backtest.strategies import (
+    simulate_bets,
+    summarize_races,
+    summarize_strategies,
+)
+
+RACE_A = "2024060105010101"
+RACE_B = "2024060105010102"
+RACE_C = "2024060105010103"  # No payouts (not finalized)
+
+
+def _umaban(values):
+    return pd.array(values, dtype="Int64")
+
+
+def _frames():
+    predictions = pd.DataFrame(
+        {
+            "race_code": [RACE_A] * 3 + [RACE_B] * 3 + [RACE_C] * 2,
+            "umaban": _umaban([1, 2, 3, 1, 2, 3, 1, 2]),
+            "pred_rank": [1, 2, 3, 2, 1, 3, 1, 2],
+            "win_prob": [0.5, 0.3, 0.2, 0.2, 0.5, 0.3, 0.6, 0.4],
+            "place_prob": [0.8, 0.6, 0.5, 0.5, 0.8, 0.7, 0.9, 0.8],
+        }
+    )
+    odds = pd.DataFrame(
+        {
+            "race_code": [RACE_A] * 3 + [RACE_B] * 3 + [RACE_C] * 2,
+            "umaban": _umaban([1, 2, 3, 1, 2, 3, 1, 2]),
+            "tansho": [2.0, 6.0, 5.0, 4.0, 2.5, 10.0, 2.0, 3.0],
+            "fukusho": [1.2, 2.0, 1.5, 1.5, 1.1, 3.0, 1.1, 1.4],
+        }
+    )
+    payouts = pd.DataFrame(
+        {
+            "race_code": [RACE_A, RACE_A, RACE_A, RACE_B, RACE_B, RACE_B],
+            "bet_type": ["tansho", "fukusho", "fukusho", "tansho", "fukusho", "fukusho"],
+            "umaban": _umaban([2, 2, 1, 3, 3, 2]),
+            "payout": [600, 200, 120, 1000, 300, 110],
+        }
+    )
+    return predictions, payouts, odds
+
+
+class TestMakeShards:
+    """Test date sharding."""
+
+    def test_shards_cover_range_without_crossing_years(self):
+        """Test shards are contiguous and split at year boundaries."""
+        shards = make_shards(date(2023, 12, 20), date(2024, 2, 10), 31)
+
+        assert shards[0] == (date(2023, 12, 20), date(2023, 12, 31))
+        assert shards[-1][1] == date(2024, 2, 10)
+        for (_, prev_end), (next_start, _) in zip(shards, shards[1:]):
+            assert (next_start - prev_end).days == 1
+        assert all(s.year == e.year for s, e in shards)
+
+    def test_one_shard_per_year(self):
+        """Test shard_days=None yields calendar-year shards."""
+        shards = make_shards(date(2022, 6, 1), date(2024, 3, 1), None)
+
+        assert shards == [
+            (date(2022, 6, 1), date(2022, 12, 31)),
+            (date(2023, 1, 1), date(2023, 12, 31)),
+            (date(2024, 1, 1), date(2024, 3, 1)),
+        ]
+
+
+class TestStrategies:
+    """Test bet placement and settlement."""
+
+    def test_settlement(self):
+        """Test each strategy's tickets and returns."""
+        predictions, payouts, odds = _frames()
+        bets = simulate_bets(predictions, payouts, odds, 1.5, 1.5)
+
+        # Unsettled races are skipped
+        assert RACE_C not in set(bets["race_code"])
+
+        races = summarize_races(predictions, payouts, bets).set_index("race_code")
+        assert races.loc[RACE_A, "win_top1_return"] == 0
+        assert races.loc[RACE_A, "place_top1_return"] == 120
+        # EV win: A-2 (1.8), A-3 (1.0 no), B-1 (0.8 no), B-3 (3.0)
+        assert races.loc[RACE_A, "ev_win_return"] == 600
+        assert races.loc[RACE_B, "ev_win_return"] == 1000
+        # EV place: A-2 (1.2 no), B-3 (2.1)
+        assert races.loc[RACE_B, "ev_place_stake"] == 100
+        assert races.loc[RACE_B, "ev_place_return"] == 300
+        assert races.loc[RACE_B, "actual_rank1"] == 3
+        assert races.loc[RACE_B, "predicted_rank1"] == 2
+
+        summary = summarize_strategies(races.reset_index())
+        assert summary["ev_win"]["stake"] == 200
+        assert summary["ev_win"]["return_rate"] == 8.0
+        assert summary["win_top1"]["hit_races"] == 0
@@ -0,0 +1,256 @@
+"""
+Unit tests for daily bias analysis.
+
+Tests that the set-based analyze_range/save_biases match the previous
+per-race loop (one runner query per race, one upsert per day) on a fixture.
+"""
+
+import json
+from datetime import date
+
+import pytest
+
+from src.features.daily_bias import (
+    DailyBiasAnalyzer,
+    DailyBiasResult,
+    JockeyDayPerformance,
+    VenueBias,
+)
+
+# race_code, race_date, keibajo_code, track_code, shiba_babajotai_code, dirt_babajotai_code
+RACES = [
+    ("2026101706010101", "20261017", "06", "11", "1", "2"),
+    ("2026101706010102", "20261017", "06", "23", "1", "2"),
+    ("2026101708010101", "20261017", "08", "17", "3", "1"),
+    ("2026101806010201", "20261018", "06", "24", "1", "4"),
+    ("2026101806010202", "20261018", "06", None, "1", "4"),
+]
+
+# race_code, wakuban, kakutei_chakujun, kyakushitsu_hantei, kishu_code, kishumei_ryakusho
+HORSES = [
+    ("2026101706010101", "1", "01", "1", "01001", "Take"),
+    ("2026101706010101", "5", "02", "3", "01002", "Lemaire"),
+    ("2026101706010101", "8", "03", "4", "01003", None),
+    ("2026101706010102", "2", "03", "2", "01001", "Take"),
+    ("2026101706010102", "6", "01", "4", "01002", "Lemaire"),
+    ("2026101706010102", None, "02", "", "", None),
+    ("2026101708010101", "4", "01", "0", "01004", "Kawada"),
+    ("2026101708010101", "7", "05", "x", "01001", "Take"),
+    ("2026101806010201", "3", "01", "1", "01002", "Lemaire"),
+    ("2026101806010201", "5", "04", "2", "01005", ""),
+]
+
+
+class FakeCursor:
+    """Cursor answering the race, runner and upsert statements from the fixture."""
+
+    def __init__(self, db):
+        self.db = db
+        self.result: list[tuple] = []
+
+    def execute(self, sql, params=None):
+        if "FROM race_shosai" in sql:
+            start, end = params[2], params[3]
+            self.result = [r for r in RACES if start <= r[1] <= end]
+        elif "FROM umagoto_race_joho" in sql:
+            self.db.runner_queries += 1
+            race_codes = set(params[0])
+            self.result = [h for h in HORSES if h[0] in race_codes]
+
+    def executemany(self, sql, rows):
+        self.db.saved.extend(rows)
+
+    def fetchall(self):
+        return self.result
+
+    def close(self):
+        pass
+
+
+class FakeDB:
+    def __init__(self):
+        self.runner_queries = 0
+        self.saved: list[tuple] = []
+
+    def get_connection(self):
+        return self
+
+    def cursor(self):
+        return FakeCursor(self)
+
+    def commit(self):
+        pass
+
+    def rollback(self):
+        pass
+
+    def close(self):
+        pass
+
+
+def legacy_analyze(target_date: date) -> DailyBiasResult | None:
+    """The previous DailyBiasAnalyzer.analyze per-race loop over the fixture."""
+    day = target_date.strftime("%Y%m%d")
+    races = [r for r in RACES if r[1] == day]
+    if not races:
+        return None
+
+    venue_data: dict[str, dict] = {}
+    jockey_data: dict[str, dict] = {}
+    for race_code, _, venue_code, track_code, shiba, dirt in races:
+        is_turf = bool(track_code and track_code.startswith("1"))
+        baba_code = shiba if is_turf else dirt
+        data = venue_data.setdefault(
+            venue_code,
+            {
+                **dict.fromkeys(
+                    (
+                        "race_count",
+                        "inner_wins",
+                        "inner_total",
+                        "outer_wins",
+                        "outer_total",
+                        "zenso_wins",
+                        "zenso_total",
+                        "koshi_wins",
+                        "koshi_total",
+                        "turf_results",
+                        "dirt_results",
+                    ),
+                    0,
+                ),
+                "track_condition": DailyBiasAnalyzer.TRACK_CONDITION.get(str(baba_code), "不明"),
+            },
+        )
+        data["race_count"] += 1
+        data["turf_results" if is_turf else "dirt_results"] += 1
+
+        for _, wakuban, chakujun_raw, kyakushitsu, kishu_code, kishu_name in (
+            h for h in HORSES if h[0] == race_code
+        ):
+            chakujun = int(chakujun_raw) if chakujun_raw else 99
+            is_win = chakujun == 1
+            try:
+                waku = int(wakuban) if wakuban else 0
+                side = "inner" if 1 <= waku <= 4 else "outer" if 5 <= waku <= 8 else None
+                if side:
+                    data[f"{side}_total"] += 1
+                    data[f"{side}_wins"] += is_win
+            except (ValueError, TypeError):
+                pass
+            try:
+                kyaku = int(kyakushitsu) if kyakushitsu else 0
+                style = "zenso" if kyaku in (1, 2) else "koshi" if kyaku in (3, 4) else None
+                if style:
+                    data[f"{style}_total"] += 1
+                    data[f"{style}_wins"] += is_win
+            except (ValueError, TypeError):
+                pass
+            if kishu_code:
+                jockey = jockey_data.setdefault(
+                    kishu_code,
+                    {"name": kishu_name or kishu_code, "rides": 0, "wins": 0, "top3": 0},
+                )
+                jockey["rides"] += 1
+                jockey["wins"] += is_win
+                jockey["top3"] += chakujun <= 3
+
+    def rate(data: dict, key: str) -> float:
+        total = data[f"{key}_total"]
+        return data[f"{key}_wins"] / total if total > 0 else 0
+
+    venue_biases = {}
+    for venue_code, data in venue_data.items():
+        inner, outer = rate(data, "inner"), rate(data, "outer")
+        zenso, koshi = rate(data, "zenso"), rate(data, "koshi")
+        venue_biases[venue_code] = VenueBias(
+            venue_code=venue_code,
+            venue_name=DailyBiasAnalyzer.VENUE_NAMES.get(venue_code, venue_code),
+            race_count=data["race_count"],
+            inner_waku_win_rate=inner,
+            outer_waku_win_rate=outer,
+            waku_bias=inner - outer,
+            zenso_win_rate=zenso,
+            koshi_win_rate=koshi,
+            pace_bias=zenso - koshi,
+            track_condition=data["track_condition"],
+            turf_results=data["turf_results"],
+            dirt_results=data["dirt_results"],
+        )
+
+    jockey_performances = {
+        code: JockeyDayPerformance(
+            jockey_code=code,
+            jockey_name=data["name"],
+            rides=data["rides"],
+            wins=data["wins"],
+            top3=data["top3"],
+            win_rate=data["wins"] / data["rides"],
+            top3_rate=data["top3"] / data["rides"],
+        )
+        for code, data in jockey_data.items()
+    }
+
+    return DailyBiasResult(
+        target_date=str(target_date),
+        analyzed_at="",
+        total_races=len(races),
+        venue_biases=venue_biases,
+        jockey_performances=jockey_performances,
+    )
+
+
+@pytest.fixture
+def analyzer():
+    analyzer = DailyBiasAnalyzer.__new__(DailyBiasAnalyzer)
+    analyzer.db = FakeDB()
+    return analyzer
+
+
+def comparable(result: DailyBiasResult) -> dict:
+    """Result as saved to daily_bias, without the analysis timestamp."""
+    data = result.to_dict()
+    data.pop("analyzed_at")
+    return data
+
+
+class TestAnalyzeRange:
+    """Test the set-based analysis against the per-race loop."""
+
+    def test_matches_per_race_loop(self, analyzer):
+        """Test every day of the range matches the previous per-day analysis."""
+        days = [date(2026, 10, 17), date(2026, 10, 18)]
+
+        results = analyzer.analyze_range(days[0], days[-1])
+
+        assert sorted(results) == days
+        assert analyzer.db.runner_queries == 1
+        for day in days:
+            assert comparable(results[day]) == comparable(legacy_analyze(day))
+
+    def test_single_day_and_empty_day(self, analyzer):
+        """Test analyze() returns one day, and None for a day without races."""
+        result = analyzer.analyze(date(2026, 10, 18))
+
+        assert comparable(result) == comparable(legacy_analyze(date(2026, 10, 18)))
+        assert result.venue_biases["06"].dirt_results == 2
+        assert result.venue_biases["06"].track_condition == "Bad"
+        assert result.jockey_performances["01005"].jockey_name == "01005"
+        assert analyzer.analyze(date(2026, 10, 19)) is None
+
+
+class TestSaveBiases:
+    """Test the batched upsert."""
+
+    def test_rows_match_per_day_upserts(self, analyzer):
+        """Test one upsert row per day with the same JSON as the per-day save."""
+        results = analyzer.analyze_range(date(2026, 10, 17), date(2026, 10, 18))
+
+        assert analyzer.save_biases([results[d] for d in sorted(results)]) == 2
+
+        for row, day in zip(analyzer.db.saved, sorted(results), strict=True):
+            legacy = legacy_analyze(day).to_dict()
+            assert row[0] == str(day)
+            assert row[2] == legacy["total_races"]
+            assert json.loads(row[3]) == legacy["venue_biases"]
+            assert json.loads(row[4]) == legacy["jockey_performances"]
@@ -0,0 +1,119 @@
+"""
+Unit tests for the dashboard summary rollups.
+
+Tests daily rows built from calculate_accuracy() output, running totals,
+period differences and derived rates.
+"""
+
+from datetime import date
+
+import pytest
+
+from src.scheduler.result.summary import (
+    CALIBRATION_BINS,
+    accumulate,
+    daily_summary,
+    difference,
+    summary_rates,
+)
+
+
+def make_accuracy(day: int, races: int, tansho_hit: int, tansho_return: int) -> dict:
+    """calculate_accuracy()-shaped dictionary for one analysis date."""
+    return {
+        "date": date(2026, 10, day),
+        "total_races": races + 1,
+        "analyzed_races": races,
+        "accuracy": {"mrr": 0.5},
+        "raw_stats": {
+            "tansho_hit": tansho_hit,
+            "fukusho_hit": tansho_hit + 2,
+            "umaren_hit": 1,
+            "sanrenpuku_hit": 0,
+            "top3_cover": 3,
+        },
+        "return_rates": {
+            "tansho_investment": races * 100,
+            "tansho_return": tansho_return,
+            "fukusho_investment": races * 100,
+            "fukusho_return": 900,
+        },
+        "axis_stats": {
+            "axis_races": races,
+            "axis_fukusho_hit": 4,
+            "axis_fukusho_investment": races * 100,
+            "axis_fukusho_return": 1100,
+        },
+        "calibration": {
+            "20%": {"count": 6, "actual_rate": 50.0},
+            "30%": {"count": 4, "actual_rate": 25.0},
+            "100%": {"count": 1, "actual_rate": 100.0},
+        },
+    }
+
+
+class TestDailySummary:
+    """Test daily rows from analysis output."""
+
+    def test_counts_and_calibration_bins(self):
+        """Test counts are copied and calibration rates become hit counts per bin."""
+        row = daily_summary(make_accuracy(11, races=12, tansho_hit=3, tansho_return=1500))
+
+        assert row["summary_date"] == date(2026, 10, 11)
+        assert row["analyzed_races"] == 12
+        assert row["tansho_hit"] == 3
+        assert row["mrr_sum"] == pytest.approx(6.0)
+        assert len(row["calib_races"]) == CALIBRATION_BINS
+        assert row["calib_races"][2:4] == [6, 4]
+        assert row["calib_hits"][2:4] == [3, 1]
+        # A 100% bin is folded into the top bin
+        assert row["calib_races"][9] == 1
+
+
+class TestRollups:
+    """Test running totals and period differences."""
+
+    def test_period_is_difference_of_cumulative_rows(self):
+        """Test the last two days equal the difference of the cumulative rows."""
+        days = [
+            daily_summary(make_accuracy(d, races=r, tansho_hit=h, tansho_return=ret))
+            for d, r, h, ret in [(4, 10, 2, 800), (5, 12, 3, 1500), (11, 8, 1, 300)]
+        ]
+        cumulative = []
+        for row in days:
+            cumulative.append(accumulate(cumulative[-1] if cumulative else None, row))
+
+        assert cumulative[-1]["days"] == 3
+        assert cumulative[-1]["analyzed_races"] == 30
+        assert cumulative[-1]["calib_races"][2] == 18
+
+        period = difference(cumulative[-1], cumulative[0])
+        assert period["days"] == 2
+        assert period["analyzed_races"] == 20
+        assert period["tansho_return"] == 1800
+        assert period["calib_hits"] == [a + b for a, b in zip(*(d["calib_hits"] for d in days[1:]))]
+        assert difference(cumulative[0], None)["analyzed_races"] == 10
+
+    def test_rates(self):
+        """Test rates and ROI are derived from the counts."""
+        row = daily_summary(make_accuracy(11, races=10, tansho_hit=2, tansho_return=1500))
+        rates = summary_rates(row)
+
+        assert rates["tansho_rate"] == pytest.approx(20.0)
+        assert rates["tansho_roi"] == pytest.approx(150.0)
+        assert rates["mrr"] == pytest.approx(0.5)
+        assert rates["calibration"][0] == {
+            "bin": "20%",
+            "races": 6,
+            "predicted_rate": 25,
+            "actual_rate": pytest.approx(50.0),
+        }
+
+    def test_rates_of_empty_row(self):
+        """Test rates are None instead of dividing by zero."""
+        row = daily_summary({"date": date(2026, 10, 11)})
+        rates = summary_rates(row)
+
+        assert rates["tansho_rate"] is None
+        assert rates["tansho_roi"] is None
+        assert rates["calibration"] == []
@@ -0,0 +1,172 @@
+"""
+Unit tests for the retraining evaluator's return simulations.
+
+Pins simulate_returns and simulate_ev_returns to the numbers of the original
+per-race loop implementation on a fixed fixture with tied scores, missing
+payouts and odds, and multi-horse place payouts.
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.scheduler.retrain.evaluator import simulate_ev_returns, simulate_returns
+
+R1, R2, R3, R4, R5 = (f"20240105060101{i:02d}" for i in range(1, 6))
+
+
+@pytest.fixture
+def races():
+    """Five races: predictions, win probabilities, payouts and win odds."""
+    df = pd.DataFrame(
+        {
+            "race_code": [R1] * 4 + [R2] * 3 + [R3] * 3 + [R4] * 2 + [R5] * 3,
+            "umaban": [3, 1, 2, 4, 5, 6, 7, 1, 2, 3, 8, 9, 10, 11, 12],
+        }
+    )
+    # Tied top scores in R1 (horses 3 and 1), R3 (all) and R5 (horses 10 and 11)
+    predictions = np.array(
+        [1.0, 1.0, 2.0, 3.0, 2.5, 0.5, 1.5, 4.0, 4.0, 4.0, 0.2, 0.9, 3.0, 3.0, 1.0]
+    )
+    win_probs = np.array(
+        [0.40, 0.30, 0.20, 0.10, 0.50, 0.0, 0.25, 0.3, 0.3, 0.3, 0.6, 0.1, 0.15, 0.25, 0.5]
+    )
+    payouts = {
+        R1: {
+            "tansho": {"umaban": "1", "payout": 250},
+            "fukusho": [
+                {"umaban": "1", "payout": 120},
+                {"umaban": "3", "payout": 140},
+                {"umaban": "2", "payout": 300},
+            ],
+        },
+        R2: {
+            "tansho": {"umaban": "6", "payout": 480},
+            "fukusho": [{"umaban": "6", "payout": 160}, {"umaban": "5", "payout": 110}],
+        },
+        # R3: no payout row
+        R4: {"tansho": {"umaban": None, "payout": 0}, "fukusho": []},
+        R5: {
+            "tansho": {"umaban": "12", "payout": 190},
+            "fukusho": [{"umaban": "12", "payout": 100}, {"umaban": "10", "payout": 230}],
+        },
+    }
+    tansho_odds = {
+        R1: {"1": 5.0, "2": 6.0, "3": 3.0, "4": 20.0},
+        R2: {"5": 2.0, "6": 4.8, "7": 8.0},
+        # R3: no odds
+        R4: {"8": 2.5, "9": 0.0},
+        R5: {"10": 8.0, "11": 6.0, "12": 4.0},
+    }
+    return df, predictions, win_probs, payouts, tansho_odds
+
+
+class TestSimulateReturns:
+    """Test top-prediction win/place returns."""
+
+    @pytest.mark.parametrize(
+        "ascending, expected",
+        [
+            (
+                True,
+                {
+                    "tansho_return": 1.34,
+                    "fukusho_return": 0.8,
+                    "tansho_bet": 500,
+                    "tansho_win": 670,
+                    "fukusho_bet": 500,
+                    "fukusho_win": 400,
+                },
+            ),
+            (
+                False,
+                {
+                    "tansho_return": 0.0,
+                    "fukusho_return": 0.68,
+                    "tansho_bet": 500,
+                    "tansho_win": 0,
+                    "fukusho_bet": 500,
+                    "fukusho_win": 340,
+                },
+            ),
+        ],
+    )
+    def test_matches_loop_implementation(self, races, ascending, expected):
+        """Test returns equal the frozen numbers of the per-race loop."""
+        df, predictions, _, payouts, _ = races
+
+        assert simulate_returns(df, predictions, payouts, ascending=ascending) == expected
+
+    def test_horse_number_column(self, races):
+        """Test horse_number is used when there is no umaban column."""
+        df, predictions, _, payouts, _ = races
+
+        result = simulate_returns(
+            df.rename(columns={"umaban": "horse_number"}), predictions, payouts
+        )
+
+        assert result["tansho_win"] == 670
+        assert result["fukusho_win"] == 400
+
+    def test_missing_columns(self, races):
+        """Test zero returns without a horse number column."""
+        df, predictions, _, payouts, _ = races
+
+        result = simulate_returns(df.drop(columns="umaban"), predictions, payouts)
+
+        assert result == {"tansho_return": 0, "fukusho_return": 0}
+
+
+class TestSimulateEVReturns:
+    """Test EV-threshold win betting returns."""
+
+    @pytest.mark.parametrize(
+        "ev_threshold, expected",
+        [
+            (
+                1.0,
+                {
+                    "ev_tansho_return": 0.44,
+                    "ev_bet_count": 10,
+                    "ev_race_count": 4,
+                    "ev_total_bet": 1000,
+                    "ev_total_win": 440,
+                },
+            ),
+            (
+                1.5,
+                {
+                    "ev_tansho_return": 440 / 600,
+                    "ev_bet_count": 6,
+                    "ev_race_count": 4,
+                    "ev_total_bet": 600,
+                    "ev_total_win": 440,
+                },
+            ),
+            (
+                2.0,
+                {
+                    "ev_tansho_return": 190 / 300,
+                    "ev_bet_count": 3,
+                    "ev_race_count": 3,
+                    "ev_total_bet": 300,
+                    "ev_total_win": 190,
+                },
+            ),
+        ],
+    )
+    def test_matches_loop_implementation(self, races, ev_threshold, expected):
+        """Test returns equal the frozen numbers of the per-race loop."""
+        df, _, win_probs, payouts, tansho_odds = races
+
+        result = simulate_ev_returns(df, win_probs, tansho_odds, payouts, ev_threshold)
+
+        assert result == expected
+
+    def test_missing_columns(self, races):
+        """Test zero returns without a horse number column."""
+        df, _, win_probs, payouts, tansho_odds = races
+
+        result = simulate_ev_returns(df.drop(columns="umaban"), win_probs, tansho_odds, payouts)
+
+        assert result == {"ev_tansho_return": 0, "ev_bet_count": 0, "ev_race_count": 0}
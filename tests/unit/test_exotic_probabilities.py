@@ -0,0 +1,93 @@
+"""
+Unit tests for exotic bet probability module.
+
+Tests Harville/discounted joint probabilities and EV ranking.
+"""
+
+import numpy as np
+import pytest
+
+from src.models.exotic_probabilities import (
+    MAX_HORSES,
+    compute_exotic_probabilities,
+    expected_values,
+    top_expected_value_bets,
+)
+
+
+@pytest.fixture
+def field_probs():
+    """Win probabilities for a 10-horse field."""
+    rng = np.random.default_rng(42)
+    return list(range(1, 11)), rng.dirichlet(np.ones(10))
+
+
+class TestExoticProbabilities:
+    """Test joint finishing-order probabilities."""
+
+    def test_harville_trifecta_matches_formula(self, field_probs):
+        """Test trifecta probability equals the Harville product."""
+        numbers, p = field_probs
+        result = compute_exotic_probabilities(numbers, p, model="harville")
+
+        expected = p[2] * p[4] / (1 - p[2]) * p[7] / (1 - p[2] - p[4])
+        assert result.trifecta[2, 4, 7] == pytest.approx(expected)
+
+    @pytest.mark.parametrize("model", ["harville", "discounted"])
+    def test_ticket_totals(self, field_probs, model):
+        """Test each ticket type sums to the number of paying positions."""
+        numbers, p = field_probs
+        result = compute_exotic_probabilities(numbers, p, model=model)
+
+        assert result.trifecta.sum() == pytest.approx(1.0)
+        assert result.exacta.sum() == pytest.approx(1.0)
+        assert result.quinella.sum() == pytest.approx(1.0)
+        assert result.trio.sum() == pytest.approx(1.0)
+        assert result.wide.sum() == pytest.approx(3.0)
+        assert result.place.sum() == pytest.approx(3.0)
+        np.testing.assert_allclose(result.win[:10], p)
+
+    def test_full_field_combination_count(self):
+        """Test an 18-horse field yields 4896 trifecta combinations."""
+        result = compute_exotic_probabilities(range(1, 19), np.full(18, 1 / 18))
+
+        assert result.trifecta.shape == (MAX_HORSES,) * 3
+        assert np.count_nonzero(result.trifecta) == 4896
+        assert np.count_nonzero(result.trio) == 816
+
+    def test_missing_horse_numbers_are_zero(self):
+        """Test scratched horse numbers get zero probability."""
+        result = compute_exotic_probabilities([1, 2, 4], [0.5, 0.3, 0.2])
+
+        assert result.win[2] == 0.0
+        assert result.trifecta[2].sum() == 0.0
+
+    def test_invalid_model_raises(self, field_probs):
+        """Test unknown model name raises ValueError."""
+        numbers, p = field_probs
+        with pytest.raises(ValueError):
+            compute_exotic_probabilities(numbers, p, model="unknown")
+
+
+class TestExoticExpectedValue:
+    """Test EV computation over packed odds."""
+
+    def test_unsold_combinations_have_zero_ev(self):
+        """Test EV is zero where odds are zero."""
+        probs = np.array([[0.0, 0.2], [0.3, 0.0]])
+        odds = np.array([[0.0, 10.0], [0.0, 0.0]])
+
+        np.testing.assert_allclose(expected_values(probs, odds), [[0.0, 2.0], [0.0, 0.0]])
+
+    def test_top_bets_sorted_and_numbered(self):
+        """Test recommendations are sorted by EV with 1-based horse numbers."""
+        probs = np.zeros((MAX_HORSES, MAX_HORSES))
+        odds = np.zeros((MAX_HORSES, MAX_HORSES))
+        probs[0, 1], odds[0, 1] = 0.2, 10.0  # EV 2.0
+        probs[2, 4], odds[2, 4] = 0.1, 30.0  # EV 3.0
+        probs[5, 6], odds[5, 6] = 0.1, 5.0  # EV 0.5
+
+        bets = top_expected_value_bets(probs, odds, ev_threshold=1.5)
+
+        assert [b["numbers"] for b in bets] == [[3, 5], [1, 2]]
+        assert bets[0]["expected_value"] == pytest.approx(3.0)
@@ -0,0 +1,86 @@
+"""
+Unit tests for the parameter order of the leak-prevention batch queries.
+
+The per-horse horse_filter VALUES list comes before the IN list in the SQL,
+so its (kettonum, current_race_code) pairs must be bound first. Each query
+is checked by binding the recorded parameters into the SQL text in order.
+"""
+
+import pytest
+
+from src.models.feature_extractor import db_queries, performance, venue
+
+HORSES = ["2019100001", "2019100002", "2020100003"]
+ENTRIES = [
+    {"ketto_toroku_bango": HORSES[0], "race_code": "2024020805010309"},
+    {"ketto_toroku_bango": HORSES[1], "race_code": "2024010205010202"},
+]
+
+
+class RecordingCursor:
+    """Cursor recording executed statements and returning no rows."""
+
+    def __init__(self, statements: list[tuple[str, list]]):
+        self.statements = statements
+
+    def execute(self, sql, params=()):
+        self.statements.append((sql, list(params)))
+
+    def fetchall(self):
+        return []
+
+    def close(self):
+        pass
+
+
+class RecordingConnection:
+    def __init__(self):
+        self.statements: list[tuple[str, list]] = []
+
+    def cursor(self):
+        return RecordingCursor(self.statements)
+
+
+def bind(sql: str, params: list) -> str:
+    """Substitute %s placeholders with quoted parameters, in order."""
+    parts = sql.replace("%%", "\0").split("%s")
+    assert len(parts) == len(params) + 1
+    bound = parts[0]
+    for value, part in zip(params, parts[1:], strict=True):
+        bound += f"'{value}'{part}"
+    return bound.replace("\0", "%")
+
+
+@pytest.mark.parametrize(
+    "query, args",
+    [
+        pytest.param(db_queries.get_past_stats_batch, (), id="get_past_stats_batch"),
+        pytest.param(db_queries.get_detailed_stats_batch, (), id="get_detailed_stats_batch"),
+        pytest.param(db_queries.get_race_lap_stats_batch, (), id="get_race_lap_stats_batch"),
+        pytest.param(performance.get_surface_stats_batch, (), id="get_surface_stats_batch"),
+        pytest.param(performance.get_baba_stats_batch, ([],), id="get_baba_stats_batch"),
+        pytest.param(performance.get_interval_stats_batch, (), id="get_interval_stats_batch"),
+        pytest.param(venue.get_venue_stats_batch, (), id="get_venue_stats_batch"),
+        pytest.param(venue.get_zenso_batch, ([],), id="get_zenso_batch"),
+    ],
+)
+def test_each_horse_paired_with_its_race(query, args):
+    """Test every horse is bound with its own current race and the IN list holds the horses."""
+    conn = RecordingConnection()
+
+    query(conn, HORSES, *args, entries=ENTRIES)
+
+    pairs = ",".join(
+        [
+            f"('{HORSES[0]}', '2024020805010309')",
+            f"('{HORSES[1]}', '2024010205010202')",
+            # Not in the entries: every run is before the sentinel race code
+            f"('{HORSES[2]}', '9999999999999999')",
+        ]
+    )
+    horses_in = ",".join(f"'{horse}'" for horse in HORSES)
+    assert conn.statements
+    for sql, params in conn.statements:
+        bound = bind(sql, params)
+        assert f"(VALUES {pairs})" in bound
+        assert f"IN ({horses_in})" in bound
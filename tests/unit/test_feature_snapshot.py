@@ -0,0 +1,91 @@
+"""
+Unit tests for pre-race feature snapshots.
+
+Tests that patching race-day data matches features built from scratch.
+"""
+
+import pandas as pd
+import pytest
+
+from src.services.prediction.feature_snapshot import (
+    add_field_relative_features,
+    is_scratched,
+    patch_snapshot,
+)
+
+RACE_ID = "2024060105010101"
+
+
+def _features(weights):
+    """Snapshot-style feature frame of four runners."""
+    df = pd.DataFrame(
+        {
+            "race_code": [RACE_ID] * 4,
+            "umaban": [1, 2, 3, 4],
+            "horse_weight": [480] * 4,
+            "weight_diff": [0] * 4,
+            "days_since_last_race": [14, 28, 35, 70],
+            "weight_rest_interaction": [0.0] * 4,
+            "baba_condition": [1] * 4,
+            "speed_index_avg": [50.0, 52.0, 48.0, 54.0],
+            "win_rate": [0.1, 0.2, 0.0, 0.3],
+        }
+    )
+    df["horse_weight"] = weights
+    return add_field_relative_features(df)
+
+
+def _entry(umaban, bataiju="", zogen_sa="", ijo="0", kishu=None):
+    return {
+        "umaban": f"{umaban:02d}",
+        "ketto_toroku_bango": f"20200{umaban:05d}",
+        "kishu_code": kishu or f"0100{umaban}",
+        "bataiju": bataiju,
+        "zogen_sa": zogen_sa,
+        "ijo_kubun_code": ijo,
+    }
+
+
+SNAPSHOT_ENTRIES = {str(u): [f"20200{u:05d}", f"0100{u}"] for u in range(1, 5)}
+
+
+class TestPatchSnapshot:
+    """Test race-day patching."""
+
+    def test_patch_matches_rebuilt_features(self):
+        """Test weights, scratches, track condition and field features."""
+        entries = [
+            _entry(1, "470", "4"),
+            _entry(2, "502", "10"),
+            _entry(3, ijo="1"),  # Scratched
+            _entry(4, "456", "0"),
+        ]
+        conditions = {
+            "track_code": "24",
+            "shiba_babajotai_code": "1",
+            "dirt_babajotai_code": "3",
+        }
+
+        patched = patch_snapshot(_features([480] * 4), SNAPSHOT_ENTRIES, entries, conditions)
+
+        expected = _features([470, 502, 480, 456])
+        expected = expected[expected["umaban"] != 3].reset_index(drop=True)
+        expected["weight_diff"] = [4, 10, 0]
+        expected["weight_rest_interaction"] = [4 * 14 / 100.0, 10 * 28 / 100.0, 0.0]
+        expected["baba_condition"] = 3
+        expected = add_field_relative_features(expected)
+
+        pd.testing.assert_frame_equal(patched, expected, check_dtype=False)
+        assert patched["speed_vs_field"].sum() == pytest.approx(0.0)
+
+    def test_changed_jockey_requires_rebuild(self):
+        """Test a jockey change rejects the snapshot."""
+        entries = [_entry(u) for u in range(1, 4)] + [_entry(4, kishu="09999")]
+
+        assert patch_snapshot(_features([480] * 4), SNAPSHOT_ENTRIES, entries, {}) is None
+
+    def test_is_scratched(self):
+        """Test scratch and registration-only detection."""
+        assert is_scratched(_entry(1, ijo="2"))
+        assert is_scratched({"umaban": "00", "ijo_kubun_code": "0"})
+        assert not is_scratched(_entry(1, ijo=" "))
@@ -0,0 +1,64 @@
+"""
+Unit tests for import-time hygiene.
+
+Entry points and the modules the API imports at startup must not load
+heavy ML libraries (pandas, numpy, xgboost, ...) until a code path uses them.
+"""
+
+import importlib.util
+
+import pytest
+
+from tests.benchmarks.import_audit import audit, parse_importtime
+
+# Modules on the startup path of the API and the short CLI tools
+LIGHT_MODULES = [
+    "src.db.connection",
+    "src.models",
+    "src.models.ev_recommender",
+    "src.services.odds_watcher",
+    "src.services.prediction",
+    "src.services.prediction_service",
+    "src.services.race_resolver",
+    "src.cli.video_export",
+]
+
+SAMPLE_OUTPUT = """\
+import time: self [us] | cumulative | imported package
+import time:       120 |        120 |     numpy.core
+import time:      3000 |       3120 |   numpy
+import time:       500 |       3620 | src.pkg.heavy
+import time:        80 |         80 |   src.pkg
+import time:        40 |       3740 | src.pkg.light
+"""
+
+
+class TestParse:
+    """Test -X importtime output parsing."""
+
+    def test_chain_follows_importers(self):
+        """Test each record's chain lists its importers, outermost first."""
+        report = parse_importtime(SAMPLE_OUTPUT, "src.pkg.light")
+        records = {r.module: r for r in report.records}
+
+        assert records["numpy.core"].chain == ("src.pkg.heavy", "numpy")
+        assert records["src.pkg"].chain == ("src.pkg.light",)
+        assert report.total_ms == pytest.approx(3.74)
+        assert list(report.heavy_loaded()) == ["numpy"]
+        assert report.slowest(1)[0].module == "numpy"
+
+
+class TestLightImports:
+    """Test startup modules load no heavy libraries."""
+
+    @pytest.mark.parametrize("module", LIGHT_MODULES)
+    def test_no_heavy_libraries(self, module):
+        """Test importing the module loads none of HEAVY_MODULES."""
+        heavy = audit(module).heavy_loaded()
+        assert not heavy, {name: " -> ".join(r.chain) for name, r in heavy.items()}
+
+    @pytest.mark.skipif(importlib.util.find_spec("fastapi") is None, reason="fastapi not installed")
+    def test_api_main(self):
+        """Test the API application imports without the ML stack."""
+        heavy = audit("src.api.main", env={"DB_MODE": "mock"}).heavy_loaded()
+        assert not heavy, {name: " -> ".join(r.chain) for name, r in heavy.items()}
@@ -0,0 +1,139 @@
+"""
+Unit tests for incremental intra-day bias.
+
+Tests that folding races in one at a time matches the full-day analysis.
+"""
+
+import random
+from dataclasses import asdict
+from datetime import date
+
+import pandas as pd
+import pytest
+
+from src.features.daily_bias import DailyBiasAnalyzer
+from src.features.intraday_bias import IntradayBiasTracker
+
+TARGET_DATE = date(2024, 6, 1)
+
+
+@pytest.fixture
+def day_results():
+    """Synthetic finalized races and runners of one day at two venues."""
+    rng = random.Random(0)
+    races, horses = [], []
+    for venue in ("05", "09"):
+        for race_no in range(1, 13):
+            race_code = f"20240601{venue}0101{race_no:02d}"
+            races.append(
+                (race_code, "20240601", venue, rng.choice(["10", "23"]), rng.choice("12"), "3")
+            )
+            for umaban in range(1, 15):
+                horses.append(
+                    (
+                        race_code,
+                        str((umaban + 1) // 2),
+                        f"{rng.randint(1, 14):02d}",
+                        rng.choice(["1", "2", "3", "4", ""]),
+                        rng.choice(["01001", "01002", "01003", ""]),
+                        rng.choice(["Jockey", None]),
+                    )
+                )
+    return races, horses
+
+
+class FakeConnection:
+    """Connection answering the race and runner queries of refresh()."""
+
+    def __init__(self, races, horses):
+        self.races = races
+        self.horses = horses
+
+    def cursor(self):
+        return self
+
+    def execute(self, sql, params):
+        if "FROM race_shosai" in sql:
+            self.result = [(r[0], *r[2:]) for r in self.races if r[0] not in params[2]]
+        else:
+            self.result = [h for h in self.horses if h[0] in params[0]]
+
+    def fetchall(self):
+        return self.result
+
+    def close(self):
+        pass
+
+
+def _fold(tracker, races, horses):
+    for race_code, _, venue, track, shiba, dirt in races:
+        runners = [h[1:] for h in horses if h[0] == race_code]
+        tracker.add_race(race_code, venue, track, shiba, dirt, runners)
+
+
+class TestIntradayBiasTracker:
+    """Test incremental counters."""
+
+    def test_matches_full_day_analysis(self, day_results):
+        """Test incremental result equals the set-based daily analysis."""
+        races, horses = day_results
+        tracker = IntradayBiasTracker(TARGET_DATE)
+        _fold(tracker, races, horses)
+
+        analyzer = DailyBiasAnalyzer.__new__(DailyBiasAnalyzer)
+        expected = analyzer._aggregate(
+            pd.DataFrame(
+                races,
+                columns=["race_code", "race_date", "venue_code", "track_code", "shiba", "dirt"],
+            ),
+            pd.DataFrame(
+                horses,
+                columns=["race_code", "wakuban", "chakujun", "kyakushitsu", "kishu_code", "name"],
+            ),
+        )[TARGET_DATE]
+
+        result = tracker.result()
+        assert result.total_races == expected.total_races
+        for venue_code, vb in expected.venue_biases.items():
+            assert asdict(result.venue_biases[venue_code]) == pytest.approx(asdict(vb))
+        for code, jp in expected.jockey_performances.items():
+            assert asdict(result.jockey_performances[code]) == pytest.approx(asdict(jp))
+
+    def test_add_race_is_idempotent(self, day_results):
+        """Test re-delivered races are not double counted."""
+        races, horses = day_results
+        tracker = IntradayBiasTracker(TARGET_DATE)
+        _fold(tracker, races[:3], horses)
+        before = tracker.result()
+
+        _fold(tracker, races[:3], horses)
+
+        assert tracker.total_races == 3
+        assert tracker.result() is before
+
+    def test_snapshot_invalidated_on_update(self, day_results):
+        """Test a new race rebuilds the snapshot."""
+        races, horses = day_results
+        tracker = IntradayBiasTracker(TARGET_DATE)
+        _fold(tracker, races[:1], horses)
+        assert tracker.race_count("05") == 1
+
+        _fold(tracker, races[1:2], horses)
+
+        assert tracker.race_count("05") == 2
+        assert tracker.result().venue_biases["05"].race_count == 2
+
+    def test_refresh_waits_for_runners(self, day_results):
+        """Test a race whose runners are not visible yet is folded in on a later refresh."""
+        races, horses = day_results
+        tracker = IntradayBiasTracker(TARGET_DATE)
+        visible = [h for h in horses if h[0] != races[1][0]]
+        conn = FakeConnection(races[:2], visible)
+
+        assert tracker.refresh(conn) == 1
+        assert tracker.total_races == 1
+
+        conn.horses = horses
+        assert tracker.refresh(conn) == 1
+        assert tracker.total_races == 2
+        assert tracker.race_count("05") == 2
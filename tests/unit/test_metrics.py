@@ -0,0 +1,70 @@
+"""
+Unit tests for pipeline timing metrics.
+
+Tests span recording, error status and Prometheus text rendering.
+"""
+
+import pytest
+
+from src.metrics import STAGE_SECONDS, Histogram, render_prometheus, reset_metrics, span, timed
+
+
+@pytest.fixture(autouse=True)
+def _clean_metrics():
+    reset_metrics()
+    yield
+    reset_metrics()
+
+
+class TestHistogram:
+    """Test histogram aggregation."""
+
+    def test_cumulative_buckets(self):
+        """Test observations fall into every bucket at or above them."""
+        hist = Histogram("test_seconds", "Test", buckets=(0.1, 1.0))
+        hist.observe(0.05, stage="a")
+        hist.observe(0.5, stage="a")
+        hist.observe(5.0, stage="a")
+
+        values = hist.snapshot()[(("stage", "a"),)]
+        assert values["buckets"] == [1, 2]
+        assert values["count"] == 3
+        assert values["sum"] == pytest.approx(5.55)
+
+    def test_render_prometheus_text(self):
+        """Test exposition lines and label escaping."""
+        hist = Histogram("test_seconds", "Test", buckets=(1.0,))
+        hist.observe(0.5, stage='q"x')
+
+        lines = hist.render()
+        assert lines[:2] == ["# HELP test_seconds Test", "# TYPE test_seconds histogram"]
+        assert 'test_seconds_bucket{stage="q\\"x",le="1"} 1' in lines
+        assert 'test_seconds_bucket{stage="q\\"x",le="+Inf"} 1' in lines
+        assert 'test_seconds_count{stage="q\\"x"} 1' in lines
+
+
+class TestSpan:
+    """Test stage spans."""
+
+    def test_span_records_status(self):
+        """Test ok and error spans are recorded separately."""
+        with span("feature_build", race_id="2024060105010101"):
+            pass
+        with pytest.raises(ValueError), span("feature_build"):
+            raise ValueError("boom")
+
+        snapshot = STAGE_SECONDS.snapshot()
+        assert snapshot[(("stage", "feature_build"), ("status", "ok"))]["count"] == 1
+        assert snapshot[(("stage", "feature_build"), ("status", "error"))]["count"] == 1
+
+    def test_timed_decorator(self):
+        """Test the decorator records and passes through the result."""
+
+        @timed("query.test")
+        def query(x):
+            return x * 2
+
+        assert query(21) == 42
+        assert 'keiba_stage_duration_seconds_count{stage="query.test",status="ok"} 1' in (
+            render_prometheus()
+        )
@@ -0,0 +1,193 @@
+"""
+Unit tests for the real-time odds watcher.
+
+Tests incremental polling against per-race watermarks: late rows for one
+race, announcements whose rows arrive across polls, and unchanged polls;
+and the EV recompute of registered predictions for changed races only.
+"""
+
+from datetime import datetime
+from unittest.mock import patch
+
+import pytest
+
+from src.models.ev_recommender import JST
+from src.services.odds_watcher import OddsWatcher
+
+TODAY = datetime.now(JST).strftime("%Y%m%d")
+RACE_A = f"{TODAY}06010901"
+RACE_B = f"{TODAY}06010902"
+
+
+class FakeCursor:
+    """Cursor over an in-memory odds1_tansho_jikeiretsu applying the watermark filter."""
+
+    def __init__(self, rows: list[tuple]):
+        self.rows = rows
+        self.result: list[tuple] = []
+
+    def execute(self, sql, params=None):
+        if "information_schema" in sql:
+            # No odds1_fukusho_jikeiretsu: place odds come from odds1_fukusho
+            self.result = []
+        elif "odds1_fukusho" in sql:
+            self.result = []
+        else:
+            race_codes, announced, race_prefix = params
+            watermarks = dict(zip(race_codes, announced, strict=True))
+            self.result = sorted(
+                (
+                    row
+                    for row in self.rows
+                    if row[0].startswith(race_prefix.rstrip("%"))
+                    and row[3] >= watermarks.get(row[0], "")
+                ),
+                key=lambda row: (row[0], row[3]),
+            )
+
+    def fetchone(self):
+        return self.result[0] if self.result else None
+
+    def fetchall(self):
+        return self.result
+
+    def close(self):
+        pass
+
+
+class FakeConnection:
+    def __init__(self, rows: list[tuple]):
+        self.rows = rows
+
+    def cursor(self):
+        return FakeCursor(self.rows)
+
+
+@pytest.fixture
+def watcher():
+    return OddsWatcher(poll_seconds=15, notify_channel=None)
+
+
+class TestPolling:
+    """Test snapshots and change detection across polls."""
+
+    def test_latest_announcement_per_race(self, watcher):
+        """Test only each race's latest announcement ends up in the snapshot."""
+        conn = FakeConnection(
+            [
+                (RACE_A, "01", "0035", "10181000"),
+                (RACE_A, "01", "0031", "10181005"),
+                (RACE_A, "02", "0052", "10181005"),
+                (RACE_B, "01", "0120", "10181003"),
+            ]
+        )
+
+        assert watcher.poll_once(conn) == {RACE_A, RACE_B}
+        assert watcher._snapshots[RACE_A].tansho == {"1": 3.1, "2": 5.2}
+        assert watcher._snapshots[RACE_A].announced_at == "10181005"
+        assert watcher.poll_once(conn) == set()
+
+    def test_late_rows_of_another_race(self, watcher):
+        """Test rows older than another race's latest announcement are not skipped."""
+        rows = [(RACE_A, "01", "0035", "10181010")]
+        conn = FakeConnection(rows)
+        watcher.poll_once(conn)
+
+        # Ingested after RACE_A's 10:10 announcement, announced at 10:05
+        rows.append((RACE_B, "01", "0120", "10181005"))
+
+        assert watcher.poll_once(conn) == {RACE_B}
+        assert watcher._snapshots[RACE_B].tansho == {"1": 12.0}
+
+    def test_announcement_split_across_polls(self, watcher):
+        """Test rows with the watermark's timestamp inserted after a poll are picked up."""
+        rows = [(RACE_A, "01", "0035", "10181005")]
+        conn = FakeConnection(rows)
+        watcher.poll_once(conn)
+
+        rows.append((RACE_A, "02", "0052", "10181005"))
+
+        assert watcher.poll_once(conn) == {RACE_A}
+        assert watcher._snapshots[RACE_A].tansho == {"1": 3.5, "2": 5.2}
+        assert watcher.poll_once(conn) == set()
+
+
+def ranked_horses(prediction: str) -> list[dict]:
+    return [
+        {
+            "horse_number": 1,
+            "horse_name": f"{prediction}1",
+            "win_probability": 0.5,
+            "place_probability": 0.8,
+            "rank": 1,
+        },
+        {
+            "horse_number": 2,
+            "horse_name": f"{prediction}2",
+            "win_probability": 0.3,
+            "place_probability": 0.6,
+            "rank": 2,
+        },
+    ]
+
+
+class TestEVRecompute:
+    """Test EV is recomputed for registered races whose odds changed."""
+
+    @pytest.fixture(autouse=True)
+    def no_db(self):
+        with patch("src.models.ev_recommender.get_db"):
+            yield
+
+    def test_only_changed_races(self, watcher):
+        """Test a poll recomputes EV only for changed races and notifies listeners."""
+        rows = [
+            (RACE_A, "01", "0035", "10181000"),
+            (RACE_B, "01", "0050", "10181000"),
+        ]
+        conn = FakeConnection(rows)
+        notified = []
+        watcher.add_listener(lambda race_code, ev: notified.append(race_code))
+        watcher.register_prediction(RACE_A, ranked_horses("A"), prediction_id="pred-a")
+        watcher.register_prediction(RACE_B, ranked_horses("B"), prediction_id="pred-b")
+
+        watcher.poll_once(conn)
+        ev_a = watcher._ev_results[RACE_A]
+        ev_b = watcher._ev_results[RACE_B]
+
+        assert sorted(notified) == [RACE_A, RACE_B]
+        assert ev_a["prediction_id"] == "pred-a"
+        assert ev_b["odds_time"].endswith("10:00")
+
+        # Only RACE_B's odds move
+        rows.append((RACE_B, "01", "0080", "10181005"))
+        notified.clear()
+
+        assert watcher.poll_once(conn) == {RACE_B}
+        assert notified == [RACE_B]
+        assert watcher._ev_results[RACE_A] is ev_a
+        assert watcher._ev_results[RACE_B] is not ev_b
+        assert watcher._ev_results[RACE_B]["odds_time"].endswith("10:05")
+
+    def test_registration_deferred_to_poll(self, watcher):
+        """Test registering only queues the race; the next poll computes its EV."""
+        conn = FakeConnection([(RACE_A, "01", "0035", "10181000")])
+        watcher.poll_once(conn)
+
+        watcher.register_prediction(RACE_A, ranked_horses("A"), prediction_id="pred-a")
+        assert RACE_A not in watcher._ev_results
+
+        assert watcher.poll_once(conn) == set()
+        assert watcher._ev_results[RACE_A]["prediction_id"] == "pred-a"
+
+    def test_get_ev_matches_prediction(self, watcher, monkeypatch):
+        """Test get_ev only returns EV computed for the requested prediction."""
+        conn = FakeConnection([(RACE_A, "01", "0035", "10181000")])
+        monkeypatch.setattr(OddsWatcher, "is_running", True)
+        watcher.register_prediction(RACE_A, ranked_horses("A"), prediction_id="pred-a")
+        watcher.poll_once(conn)
+
+        assert watcher.get_ev(RACE_A)["prediction_id"] == "pred-a"
+        assert watcher.get_ev(RACE_A, "pred-a") is not None
+        assert watcher.get_ev(RACE_A, "pred-old") is None
+        assert watcher.get_ev(RACE_B) is None
@@ -0,0 +1,108 @@
+"""
+Unit tests for the packed exotic odds table.
+
+Tests combination indices, raw odds parsing and the dense uint32 array
+streamed by iter_exotic_odds_packed from cursor rows.
+"""
+
+from contextlib import asynccontextmanager
+
+import numpy as np
+import pytest
+
+from src.db.queries.odds_queries import (
+    PACKED_ODDS_BASE,
+    _parse_raw_odds,
+    combination_index,
+    iter_exotic_odds_packed,
+)
+
+RACE_ID = "2025012506010911"
+
+
+class FakeConnection:
+    """asyncpg connection stand-in yielding fixed rows from cursor()."""
+
+    def __init__(self, rows: list[dict]):
+        self.rows = rows
+        self.args: tuple = ()
+
+    @asynccontextmanager
+    async def transaction(self):
+        yield
+
+    async def _iter(self):
+        for row in self.rows:
+            yield row
+
+    def cursor(self, sql, *args, prefetch=None):
+        self.args = args
+        return self._iter()
+
+
+async def read_packed(rows: list[dict], ticket_type: str, chunk_rows: int = 1024) -> bytes:
+    conn = FakeConnection(rows)
+    chunks = [
+        chunk async for chunk in iter_exotic_odds_packed(conn, RACE_ID, ticket_type, chunk_rows)
+    ]
+    return b"".join(chunks)
+
+
+class TestEncoding:
+    """Test index and value encoding."""
+
+    def test_combination_index(self):
+        """Test base-18 indices of (horse number - 1)."""
+        assert combination_index([1, 2]) == 1
+        assert combination_index([3, 7, 12]) == 2 * 18 * 18 + 6 * 18 + 11
+        assert combination_index([18, 18, 18]) == PACKED_ODDS_BASE**3 - 1
+
+    def test_parse_raw_odds(self):
+        """Test raw 10x odds text; unsold or malformed values are 0."""
+        assert _parse_raw_odds("0123") == 123
+        assert _parse_raw_odds(None) == 0
+        assert _parse_raw_odds("----") == 0
+
+
+class TestPackedTable:
+    """Test the streamed packed array."""
+
+    async def test_quinella_table(self):
+        """Test values land at their indices and gaps are zero-filled."""
+        rows = [
+            {"umaban_1": "01", "umaban_2": "02", "umaren_odds": "0035"},
+            {"umaban_1": "01", "umaban_2": "05", "umaren_odds": "0120"},
+            {"umaban_1": "03", "umaban_2": "18", "umaren_odds": "----"},
+            {"umaban_1": "17", "umaban_2": "18", "umaren_odds": "9999"},
+        ]
+        table = np.frombuffer(await read_packed(rows, "quinella"), "<u4").reshape(18, 18)
+
+        assert table.shape == (18, 18)
+        assert table[0, 1] == 35
+        assert table[0, 4] == 120
+        assert table[2, 17] == 0
+        assert table[16, 17] == 9999
+        assert np.count_nonzero(table) == 3
+
+    async def test_trifecta_chunked(self):
+        """Test chunking does not change the array and invalid rows are skipped."""
+        rows = [
+            {"umaban_1": "01", "umaban_2": "02", "umaban_3": "03", "sanrentan_odds": "0052"},
+            {"umaban_1": "03", "umaban_2": "07", "umaban_3": "12", "sanrentan_odds": "1234"},
+            {"umaban_1": "19", "umaban_2": "01", "umaban_3": "02", "sanrentan_odds": "0010"},
+            {"umaban_1": "  ", "umaban_2": "01", "umaban_3": "02", "sanrentan_odds": "0010"},
+        ]
+        whole = await read_packed(rows, "trifecta")
+        chunked = await read_packed(rows, "trifecta", chunk_rows=1)
+
+        assert whole == chunked
+        assert len(whole) == 4 * 18**3
+        table = np.frombuffer(whole, "<u4")
+        assert table[combination_index([1, 2, 3])] == 52
+        assert table[combination_index([3, 7, 12])] == 1234
+        assert np.count_nonzero(table) == 2
+
+    async def test_unknown_ticket_type(self):
+        """Test non-exotic ticket types are rejected."""
+        with pytest.raises(ValueError):
+            await read_packed([], "win")
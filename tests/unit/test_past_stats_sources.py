@@ -0,0 +1,172 @@
+"""
+Unit tests for the past-stats run sources.
+
+Tests that get_past_stats_batch returns the same stats from the raw
+umagoto_race_joho text columns and from the typed finalized_runs copy
+(FEATURE_USE_FINALIZED_RUNS). SQLite stands in for PostgreSQL: the few
+dialect differences of the two queries are translated by the test cursor.
+"""
+
+import math
+import random
+import re
+import sqlite3
+
+import pytest
+
+from src.models.feature_extractor import db_queries
+
+HORSES = ["2019100001", "2019100002", "2019100003", "2020100004"]
+
+
+class StdDev:
+    """Sample standard deviation aggregate (PostgreSQL STDDEV)."""
+
+    def __init__(self):
+        self.values: list[float] = []
+
+    def step(self, value):
+        if value is not None:
+            self.values.append(value)
+
+    def finalize(self):
+        n = len(self.values)
+        if n < 2:
+            return None
+        mean = sum(self.values) / n
+        return math.sqrt(sum((v - mean) ** 2 for v in self.values) / (n - 1))
+
+
+class SqliteCursor:
+    """Cursor translating the PostgreSQL-only syntax of the past-stats query."""
+
+    def __init__(self, cur: sqlite3.Cursor):
+        self.cur = cur
+
+    def execute(self, sql, params=()):
+        sql = re.sub(
+            r"horse_filter AS \(\s*SELECT \* FROM \(VALUES (.*?)\) AS t\((.*?)\)\s*\)",
+            r"horse_filter(\2) AS (VALUES \1)",
+            sql,
+            flags=re.S,
+        )
+        sql = sql.replace("%s", "?").replace(" ~ ", " REGEXP ")
+        self.cur.execute(sql, list(params))
+
+    def fetchall(self):
+        return self.cur.fetchall()
+
+    def close(self):
+        self.cur.close()
+
+
+class SqliteConnection:
+    def __init__(self, db: sqlite3.Connection):
+        self.db = db
+
+    def cursor(self):
+        return SqliteCursor(self.db.cursor())
+
+
+def keiba_int(value: str | None) -> int | None:
+    """Python version of migration 004's keiba_int()."""
+    value = (value or "").strip()
+    return int(value) if re.fullmatch(r"-?[0-9]+", value) else None
+
+
+@pytest.fixture
+def conn():
+    """Raw runs of four horses and their finalized_runs copy."""
+    rng = random.Random(4)
+    raw = []
+    for horse in HORSES:
+        for i in range(14):
+            day = f"{1 + i // 4:02d}{1 + i % 28:02d}"
+            raw.append(
+                {
+                    "race_code": f"2024{day}0501{i % 3 + 1:02d}{i % 12 + 1:02d}",
+                    "ketto_toroku_bango": horse,
+                    "kaisai_nen": "2024",
+                    "kaisai_gappi": day,
+                    "kishu_code": f"0100{rng.randint(1, 4)}",
+                    # Not yet finalized, or cancelled/excluded (non-numeric position)
+                    "data_kubun": "2" if i == 13 else "7",
+                    "kakutei_chakujun": "" if i == 5 else f"{rng.randint(1, 16):02d}",
+                    "soha_time": "" if i % 7 == 3 else str(rng.randint(1080, 2500)),
+                    "kohan_3f": "" if i % 5 == 4 else f"{rng.randint(330, 400):03d}",
+                    "corner3_juni": "" if i % 6 == 2 else f"{rng.randint(1, 16):02d}",
+                    "corner4_juni": f"{rng.randint(1, 16):02d}",
+                }
+            )
+
+    db = sqlite3.connect(":memory:")
+    db.create_function("REGEXP", 2, lambda p, s: s is not None and re.search(p, s) is not None)
+    db.create_function("POWER", 2, math.pow)
+    db.create_aggregate("STDDEV", 1, StdDev)
+    columns = list(raw[0])
+    db.execute(f"CREATE TABLE umagoto_race_joho ({', '.join(columns)})")
+    db.executemany(
+        f"INSERT INTO umagoto_race_joho VALUES ({', '.join('?' * len(columns))})",
+        [tuple(run.values()) for run in raw],
+    )
+
+    # refresh_finalized_runs(): finalized runs with numeric positions, cast by keiba_int
+    typed = [
+        (
+            run["race_code"],
+            run["ketto_toroku_bango"],
+            run["kaisai_nen"],
+            run["kaisai_gappi"],
+            run["kishu_code"],
+            keiba_int(run["kakutei_chakujun"]),
+            keiba_int(run["soha_time"]),
+            keiba_int(run["kohan_3f"]),
+            keiba_int(run["corner3_juni"]),
+            keiba_int(run["corner4_juni"]),
+        )
+        for run in raw
+        if run["data_kubun"] == "7" and re.fullmatch(r"[0-9]+", run["kakutei_chakujun"])
+    ]
+    db.execute(
+        "CREATE TABLE finalized_runs (race_code, ketto_toroku_bango, kaisai_nen, kaisai_gappi,"
+        " kishu_code, chakujun INTEGER, soha_time INTEGER, kohan_3f INTEGER,"
+        " corner3_juni INTEGER, corner4_juni INTEGER)"
+    )
+    db.executemany(f"INSERT INTO finalized_runs VALUES ({', '.join('?' * 10)})", typed)
+    return SqliteConnection(db)
+
+
+def past_stats(conn, monkeypatch, use_finalized_runs: bool, entries=None) -> dict:
+    monkeypatch.setattr(db_queries, "FEATURE_USE_FINALIZED_RUNS", use_finalized_runs)
+    return db_queries.get_past_stats_batch(conn, HORSES, entries)
+
+
+class TestPastStatsSources:
+    """Test both run sources give identical past stats."""
+
+    def test_prediction_mode(self, conn, monkeypatch):
+        """Test the last 10 runs of every horse aggregate identically."""
+        raw = past_stats(conn, monkeypatch, False)
+        typed = past_stats(conn, monkeypatch, True)
+
+        assert sorted(raw) == HORSES
+        assert typed == raw
+        assert all(stats["race_count"] == 10 for stats in raw.values())
+
+    def test_excluding_current_race(self, conn, monkeypatch):
+        """Test the leak-prevention path (runs before each horse's current race)."""
+        entries = [
+            {"ketto_toroku_bango": HORSES[0], "race_code": "2024020805010309"},
+            {"ketto_toroku_bango": HORSES[1], "race_code": "2024010205010202"},
+            {"ketto_toroku_bango": HORSES[2], "race_code": "2024010105010101"},
+        ]
+
+        raw = past_stats(conn, monkeypatch, False, entries)
+        typed = past_stats(conn, monkeypatch, True, entries)
+
+        assert typed == raw
+        assert raw[HORSES[1]]["race_count"] == 1
+        # No earlier runs, so no stats row
+        assert HORSES[2] not in raw
+        # Not in the entries: all runs are included
+        assert raw[HORSES[3]]["race_count"] == 10
@@ -0,0 +1,163 @@
+"""
+Unit tests for the race-time schedule.
+
+Tests exact-time job ordering, post-time changes and restart recovery.
+"""
+
+from datetime import date, datetime, timedelta, timezone
+
+from src.discord.race_schedule import FINAL, PREWARM, RETRY, RaceSchedule, parse_post_time
+
+JST = timezone(timedelta(hours=9))
+TODAY = date(2024, 6, 1)
+RACE_1 = "2024060105010101"
+RACE_2 = "2024060105010102"
+
+
+def _at(hour, minute):
+    return datetime(2024, 6, 1, hour, minute, tzinfo=JST)
+
+
+def _schedule(state_path=None):
+    return RaceSchedule(30, 10, state_path)
+
+
+class TestParsePostTime:
+    """Test post time parsing."""
+
+    def test_formats(self):
+        """Test "HH:MM", "HHMM" and invalid values."""
+        assert parse_post_time(TODAY, "15:25", JST) == _at(15, 25)
+        assert parse_post_time(TODAY, "0950", JST) == _at(9, 50)
+        assert parse_post_time(TODAY, "15", JST) is None
+
+
+class TestRaceSchedule:
+    """Test job scheduling."""
+
+    def test_jobs_fire_at_exact_times(self):
+        """Test pre-warm and final fire at T-40 and T-30 in order."""
+        schedule = _schedule()
+        schedule.update_card(TODAY, {RACE_1: _at(10, 0), RACE_2: _at(10, 30)}, _at(8, 0))
+
+        assert schedule.next_fire_at() == _at(9, 20).timestamp()
+        assert schedule.pop_due(_at(9, 19)) == []
+        assert schedule.pop_due(_at(9, 30)) == [(RACE_1, PREWARM), (RACE_1, FINAL)]
+        assert schedule.next_fire_at() == _at(9, 50).timestamp()
+
+    def test_post_time_change_reschedules(self):
+        """Test a delayed race drops its old jobs and fires at the new time."""
+        schedule = _schedule()
+        schedule.update_card(TODAY, {RACE_1: _at(10, 0), RACE_2: _at(10, 30)}, _at(8, 0))
+
+        changed = schedule.update_card(
+            TODAY, {RACE_1: _at(10, 15), RACE_2: _at(10, 30)}, _at(8, 30)
+        )
+
+        assert changed == [RACE_1]
+        assert schedule.pop_due(_at(9, 30)) == []
+        assert schedule.pop_due(_at(9, 45)) == [(RACE_1, PREWARM), (RACE_1, FINAL)]
+
+    def test_predicted_races_are_skipped(self):
+        """Test completed and started races are not scheduled again."""
+        schedule = _schedule()
+        schedule.update_card(TODAY, {RACE_1: _at(10, 0), RACE_2: _at(10, 30)}, _at(9, 55))
+        schedule.mark_predicted(RACE_1)
+
+        # Race 1 final is overdue but done; race 2 pre-warm is overdue
+        assert schedule.pop_due(_at(9, 56)) == []
+        assert schedule.pending(_at(9, 56)) == [RACE_2]
+        assert schedule.pop_due(_at(10, 0)) == [(RACE_2, FINAL)]
+
+        schedule.reset(_at(10, 5))
+        assert schedule.pop_due(_at(10, 5)) == [(RACE_2, FINAL)]
+        assert schedule.is_finished(_at(10, 30))
+
+    def test_new_day_replaces_card(self):
+        """Test a new date forgets the previous day's predictions."""
+        schedule = _schedule()
+        schedule.update_card(TODAY, {RACE_1: _at(10, 0)}, _at(8, 0))
+        schedule.mark_predicted(RACE_1)
+
+        tomorrow = TODAY + timedelta(days=1)
+        post_time = _at(10, 0) + timedelta(days=1)
+        schedule.update_card(tomorrow, {RACE_1: post_time}, _at(8, 0) + timedelta(days=1))
+
+        assert schedule.card_date == tomorrow
+        assert schedule.predicted == set()
+        assert schedule.pending(_at(8, 0) + timedelta(days=1)) == [RACE_1]
+
+
+class TestRetry:
+    """Test retries of failed final predictions."""
+
+    def test_backoff_doubles_up_to_max(self):
+        """Test a failed final prediction is re-pushed with a doubling, capped delay."""
+        schedule = RaceSchedule(30, 10, retry_base_seconds=60, retry_max_seconds=180)
+        schedule.update_card(TODAY, {RACE_1: _at(10, 0)}, _at(8, 0))
+        assert schedule.pop_due(_at(9, 30)) == [(RACE_1, PREWARM), (RACE_1, FINAL)]
+
+        assert schedule.retry_final(RACE_1, _at(9, 30)) == _at(9, 31)
+        assert schedule.pop_due(_at(9, 30)) == []
+        assert schedule.pop_due(_at(9, 31)) == [(RACE_1, RETRY)]
+        assert schedule.retry_final(RACE_1, _at(9, 31)) == _at(9, 33)
+        assert schedule.pop_due(_at(9, 33)) == [(RACE_1, RETRY)]
+        assert schedule.retry_final(RACE_1, _at(9, 33)) == _at(9, 36)
+        assert schedule.pop_due(_at(9, 36)) == [(RACE_1, RETRY)]
+        assert schedule.retry_final(RACE_1, _at(9, 36)) == _at(9, 39)
+
+    def test_no_retry_after_post_or_prediction(self):
+        """Test retries stop once the race would start or has been predicted."""
+        schedule = RaceSchedule(30, 10, retry_base_seconds=60)
+        schedule.update_card(TODAY, {RACE_1: _at(10, 0), RACE_2: _at(10, 30)}, _at(9, 50))
+
+        assert schedule.retry_final(RACE_1, _at(9, 59)) is None
+        assert schedule.retry_final(RACE_2, _at(9, 50)) == _at(9, 51)
+        schedule.mark_predicted(RACE_2)
+        assert schedule.pop_due(_at(9, 51)) == [(RACE_1, FINAL)]
+        assert schedule.retry_final(RACE_2, _at(9, 31)) is None
+        assert schedule.retry_final("2024060105010199", _at(9, 31)) is None
+
+    def test_post_time_change_resets_retry(self):
+        """Test a rescheduled race drops its pending retry and backoff."""
+        schedule = RaceSchedule(30, 10, retry_base_seconds=60)
+        schedule.update_card(TODAY, {RACE_1: _at(10, 0)}, _at(8, 0))
+        schedule.retry_final(RACE_1, _at(9, 30))
+        schedule.retry_final(RACE_1, _at(9, 31))
+
+        schedule.update_card(TODAY, {RACE_1: _at(10, 15)}, _at(9, 32))
+
+        assert schedule.pop_due(_at(9, 34)) == []
+        assert schedule.pop_due(_at(9, 45)) == [(RACE_1, PREWARM), (RACE_1, FINAL)]
+        assert schedule.retry_final(RACE_1, _at(9, 45)) == _at(9, 46)
+
+
+class TestPersistence:
+    """Test restart recovery."""
+
+    def test_restart_restores_schedule(self, tmp_path):
+        """Test a restart keeps completed races and fires missed ones before post."""
+        state_path = tmp_path / "state" / "scheduler.json"
+        schedule = _schedule(state_path)
+        schedule.update_card(TODAY, {RACE_1: _at(10, 0), RACE_2: _at(10, 30)}, _at(8, 0))
+        schedule.mark_predicted(RACE_1)
+        schedule.save()
+
+        restored = _schedule(state_path)
+        assert restored.load(TODAY, _at(10, 5))
+
+        assert restored.predicted == {RACE_1}
+        # Race 2 final (10:00) was missed while down; it has not started yet
+        assert restored.pop_due(_at(10, 5)) == [(RACE_2, FINAL)]
+
+    def test_stale_or_corrupt_state_is_ignored(self, tmp_path):
+        """Test state of another day or unreadable state is not restored."""
+        state_path = tmp_path / "scheduler.json"
+        schedule = _schedule(state_path)
+        schedule.update_card(TODAY, {RACE_1: _at(10, 0)}, _at(8, 0))
+        schedule.save()
+
+        assert not _schedule(state_path).load(TODAY + timedelta(days=1), _at(8, 0))
+
+        state_path.write_text("{", encoding="utf-8")
+        assert not _schedule(state_path).load(TODAY, _at(8, 0))
@@ -0,0 +1,112 @@
+"""
+Unit tests for group-wise ranking metrics.
+
+Tests the vectorized metrics against per-race reference loops.
+"""
+
+import numpy as np
+import pytest
+from sklearn.metrics import ndcg_score
+
+from src.models.ranking_metrics import (
+    contiguous_order,
+    group_offsets,
+    mean_reciprocal_rank,
+    ndcg_at_k,
+    offsets_from_sizes,
+    rank_within_groups,
+    top_k_hit_rate,
+    winner_ranks,
+)
+
+
+@pytest.fixture
+def races():
+    """Synthetic races of 1-18 runners with finishing positions and scores."""
+    rng = np.random.default_rng(0)
+    sizes = rng.integers(1, 19, size=200)
+    positions = np.concatenate([rng.permutation(n) + 1 for n in sizes])
+    scores = rng.normal(size=len(positions))
+    return sizes, positions, scores
+
+
+class TestGroupOffsets:
+    """Test group layout helpers."""
+
+    def test_offsets_from_labels(self):
+        """Test offsets of consecutive labels."""
+        offsets = group_offsets(["a", "a", "b", "c", "c", "c"])
+
+        assert offsets.tolist() == [0, 2, 3, 6]
+        assert offsets_from_sizes([2, 1, 3]).tolist() == [0, 2, 3, 6]
+        assert group_offsets([]).tolist() == [0]
+
+    def test_contiguous_order(self):
+        """Test interleaved labels are grouped stably."""
+        labels = np.array(["b", "a", "b", "a"])
+
+        order = contiguous_order(labels)
+
+        assert order.tolist() == [1, 3, 0, 2]
+
+    def test_rank_within_groups(self):
+        """Test ranks restart in each group."""
+        offsets = offsets_from_sizes([3, 2])
+
+        ranks = rank_within_groups([0.1, 0.9, 0.5, 0.2, 0.3], offsets)
+
+        assert ranks.tolist() == [2, 0, 1, 1, 0]
+
+
+class TestMetrics:
+    """Test metrics against per-race loops."""
+
+    def test_ndcg_matches_sklearn(self, races):
+        """Test NDCG@3 equals the mean of per-race ndcg_score."""
+        sizes, positions, scores = races
+        relevance = positions.max() - positions + 1
+        offsets = offsets_from_sizes(sizes)
+
+        expected = [
+            ndcg_score(relevance[start:end].reshape(1, -1), scores[start:end].reshape(1, -1), k=3)
+            for start, end in zip(offsets[:-1], offsets[1:])
+            if end - start >= 2
+        ]
+
+        assert ndcg_at_k(relevance, scores, offsets, k=3) == pytest.approx(np.mean(expected))
+
+    def test_winner_metrics_match_loop(self, races):
+        """Test winner rank, top-3 hit rate and MRR."""
+        sizes, positions, scores = races
+        offsets = offsets_from_sizes(sizes)
+
+        expected_ranks = [
+            int(
+                np.flatnonzero(np.argsort(-scores[start:end]) == np.argmin(positions[start:end]))[0]
+            )
+            + 1
+            for start, end in zip(offsets[:-1], offsets[1:])
+        ]
+        ranks = winner_ranks(positions == 1, scores, offsets)
+
+        assert ranks.tolist() == expected_ranks
+        large = [r for r, n in zip(expected_ranks, sizes) if n >= 3]
+        assert top_k_hit_rate(positions == 1, scores, offsets, k=3, min_size=3) == pytest.approx(
+            np.mean([r <= 3 for r in large])
+        )
+        assert mean_reciprocal_rank(positions == 1, scores, offsets) == pytest.approx(
+            np.mean([1 / r for r in expected_ranks])
+        )
+
+    def test_ascending_scores_and_missing_winner(self):
+        """Test lower-is-better scores and races without a winner."""
+        offsets = offsets_from_sizes([3, 2])
+        is_winner = np.array([False, False, True, False, False])
+
+        ranks = winner_ranks(is_winner, [3.0, 2.0, 1.0, 1.0, 2.0], offsets, descending=False)
+
+        assert ranks.tolist() == [1, 0]
+        assert (
+            top_k_hit_rate(is_winner, [3.0, 2.0, 1.0, 1.0, 2.0], offsets, k=1, descending=False)
+            == 1.0
+        )
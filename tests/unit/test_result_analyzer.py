@@ -0,0 +1,175 @@
+"""
+Unit tests for the prediction/result comparison.
+
+Tests compare_results against the output of the previous per-race
+implementation (tests/fixtures/result_comparison_expected.json, generated
+from the same inputs), and edge cases: empty input, races without results
+and missing race metadata.
+"""
+
+import json
+import random
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+from src.scheduler.result.analyzer import compare_results
+
+EXPECTED_PATH = Path(__file__).parent.parent / "fixtures" / "result_comparison_expected.json"
+
+
+def make_inputs() -> tuple[dict, list[dict], dict, dict]:
+    """
+    Predictions, results, payouts and final odds of one day (12 races).
+
+    Race 5 has no result, race 9 no payout, race 7 no distance, race 3 no
+    track, race 4 no finishers; every third race has saved EV recommendations
+    (one of them for a horse that was not predicted).
+    """
+    rng = random.Random(1)
+    predictions, results, payouts, final_odds = [], [], {}, {}
+    for i in range(12):
+        race_code = f"2026101806010{i:03d}"
+        numbers = list(range(1, rng.randint(5, 16) + 1))
+        horses = sorted(
+            (
+                {
+                    "horse_number": n,
+                    "win_probability": round(rng.random() * 0.4, 3),
+                    "place_probability": round(rng.random() * 0.8, 3),
+                    "confidence": round(rng.random(), 2),
+                }
+                for n in numbers
+            ),
+            key=lambda h: -h["win_probability"],
+        )
+        pred_race = {
+            "race_code": race_code,
+            "all_horses": horses,
+            "top3": [
+                {"umaban": h["horse_number"], "win_prob": h["win_probability"]} for h in horses[:3]
+            ],
+        }
+        if i % 3 == 0:
+            pred_race["ev_recommendations"] = {
+                "win_recommendations": [{"horse_number": horses[1]["horse_number"]}],
+                "place_recommendations": [
+                    {"horse_number": horses[2]["horse_number"]},
+                    {"horse_number": 99},
+                ],
+            }
+        predictions.append(pred_race)
+        if i == 5:
+            continue
+
+        order = numbers[:]
+        rng.shuffle(order)
+        race_results = [
+            {
+                "umaban": f"{u:02d}",
+                "chakujun": pos,
+                "bamei": f"Horse{u}",
+                "ninki": rng.randint(1, len(numbers)),
+                "odds": round(rng.uniform(1.2, 80), 1),
+            }
+            for pos, u in enumerate(order, 1)
+        ]
+        results.append(
+            {
+                "race_code": race_code,
+                "keibajo": rng.choice(["中山", "東京"]),
+                "race_number": i + 1,
+                "kyori": None if i == 7 else rng.choice([1200, 1600, 2000, 2400]),
+                "track": None if i == 3 else rng.choice(["芝", "ダ"]),
+                "results": [] if i == 4 else race_results,
+            }
+        )
+        if i != 9:
+            payouts[race_code] = {
+                "tansho_umaban": f"{order[0]:02d}",
+                "tansho_payout": rng.randint(110, 5000),
+                "fukusho": [
+                    {"umaban": f"{u:02d}", "payout": rng.randint(100, 900)} for u in order[:3]
+                ],
+            }
+        final_odds[race_code] = {
+            f"{u:02d}": {"fukusho": round(rng.uniform(1.0, 10), 1)} for u in numbers
+        }
+    return {"date": "2026-10-18", "races": predictions}, results, payouts, final_odds
+
+
+def as_json(comparison: dict) -> dict:
+    """Comparison as saved to the jsonb column (fails on NaN)."""
+    return json.loads(json.dumps(comparison, ensure_ascii=False, allow_nan=False))
+
+
+class TestCompareResults:
+    """Test the frame-based comparison."""
+
+    def test_matches_per_race_implementation(self):
+        """Test every aggregate and race detail equals the previous implementation."""
+        expected = json.loads(EXPECTED_PATH.read_text(encoding="utf-8"))
+
+        actual = as_json(compare_results(*make_inputs()))
+
+        assert actual["stats"].pop("mrr_sum") == pytest.approx(expected["stats"].pop("mrr_sum"))
+        assert actual == expected
+
+    def test_list_and_frame_results_agree(self):
+        """Test results as fetch_race_results_frame() rows give the same comparison."""
+        predictions, results, payouts, final_odds = make_inputs()
+        frame = pd.DataFrame(
+            [
+                {
+                    "race_code": r["race_code"],
+                    "keibajo_code": r["keibajo"],
+                    "race_bango": r["race_number"],
+                    "kyori": r["kyori"],
+                    "track_code": {"芝": "10", "ダ": "23"}.get(r["track"]),
+                    **h,
+                }
+                for r in results
+                for h in r["results"]
+            ]
+        )
+        # Races without finishers have no rows in the frame
+        with_runners = [r for r in results if r["results"]]
+
+        from_list = as_json(compare_results(predictions, with_runners, payouts, final_odds))
+        from_frame = as_json(compare_results(predictions, frame, payouts, final_odds))
+
+        assert from_frame["stats"] == from_list["stats"]
+        assert from_frame["ev_stats"] == from_list["ev_stats"]
+        assert from_frame["axis_stats"] == from_list["axis_stats"]
+
+    def test_empty_predictions(self):
+        """Test a day without predicted races returns an empty comparison."""
+        _, results, payouts, _ = make_inputs()
+
+        comparison = compare_results({"date": "2026-10-18", "races": []}, results, payouts)
+
+        assert comparison["total_races"] == 0
+        assert comparison["analyzed_races"] == 0
+        assert comparison["races"] == []
+        assert compare_results({"date": "2026-10-18", "races": []}, [])["races"] == []
+
+    def test_no_results(self):
+        """Test predictions without any results are counted but not analyzed."""
+        predictions, _, payouts, final_odds = make_inputs()
+
+        comparison = compare_results(predictions, [], payouts, final_odds)
+
+        assert comparison["total_races"] == 12
+        assert comparison["analyzed_races"] == 0
+        assert comparison["stats"]["top1_hit"] == 0
+
+    def test_missing_metadata_is_null(self):
+        """Test a missing distance or track is None in the details, not NaN."""
+        comparison = as_json(compare_results(*make_inputs()))
+        races = {r["race_code"]: r for r in comparison["races"]}
+
+        assert races["2026101806010007"]["kyori"] is None
+        assert races["2026101806010003"]["track"] is None
+        assert races["2026101806010000"]["kyori"] in (1200, 1600, 2000, 2400)
+        assert "2026101806010005" not in races
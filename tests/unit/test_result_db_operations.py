@@ -0,0 +1,172 @@
+"""
+Unit tests for the set-based result and final odds fetches.
+
+Tests fetch_race_results_frame and fetch_final_odds_frame on cursor rows:
+value parsing, races without runners or odds, the win/place outer join and
+empty inputs (no races, or final odds not loaded yet).
+"""
+
+from datetime import date
+
+import pandas as pd
+import pytest
+
+from src.scheduler.backtest.data import fetch_odds_frame
+from src.scheduler.result import db_operations
+from src.scheduler.result.db_operations import (
+    FINAL_ODDS_FRAME_COLUMNS,
+    RESULT_FRAME_COLUMNS,
+    fetch_final_odds_frame,
+    fetch_race_results_frame,
+    get_final_odds,
+)
+
+RACE_A = "2026101806010101"
+RACE_B = "2026101806010102"
+
+
+class FakeCursor:
+    """Cursor returning one row list per executed statement, in order."""
+
+    def __init__(self, results: list[list[tuple]]):
+        self.results = list(results)
+        self.statements: list[str] = []
+        self.rows: list[tuple] = []
+
+    def execute(self, sql, params=None):
+        self.statements.append(sql)
+        self.rows = self.results.pop(0) if self.results else []
+
+    def fetchall(self):
+        return self.rows
+
+    def close(self):
+        pass
+
+
+class FakeConnection:
+    def __init__(self, *results: list[tuple]):
+        self.cur = FakeCursor(list(results))
+
+    def cursor(self):
+        return self.cur
+
+    def close(self):
+        pass
+
+
+class FakeDB:
+    def __init__(self, conn: FakeConnection):
+        self.conn = conn
+
+    def get_connection(self):
+        return self.conn
+
+
+class TestFetchRaceResultsFrame:
+    """Test the one-query result fetch."""
+
+    def test_parses_runners(self):
+        """Test odds, popularity and positions are parsed; a race without runners keeps one row."""
+        conn = FakeConnection(
+            [
+                (RACE_A, "06", "01", 1200, "10", "03", "01", "Horse3", "02", "0052"),
+                (RACE_A, "06", "01", 1200, "10", "01", "02", "Horse1", "01", "0021"),
+                (RACE_A, "06", "01", 1200, "10", "02", "  ", "Horse2", "  ", "----"),
+                (RACE_B, "06", "02", 1600, "23", None, None, None, None, None),
+            ]
+        )
+
+        frame = fetch_race_results_frame(conn, target_dates=[date(2026, 10, 18)])
+
+        assert list(frame.columns) == RESULT_FRAME_COLUMNS
+        assert frame["odds"].tolist()[:2] == [5.2, 2.1]
+        assert pd.isna(frame["odds"].iloc[2])
+        assert frame["chakujun"].tolist() == [1, 2, 99, 99]
+        assert frame["ninki"].tolist()[:2] == [2, 1]
+        assert frame["umaban"].isna().tolist() == [False, False, False, True]
+
+    def test_empty(self):
+        """Test a day without races gives an empty frame with the result columns."""
+        frame = fetch_race_results_frame(FakeConnection([]), race_codes=[])
+
+        assert frame.empty
+        assert list(frame.columns) == RESULT_FRAME_COLUMNS
+
+
+class TestFetchFinalOddsFrame:
+    """Test the win/place final odds fetch."""
+
+    def test_outer_join(self):
+        """Test horses with only win or only place odds keep NaN for the other."""
+        conn = FakeConnection(
+            [(RACE_A, "01", "0035"), (RACE_A, "02", "0120"), (RACE_B, "01", "0021")],
+            [(RACE_A, "01", "0012"), (RACE_A, "03", "0030")],
+        )
+
+        frame = fetch_final_odds_frame(conn, race_codes=[RACE_A, RACE_B])
+        rows = {
+            (race_code, umaban): (tansho, fukusho)
+            for race_code, umaban, tansho, fukusho in frame.itertuples(index=False)
+        }
+
+        assert list(frame.columns) == FINAL_ODDS_FRAME_COLUMNS
+        assert rows[(RACE_A, "01")] == (3.5, 1.2)
+        assert rows[(RACE_A, "02")][0] == 12.0
+        assert pd.isna(rows[(RACE_A, "02")][1])
+        assert pd.isna(rows[(RACE_A, "03")][0])
+        assert rows[(RACE_A, "03")][1] == 3.0
+        assert rows[(RACE_B, "01")][0] == 2.1
+        assert pd.isna(rows[(RACE_B, "01")][1])
+
+    @pytest.mark.parametrize(
+        "tansho, fukusho",
+        [
+            ([(RACE_A, "01", "0035")], []),
+            ([], [(RACE_A, " 1", "0012")]),
+        ],
+    )
+    def test_one_odds_type_only(self, tansho, fukusho):
+        """Test only win or only place odds loaded gives one row with the other NaN."""
+        frame = fetch_final_odds_frame(FakeConnection(tansho, fukusho), race_codes=[RACE_A])
+
+        assert list(frame.columns) == FINAL_ODDS_FRAME_COLUMNS
+        assert len(frame) == 1
+        assert frame[["tansho", "fukusho"]].isna().sum().sum() == 1
+
+    def test_no_races(self):
+        """Test empty race codes return a typed empty frame without querying odds."""
+        conn = FakeConnection()
+
+        frame = fetch_final_odds_frame(conn, race_codes=[])
+
+        assert frame.empty
+        assert list(frame.columns) == FINAL_ODDS_FRAME_COLUMNS
+        assert conn.cur.statements == []
+
+    def test_no_races_on_date(self):
+        """Test a non-race day returns an empty frame after the race list query."""
+        conn = FakeConnection([])
+
+        frame = fetch_final_odds_frame(conn, target_dates=[date(2026, 10, 19)])
+
+        assert frame.empty
+        assert len(conn.cur.statements) == 1
+
+    def test_odds_not_loaded(self):
+        """Test races without any odds rows return a typed empty frame."""
+        frame = fetch_final_odds_frame(FakeConnection([], []), race_codes=[RACE_A])
+
+        assert frame.empty
+        assert list(frame.columns) == FINAL_ODDS_FRAME_COLUMNS
+        assert frame["tansho"].dtype == "Float64"
+        assert frame.merge(frame, on=["race_code", "umaban"], how="outer").empty
+
+    def test_callers_on_empty(self, monkeypatch, caplog):
+        """Test get_final_odds and the backtest odds fetch handle a day without odds."""
+        conn = FakeConnection([(RACE_A,)], [], [])
+        monkeypatch.setattr(db_operations, "get_db", lambda: FakeDB(conn))
+
+        assert get_final_odds(date(2026, 10, 18)) == {}
+        assert not [r for r in caplog.records if r.levelname == "ERROR"]
+        assert fetch_odds_frame(FakeConnection([], []), [RACE_A]).empty
@@ -0,0 +1,247 @@
+"""
+Unit tests for the rolling SHAP feature adjustment aggregates.
+
+Tests the model version key, exponential decay between race dates, folding
+rows stored late exactly once, the adjustment vector derived from the
+place/miss means and its application in RacePredictor.
+"""
+
+import inspect
+from datetime import date
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.scheduler import shap_aggregates
+from src.scheduler.race_predictor import RacePredictor
+from src.scheduler.shap_aggregates import (
+    ADJUSTMENT_MAX,
+    adjustment_vector,
+    align_adjustments,
+    empty_aggregate,
+    fold_day,
+    model_version,
+    update_feature_adjustments,
+)
+
+FEATURES = ["speed", "jockey", "draw"]
+
+
+class TestModelVersion:
+    """Test the model version key."""
+
+    def test_includes_training_time(self):
+        """Test retrains of the same architecture get different keys."""
+        assert model_version({"version": "v6", "trained_at": "2026-10-13T23:40"}) == (
+            "v6@2026-10-13T23:40"
+        )
+        assert model_version({"version": "v6"}) == "v6"
+
+
+class TestAggregates:
+    """Test decayed sums and adjustment coefficients."""
+
+    def test_fold_decays_previous_days(self):
+        """Test a day one half-life later halves the earlier weight."""
+        aggregate = empty_aggregate(FEATURES)
+        fold_day(
+            aggregate,
+            date(2026, 10, 4),
+            place=np.array([[0.4, 0.0, 0.1]]),
+            miss=np.array([[0.0, 0.2, 0.1], [0.0, 0.4, 0.1]]),
+            half_life_days=7,
+        )
+        fold_day(
+            aggregate,
+            date(2026, 10, 11),
+            place=np.array([[0.2, 0.0, 0.1]]),
+            miss=np.empty((0, 3)),
+            half_life_days=7,
+        )
+
+        assert aggregate["races"] == 4
+        assert aggregate["last_race_date"] == date(2026, 10, 11)
+        assert aggregate["place_weight"] == pytest.approx(1.5)
+        assert aggregate["place_sum"][0] == pytest.approx(0.4)
+        assert aggregate["miss_weight"] == pytest.approx(1.0)
+        assert aggregate["miss_sum"][1] == pytest.approx(0.3)
+
+    def test_late_day_matches_date_order(self):
+        """Test a day folded after a later one gives the same sums as date order."""
+        days = [
+            (date(2026, 10, 4), np.array([[0.4, 0.0, 0.1]]), np.array([[0.0, 0.2, 0.1]])),
+            (date(2026, 10, 11), np.array([[0.2, 0.1, 0.0]]), np.empty((0, 3))),
+            (date(2026, 10, 12), np.empty((0, 3)), np.array([[0.1, 0.3, 0.2]])),
+        ]
+        in_order = empty_aggregate(FEATURES)
+        for day in days:
+            fold_day(in_order, *day, half_life_days=7)
+        late = empty_aggregate(FEATURES)
+        for day in (days[0], days[2], days[1]):
+            fold_day(late, *day, half_life_days=7)
+
+        assert late["last_race_date"] == date(2026, 10, 12)
+        assert late["races"] == in_order["races"]
+        for key in ("place_sum", "place_weight", "miss_sum", "miss_weight"):
+            np.testing.assert_allclose(late[key], in_order[key])
+
+    def test_adjustment_vector(self):
+        """Test threshold, scale and clipping of the place - miss difference."""
+        aggregate = empty_aggregate(FEATURES)
+        fold_day(
+            aggregate,
+            date(2026, 10, 4),
+            place=np.array([[0.4, 0.0, 2.0]]),
+            miss=np.array([[0.0, 0.4, 0.05]]),
+        )
+
+        adjustments = adjustment_vector(aggregate)
+        assert adjustments.dtype == np.float32
+        assert adjustments[0] == pytest.approx(1.2)
+        assert adjustments[1] == pytest.approx(0.8)
+        assert adjustments[2] == pytest.approx(ADJUSTMENT_MAX)
+
+    def test_no_adjustment_without_both_groups(self):
+        """Test all coefficients stay 1.0 until places and misses were seen."""
+        aggregate = empty_aggregate(FEATURES)
+        fold_day(aggregate, date(2026, 10, 4), np.array([[0.4, 0.0, 0.1]]), np.empty((0, 3)))
+        assert adjustment_vector(aggregate).tolist() == [1.0, 1.0, 1.0]
+
+
+class FakeCursor:
+    """Cursor over in-memory contribution rows and one aggregate row."""
+
+    def __init__(self, db):
+        self.db = db
+        self.result: list[tuple] = []
+
+    def execute(self, sql, params=None):
+        if "UPDATE shap_race_contributions" in sql:
+            taken = [row for row in self.db.rows if not row["folded"]]
+            for row in taken:
+                row["folded"] = True
+            self.result = [(r["race_date"], r["chakujun"] <= 3, r["contributions"]) for r in taken]
+        elif "FROM shap_feature_aggregates" in sql:
+            self.result = [self.db.aggregate] if self.db.aggregate else []
+        elif "INSERT INTO shap_feature_aggregates" in sql:
+            self.db.aggregate = params[1:8]
+
+    def fetchone(self):
+        return self.result[0] if self.result else None
+
+    def fetchall(self):
+        return self.result
+
+    def close(self):
+        pass
+
+
+class FakeDB:
+    def __init__(self):
+        self.rows: list[dict] = []
+        self.aggregate: tuple | None = None
+
+    def store(self, race_date: date, chakujun: int, contributions: list[float]):
+        self.rows.append(
+            {
+                "race_date": race_date,
+                "chakujun": chakujun,
+                "contributions": contributions,
+                "folded": False,
+            }
+        )
+
+    def get_connection(self):
+        return self
+
+    def cursor(self):
+        return FakeCursor(self)
+
+    def commit(self):
+        pass
+
+    def rollback(self):
+        pass
+
+    def close(self):
+        pass
+
+
+class TestUpdateFeatureAdjustments:
+    """Test stored rows are folded exactly once, including late ones."""
+
+    def test_late_rows_are_folded_once(self, monkeypatch):
+        """Test rows stored for an already folded date are added, and nothing twice."""
+        db = FakeDB()
+        monkeypatch.setattr(shap_aggregates, "get_db", lambda: db)
+        db.store(date(2026, 10, 4), 1, [0.4, 0.0, 0.1])
+        db.store(date(2026, 10, 11), 8, [0.0, 0.4, 0.1])
+        update_feature_adjustments("v6", FEATURES)
+
+        # Explained on a re-run over the window, after 10/11 was folded
+        db.store(date(2026, 10, 4), 9, [0.0, 0.2, 0.3])
+        update_feature_adjustments("v6", FEATURES)
+        adjustments = update_feature_adjustments("v6", FEATURES)
+
+        expected = empty_aggregate(FEATURES)
+        fold_day(
+            expected, date(2026, 10, 4), np.array([[0.4, 0.0, 0.1]]), np.array([[0.0, 0.2, 0.3]])
+        )
+        fold_day(expected, date(2026, 10, 11), np.empty((0, 3)), np.array([[0.0, 0.4, 0.1]]))
+        _, place_sum, place_weight, miss_sum, miss_weight, races, last = db.aggregate
+        assert races == 3
+        assert last == date(2026, 10, 11)
+        assert place_weight == pytest.approx(expected["place_weight"])
+        assert miss_weight == pytest.approx(expected["miss_weight"])
+        np.testing.assert_allclose(place_sum, expected["place_sum"])
+        np.testing.assert_allclose(miss_sum, expected["miss_sum"])
+        assert adjustments == dict(zip(FEATURES, adjustment_vector(expected).tolist(), strict=True))
+
+
+class TestApplyAdjustments:
+    """Test adjustments compiled to aligned vectors and applied in one multiply."""
+
+    def make_predictor(self, adjustments: dict[str, float]) -> RacePredictor:
+        """RacePredictor with a mixed and a turf feature order, without model files."""
+        predictor = RacePredictor.__new__(RacePredictor)
+        predictor.feature_names = FEATURES
+        predictor._surface_models = {"turf": {"feature_names": ["draw", "speed"]}}
+        predictor.feature_adjustments = adjustments
+        predictor._compile_feature_adjustments()
+        return predictor
+
+    def test_align(self):
+        """Test coefficients follow the feature order and missing ones are 1.0."""
+        weights = align_adjustments({"draw": 0.5, "unknown": 2.0}, FEATURES)
+        assert weights.dtype == np.float32
+        assert weights.tolist() == [1.0, 1.0, 0.5]
+        assert align_adjustments({"speed": 1.0}, FEATURES) is None
+
+    def test_apply_per_model_order(self):
+        """Test each model's columns are scaled by its own aligned vector."""
+        predictor = self.make_predictor({"speed": 1.5, "draw": 0.5})
+        X = pd.DataFrame({"speed": [2, 4], "jockey": [0.1, 0.2], "draw": [8.0, 6.0]})
+
+        mixed = predictor._apply_feature_adjustments(X)
+        assert list(mixed.columns) == FEATURES
+        assert mixed.dtypes.eq(np.float32).all()
+        assert mixed["speed"].tolist() == [3.0, 6.0]
+        assert mixed["draw"].tolist() == [4.0, 3.0]
+
+        turf = predictor._apply_feature_adjustments(X[["draw", "speed"]], "turf")
+        assert turf["draw"].tolist() == [4.0, 3.0]
+        assert turf["speed"].tolist() == [3.0, 6.0]
+
+    def test_no_adjustments(self):
+        """Test features are only converted to float32 without coefficients."""
+        predictor = self.make_predictor({})
+        X = pd.DataFrame({"speed": [2.0], "jockey": [0.1], "draw": [8.0]})
+
+        result = predictor._apply_feature_adjustments(X)
+        np.testing.assert_array_equal(result.to_numpy(), X.to_numpy(dtype=np.float32))
+
+    def test_off_by_default(self):
+        """Test predictions use unadjusted features unless the flag is enabled."""
+        default = inspect.signature(RacePredictor).parameters["use_adjustments"].default
+        assert default is False
@@ -0,0 +1,175 @@
+"""
+Unit tests for Monte Carlo race simulation.
+
+Tests Plackett-Luce sampling, reproducibility, summary aggregation, and the
+simulation attached to predictions.
+"""
+
+import numpy as np
+import pytest
+
+from src.services.prediction import simulation
+from src.services.prediction.result_generator import (
+    convert_to_prediction_response,
+    generate_ml_only_prediction,
+)
+from src.services.prediction.simulation import (
+    simulate_day,
+    simulate_race,
+    simulate_races,
+    simulated_exotic_probabilities,
+    strengths_from_predictions,
+)
+
+
+@pytest.fixture
+def strengths():
+    """Plackett-Luce strengths for an 8-horse field."""
+    return strengths_from_predictions(
+        range(1, 9), win_probs=[0.30, 0.20, 0.15, 0.10, 0.10, 0.07, 0.05, 0.03]
+    )
+
+
+class TestStrengths:
+    """Test strength construction."""
+
+    def test_win_probs_normalized(self, strengths):
+        """Test strengths sum to 1 with zeros for absent horse numbers."""
+        assert strengths.sum() == pytest.approx(1.0)
+        assert np.all(strengths[8:] == 0.0)
+
+    def test_rank_scores_fallback(self):
+        """Test lower rank score yields higher strength."""
+        s = strengths_from_predictions([1, 2, 3], win_probs=[0, 0, 0], rank_scores=[1.0, 2.0, 3.0])
+
+        assert s[0] > s[1] > s[2]
+
+
+class TestSimulation:
+    """Test simulation outputs."""
+
+    def test_seeded_reproducibility(self, strengths):
+        """Test identical seeds give identical summaries."""
+        first = simulate_races(strengths, n_draws=2000, seed=7)[0]
+        second = simulate_races(strengths, n_draws=2000, seed=7)[0]
+
+        assert first == second
+
+    def test_win_marginals_match_strengths(self, strengths):
+        """Test simulated win rates converge to Plackett-Luce strengths."""
+        summary = simulate_races(strengths, n_draws=20000, seed=1)[0]
+
+        win = np.array([summary["horses"][str(i)]["win_probability"] for i in range(1, 9)])
+        np.testing.assert_allclose(win, strengths[:8], atol=0.015)
+
+    def test_position_distribution_sums_to_one(self, strengths):
+        """Test each horse's position distribution sums to 1."""
+        summary = simulate_races(strengths, n_draws=2000, seed=3)[0]
+
+        for horse in summary["horses"].values():
+            assert sum(horse["position_distribution"].values()) == pytest.approx(1.0, abs=1e-3)
+            lower, upper = horse["win_ci"]
+            assert lower <= horse["win_probability"] <= upper
+            lower, upper = horse["place_ci"]
+            assert lower <= horse["place_probability"] <= upper
+
+    def test_batched_races(self, strengths):
+        """Test several races are simulated in one batch."""
+        small_field = strengths_from_predictions([1, 2, 3], win_probs=[0.5, 0.3, 0.2])
+
+        summaries = simulate_races(np.stack([strengths, small_field]), n_draws=1000)
+
+        assert len(summaries) == 2
+        assert set(summaries[1]["horses"]) == {"1", "2", "3"}
+
+    def test_cached_per_prediction(self, strengths):
+        """Test a repeated prediction returns the cached summary."""
+        first = simulate_race("2025012506010911", strengths, n_draws=1000)
+
+        assert simulate_race("2025012506010911", strengths, n_draws=1000) is first
+
+    def test_exotic_probabilities_from_summary(self, strengths):
+        """Test trifecta frequencies aggregate into valid ticket probabilities."""
+        summary = simulate_race("2025012506010911", strengths, n_draws=5000)
+
+        exotic = simulated_exotic_probabilities(summary)
+
+        assert exotic.trifecta.sum() == pytest.approx(1.0)
+        assert exotic.trio.sum() == pytest.approx(1.0)
+        assert exotic.wide.sum() == pytest.approx(3.0)
+
+    def test_top_exotic_combinations(self, strengths):
+        """Test the summary keeps the most likely combinations of every ticket type."""
+        summary = simulate_races(strengths, n_draws=5000, seed=2)[0]
+        exotic = simulated_exotic_probabilities(summary)
+
+        for ticket_type, entries in summary["exotic"].items():
+            probabilities = [entry["probability"] for entry in entries]
+            assert probabilities == sorted(probabilities, reverse=True)
+            best = entries[0]["numbers"]
+            assert exotic.ticket(ticket_type)[tuple(n - 1 for n in best)] == pytest.approx(
+                probabilities[0], abs=1e-4
+            )
+        # Unordered tickets are reported in ascending horse numbers
+        assert all(e["numbers"] == sorted(e["numbers"]) for e in summary["exotic"]["trio"])
+
+    def test_day_simulated_in_one_batch(self, strengths, monkeypatch):
+        """Test uncached races of a day are simulated together, cached ones skipped."""
+        small_field = strengths_from_predictions([1, 2, 3], win_probs=[0.5, 0.3, 0.2])
+        cached = simulate_race("2025012506010901", small_field, n_draws=500)
+        calls = []
+
+        def counting_simulate_races(batch, **kwargs):
+            calls.append(len(batch))
+            return simulate_races(batch, **kwargs)
+
+        monkeypatch.setattr(simulation, "simulate_races", counting_simulate_races)
+        summaries = simulate_day(
+            ["2025012506010901", "2025012506010902", "2025012506010903"],
+            np.stack([small_field, strengths, strengths[::-1]]),
+            n_draws=500,
+        )
+
+        assert calls == [2]
+        assert summaries[0] is cached
+        assert set(summaries[1]["horses"]) == {str(i) for i in range(1, 9)}
+        assert set(summaries[2]["horses"]) == {str(i) for i in range(11, 19)}
+
+
+class TestPredictionSimulation:
+    """Test the simulation returned with a prediction."""
+
+    def test_attached_with_quinella_and_place_models(self):
+        """Test the simulation is attached even when quinella/place models gave output."""
+        race_data = {
+            "race": {"race_code": "2025012506010911", "kaisai_nen": "2025"},
+            "horses": [{"umaban": f"{i:02d}", "bamei": f"Horse{i}"} for i in range(1, 6)],
+        }
+        win_probs = [0.35, 0.25, 0.2, 0.12, 0.08]
+        ml_scores = {
+            str(i): {
+                "rank_score": float(i),
+                "win_probability": p,
+                "quinella_probability": min(1.0, p * 1.8),
+                "place_probability": min(1.0, p * 2.5),
+            }
+            for i, p in enumerate(win_probs, start=1)
+        }
+
+        ml_result = generate_ml_only_prediction(race_data, ml_scores)
+        result = convert_to_prediction_response(race_data, ml_result, is_final=False)
+
+        first = ml_result["ranked_horses"][0]
+        # The direct quinella/place split is kept for the 2nd/3rd estimate
+        assert first["position_distribution"]["second"] == pytest.approx(0.35 * 0.8, abs=1e-4)
+        simulated = result.prediction_result.simulation
+        assert simulated is not None
+        assert [h.horse_number for h in simulated.horses][0] == 1
+        assert all(h.win_ci_lower <= h.win_probability <= h.win_ci_upper for h in simulated.horses)
+        assert {e.bet_type for e in simulated.exotic_probabilities} == {
+            "quinella",
+            "exacta",
+            "wide",
+            "trio",
+            "trifecta",
+        }
@@ -0,0 +1,104 @@
+"""
+Unit tests for the SQL query profiler.
+
+Tests origin tagging, statement fingerprints, plan-based index suggestions
+and report aggregation.
+"""
+
+from src.db import profiler
+
+SEQ_SCAN_PLAN = [
+    {
+        "Plan": {
+            "Node Type": "Hash Join",
+            "Actual Rows": 120,
+            "Actual Loops": 1,
+            "Plans": [
+                {
+                    "Node Type": "Seq Scan",
+                    "Relation Name": "umagoto_race_joho",
+                    "Filter": (
+                        "((data_kubun = '7'::bpchar) AND ((kaisai_nen)::integer >= 2020) "
+                        "AND (ketto_toroku_bango = ANY ('{2019100001}'::text[])))"
+                    ),
+                    "Rows Removed by Filter": 2400000,
+                    "Actual Rows": 120,
+                    "Actual Loops": 1,
+                },
+                {"Node Type": "Sort", "Sort Space Type": "Disk", "Sort Space Used": 20480},
+            ],
+        },
+        "Execution Time": 812.5,
+    }
+]
+
+
+class TestOrigin:
+    """Test query origin tagging."""
+
+    def test_origin_is_first_src_frame(self):
+        """Test the issuing src function is found through plumbing frames."""
+        namespace = {"__name__": "src.models.feature_extractor.db_queries", "profiler": profiler}
+        exec("def get_zenso_batch():\n    return profiler.query_origin()\n", namespace)
+        assert namespace["get_zenso_batch"]() == "db_queries.get_zenso_batch"
+
+    def test_unknown_outside_src(self):
+        """Test statements issued outside src are tagged unknown."""
+        assert profiler.query_origin() == "unknown"
+
+
+class TestStatements:
+    """Test statement normalization."""
+
+    def test_fingerprint_ignores_literals_and_whitespace(self):
+        """Test statements differing only in literals share a fingerprint."""
+        a = "SELECT *  FROM race_shosai\n WHERE kaisai_nen = '2024' AND kyori > 1600"
+        b = "SELECT * FROM race_shosai WHERE kaisai_nen = '2023' AND kyori > 2000"
+        assert profiler.fingerprint(a) == profiler.fingerprint(b)
+        assert profiler.normalize_sql(a).endswith("kaisai_nen = ? AND kyori > ?")
+
+    def test_only_read_queries_are_explained(self):
+        """Test EXPLAIN ANALYZE is limited to read-only statements."""
+        assert profiler.is_explainable("WITH r AS (SELECT 1) SELECT * FROM r")
+        assert not profiler.is_explainable("INSERT INTO predictions VALUES (1)")
+        assert not profiler.is_explainable("WITH d AS (DELETE FROM t RETURNING *) SELECT * FROM d")
+
+
+class TestReport:
+    """Test aggregation and suggestions."""
+
+    def test_recommend_index_for_filtered_seq_scan(self):
+        """Test filter columns become an index (equality first) and disk sorts a note."""
+        suggestions = profiler.recommend(SEQ_SCAN_PLAN)
+        assert suggestions[0] == (
+            "CREATE INDEX IF NOT EXISTS "
+            "idx_umagoto_race_joho_data_kubun_ketto_toroku_bango_kaisai_nen_integer "
+            "ON umagoto_race_joho (data_kubun, ketto_toroku_bango, (kaisai_nen::integer));"
+        )
+        assert "work_mem" in suggestions[1]
+
+    def test_existing_index_suppresses_suggestion(self):
+        """Test suggestions led by an indexed column are dropped."""
+        statement = profiler.recommend(SEQ_SCAN_PLAN)[0]
+        assert profiler._already_indexed(statement, {"umagoto_race_joho": ["data_kubun"]})
+        assert not profiler._already_indexed(statement, {"umagoto_race_joho": ["bamei"]})
+
+    def test_summarize_orders_by_total_time(self):
+        """Test grouping by origin and shape with the slowest plan kept."""
+        records = [
+            {"origin": "a.f", "fingerprint": "x", "duration_ms": 10.0, "rows": 1, "sql": "q"},
+            {"origin": "a.f", "fingerprint": "x", "duration_ms": 30.0, "rows": 2, "sql": "q"},
+            {
+                "origin": "b.g",
+                "fingerprint": "y",
+                "duration_ms": 900.0,
+                "rows": 5,
+                "sql": "r",
+                "plan": SEQ_SCAN_PLAN,
+            },
+        ]
+        summary = profiler.summarize(records)
+        assert [s["origin"] for s in summary] == ["b.g", "a.f"]
+        assert summary[1]["calls"] == 2
+        assert summary[1]["total_ms"] == 40.0
+        assert summary[0]["plan"] is SEQ_SCAN_PLAN
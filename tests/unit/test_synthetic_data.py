@@ -0,0 +1,87 @@
+"""
+Unit tests for the benchmark data generator and harness.
+
+Tests determinism, JRA-VAN code formats and baseline comparison.
+"""
+
+import pandas as pd
+
+from tests.benchmarks.harness import BenchmarkResult, compare, latency_summary
+from tests.benchmarks.synthetic_data import generate, wakuban_for_field
+
+
+class TestSyntheticData:
+    """Test synthetic dataset generation."""
+
+    def test_same_seed_same_tables(self):
+        """Test generation is deterministic for a seed."""
+        first = generate("day", seed=7)
+        second = generate("day", seed=7)
+        for name, df in first.tables.items():
+            pd.testing.assert_frame_equal(df, second.tables[name])
+
+    def test_race_codes_and_results(self):
+        """Test race_code layout and one winner per finalized race."""
+        dataset = generate("day", seed=1)
+        races = dataset.tables["race_shosai"]
+        assert races["race_code"].str.len().eq(16).all()
+        assert (
+            races["race_code"]
+            == races["kaisai_nen"]
+            + races["kaisai_gappi"]
+            + races["keibajo_code"]
+            + races["kaisai_kai"]
+            + races["kaisai_nichime"]
+            + races["race_bango"]
+        ).all()
+
+        entries = dataset.tables["umagoto_race_joho"]
+        finalized = entries[entries["data_kubun"] == "7"]
+        winners = finalized[finalized["kakutei_chakujun"] == "01"]
+        assert winners["race_code"].is_unique
+        assert set(winners["race_code"]) == set(finalized["race_code"])
+        # The card has no results yet
+        card = entries[entries["data_kubun"] == "2"]
+        assert card["race_code"].nunique() == len(dataset.card_race_codes)
+        assert (card["kakutei_chakujun"] == "00").all()
+
+    def test_wakuban_for_field(self):
+        """Test JRA frame assignment puts extra horses in the outer frames."""
+        assert wakuban_for_field(8).tolist() == [1, 2, 3, 4, 5, 6, 7, 8]
+        assert wakuban_for_field(10).tolist() == [1, 2, 3, 4, 5, 6, 7, 7, 8, 8]
+
+
+class TestHarness:
+    """Test result summaries and baseline comparison."""
+
+    @staticmethod
+    def _result(throughput: float, p95: float, rss: float) -> BenchmarkResult:
+        return BenchmarkResult(
+            name="batch_prediction",
+            unit="race",
+            mode="memory",
+            params={"scale": "day"},
+            throughput=throughput,
+            latency_ms={"p95": p95},
+            peak_rss_mb=rss,
+        )
+
+    def test_latency_summary(self):
+        """Test percentile summary of latencies."""
+        summary = latency_summary([float(i) for i in range(1, 101)])
+        assert summary["p50"] == 50.5
+        assert summary["max"] == 100.0
+
+    def test_compare_flags_regressions(self):
+        """Test regressions beyond the tolerance are reported."""
+        baseline = {"batch_prediction[memory]": vars(self._result(100.0, 10.0, 300.0))}
+
+        assert compare([self._result(90.0, 11.0, 320.0)], baseline, tolerance=0.2) == []
+        regressions = compare([self._result(70.0, 13.0, 400.0)], baseline, tolerance=0.2)
+        assert len(regressions) == 3
+
+    def test_compare_skips_other_params(self):
+        """Test results at a different scale are not compared."""
+        base = vars(self._result(100.0, 10.0, 300.0)) | {"params": {"scale": "season"}}
+        results = [self._result(10.0, 100.0, 900.0)]
+        assert compare(results, {"batch_prediction[memory]": base}) == []